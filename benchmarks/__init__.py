@@ -0,0 +1 @@
+"""Benchmark offline CineBot (tanpa jaringan). Jalankan dari root repo: `python -m benchmarks.<nama>`."""
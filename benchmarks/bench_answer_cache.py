@@ -0,0 +1,150 @@
+"""
+Benchmark & cek perilaku cache jawaban (`cinebot.answer_cache`).
+
+- Embedder palsu `BlindEmbeddings`: bag-of-words `HashEmbeddings` yang buta terhadap angka dan nama
+  (seperti embedding sungguhan, "top 5 film terbaik 2018" dan "top 10 film terbaik 2019" ber-cosine ~1).
+- Kasus: hit exact (kapitalisasi/tanda baca berbeda), hit similar (parafrase), pertanyaan nyaris sama
+  dengan angka/tahun/filter/nama berbeda (harus miss, tercatat di `signature_rejects`), TTL, dan isolasi
+  konteks history (pertanyaan sama setelah pertanyaan sebelumnya yang berbeda -> miss).
+- Nama sutradara/pemeran/judul diambil dari `Router.entities` (kamus dari `movies.db` sementara).
+- Latensi lookup (exact / similar / miss) dengan cache berisi `--entries` entri.
+
+Contoh: python -m benchmarks.bench_answer_cache --entries 512
+"""
+import argparse
+import os
+import re
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_retrieval import percentile
+from benchmarks.data import load_movies
+from benchmarks.fakes import HashEmbeddings
+from cinebot.answer_cache import AnswerCache
+from cinebot.chat import TurnResult
+from cinebot.ingest import write_sql_database
+from cinebot.router import Router
+
+BLIND_NAMES = {"christopher", "nolan", "steven", "spielberg", "inception", "interstellar", "tom", "hanks",
+               "leonardo", "dicaprio"}
+# Parafrase yang hanya berbeda kata pengisi (tanpa angka/nama) -> embedding sangat dekat
+PARAPHRASE_WORDS = {"rekomendasi", "dong", "kasih", "tau", "yang", "apa", "aja", "saja", "please"}
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BlindEmbeddings(HashEmbeddings):
+    """HashEmbeddings tanpa angka, nama (`BLIND_NAMES`), dan kata pengisi; menghitung panggilan."""
+
+    def _embed(self, text):
+        tokens = [t for t in _WORD_RE.findall(text.casefold())
+                  if not t.isdigit() and t not in BLIND_NAMES and t not in PARAPHRASE_WORDS]
+        return super()._embed(" ".join(tokens))
+
+
+def turn(answer):
+    return TurnResult(answer=answer, tool_output='{"type": "movies", "movies": []}')
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+# (pertanyaan tersimpan, pertanyaan baru, tier yang diharapkan: "exact" / "similar" / None)
+CASES = [
+    ("Top 5 film terbaik 2018", "top 5 film terbaik 2018?", "exact"),
+    ("Top 5 film terbaik 2018", "Rekomendasi top 5 film terbaik 2018 dong", "similar"),
+    ("film mirip Inception", "kasih tau film yang mirip Inception", "similar"),
+    ("Top 5 film terbaik 2018", "top 10 film terbaik 2019", None),
+    ("Top 5 film terbaik 2018", "top 5 film terbaik 2019", None),
+    ("film horor terbaik setelah 2000", "film horor terbaik sebelum 2000", None),
+    ("film komedi rating di atas 8", "film komedi rating di atas 7", None),
+    ("Daftar film Christopher Nolan", "daftar film Steven Spielberg", None),
+    ("film mirip Inception", "film mirip Interstellar", None),
+    ("semua film Tom Hanks", "semua film Leonardo DiCaprio", None),
+]
+
+
+def check_cases(cache, embeddings):
+    failures = 0
+    print(f"{'tersimpan':<34} {'pertanyaan baru':<42} {'hasil':<8}")
+    for stored, asked, expected in CASES:
+        cache.clear()
+        cache.store(stored, [], turn(f"jawaban untuk '{stored}'"))
+        calls = embeddings.query_calls
+        result, tier = cache.lookup(asked, [])
+        ok = tier == expected and (result is None or result.answer == f"jawaban untuk '{stored}'")
+        # Tier exact tidak perlu embedding
+        ok = ok and (expected != "exact" or embeddings.query_calls == calls)
+        failures += not ok
+        print(f"{stored:<34} {asked:<42} {tier or 'miss':<8} {'OK' if ok else 'ERR (harapan ' + str(expected) + ')'}")
+    return failures
+
+
+def check_history(cache):
+    """Jawaban dipakai ulang hanya jika pertanyaan user sebelumnya (konteks) sama."""
+    cache.clear()
+    question = "yang kedua tahun berapa?"
+    cache.store(question, [user("Top 5 film terbaik 2018")], turn("2018"))
+    same, _ = cache.lookup(question, [user("top 5 film terbaik 2018"), {"role": "assistant", "content": "..."}])
+    other, _ = cache.lookup(question, [user("Daftar film Christopher Nolan")])
+    fresh, _ = cache.lookup(question, [])
+    ok = same is not None and other is None and fresh is None
+    print(f"\nIsolasi history: konteks sama -> {'hit' if same else 'miss'}, konteks lain -> "
+          f"{'hit' if other else 'miss'}, tanpa history -> {'hit' if fresh else 'miss'} {'OK' if ok else 'ERR'}")
+    return not ok
+
+
+def check_ttl(embeddings, entities):
+    cache = AnswerCache(embeddings, ttl=0.2, entities=entities)
+    cache.store("Top 5 film terbaik 2018", [], turn("a"))
+    before = cache.lookup("top 5 film terbaik 2018", [])[1], cache.lookup("Rekomendasi top 5 film terbaik 2018", [])[1]
+    time.sleep(0.25)
+    after = cache.lookup("top 5 film terbaik 2018", [])[1], cache.lookup("Rekomendasi top 5 film terbaik 2018", [])[1]
+    ok = before == ("exact", "similar") and after == (None, None) and cache.stats()["entries"] == 0
+    print(f"TTL 0.2s: sebelum kedaluwarsa {before}, sesudah {after} {'OK' if ok else 'ERR'}")
+    return not ok
+
+
+def lookup_latency(embeddings, entities, entries, repeat):
+    cache = AnswerCache(embeddings, max_entries=entries, entities=entities)
+    for i in range(entries):
+        cache.store(f"top {i % 50 + 1} film terbaik tahun {1950 + i % 70} genre {i}", [], turn(str(i)))
+    cache.store("Daftar film Christopher Nolan", [], turn("nolan"))
+    timings = {"exact": [], "similar": [], "miss": []}
+    questions = {"exact": "daftar film christopher nolan", "similar": "kasih tau daftar film Christopher Nolan",
+                 "miss": "daftar film Steven Spielberg"}
+    for _ in range(repeat):
+        for name, question in questions.items():
+            started = time.perf_counter()
+            _, tier = cache.lookup(question, [])
+            timings[name].append((time.perf_counter() - started) * 1000)
+            assert (tier or "miss") == name, (name, tier)
+    print(f"\nLatensi lookup ({entries} entri, tanpa latensi embedding):")
+    for name, values in timings.items():
+        print(f"  {name:<8} mean={statistics.mean(values):.3f}ms p95={percentile(values, 95):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(load_movies(), db_path, None, True)
+        router = Router.from_sqlite(db_path)
+
+    embeddings = BlindEmbeddings()
+    cache = AnswerCache(embeddings, entities=router.entities)
+    failures = check_cases(cache, embeddings)
+    failures += check_history(cache)
+    failures += check_ttl(embeddings, router.entities)
+    print(f"stats(): {cache.stats()}")
+    assert not failures, f"{failures} kasus gagal"
+    lookup_latency(embeddings, router.entities, args.entries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
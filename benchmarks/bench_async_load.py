@@ -0,0 +1,185 @@
+"""
+Load test jalur request: sync (thread per turn) vs async (`cinebot.async_runtime.AsyncRunner`).
+
+- Backend di-stub (offline): FakeToolChatModel dengan latensi tetap per panggilan LLM, tool stub
+  dengan nama yang sama dengan tool CineBot; latensi tool = embedding (HashEmbeddings) + retrieval/SQL
+  (sleep). Versi async memakai `asyncio.sleep`, jadi yang diukur hanya cara menunggu I/O.
+- Setiap level konkurensi C: C sesi bersamaan, masing-masing mengirim `--turns` pertanyaan berurutan.
+  * sync : `run_agent_turn` di ThreadPoolExecutor berukuran `--sync-workers` (thread blocking)
+  * async: `arun_agent_turn` di satu event loop, dibatasi `--max-concurrency` dan `--timeout`
+- Laporan: throughput (turn/detik), latensi p50/p95 per turn (termasuk waktu antre), peak in-flight,
+  jumlah timeout/error, dan p95 async relatif terhadap level terkecil (baseline).
+- `--check`: exit code 1 jika p95 async di level <= `--max-concurrency` melebihi baseline x `--tolerance`.
+  Level di atas batas tidak dicek: turn antre di semaphore, jadi p95 memang naik (kira-kira
+  ceil(sesi / batas) x latensi turn) — ini perilaku `CINEBOT_MAX_CONCURRENT_TURNS` yang disengaja.
+  Toleransi default 1.75x: semua sesi datang serentak dan CPU graph agent dijalankan satu event loop, jadi
+  di mesin 1 core p95 di 32-64 sesi terukur ~1.3-1.5x baseline walau tidak ada turn yang antre.
+
+Contoh: python -m benchmarks.bench_async_load --levels 8 32 64 128 --llm-latency 0.2 --check
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+
+from benchmarks.bench_retrieval import percentile
+from benchmarks.bench_router import STUB_RAG_OUTPUT, STUB_SQL_OUTPUT
+from benchmarks.fakes import FakeToolChatModel, HashEmbeddings
+from cinebot.async_runtime import AsyncRunner
+from cinebot.chat import arun_agent_turn, run_agent_turn, to_langchain_messages
+
+QUESTIONS = [
+    "Rekomendasi film yang mirip Inception",
+    "Cari film tentang perjalanan waktu",
+    "Apa 5 film dengan pendapatan (gross) tertinggi?",
+    "Kasih tau daftar film dari Christopher Nolan",
+]
+
+
+def build_stub_tools(embeddings, tool_latency):
+    """Tool stub sync + async (coroutine) seperti `cinebot.tools`."""
+
+    @tool
+    def get_movie_recommendations(question: str) -> str:
+        """Stub tool RAG (benchmark)."""
+        embeddings.embed_query(question)
+        time.sleep(tool_latency)
+        return STUB_RAG_OUTPUT
+
+    @tool
+    def get_factual_movie_data(question: str) -> str:
+        """Stub tool SQL (benchmark)."""
+        time.sleep(tool_latency)
+        return STUB_SQL_OUTPUT
+
+    async def _aget_movie_recommendations(question: str) -> str:
+        await embeddings.aembed_query(question)
+        await asyncio.sleep(tool_latency)
+        return STUB_RAG_OUTPUT
+
+    async def _aget_factual_movie_data(question: str) -> str:
+        await asyncio.sleep(tool_latency)
+        return STUB_SQL_OUTPUT
+
+    get_movie_recommendations.coroutine = _aget_movie_recommendations
+    get_factual_movie_data.coroutine = _aget_factual_movie_data
+    return [get_movie_recommendations, get_factual_movie_data]
+
+
+def session_messages(session, turn):
+    question = QUESTIONS[(session + turn) % len(QUESTIONS)]
+    return to_langchain_messages([{"role": "user", "content": question}])
+
+
+def run_sync(agent, sessions, turns, workers):
+    latencies = []
+
+    def one_session(session, arrived):
+        # Turn pertama dihitung sejak sesi datang (termasuk antre menunggu thread kosong)
+        t0 = arrived
+        for turn in range(turns):
+            run_agent_turn(agent, session_messages(session, turn))
+            latencies.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+
+    peak = min(sessions, workers)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(one_session, s, time.perf_counter()) for s in range(sessions)]:
+            future.result()
+    return latencies, time.perf_counter() - started, {"peak_in_flight": peak, "timeouts": 0, "errors": 0}
+
+
+def run_async(agent, sessions, turns, max_concurrency, timeout):
+    runner = AsyncRunner(max_concurrency, timeout)
+    latencies = []
+
+    async def one_session(session):
+        for turn in range(turns):
+            t0 = time.perf_counter()
+            try:
+                await runner.guarded(arun_agent_turn(agent, session_messages(session, turn)))
+            except Exception:
+                continue  # dihitung di runner.stats
+            latencies.append(time.perf_counter() - t0)
+
+    async def all_sessions():
+        await asyncio.gather(*(one_session(s) for s in range(sessions)))
+
+    try:
+        started = time.perf_counter()
+        asyncio.run_coroutine_threadsafe(all_sessions(), runner.loop).result()
+        return latencies, time.perf_counter() - started, runner.snapshot()
+    finally:
+        runner.close()
+
+
+def report(name, latencies, elapsed, stats):
+    """Cetak satu baris hasil; kembalikan p95 (ms)."""
+    ms = [t * 1000 for t in latencies] or [0.0]
+    p95 = percentile(ms, 95)
+    print(f"  {name:<5} throughput={len(latencies) / elapsed:7.1f} turn/s  "
+          f"p50={statistics.median(ms):7.1f}ms p95={p95:7.1f}ms  "
+          f"peak_in_flight={stats['peak_in_flight']} timeouts={stats['timeouts']} errors={stats['errors']}")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[8, 32, 64, 128], help="Jumlah sesi bersamaan.")
+    parser.add_argument("--turns", type=int, default=3, help="Pertanyaan berurutan per sesi.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Detik per panggilan LLM (simulasi).")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Detik per panggilan tool (simulasi).")
+    parser.add_argument("--sync-workers", type=int, default=16, help="Ukuran thread pool jalur sync.")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="CINEBOT_MAX_CONCURRENT_TURNS.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="CINEBOT_REQUEST_TIMEOUT (detik).")
+    parser.add_argument("--tolerance", type=float, default=1.75,
+                        help="Kenaikan p95 async maksimum terhadap baseline (level terkecil) untuk --check.")
+    parser.add_argument("--check", action="store_true",
+                        help="Gagal (exit 1) jika p95 async naik melebihi toleransi selama sesi <= --max-concurrency.")
+    args = parser.parse_args()
+
+    embeddings = HashEmbeddings(latency=args.tool_latency / 2)
+    llm = FakeToolChatModel(latency=args.llm_latency)
+    agent = create_agent(llm, build_stub_tools(embeddings, args.tool_latency))
+
+    # Warm-up (kompilasi graph, import lazy) agar tidak masuk ke pengukuran
+    run_agent_turn(agent, session_messages(0, 0))
+
+    ideal = 2 * args.llm_latency + args.tool_latency
+    print(f"Latensi ideal per turn (2 LLM + 1 tool): {ideal * 1000:.0f}ms | sync workers={args.sync_workers} "
+          f"| async max_concurrency={args.max_concurrency}\n")
+    p95 = {}
+    for level in sorted(args.levels):
+        print(f"== {level} sesi x {args.turns} turn")
+        report("sync", *run_sync(agent, level, args.turns, args.sync_workers))
+        p95[level] = report("async", *run_async(agent, level, args.turns, args.max_concurrency, args.timeout))
+
+    baseline_level = min(p95)
+    print(f"\np95 async relatif terhadap {baseline_level} sesi (toleransi {args.tolerance:g}x "
+          f"sampai {args.max_concurrency} sesi):")
+    failures = []
+    for level, value in p95.items():
+        ratio = value / p95[baseline_level]
+        if level > args.max_concurrency:
+            verdict = "di atas batas konkurensi: antre di semaphore, tidak dicek"
+        elif ratio <= args.tolerance:
+            verdict = "OK"
+        else:
+            verdict = "ERR"
+            failures.append(f"{level} sesi: p95 {value:.0f}ms = {ratio:.2f}x baseline")
+        print(f"  {level:>4} sesi  p95={value:7.1f}ms  {ratio:5.2f}x  {verdict}")
+    if args.check:
+        if failures:
+            print("\nCEK GAGAL:\n  - " + "\n  - ".join(failures))
+            sys.exit(1)
+        print("\nCek lolos: p95 async stabil selama sesi bersamaan <= batas konkurensi.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark profil koleksi Qdrant: recall@k terhadap exact search, latensi, dan memori per profil.
+
+- Default memakai Qdrant local mode (offline). Local mode selalu melakukan brute-force search, sehingga
+  HNSW/quantization tidak berpengaruh di sana (recall = 1.0); angka memori yang dilaporkan adalah
+  perkiraan RAM vektor per profil + alokasi Python terukur (tracemalloc) saat mengisi koleksi.
+- Berikan --qdrant-url (mis. Qdrant lokal via Docker) untuk mengukur HNSW & quantization sungguhan;
+  koleksi sementara `bench_profile_<nama>` dibuat lalu dihapus.
+
+Contoh: python -m benchmarks.bench_collection_profiles --scale 3 --queries 100
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from qdrant_client import QdrantClient, models
+
+from benchmarks.bench_ingest import scaled_dataframe
+from benchmarks.bench_retrieval import SAMPLE_QUESTIONS, percentile
+from benchmarks.data import load_movies
+from benchmarks.fakes import HashEmbeddings
+from cinebot.collection_profile import PROFILES, create_collection
+from cinebot.ingest import records_from_dataframe
+
+
+def wait_until_indexed(client, name, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-api-key", default=None)
+    args = parser.parse_args()
+
+    df = scaled_dataframe(load_movies(), args.scale)
+    records = records_from_dataframe(df)
+    embeddings = HashEmbeddings(size=args.dim)
+    vectors = embeddings.embed_documents([r.text for r in records])
+    questions = SAMPLE_QUESTIONS + df["Overview"].sample(
+        n=max(0, args.queries - len(SAMPLE_QUESTIONS)), random_state=1).tolist()
+    query_vectors = [embeddings.embed_query(q) for q in questions]
+
+    mode = f"server {args.qdrant_url}" if args.qdrant_url else "local mode (brute-force)"
+    print(f"{len(records)} vektor dim={args.dim}, {len(query_vectors)} query, recall@{args.k} — {mode}\n")
+    print(f"{'profil':<14}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'exact p50':>11}{'RAM vektor':>12}{'py alloc':>10}")
+
+    for name in args.profiles.split(","):
+        profile = PROFILES[name]
+        collection = f"bench_profile_{name}"
+        client = QdrantClient(url=args.qdrant_url, api_key=args.qdrant_api_key) if args.qdrant_url else QdrantClient(":memory:")
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+
+        tracemalloc.start()
+        create_collection(client, collection, profile, args.dim)
+        for start in range(0, len(records), 256):
+            client.upsert(collection, wait=True, points=[
+                models.PointStruct(id=r.point_id, vector=v, payload={"title": r.metadata["title"]})
+                for r, v in zip(records[start:start + 256], vectors[start:start + 256])
+            ])
+        _, py_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if args.qdrant_url:
+            wait_until_indexed(client, collection)
+
+        approx_times, exact_times, hits = [], [], 0
+        for vector in query_vectors:
+            start = time.perf_counter()
+            approx = client.query_points(collection, query=vector, limit=args.k,
+                                         search_params=profile.search_params()).points
+            approx_times.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            exact = client.query_points(collection, query=vector, limit=args.k,
+                                        search_params=models.SearchParams(exact=True)).points
+            exact_times.append((time.perf_counter() - start) * 1000)
+            hits += len({p.id for p in approx} & {p.id for p in exact})
+
+        recall = hits / (len(query_vectors) * args.k)
+        ram_mb = profile.estimated_ram_bytes(len(records), args.dim) / 1e6
+        print(f"{profile.label:<14}{recall:>8.3f}{percentile(approx_times, 50):>9.2f}"
+              f"{percentile(approx_times, 95):>9.2f}{statistics.median(exact_times):>11.2f}"
+              f"{ram_mb:>10.1f}MB{py_peak / 1e6:>8.1f}MB")
+        if args.qdrant_url:
+            client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark & cek perilaku cache embedding pertanyaan (`cinebot.embedding_cache`).
+
+- Upstream = `HashEmbeddings` (menghitung panggilan `embed_query`, latensi `--embed-latency`).
+- Kasus: hit memori, kunci ternormalisasi (kapitalisasi/spasi/tanda baca), hit disk lintas instance
+  (restart / worker lain), TTL di kedua tier, pemangkasan tier disk (`max_rows`, saat start dan setiap
+  `prune_every` penulisan), dan file cache yang rusak/terkunci (miss + `disk_errors`, tool tidak gagal).
+- Latensi embed_query per tier: hit memori, hit disk, miss (upstream).
+
+Contoh: python -m benchmarks.bench_embedding_cache --embed-latency 0.1
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import HashEmbeddings
+from cinebot.embedding_cache import CachedEmbeddings, SQLiteVectorStore
+
+MODEL = "hash"
+
+
+def cached(upstream, db_path, **kwargs):
+    return CachedEmbeddings(upstream, MODEL, db_path=db_path, log=lambda message: None, **kwargs)
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'OK ' if ok else 'ERR'}] {name:<44} {detail}")
+    return not ok
+
+
+def behaviour(tmp):
+    failures = 0
+    db_path = os.path.join(tmp, "behaviour.sqlite")
+    upstream = HashEmbeddings()
+    cache = cached(upstream, db_path)
+
+    first = cache.embed_query("Film tentang perjalanan waktu")
+    cache.embed_query("Film tentang perjalanan waktu")
+    failures += check("hit memori", upstream.query_calls == 1 and cache.memory_hits == 1,
+                      f"upstream={upstream.query_calls}")
+    same = cache.embed_query("  film tentang   PERJALANAN waktu?")
+    failures += check("kunci ternormalisasi", upstream.query_calls == 1 and same == first,
+                      f"upstream={upstream.query_calls}")
+
+    # Instance baru (restart / worker Streamlit lain) membaca tier disk yang sama
+    restarted = cached(upstream, db_path)
+    vector = restarted.embed_query("film tentang perjalanan waktu")
+    failures += check("hit disk lintas instance", upstream.query_calls == 1 and restarted.disk_hits == 1
+                      and vector == first, f"stats={restarted.stats()}")
+    restarted.embed_query("film tentang perjalanan waktu")
+    failures += check("hit disk dinaikkan ke memori", restarted.memory_hits == 1 and restarted.disk_hits == 1)
+
+    # TTL: entri kedaluwarsa tidak dipakai dari memori maupun disk, lalu dipangkas saat start
+    ttl_path = os.path.join(tmp, "ttl.sqlite")
+    short = cached(upstream, ttl_path, ttl=0.2)
+    short.embed_query("film horor")
+    time.sleep(0.25)
+    calls = upstream.query_calls
+    short.embed_query("film horor")
+    failures += check("TTL memori & disk", upstream.query_calls == calls + 1 and short.misses == 2,
+                      f"miss={short.misses}")
+    time.sleep(0.25)
+    store = SQLiteVectorStore(ttl_path, ttl=0.2)
+    failures += check("entri kedaluwarsa dipangkas saat start", len(store) == 0, f"baris={len(store)}")
+
+    # Batas baris: yang tertua dibuang setiap `prune_every` penulisan
+    capped_path = os.path.join(tmp, "capped.sqlite")
+    capped = cached(HashEmbeddings(), capped_path, max_disk_rows=50)
+    capped.disk.prune_every = 20
+    for i in range(500):
+        capped.embed_query(f"pertanyaan nomor {i}")
+    rows = len(capped.disk)
+    newest_kept = capped.disk.get(capped._key("pertanyaan nomor 499")) is not None
+    oldest_dropped = capped.disk.get(capped._key("pertanyaan nomor 0")) is None
+    failures += check("tier disk dibatasi max_rows", rows <= 50 + 20 and newest_kept and oldest_dropped,
+                      f"baris={rows} dari 500 penulisan")
+
+    # File rusak: tier disk dinonaktifkan, embedding tetap jalan
+    corrupt_path = os.path.join(tmp, "corrupt.sqlite")
+    with open(corrupt_path, "wb") as f:
+        f.write(b"bukan database sqlite" * 100)
+    corrupt_upstream = HashEmbeddings()
+    corrupt = cached(corrupt_upstream, corrupt_path)
+    corrupt.embed_query("film perang")
+    corrupt.embed_query("film perang")
+    failures += check("file rusak -> tanpa tier disk", corrupt.disk is None and corrupt_upstream.query_calls == 1
+                      and corrupt.memory_hits == 1)
+
+    # Tabel hilang / DB terkunci saat dibaca: dihitung miss + disk_errors, bukan exception di tool
+    broken_path = os.path.join(tmp, "broken.sqlite")
+    broken_upstream = HashEmbeddings()
+    broken = cached(broken_upstream, broken_path)
+    other = sqlite3.connect(broken_path)
+    other.execute("DROP TABLE embeddings")
+    other.commit()
+    other.close()
+    try:
+        broken.embed_query("film animasi")
+        ok = broken_upstream.query_calls == 1 and broken.disk_errors >= 1 and broken.misses == 1
+    except sqlite3.Error as e:
+        ok = False
+        print(f"    exception: {e}")
+    failures += check("error baca disk -> miss", ok, f"stats={broken.stats()}")
+    return failures
+
+
+def latency(tmp, args):
+    upstream = HashEmbeddings(size=1536, latency=args.embed_latency)
+    db_path = os.path.join(tmp, "latency.sqlite")
+    questions = [f"film tentang topik {i}" for i in range(args.questions)]
+    timings = {"miss": [], "disk": [], "memori": []}
+    writer = cached(upstream, db_path)
+    for question in questions:
+        started = time.perf_counter()
+        writer.embed_query(question)
+        timings["miss"].append(time.perf_counter() - started)
+    reader = cached(upstream, db_path)
+    for name in ("disk", "memori"):
+        for question in questions:
+            started = time.perf_counter()
+            reader.embed_query(question)
+            timings[name].append(time.perf_counter() - started)
+    print(f"\nLatensi embed_query ({args.questions} pertanyaan, upstream {args.embed_latency * 1000:.0f}ms, 1536 dimensi):")
+    for name, values in timings.items():
+        ms = [v * 1000 for v in values]
+        print(f"  {name:<7} mean={statistics.mean(ms):.3f}ms maks={max(ms):.3f}ms")
+    print(f"  stats(): {reader.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="Detik per embedding upstream (simulasi).")
+    parser.add_argument("--questions", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Perilaku:")
+        failures = behaviour(tmp)
+        assert not failures, f"{failures} kasus gagal"
+        latency(tmp, args)
+
+
+if __name__ == "__main__":
+    main()
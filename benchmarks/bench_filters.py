@@ -0,0 +1,167 @@
+"""
+Benchmark filter metadata untuk tool rekomendasi: filter native Qdrant vs tanpa filter vs over-fetch.
+
+- Koleksi diisi lewat `sync_collection` (payload sama dengan setup.py: genre sebagai array keyword)
+  memakai HashEmbeddings (offline) di Qdrant local mode (":memory:"), atau server via --qdrant-url
+  (payload index dibuat oleh `ensure_payload_indexes`; koleksi sementara dihapus di akhir).
+- Batasan diambil dari pertanyaan dengan `extract_filters`; parsing dicek dulu terhadap `PARSE_CASES`
+  (angka di dalam bilangan lain, skala "/10", batas rating ketat vs inklusif, rentang rating, dekade).
+- Kebenaran dibandingkan dengan top-k exact (brute force NumPy atas baris yang lolos filter):
+  * native   : satu pencarian dengan `Filter` Qdrant
+  * none     : similarity search murni (perilaku lama) -> berapa hasil yang melanggar batasan
+  * overfetch: ambil k * faktor lalu filter di Python -> recall bisa turun jika faktor kurang
+  Latensi native di local mode tidak representatif (tanpa payload index, filter dievaluasi di Python);
+  ukur latensi dengan --qdrant-url.
+
+Contoh: python -m benchmarks.bench_filters --k 3 --overfetch 5
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from langchain_qdrant import QdrantVectorStore
+
+from benchmarks.bench_retrieval import percentile
+from benchmarks.data import load_movies
+from benchmarks.fakes import HashEmbeddings
+from cinebot.ingest import records_from_dataframe, sync_collection
+from cinebot.query_filters import MovieFilters, extract_filters
+
+COLLECTION = "bench_filters"
+FILTERED_QUESTIONS = [
+    "film sci-fi tentang perjalanan waktu setelah 2000 dengan rating di atas 8",
+    "film horor tahun 80-an yang bikin merinding",
+    "komedi sebelum 1980 rating minimal 8",
+    "film animasi sejak 2010 tentang persahabatan",
+    "film thriller antara 1995 dan 2005 tentang detektif",
+    "drama rilis 2019 tentang keluarga",
+    "film western rating 8+",
+    "film perang rating di bawah 8 tentang pengorbanan",
+]
+# (pertanyaan, MovieFilters yang diharapkan)
+PARSE_CASES = [
+    ("film rating imdb 250 terbaik", MovieFilters()),
+    ("film dengan skor 10/10", MovieFilters()),
+    ("film rating 8/10 tentang balas dendam", MovieFilters(min_rating=8.0)),
+    ("film western rating 8+", MovieFilters(min_rating=8.0, genres=("Western",))),
+    ("film dengan rating di bawah 8", MovieFilters(max_rating=7.9)),
+    ("komedi rating maksimal 7.5", MovieFilters(max_rating=7.5, genres=("Comedy",))),
+    ("rating di atas 8,5 setelah 2000", MovieFilters(year_min=2001, min_rating=8.6)),
+    ("film dengan rating di atas 8", MovieFilters(min_rating=8.1)),
+    ("film rating lebih dari 8", MovieFilters(min_rating=8.1)),
+    ("film rating > 8", MovieFilters(min_rating=8.1)),
+    ("film rating >= 8", MovieFilters(min_rating=8.0)),
+    ("film rating minimal 8", MovieFilters(min_rating=8.0)),
+    ("film rating di atas 10", MovieFilters()),
+    ("film rating 7 sampai 9", MovieFilters(min_rating=7.0, max_rating=9.0)),
+    ("rating antara 7,5 dan 8.5 setelah 2000", MovieFilters(year_min=2001, min_rating=7.5, max_rating=8.5)),
+    ("film rating 9-7", MovieFilters(min_rating=7.0, max_rating=9.0)),
+    ("film 2000an tentang mafia", MovieFilters(year_min=2000, year_max=2009)),
+    ("film horor tahun 80-an", MovieFilters(year_min=1980, year_max=1989, genres=("Horror",))),
+]
+
+
+def matches(metadata, filters):
+    year, rating = metadata["year"], metadata["rating"]
+    genres = metadata["genre"] if isinstance(metadata["genre"], list) else [metadata["genre"]]
+    if filters.year_min is not None and year < filters.year_min:
+        return False
+    if filters.year_max is not None and year > filters.year_max:
+        return False
+    if filters.min_rating is not None and rating < filters.min_rating:
+        return False
+    if filters.max_rating is not None and rating > filters.max_rating:
+        return False
+    if filters.genres and not set(filters.genres) & set(genres):
+        return False
+    return True
+
+
+def check_parsing():
+    failures = 0
+    for question, expected in PARSE_CASES:
+        got = extract_filters(question)
+        failures += got != expected
+        print(f"  [{'OK ' if got == expected else 'ERR'}] {question:<45} -> {got.describe() or '-'}")
+    assert not failures, f"{failures} pertanyaan salah diparse"
+    print()
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--overfetch", type=int, default=5, help="Faktor over-fetch (k * faktor).")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-api-key", default=None)
+    args = parser.parse_args()
+
+    check_parsing()
+    embeddings = HashEmbeddings(size=args.dim)
+    records = records_from_dataframe(load_movies())
+    client = QdrantClient(url=args.qdrant_url, api_key=args.qdrant_api_key) if args.qdrant_url else QdrantClient(":memory:")
+    sync = sync_collection(client, COLLECTION, records, embeddings, full=True, embedding_model="hash", log=lambda _: None)
+    print(f"Koleksi berisi {len(records)} film | payload index dibuat: {sync['payload_indexes_created'] or '-'}\n")
+    store = QdrantVectorStore(client=client, collection_name=COLLECTION, embedding=embeddings)
+
+    # Matriks exact untuk ground truth (vektor sama dengan yang ada di koleksi)
+    by_id = {r.point_id: r for r in records}
+    point_ids = list(by_id)
+    matrix = np.asarray(embeddings.embed_documents([by_id[p].text for p in point_ids]), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    totals = {"native": [], "none": [], "overfetch": []}
+    recalls = {"native": [], "none": [], "overfetch": []}
+    violations = 0
+    try:
+        for question in FILTERED_QUESTIONS:
+            filters = extract_filters(question)
+            query = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+            scores = matrix @ (query / np.linalg.norm(query))
+            allowed = [i for i, pid in enumerate(point_ids) if matches(by_id[pid].metadata, filters)]
+            exact = {point_ids[i] for i in sorted(allowed, key=lambda i: -scores[i])[:args.k]}
+
+            runs = {
+                "native": lambda: store.similarity_search(question, k=args.k, filter=filters.to_qdrant()),
+                "none": lambda: store.similarity_search(question, k=args.k),
+                "overfetch": lambda: [
+                    d for d in store.similarity_search(question, k=args.k * args.overfetch)
+                    if matches(d.metadata, filters)
+                ][:args.k],
+            }
+            line = []
+            for name, run in runs.items():
+                docs, _ = timed(run)
+                got = {d.metadata["_id"] for d in docs}
+                recall = len(got & exact) / len(exact) if exact else 1.0
+                recalls[name].append(recall)
+                if name == "none":
+                    violations += sum(not matches(d.metadata, filters) for d in docs)
+                for _ in range(args.repeat):
+                    totals[name].append(timed(run)[1])
+                line.append(f"{name}={recall:.2f}")
+            print(f"[{filters.describe()}] {len(allowed)} film lolos | recall@{args.k}: {' '.join(line)}")
+            print(f"   {question}")
+
+        print()
+        for name, timings in totals.items():
+            ms = [t * 1000 for t in timings]
+            print(f"  {name:<9} recall@{args.k}={statistics.mean(recalls[name]):.3f} "
+                  f"mean={statistics.mean(ms):.3f}ms p95={percentile(ms, 95):.3f}ms")
+        print(f"  hasil tanpa filter yang melanggar batasan: {violations}/{len(FILTERED_QUESTIONS) * args.k}")
+    finally:
+        if args.qdrant_url:
+            client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
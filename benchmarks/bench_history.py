@@ -0,0 +1,96 @@
+"""
+Benchmark compaction riwayat percakapan (`cinebot.history.HistoryManager`).
+
+- Sesi disimulasikan dari dataset: setiap turn user bertanya (sutradara / genre / tema), jawaban asisten
+  meniru format system prompt (opener, tabel Markdown dengan kolom Poster berisi URL Amazon, follow-up).
+- Per turn dilaporkan token prompt history sebelum dan sesudah compaction.
+- Retensi konteks: judul film dari turn paling awal (turn Nolan) harus tetap ada di history yang
+  dikirim, agar perilaku "ATURAN HISTORY" (mengenali pola) tetap bisa berjalan.
+
+Contoh: python -m benchmarks.bench_history --turns 12 --budget 3000 --keep-turns 2
+"""
+import argparse
+
+from benchmarks.data import load_movies
+from cinebot.history import HistoryManager, build_token_counter
+
+FOLLOW_UP = (
+    "**Rekomendasi Mulai Dari Mana?**\n"
+    "* Kalau kamu suka plot yang bikin mikir, coba **{a}** dulu.\n"
+    "* Pengen yang lebih ringan? Tonton **{b}**.\n"
+    "Udah nonton yang mana aja? Atau pengen aku kasih saran urutan nonton biar maksimal? 😄"
+)
+
+
+def session_questions(df, turns):
+    """Pertanyaan bergantian: sutradara, genre, tema — dimulai dari Christopher Nolan."""
+    directors = ["Christopher Nolan"] + [d for d in df["Director"].value_counts().index if d != "Christopher Nolan"]
+    genres = ["Sci-Fi", "Crime", "Animation", "Western", "Horror", "Comedy"]
+    questions = []
+    for i in range(turns):
+        if i % 2 == 0:
+            director = directors[i // 2]
+            questions.append((f"Kasih tau daftar film dari {director}", df[df["Director"] == director]))
+        else:
+            genre = genres[(i // 2) % len(genres)]
+            questions.append((f"Daftar film genre {genre} terbaik", df[df["Genre"].str.contains(genre)]))
+    return questions
+
+
+def fake_answer(rows):
+    rows = rows.sort_values("IMDB_Rating", ascending=False).head(5)
+    lines = [
+        "Wah, pilihan yang keren banget! Siap, ini dia daftar film yang wajib kamu tonton:",
+        "",
+        "| Poster | Film | Tahun | Rating | Kenapa Wajib Tonton? |",
+        "|---|---|---|---|---|",
+    ]
+    for _, row in rows.iterrows():
+        lines.append(f"| ![Poster]({row['Poster_Link']}) | {row['Series_Title']} | {row['Released_Year']} | "
+                     f"{row['IMDB_Rating']} | {row['Overview']} |")
+    titles = rows["Series_Title"].tolist() + ["-", "-"]
+    lines += ["", FOLLOW_UP.format(a=titles[0], b=titles[1])]
+    return "\n".join(lines), rows["Series_Title"].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--keep-turns", type=int, default=2)
+    parser.add_argument("--model", default="gpt-4o-mini", help="Model untuk tokenizer tiktoken (fallback: ~4 char/token).")
+    args = parser.parse_args()
+
+    count_tokens = build_token_counter(args.model)
+    manager = HistoryManager(token_budget=args.budget, keep_turns=args.keep_turns, count_tokens=count_tokens)
+    df = load_movies()
+
+    messages = [{"role": "assistant", "content": "Halo! Aku CineBot 🍿 Ada yang bisa kubantu?"}]
+    first_titles = None
+    total_before = total_after = 0
+    print(f"{'turn':>4} {'sebelum':>8} {'sesudah':>8} {'hemat':>6}  pesan  judul turn-1 tersimpan")
+    for turn, (question, rows) in enumerate(session_questions(df, args.turns), start=1):
+        messages.append({"role": "user", "content": question})
+        compacted, stats = manager.compact(messages)
+        sent = "\n".join(m.content for m in compacted)
+        retained = sum(title in sent for title in first_titles) if first_titles else 0
+        total_before += stats.tokens_before
+        total_after += stats.tokens_after
+        print(f"{turn:>4} {stats.tokens_before:>8} {stats.tokens_after:>8} {stats.saved_ratio:>6.0%}  "
+              f"{stats.messages_before:>2}->{stats.messages_after:<2}  "
+              f"{f'{retained}/{len(first_titles)}' if first_titles else '-'}")
+
+        answer, titles = fake_answer(rows)
+        first_titles = first_titles or titles
+        messages.append({"role": "assistant", "content": answer})
+
+    print(f"\nTotal token history terkirim: {total_before} -> {total_after} "
+          f"({1 - total_after / total_before:.0%} lebih sedikit)")
+    print("Contoh history terkirim pada turn terakhir (pesan diringkas):")
+    for message in compacted:
+        if message.content.startswith("["):
+            print(f"  - {message.content[:160]}")
+
+
+if __name__ == "__main__":
+    main()
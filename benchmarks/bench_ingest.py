@@ -0,0 +1,188 @@
+"""
+Benchmark pipeline ingestion: sekuensial (embed lalu upload per batch) vs pipeline konkuren.
+
+Latensi jaringan disimulasikan: embedding lewat HashEmbeddings(latency=...) dan upsert lewat
+Qdrant local mode yang dibungkus jeda (`--upload-latency`). `--rate-limit-every N` membuat setiap
+panggilan embedding ke-N gagal dengan 429 untuk menguji jalur retry/backoff.
+
+Cek idempotensi (`sync_collection` + `write_sql_database`, koleksi di `DiskQdrantClient`): run kedua pada
+data yang sama -> 0 panggilan embedding & 0 upsert; baris awal dihapus -> hanya point itu yang dihapus,
+Movie_ID film lain (SQLite & metadata `id` Qdrant) tidak bergeser dan tidak ada payload yang ditulis ulang.
+
+Contoh: python -m benchmarks.bench_ingest --scale 5 --concurrency 8
+"""
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import pandas as pd
+from qdrant_client import QdrantClient, models
+
+from benchmarks.data import load_movies
+from benchmarks.fakes import DiskQdrantClient, HashEmbeddings
+from cinebot.ingest import records_from_dataframe, sync_collection, write_sql_database
+from cinebot.pipeline import run_ingest_pipeline
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddings(HashEmbeddings):
+    """Setiap panggilan ke-N mengembalikan 429 (sekali per batch)."""
+
+    def __init__(self, every, **kwargs):
+        super().__init__(**kwargs)
+        self.every = every
+        self._counter = itertools.count(1)
+        self._counter_lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._counter_lock:
+            n = next(self._counter)
+        if self.every and n % self.every == 0:
+            raise RateLimitError("429 Too Many Requests")
+        return super().embed_documents(texts)
+
+
+class SlowClient:
+    """
+    Bungkus QdrantClient dan tambahkan latensi jaringan pada upsert.
+    Local mode tidak thread-safe, jadi panggilan aslinya diserialisasi; jeda jaringan tetap paralel.
+    """
+
+    def __init__(self, client, latency):
+        self.client = client
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def upsert(self, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            return self.client.upsert(**kwargs)
+
+
+class CountingClient(DiskQdrantClient):
+    """DiskQdrantClient yang menghitung point yang di-upsert dan payload yang ditulis ulang."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.upserted = self.payload_updates = 0
+
+    def upsert(self, collection_name, points, **kwargs):
+        self.upserted += len(points)
+        return super().upsert(collection_name, points, **kwargs)
+
+    def batch_update_points(self, collection_name, update_operations, **kwargs):
+        self.payload_updates += sum(len(op.overwrite_payload.points) for op in update_operations)
+        return super().batch_update_points(collection_name, update_operations, **kwargs)
+
+
+def scaled_dataframe(df, scale):
+    if scale <= 1:
+        return df
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        if i:
+            copy["Series_Title"] = copy["Series_Title"] + f" ({i})"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def fresh_client(dim, name):
+    client = QdrantClient(":memory:")
+    client.create_collection(name, vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE))
+    return client
+
+
+def movie_ids(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return {(title, year, director): movie_id for title, year, director, movie_id in conn.execute(
+            "SELECT Series_Title, Released_Year, Director, Movie_ID FROM movies")}
+    finally:
+        conn.close()
+
+
+def rerun_section(df, dim):
+    print("\nRun ulang (sinkronisasi inkremental):")
+    print(f"  {'run':<22} {'embed':>6} {'upsert':>7} {'payload':>8} {'hapus':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        client = CountingClient(os.path.join(tmp, "qdrant.sqlite"))
+        db_file = os.path.join(tmp, "movies.db")
+        runs = {}
+        previous_hash = None
+        for name, frame in (("pertama", df), ("data sama", df), ("baris pertama dihapus", df.iloc[1:])):
+            embeddings = HashEmbeddings(size=dim)
+            client.upserted = client.payload_updates = 0
+            # Seperti setup.py: CSV dibaca ulang, jadi index DataFrame selalu 0..n-1
+            frame = frame.reset_index(drop=True)
+            previous_hash = write_sql_database(frame, db_file, previous_hash=previous_hash)["dataset_hash"]
+            result = sync_collection(client, "movies", records_from_dataframe(frame), embeddings,
+                                     embedding_model="hash", log=lambda message: None)
+            runs[name] = (embeddings.document_calls, client.upserted, client.payload_updates,
+                          len(result["deleted"]), movie_ids(db_file))
+            print(f"  {name:<22} {runs[name][0]:>6} {runs[name][1]:>7} {runs[name][2]:>8} {runs[name][3]:>6}")
+
+        payload_ids = {json.loads(payload)["metadata"]["id"]
+                       for (payload,) in client._conn.execute(f"SELECT payload FROM {client._table('movies')}")}
+        first, after_delete = runs["pertama"][4], runs["baris pertama dihapus"][4]
+        shifted = sum(after_delete[key] != movie_id for key, movie_id in first.items() if key in after_delete)
+
+    assert runs["data sama"][:4] == (0, 0, 0, 0), "run kedua pada data yang sama meng-embed/upsert ulang"
+    assert runs["baris pertama dihapus"][:4] == (0, 0, 0, 1), "menghapus satu baris menyentuh baris lain"
+    assert shifted == 0 and len(after_delete) == len(first) - 1, f"{shifted} Movie_ID bergeser"
+    assert payload_ids == set(after_delete.values()), "metadata id Qdrant != Movie_ID SQLite"
+    print(f"  Movie_ID bergeser setelah penghapusan: {shifted}; metadata id Qdrant == Movie_ID SQLite")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=2, help="Perbanyak dataset N kali.")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embed-latency", type=float, default=0.15)
+    parser.add_argument("--upload-latency", type=float, default=0.08)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    rerun_section(load_movies(), args.dim)
+    records = records_from_dataframe(scaled_dataframe(load_movies(), args.scale))
+    quiet = lambda *_: None
+
+    # Baseline: embed lalu upload, batch demi batch (perilaku setup.py lama)
+    embeddings = HashEmbeddings(size=args.dim, latency=args.embed_latency)
+    client = SlowClient(fresh_client(args.dim, "seq"), args.upload_latency)
+    start = time.perf_counter()
+    for i in range(0, len(records), args.batch_size):
+        batch = records[i:i + args.batch_size]
+        vectors = embeddings.embed_documents([r.text for r in batch])
+        client.upsert(collection_name="seq", points=[
+            models.PointStruct(id=r.point_id, vector=v, payload=r.payload()) for r, v in zip(batch, vectors)
+        ])
+    sequential = time.perf_counter() - start
+
+    embeddings = FlakyEmbeddings(args.rate_limit_every, size=args.dim, latency=args.embed_latency)
+    client = SlowClient(fresh_client(args.dim, "pipe"), args.upload_latency)
+    stats = run_ingest_pipeline(
+        client, "pipe", records, embeddings,
+        batch_size=args.batch_size, concurrency=args.concurrency, log=quiet,
+    )
+    assert client.client.count("pipe").count == len(records)
+
+    print(f"{len(records)} dokumen, batch={args.batch_size}, concurrency={args.concurrency}")
+    print(f"  sekuensial : {sequential:.2f} detik ({len(records) / sequential:.1f} dok/detik)")
+    print(f"  pipeline   : {stats.wall_seconds:.2f} detik ({stats.docs_per_sec:.1f} dok/detik, "
+          f"{stats.retries} retry 429)")
+    print(f"  speedup    : {sequential / stats.wall_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark & contoh instrumentasi latensi per tahap (`cinebot.metrics`).
+
+- Offline: resource CineBot asli (tools, router, sub-agent tidak dipanggil) di atas Qdrant local mode,
+  HashEmbeddings (`--embed-latency`) dan FakeToolChatModel (`--llm-latency`).
+- Turn agent penuh (RAG) dan fast path template SQL dijalankan dengan dan tanpa `MetricsCallbackHandler`
+  + `activate(...)`, untuk mengukur overhead instrumentasi per turn.
+- Mencetak rincian tahap satu turn, baris JSONL yang ditulis sink, dan cuplikan format Prometheus.
+
+Contoh: python -m benchmarks.bench_metrics --llm-latency 0.05 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from langchain.agents import create_agent
+from qdrant_client import QdrantClient
+
+import cinebot.resources as cinebot_resources
+from benchmarks.data import load_movies
+from benchmarks.fakes import FakeToolChatModel, HashEmbeddings
+from cinebot.chat import run_agent_turn, run_fast_path_turn, to_langchain_messages
+from cinebot.config import Settings
+from cinebot.ingest import records_from_dataframe, sync_collection, write_sql_database
+from cinebot.metrics import MetricsCallbackHandler, StageMetrics, activate
+from cinebot.tools import tools
+
+RAG_QUESTION = "Rekomendasi film yang mirip Inception"
+SQL_QUESTION = "Kasih tau daftar film dari Christopher Nolan"
+
+
+def run_turns(turn_fn, repeat, registry=None):
+    """Jalankan `turn_fn(config)` berulang; kembalikan (durasi per turn, StageMetrics terakhir)."""
+    durations, metrics = [], None
+    for _ in range(repeat):
+        metrics = StageMetrics() if registry is not None else None
+        config = {"callbacks": [MetricsCallbackHandler(metrics)]} if metrics is not None else None
+        started = time.perf_counter()
+        with activate(metrics):
+            result = turn_fn(config)
+        durations.append(time.perf_counter() - started)
+        if registry is not None:
+            registry.observe_turn(metrics, result.source, result.timings["total_seconds"])
+    return durations, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Detik per panggilan LLM (simulasi).")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Detik per embedding pertanyaan.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = load_movies()
+    embeddings = HashEmbeddings(latency=args.embed_latency)
+    client = QdrantClient(":memory:")
+    sync_collection(client, "imdb_movies", records_from_dataframe(df), embeddings, full=True,
+                    embedding_model="hash", log=lambda _: None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(df, db_path, None, True)
+        settings = Settings(
+            openai_api_key="bench", qdrant_url="http://localhost", sql_db_uri=f"sqlite:///{db_path}",
+            answer_cache_enabled=False, embedding_cache_enabled=False, async_enabled=False,
+            metrics_jsonl_path=os.path.join(tmp, "metrics.jsonl"),
+        )
+        llm = FakeToolChatModel(latency=args.llm_latency)
+        resources = cinebot_resources.CineBotResources(settings, llm=llm, embeddings=embeddings, qdrant_client=client)
+        cinebot_resources._resources = resources
+        agent = create_agent(llm, tools, system_prompt="CineBot (benchmark)")
+        decision = resources.router.route(SQL_QUESTION)
+
+        scenarios = {
+            "agent (RAG)": lambda config: run_agent_turn(
+                agent, to_langchain_messages([{"role": "user", "content": RAG_QUESTION}]), config),
+            "fast path (SQL)": lambda config: run_fast_path_turn(
+                llm, "CineBot (benchmark)", to_langchain_messages([{"role": "user", "content": SQL_QUESTION}]),
+                decision, tools, resources.sql_db_path, config=config),
+        }
+        print(f"{'skenario':<18} {'tanpa metrik':>13} {'dengan metrik':>14} {'overhead':>10}  (p50 per turn)")
+        samples = {}
+        for name, turn_fn in scenarios.items():
+            run_turns(turn_fn, 2)  # warm-up
+            plain, _ = run_turns(turn_fn, args.repeat)
+            measured, samples[name] = run_turns(turn_fn, args.repeat, resources.metrics)
+            p50_plain, p50_measured = statistics.median(plain), statistics.median(measured)
+            print(f"{name:<18} {p50_plain * 1000:>11.1f}ms {p50_measured * 1000:>12.1f}ms "
+                  f"{(p50_measured - p50_plain) * 1000:>8.2f}ms")
+
+        for name, metrics in samples.items():
+            print(f"\nRincian tahap satu turn {name}:")
+            for stage_name, count, seconds in metrics.breakdown():
+                print(f"  - {stage_name:<32} x{count:<2} {seconds * 1000:8.1f}ms")
+            print(f"  {metrics.llm_calls} round trip LLM")
+
+        with open(settings.metrics_jsonl_path, encoding="utf-8") as f:
+            lines = f.readlines()
+        print(f"\nSink JSONL: {len(lines)} baris; contoh: {lines[-1].strip()[:200]}...")
+        prometheus = resources.metrics.render_prometheus().splitlines()
+        print("Cuplikan Prometheus:")
+        for line in prometheus:
+            if line.startswith(("cinebot_turns_total", "cinebot_llm_calls_total", "cinebot_stage_seconds_count")):
+                print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark & verifikasi graf tetangga "mirip <film>" (`cinebot.neighbors`) dan resolver judul (`cinebot.titles`).
+
+- Build penuh: top-k tetangga semua film per batch (`--batch-sizes`, 1 = loop per film) dari vektor
+  HashEmbeddings (deterministik), dataset bisa diperbesar sintetis (`--scale`).
+- Refresh inkremental setelah sebagian baris berubah (sinopsis diganti), dihapus, dan ditambah: waktu vs
+  hitung ulang penuh, dan skor top-k harus identik. Run ulang tanpa perubahan tidak menghitung apa pun.
+- Resolver judul: exact / alias / fuzzy / ambigu, latensi per lookup.
+- Tool `get_movie_recommendations` end-to-end (`benchmarks.bench_suite.Environment`) untuk pertanyaan
+  "mirip <judul>": panggilan embedding, p50 latensi, dan kecocokan top-3 dengan tetangga berdasarkan vektor
+  film itu sendiri — graf vs embedding seluruh kalimat pertanyaan.
+- Pemilihan jalur: graf hanya jika sisa pertanyaan selain judul tinggal kata pengisi + filter tahun/rating/genre;
+  batasan lain ("yang lebih baru", "tapi lebih lucu") harus lewat pencarian vektor (embedding dipanggil).
+
+Contoh: python -m benchmarks.bench_neighbors --scale 1 --embed-latency 0.05
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_suite import Environment
+from benchmarks.data import load_movies, synthetic_movies
+from benchmarks.fakes import HashEmbeddings
+from cinebot.ingest import build_text_for_embedding, records_from_dataframe
+from cinebot.local_index import export_local_index
+from cinebot.neighbors import NeighborGraph, build_neighbor_graph, compute_neighbors, load_neighbors
+from cinebot.router import SIMILARITY_MARKERS
+from cinebot.titles import TitleResolver
+from cinebot.tool_payloads import parse_payload
+from cinebot.tools import get_movie_recommendations
+
+warnings.filterwarnings("ignore", message="Local mode performs exact")
+
+# (teks pertanyaan, judul yang diharapkan; None = tidak boleh cocok)
+RESOLVER_CASES = [
+    ("film yang mirip Inception", "Inception"),
+    ("mirip dark knight dong", "The Dark Knight"),
+    ("mirip godfather", "The Godfather"),
+    ("film mirip The Godfather Part 2", "The Godfather: Part II"),
+    ("seperti film leon", "Léon"),
+    ("mirip inceptoin", "Inception"),
+    ("rekomendasi film seperti interstelar yang seru", "Interstellar"),
+    ("mirip the shawshank redemtion", "The Shawshank Redemption"),
+    ("film yang mirip dengan Inception", "Inception"),
+    ("serupa dengan the dark knight", "The Dark Knight"),
+    ("mirip sama film heat", "Heat"),
+    ("mirip lord of the rings", None),
+    ("film mirip horor yang seram", None),
+]
+
+
+def export(df, embeddings, path):
+    records = records_from_dataframe(df)
+    vectors = embeddings.embed_documents([r.text for r in records])
+    export_local_index(path, [r.point_id for r in records], vectors, [r.payload() for r in records], "hash")
+
+
+def mutate(df, changed=10, deleted=5, added=5):
+    """Sinopsis sebagian baris diganti, beberapa baris dihapus, beberapa film baru ditambah."""
+    df = df.copy()
+    rows = df.index[::max(1, len(df) // changed)][:changed]
+    df.loc[rows, "Overview"] = df.loc[rows, "Overview"] + " A secret heist across dreams and time."
+    df = df.drop(df.index[len(df) // 2:len(df) // 2 + deleted])
+    extra = df.iloc[:added].copy()
+    extra["Series_Title"] = extra["Series_Title"] + " (Director's Cut)"
+    df = pd.concat([df, extra], ignore_index=True)
+    df["text_for_embedding"] = build_text_for_embedding(df)
+    return df
+
+
+def graph_section(df, embeddings, tmp, args):
+    index_path = os.path.join(tmp, "index")
+    export(df, embeddings, index_path)
+    matrix = np.load(os.path.join(index_path, "vectors.npy"))
+    print(f"Build penuh: {matrix.shape[0]} film x dim {matrix.shape[1]}, k={args.k}")
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        compute_neighbors(matrix, args.k, batch_size=batch_size)
+        label = "loop per film" if batch_size == 1 else f"batch {batch_size}"
+        print(f"  {label:<16} {time.perf_counter() - started:>8.3f}s")
+    print(f"  setup.py (build_neighbor_graph): {build_neighbor_graph(index_path, k=args.k)}")
+
+    # Refresh inkremental vs penuh pada dataset yang berubah
+    export(mutate(df), embeddings, index_path)
+    incremental = build_neighbor_graph(index_path, k=args.k)
+    refreshed = load_neighbors(index_path)
+    full = build_neighbor_graph(index_path, k=args.k, full=True)
+    rebuilt = load_neighbors(index_path)
+    print(f"\nSetelah 10 berubah, 5 dihapus, 5 ditambah:\n  inkremental: {incremental}\n  penuh      : {full}")
+    assert (refreshed.point_ids == rebuilt.point_ids).all()
+    assert np.allclose(refreshed.scores, rebuilt.scores, atol=1e-5), "skor top-k inkremental != penuh"
+    same_lists = np.mean([set(a) == set(b) for a, b in zip(refreshed.neighbors, rebuilt.neighbors)])
+    print(f"  skor top-k identik; daftar tetangga sama persis di {same_lists:.1%} baris (sisanya skor seri)")
+    unchanged = build_neighbor_graph(index_path, k=args.k)
+    print(f"  run ulang tanpa perubahan: {unchanged}")
+    assert unchanged["recomputed"] == 0 and unchanged["merged"] == 0
+
+
+# (pertanyaan, True = graf tetangga, False = pencarian vektor)
+PATH_CASES = [
+    ("Rekomendasi film yang mirip Inception", True),
+    ("film mirip dengan The Dark Knight", True),
+    ("serupa dengan Gladiator dong", True),
+    ("film mirip Interstellar rating di atas 7", True),
+    ("film mirip Schindler's List", True),
+    ("rekomendasi film seperti Pan's Labyrinth dong", True),
+    ("film mirip Léon", True),
+    ("film yang mirip Amélie", True),
+    ("mirip La vita è bella", True),
+    ("film mirip WALL·E?", True),
+    ("film mirip Bir Zamanlar Anadolu'da", True),
+    ("film mirip Dr. Strangelove or: How I Learned to Stop Worrying and Love the Bomb", True),
+    ("film mirip Amélie tapi lebih sedih", False),
+    ("film mirip The Matrix yang lebih baru", False),
+    ("film seperti Gladiator tapi lebih lucu", False),
+    ("rekomendasi film seperti interstelar yang seru", False),
+]
+
+
+def resolver_section(db_path):
+    resolver = TitleResolver.from_sqlite(db_path)
+    print(f"\nResolver: {len(resolver)} judul, {len(resolver.aliases)} alias")
+    for question, expected in RESOLVER_CASES:
+        started = time.perf_counter()
+        for _ in range(20):
+            match = resolver.find_after(question, SIMILARITY_MARKERS)
+        micros = (time.perf_counter() - started) / 20 * 1e6
+        found = f"{match.title} ({match.method})" if match else "-"
+        print(f"  {question:<48} -> {found:<36} {micros:>7.0f}µs")
+        assert (match.title if match else None) == expected, question
+
+
+def tool_section(df, tmp, args):
+    env = Environment(df, tmp, args)
+    resources = env.resources
+    index_path = os.path.join(tmp, "index")
+    export(df, HashEmbeddings(), index_path)
+    build_neighbor_graph(index_path, k=args.k)
+    graph = NeighborGraph.load(index_path)
+    titles = TitleResolver.from_sqlite(resources.sql_db_path)
+    matrix = np.load(os.path.join(index_path, "vectors.npy"))
+    expected_ids, _ = compute_neighbors(matrix, 3)
+    point_titles = graph.columns["title"]
+
+    sample = list(range(0, len(df), max(1, len(df) // args.questions)))[:args.questions]
+    modes = [("embedding pertanyaan", None, None), ("graf tetangga", graph, titles)]
+    print(f"\nTool get_movie_recommendations, {len(sample)} pertanyaan \"mirip <judul>\", "
+          f"embedding {args.embed_latency * 1000:.0f}ms:")
+    print(f"  {'mode':<22} {'embed calls':>11} {'p50':>8} {'top-3 = tetangga vektor film':>30}")
+    for name, neighbors, resolver in modes:
+        resources.neighbors, resources.titles = neighbors, resolver
+        calls_before = env.embeddings.query_calls
+        latencies, overlap = [], []
+        for row in sample:
+            title = point_titles[row]
+            started = time.perf_counter()
+            output = get_movie_recommendations.invoke({"question": f"Rekomendasi film yang mirip {title}"})
+            latencies.append(time.perf_counter() - started)
+            got = {m["title"] for m in parse_payload(output)["movies"]}
+            overlap.append(len(got & {point_titles[i] for i in expected_ids[row]}) / 3)
+        print(f"  {name:<22} {env.embeddings.query_calls - calls_before:>11} "
+              f"{statistics.median(latencies) * 1000:>6.1f}ms {statistics.mean(overlap):>29.0%}")
+    assert env.embeddings.query_calls - calls_before == 0
+
+    print("\n  Jalur per pertanyaan (graf aktif):")
+    for question, expect_graph in PATH_CASES:
+        calls_before = env.embeddings.query_calls
+        get_movie_recommendations.invoke({"question": question})
+        used_graph = env.embeddings.query_calls == calls_before
+        print(f"  {question[:48]:<48} -> {'graf' if used_graph else 'vektor':<7} "
+              f"{'OK' if used_graph == expect_graph else 'ERR'}")
+        assert used_graph == expect_graph, question
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Perbesar dataset N kali untuk build graf.")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 512])
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    # Parameter yang dibutuhkan Environment benchmark suite
+    args.runtime, args.concurrency, args.timeout = "sync", [1], 120.0
+    args.llm_latency, args.token_latency, args.search_latency, args.sql_direct = 0.0, 0.0, 0.005, True
+
+    df = load_movies()
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_df = synthetic_movies(df, args.scale) if args.scale > 1 else df
+        graph_section(graph_df, HashEmbeddings(), os.path.join(tmp, "graph"), args)
+        env_tmp = os.path.join(tmp, "app")
+        os.makedirs(env_tmp)
+        tool_section(df, env_tmp, args)
+        resolver_section(os.path.join(env_tmp, "movies.db"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark & verifikasi prefetch poster (`cinebot.poster_cache`) terhadap server HTTP lokal pengganti CDN.
+
+- Server stand-in (ThreadingHTTPServer) menyajikan JPEG sintetis dengan latensi per request (`--latency`),
+  beberapa poster identik (uji content-addressing), sebagian 503 di setiap request pertama/ganjil (uji retry),
+  dan sebagian 404 (gagal permanen -> aplikasi memakai URL remote).
+- Membandingkan unduhan sekuensial (1 worker) vs konkuren (`--workers`), lalu menguji resume:
+  run yang "terputus" di tengah dilanjutkan, dan run ulang pada cache lengkap hanya mencoba lagi poster yang gagal.
+- Terakhir, `PosterIndex.expand` merender thumbnail lokal dan jatuh ke URL remote untuk poster yang gagal.
+
+Contoh: python -m benchmarks.bench_posters --latency 0.05 --workers 16
+"""
+import argparse
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+from benchmarks.data import load_movies
+from cinebot.ingest import write_sql_database
+from cinebot.poster_cache import PosterCache, prefetch_posters
+from cinebot.posters import PosterIndex
+
+
+class StandInCDN:
+    """Server poster lokal; `requests` menghitung request per path."""
+
+    def __init__(self, latency, missing=(), flaky=(), duplicate_of=None):
+        self.latency = latency
+        self.missing = set(missing)
+        self.flaky = set(flaky)
+        self.duplicate_of = duplicate_of or {}
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._images = {}
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                cdn.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, movie_id):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/poster/{movie_id}.jpg"
+
+    def image(self, movie_id):
+        movie_id = self.duplicate_of.get(movie_id, movie_id)
+        with self._lock:
+            if movie_id not in self._images:
+                # Ukuran mirip poster IMDb asli (lebih besar dari thumbnail) dengan warna unik per film
+                image = Image.new("RGB", (300, 450), (movie_id % 256, (movie_id * 91) % 256, movie_id // 256 * 40))
+                out = BytesIO()
+                image.save(out, format="JPEG", quality=90)
+                self._images[movie_id] = out.getvalue()
+            return self._images[movie_id]
+
+    def handle(self, request):
+        movie_id = int(request.path.rsplit("/", 1)[-1].split(".")[0])
+        with self._lock:
+            count = self.requests[movie_id] = self.requests.get(movie_id, 0) + 1
+        threading.Event().wait(self.latency)
+        if movie_id in self.missing:
+            request.send_error(404)
+            return
+        if movie_id in self.flaky and count % 2 == 1:
+            request.send_error(503)
+            return
+        body = self.image(movie_id)
+        request.send_response(200)
+        request.send_header("Content-Type", "image/jpeg")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def close(self):
+        self.server.shutdown()
+
+
+def dir_size(path):
+    files = [os.path.join(root, f) for root, _, names in os.walk(path) for f in names]
+    return len(files), sum(os.path.getsize(f) for f in files)
+
+
+def report(name, stats, cdn, requests_before):
+    print(f"{name:<34} {stats.wall_seconds:>7.2f}s {stats.posters_per_sec:>8.1f}/s  diunduh={stats.downloaded:<4} "
+          f"dilewati={stats.skipped:<4} gagal={stats.failed:<3} retry={stats.retries:<3} "
+          f"request={cdn.total_requests() - requests_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Detik per request ke server stand-in.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=200, help="Jumlah film (poster) yang diuji.")
+    args = parser.parse_args()
+    quiet = lambda _: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(load_movies(), db_path, None, True)
+        remote = PosterIndex.from_sqlite(db_path).urls
+        ids = sorted(remote)[:args.limit]
+        cdn = StandInCDN(
+            args.latency,
+            missing=ids[1::50],
+            flaky=ids[2::25],
+            duplicate_of={movie_id: ids[0] for movie_id in ids[3::40]},
+        )
+        urls = {movie_id: cdn.url(movie_id) for movie_id in ids}
+
+        print(f"{len(urls)} poster, latensi server {args.latency * 1000:.0f}ms/request\n")
+        before = cdn.total_requests()
+        sequential = prefetch_posters(urls, PosterCache(os.path.join(tmp, "seq")), workers=1, log=quiet)
+        report("sekuensial (1 worker)", sequential, cdn, before)
+
+        cache_dir = os.path.join(tmp, "posters")
+        before = cdn.total_requests()
+        half = dict(list(urls.items())[:len(urls) // 2])
+        interrupted = prefetch_posters(half, PosterCache(cache_dir), workers=args.workers, log=quiet)
+        report("konkuren, terputus di 50%", interrupted, cdn, before)
+        before = cdn.total_requests()
+        resumed = prefetch_posters(urls, PosterCache(cache_dir), workers=args.workers, log=quiet)
+        report(f"konkuren, resume ({args.workers} worker)", resumed, cdn, before)
+        before = cdn.total_requests()
+        warm = prefetch_posters(urls, PosterCache(cache_dir), workers=args.workers, log=quiet)
+        report("run ulang (cache lengkap)", warm, cdn, before)
+
+        concurrent_seconds = interrupted.wall_seconds + resumed.wall_seconds
+        print(f"\nPercepatan konkuren vs sekuensial: {sequential.wall_seconds / concurrent_seconds:.1f}x")
+        cache = PosterCache(cache_dir)
+        originals, original_bytes = dir_size(os.path.join(cache_dir, "originals"))
+        thumbs, thumb_bytes = dir_size(os.path.join(cache_dir, "thumbs"))
+        print(f"Cache: {len(cache)} entri manifest, {originals} file asli ({original_bytes / 1024:.0f} KiB), "
+              f"{thumbs} thumbnail ({thumb_bytes / 1024:.0f} KiB); poster identik disimpan sekali.")
+
+        local = cache.local_urls("app/static/posters")
+        posters = PosterIndex(urls, local_urls=local)
+        cached_id, missing_id = ids[0], ids[1]
+        print("\nRender:")
+        print(f"  {posters.expand(f'![Poster](poster:{cached_id})')}")
+        print(f"  {posters.expand(f'![Poster](poster:{missing_id})')}  (404 -> URL remote)")
+        assert posters.display_url(f"poster:{cached_id}").startswith("app/static/posters/thumbs/")
+        assert posters.display_url(f"poster:{missing_id}") == urls[missing_id]
+        assert warm.downloaded == 0 and warm.failed == len(cdn.missing)
+        cdn.close()
+
+
+if __name__ == "__main__":
+    main()
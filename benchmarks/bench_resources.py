@@ -0,0 +1,121 @@
+"""
+Cek penutupan resource lama saat resource CineBot diganti (`cinebot.resources._swap_resources`).
+
+- Dua set resource asli di atas backend palsu (`benchmarks.bench_suite.Environment`, runtime async): yang lama
+  diganti yang baru seperti saat konfigurasi berubah di tengah sesi.
+- Kasus: turn yang sedang berjalan di resource lama tetap selesai dan resource lama baru ditutup setelah
+  `in_use` kembali 0; turn yang tidak kunjung selesai -> ditutup paksa setelah `resources_close_grace`;
+  `close()` idempoten.
+- "Tertutup" = thread event loop `AsyncRunner` berhenti, pool spekulasi di-shutdown, client HTTP async
+  tertutup, dan pool koneksi SQLite kosong.
+
+Contoh: python -m benchmarks.bench_resources --llm-latency 0.3
+"""
+import argparse
+import dataclasses
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_suite import Environment
+from benchmarks.data import load_movies
+from cinebot import resources as cinebot_resources
+
+
+def is_closed(resources):
+    return (not resources.runner._thread.is_alive() and resources.speculator._pool._shutdown
+            and resources.async_http_client.is_closed and resources.sql_executor._pool.empty())
+
+
+def wait_closed(resources, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_closed(resources):
+            return True
+        time.sleep(0.01)
+    return is_closed(resources)
+
+
+def check(name, ok, detail=""):
+    print(f"  [{'OK ' if ok else 'ERR'}] {name:<52} {detail}")
+    return not ok
+
+
+def environment(df, tmp, args, grace):
+    env = Environment(df, tmp, args)
+    env.resources.settings = dataclasses.replace(env.resources.settings, resources_close_grace=grace)
+    env.resources.speculator.log = lambda message: None
+    return env
+
+
+def swap(old, new):
+    cinebot_resources._resources = old.resources
+    cinebot_resources._resources = cinebot_resources._swap_resources(new.resources)
+
+
+def in_flight_case(df, tmp, args):
+    """Turn di resource lama berjalan saat swap: selesai normal, lalu resource lama ditutup."""
+    failures = 0
+    old, new = environment(df, tmp, args, 60.0), environment(df, tmp, args, 60.0)
+    cinebot_resources._resources = old.resources
+    outcome = {}
+    started = threading.Event()
+
+    def turn():
+        with old.resources.in_use():
+            started.set()
+            time.sleep(args.llm_latency)
+            outcome["docs"] = old.runner.run(old.resources.asimilarity_search("film tentang perjalanan waktu"))
+
+    thread = threading.Thread(target=turn)
+    thread.start()
+    started.wait()
+    swap(old, new)
+    failures += check("resource lama tetap hidup selama turn berjalan", not is_closed(old.resources))
+    thread.join()
+    failures += check("turn di resource lama selesai (pencarian async)", len(outcome.get("docs", [])) == 3)
+    failures += check("resource lama ditutup setelah in_use = 0", wait_closed(old.resources, 2.0))
+    failures += check("resource baru tetap terbuka", not is_closed(new.resources))
+    old.resources.close()
+    failures += check("close() idempoten", is_closed(old.resources))
+    new.resources.close()
+    return failures
+
+
+def grace_case(df, tmp, args):
+    """Turn yang macet tidak menahan resource lama selamanya: ditutup paksa setelah masa tenggang."""
+    failures = 0
+    grace = args.grace
+    old, new = environment(df, tmp, args, grace), environment(df, tmp, args, grace)
+    stuck = old.resources.in_use()
+    stuck.__enter__()
+    started = time.perf_counter()
+    swap(old, new)
+    failures += check("tidak ditutup sebelum masa tenggang", not wait_closed(old.resources, grace / 2))
+    closed = wait_closed(old.resources, grace * 4)
+    failures += check(f"ditutup paksa setelah {grace:.1f}s", closed,
+                      f"setelah {time.perf_counter() - started:.2f}s")
+    stuck.__exit__(None, None, None)
+    new.resources.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Lama turn simulasi (detik).")
+    parser.add_argument("--grace", type=float, default=0.5, help="CINEBOT_RESOURCES_CLOSE_GRACE untuk kasus turn macet.")
+    args = parser.parse_args()
+    # Parameter yang dibutuhkan Environment benchmark suite
+    args.runtime, args.concurrency, args.timeout = "async", [1], 120.0
+    args.embed_latency, args.search_latency, args.token_latency, args.sql_direct = 0.0, 0.0, 0.0, False
+
+    df = load_movies()
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Penggantian resource:")
+        failures = in_flight_case(df, tmp, args)
+        failures += grace_case(df, tmp, args)
+    assert not failures, f"{failures} kasus gagal"
+
+
+if __name__ == "__main__":
+    main()
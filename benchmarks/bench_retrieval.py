@@ -0,0 +1,106 @@
+"""
+Benchmark retrieval: Qdrant vs index NumPy lokal pada vektor yang sama.
+
+- Koleksi Qdrant diisi dari `data/imdb_top_1000_cleaned.csv` memakai HashEmbeddings (offline).
+  Default memakai Qdrant local mode (":memory:"); berikan --qdrant-url untuk mengukur server sungguhan
+  (koleksi sementara `bench_retrieval` akan dibuat lalu dihapus).
+- Index lokal diekspor dari koleksi tersebut dengan `export_from_qdrant` (jalur yang sama dengan setup.py).
+- Laporan: kecocokan urutan top-k dan latensi per query (ms) untuk kedua jalur.
+
+Contoh: python -m benchmarks.bench_retrieval --queries 200 --k 3
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+from benchmarks.data import load_movies, movie_documents
+from benchmarks.fakes import HashEmbeddings
+from cinebot.local_index import NumpyIndex, export_from_qdrant
+
+COLLECTION = "bench_retrieval"
+SAMPLE_QUESTIONS = [
+    "Cari film tentang perjalanan waktu",
+    "Rekomendasi film yang mirip Inception",
+    "film perang yang emosional",
+    "animasi keluarga tentang persahabatan",
+    "thriller detektif dengan plot twist",
+    "film tentang mafia dan keluarga kriminal",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"  {name:<8} mean={statistics.mean(ms):.3f}ms p50={percentile(ms, 50):.3f}ms "
+          f"p95={percentile(ms, 95):.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-api-key", default=None)
+    args = parser.parse_args()
+
+    embeddings = HashEmbeddings(size=args.dim)
+    df = load_movies()
+    documents = movie_documents(df)
+
+    client = QdrantClient(url=args.qdrant_url, api_key=args.qdrant_api_key) if args.qdrant_url else QdrantClient(":memory:")
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        COLLECTION,
+        vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+    )
+    QdrantVectorStore(client=client, collection_name=COLLECTION, embedding=embeddings).add_documents(documents)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        export_from_qdrant(client, COLLECTION, index_dir)
+        index = NumpyIndex.load(index_dir)
+
+        # Query: pertanyaan contoh + potongan sinopsis film (agar ada variasi)
+        questions = SAMPLE_QUESTIONS + df["Overview"].sample(
+            n=max(0, args.queries - len(SAMPLE_QUESTIONS)), random_state=0).tolist()
+        vectors = [embeddings.embed_query(q) for q in questions]
+
+        qdrant_times, numpy_times, matches, ties = [], [], 0, 0
+        for vector in vectors:
+            start = time.perf_counter()
+            hits = client.query_points(COLLECTION, query=vector, limit=args.k).points
+            qdrant_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rows = index.search_ids(vector, k=args.k)
+            numpy_times.append(time.perf_counter() - start)
+
+            qdrant_ids = [str(h.id) for h in hits]
+            numpy_ids = [index.columns["point_id"][row] for row, _ in rows]
+            if qdrant_ids == numpy_ids:
+                matches += 1
+            elif all(abs(h.score - s) < 1e-5 for h, (_, s) in zip(hits, rows)):
+                ties += 1  # skor identik, hanya urutan dokumen yang seri berbeda
+
+    if args.qdrant_url:
+        client.delete_collection(COLLECTION)
+
+    print(f"Korpus: {len(documents)} dokumen, dim={args.dim}, {len(vectors)} query, k={args.k}")
+    print(f"Urutan top-{args.k} identik: {matches}/{len(vectors)} (+{ties} berbeda hanya pada skor seri)")
+    print("Latensi pencarian (tanpa embedding):")
+    summarize("qdrant", qdrant_times)
+    summarize("numpy", numpy_times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Benchmark router fast path (`cinebot.router`) vs agent penuh.
+
+- `movies.db` sementara dibangun dari CSV dengan `write_sql_database` (jalur yang sama dengan setup.py).
+- Akurasi: pertanyaan berlabel (tool yang benar) -> coverage fast path, akurasi keputusan yang confident,
+  dan latensi klasifikasi lokal.
+- Kebenaran template: hasil template SQL fast path dibandingkan dengan SQL acuan di `movies.db` yang sama
+  (arah urutan, metrik di template sutradara/pemeran, rentang tahun); pertanyaan dengan pengecualian atau
+  kata yang tidak tertampung template harus ke agent penuh.
+- End-to-end (offline): FakeToolChatModel dengan latensi tetap per panggilan LLM; agent penuh
+  (create_agent) dibandingkan dengan `run_fast_path_turn` (tool langsung + satu panggilan sintesis).
+  Tool diganti stub dengan nama yang sama agar yang diukur hanya hop LLM.
+
+Contoh: python -m benchmarks.bench_router --llm-latency 0.5
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+
+from benchmarks.bench_retrieval import percentile
+from benchmarks.data import load_movies
+from benchmarks.fakes import FakeToolChatModel
+from cinebot.chat import run_agent_turn, run_fast_path_turn, to_langchain_messages
+from cinebot.ingest import write_sql_database
+from cinebot.router import Router, build_template
+from cinebot.tool_payloads import movies_payload, sql_answer_payload
+
+STUB_RAG_OUTPUT = movies_payload([{"id": 9, "title": "Inception", "year": 2010, "poster": "poster:9"}], source="rag")
+STUB_SQL_OUTPUT = sql_answer_payload("Inception (2010) poster:9", "SELECT 1")
+
+RECOMMENDATION_TOOL = "get_movie_recommendations"
+FACTUAL_TOOL = "get_factual_movie_data"
+
+# (pertanyaan, tool yang benar; None = seharusnya ke agent penuh)
+LABELED_QUESTIONS = [
+    ("Rekomendasi film yang mirip Inception", RECOMMENDATION_TOOL),
+    ("film yang sebagus Interstellar", RECOMMENDATION_TOOL),
+    ("Cari film tentang perjalanan waktu", RECOMMENDATION_TOOL),
+    ("film bertema persahabatan dan keluarga", RECOMMENDATION_TOOL),
+    ("Apa 5 film dengan pendapatan (gross) tertinggi?", FACTUAL_TOOL),
+    ("Top 5 film 2010", FACTUAL_TOOL),
+    ("Kasih tau daftar film dari Christopher Nolan", FACTUAL_TOOL),
+    ("Rekomendasi film Christopher Nolan", FACTUAL_TOOL),
+    ("Film Kubrick apa aja?", FACTUAL_TOOL),
+    ("Kasih tau semua film Tom Hanks", FACTUAL_TOOL),
+    ("Daftar film genre Sci-Fi terbaik", FACTUAL_TOOL),
+    ("Siapa sutradara film The Dark Knight?", FACTUAL_TOOL),
+    ("rata-rata pendapatan film Christopher Nolan", FACTUAL_TOOL),
+    ("berapa jumlah film di atas 150 menit?", FACTUAL_TOOL),
+    ("top 3 film terpopuler", FACTUAL_TOOL),
+    ("film horor terbaik tahun 1980", FACTUAL_TOOL),
+    ("yang kedua itu tahun berapa?", None),
+    ("halo CineBot", None),
+    ("menurutmu aku harus nonton apa malam ini?", None),
+]
+
+# (pertanyaan, WHERE acuan, kolom urutan, naik?, jumlah); WHERE None = harus ke agent penuh
+STAR_WHERE = ("Movie_ID IN (SELECT ms.Movie_ID FROM movie_stars ms JOIN stars s ON s.Star_ID = ms.Star_ID "
+              "WHERE s.Name = '{}')")
+TEMPLATE_CASES = [
+    ("top 5 film dengan rating terendah", "1 = 1", "IMDB_Rating", True, 5),
+    ("film sebelum 1980 terbaik", "Released_Year < 1980", "IMDB_Rating", False, 5),
+    ("film terbaik di atas 2010", "Released_Year > 2010", "IMDB_Rating", False, 5),
+    ("film 2000an terbaik", "Released_Year BETWEEN 2000 AND 2009", "IMDB_Rating", False, 5),
+    ("film horor antara 1980 dan 1990 terbaik",
+     "Released_Year BETWEEN 1980 AND 1990 AND Genre LIKE '%Horror%'", "IMDB_Rating", False, 5),
+    ("top 3 film dengan pendapatan paling sedikit", "1 = 1", "Gross", True, 3),
+    ("film Leonardo DiCaprio yang paling laris", STAR_WHERE.format("Leonardo DiCaprio"), "Gross", False, 10),
+    ("film Nolan yang paling panjang", "Director = 'Christopher Nolan'", "Runtime", False, 10),
+    ("film Nolan setelah 2005", "Director = 'Christopher Nolan' AND Released_Year > 2005", "IMDB_Rating", False, 10),
+    ("film Christopher Nolan selain Inception", None, None, False, 0),
+    ("film Kubrick kecuali The Shining", None, None, False, 0),
+    ("rekomendasi film drama korea", None, None, False, 0),
+    ("5 film terbaik dengan gross tertinggi", None, None, False, 0),
+    ("top 10 film rating tertinggi dan terendah", None, None, False, 0),
+    ("film rating imdb di atas 8 terlaris", None, None, False, 0),
+]
+
+
+def check_templates(router, db_path):
+    """Template fast path vs SQL acuan: film yang lolos WHERE dan nilai metrik top-N harus sama."""
+    failures = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        for question, where, column, ascending, limit in TEMPLATE_CASES:
+            decision = router.route(question)
+            if where is None:
+                ok = not router.is_confident(decision)
+                detail = decision.reason
+            elif not (router.is_confident(decision) and decision.template):
+                ok, detail = False, f"tidak di-route ke template ({decision.reason})"
+            else:
+                template = build_template(decision)
+                cursor = conn.execute(template.sql, template.params)
+                rows = [dict(zip([c[0] for c in cursor.description], row)) for row in cursor.fetchall()]
+                allowed = {r[0] for r in conn.execute(f"SELECT Movie_ID FROM movies WHERE {where}")}
+                expected = [r[0] for r in conn.execute(
+                    f"SELECT {column} FROM movies WHERE {where} AND {column} IS NOT NULL "
+                    f"ORDER BY {column} {'ASC' if ascending else 'DESC'} LIMIT {limit}")]
+                got = [r.get(column) for r in rows]
+                ok = got == expected and all(r["Movie_ID"] in allowed for r in rows)
+                detail = template.display_sql() if ok else f"{got} != {expected}"
+            failures += not ok
+            print(f"  [{'OK ' if ok else 'ERR'}] {question:<45} {detail}")
+    finally:
+        conn.close()
+    return failures
+
+
+@tool
+def get_movie_recommendations(question: str) -> str:
+    """Stub tool RAG (benchmark)."""
+    return STUB_RAG_OUTPUT
+
+
+@tool
+def get_factual_movie_data(question: str) -> str:
+    """Stub tool SQL (benchmark)."""
+    return STUB_SQL_OUTPUT
+
+
+STUB_TOOLS = [get_movie_recommendations, get_factual_movie_data]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Detik per panggilan LLM (simulasi)")
+    parser.add_argument("--min-confidence", type=float, default=0.85)
+    parser.add_argument("--repeat", type=int, default=200, help="Ulangan untuk mengukur latensi klasifikasi")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(load_movies(), db_path, None, True)
+        t0 = time.perf_counter()
+        router = Router.from_sqlite(db_path, min_confidence=args.min_confidence)
+        print(f"Router dibangun dalam {(time.perf_counter() - t0) * 1000:.1f}ms "
+              f"({len(router.directors)} sutradara, {len(router.stars)} pemeran, {len(router.titles)} judul)")
+
+        # --- 1. Akurasi & coverage ---
+        confident = correct = wrongly_routed = 0
+        for question, expected in LABELED_QUESTIONS:
+            decision = router.route(question)
+            routed = router.is_confident(decision)
+            ok = (decision.tool_name == expected) if routed else True
+            confident += routed
+            correct += routed and ok
+            wrongly_routed += routed and expected is None
+            marker = "OK " if ok else "ERR"
+            print(f"  [{marker}] {decision.target:<14} {decision.confidence:.2f} "
+                  f"{(decision.template or '-'):<18} {question}")
+        print(f"\nCoverage fast path: {confident}/{len(LABELED_QUESTIONS)} | "
+              f"akurasi keputusan confident: {correct}/{confident} | ambigu yang ikut di-route: {wrongly_routed}")
+
+        print("\nTemplate vs SQL acuan:")
+        failures = check_templates(router, db_path)
+        assert not failures, f"{failures} pertanyaan template salah"
+
+        timings = []
+        for _ in range(args.repeat):
+            for question, _expected in LABELED_QUESTIONS:
+                t0 = time.perf_counter()
+                router.route(question)
+                timings.append(time.perf_counter() - t0)
+        ms = [t * 1000 for t in timings]
+        print(f"Latensi klasifikasi: mean={statistics.mean(ms):.3f}ms p95={percentile(ms, 95):.3f}ms")
+
+        # --- 2. End-to-end: agent penuh vs fast path ---
+        llm = FakeToolChatModel(latency=args.llm_latency)
+        agent = create_agent(llm, STUB_TOOLS, system_prompt="CineBot (benchmark)")
+        routed_questions = [q for q, _ in LABELED_QUESTIONS if router.is_confident(router.route(q))]
+
+        agent_times, fast_times = [], []
+        calls_before = llm.calls
+        for question in routed_questions:
+            messages = to_langchain_messages([{"role": "user", "content": question}])
+            result = run_agent_turn(agent, messages)
+            agent_times.append(result.timings["total_seconds"])
+            router.record_agent_turn(result.timings.get("selection_seconds"))
+        agent_calls = llm.calls - calls_before
+
+        calls_before = llm.calls
+        for question in routed_questions:
+            messages = to_langchain_messages([{"role": "user", "content": question}])
+            decision = router.route(question)
+            result = run_fast_path_turn(llm, "CineBot (benchmark)", messages, decision, STUB_TOOLS, db_path)
+            fast_times.append(result.timings["total_seconds"])
+            router.record_fast_path(decision)
+        fast_calls = llm.calls - calls_before
+
+    n = len(routed_questions)
+    print(f"\nEnd-to-end ({n} pertanyaan, latensi LLM {args.llm_latency:.2f}s/panggilan):")
+    print(f"  agent     mean={statistics.mean(agent_times):.3f}s  panggilan LLM/turn={agent_calls / n:.1f}")
+    print(f"  fast path mean={statistics.mean(fast_times):.3f}s  panggilan LLM/turn={fast_calls / n:.1f}")
+    print(f"  speedup   {statistics.mean(agent_times) / statistics.mean(fast_times):.2f}x")
+    stats = router.snapshot()
+    print(f"  estimasi hemat (EWMA hop pemilihan tool): {stats['estimated_saved_seconds']:.2f}s total, "
+          f"routed={stats['routed']}")
+
+
+if __name__ == "__main__":
+    main()
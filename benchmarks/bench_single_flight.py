@@ -0,0 +1,116 @@
+"""
+Benchmark single-flight (`cinebot.single_flight`): burst pertanyaan identik dari tombol contoh main.py.
+
+- Resource CineBot asli di atas backend palsu (`benchmarks.bench_suite.Environment`: Qdrant in-memory,
+  FakeToolChatModel, ScriptedSQLChatModel) dengan latensi LLM `--llm-latency`.
+- `--users` sesi per tombol contoh mengirim pertanyaan yang sama pada saat bersamaan (barrier).
+- Mode: tanpa single-flight, hanya level tool, dan level tool + turn agent (seperti main.py).
+  Dilaporkan: panggilan LLM upstream, p50/maks latensi per turn, dan panggilan yang dihemat (`stats()`).
+- Error & timeout: leader yang gagal tidak membagikan error-nya (follower memilih leader baru), dan
+  follower berhenti menunggu leader yang terlalu lama lalu menjalankan sendiri.
+
+Contoh: python -m benchmarks.bench_single_flight --users 16 --llm-latency 0.1
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_suite import Environment
+from benchmarks.data import load_movies
+from cinebot.single_flight import SingleFlight, turn_key
+
+warnings.filterwarnings("ignore", message="Local mode performs exact")
+
+EXAMPLE_QUESTIONS = [
+    "Rekomendasi film yang mirip Inception",
+    "Apa 5 film dengan pendapatan (gross) tertinggi?",
+    "Kasih tau daftar film dari Christopher Nolan",
+]
+
+
+def burst(env, scenario, users, coalesce_turns):
+    """Semua sesi mulai bersamaan; kembalikan (latensi per turn, panggilan LLM, stats single-flight)."""
+    jobs = [q for q in EXAMPLE_QUESTIONS for _ in range(users)]
+    barrier = threading.Barrier(len(jobs))
+    flight = env.resources.single_flight
+    calls_before = env.llm_calls()
+
+    def session(question):
+        barrier.wait()
+        started = time.perf_counter()
+        if coalesce_turns:
+            flight.do(turn_key(question, []), lambda: env.turn(scenario, question, None))
+        else:
+            env.turn(scenario, question, None)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(len(jobs)) as pool:
+        latencies = list(pool.map(session, jobs))
+    stats = flight.stats() if flight is not None else None
+    return latencies, env.llm_calls() - calls_before, stats
+
+
+def error_and_timeout_demo():
+    flight = SingleFlight(timeout=5.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(threading.current_thread().name)
+        time.sleep(0.1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream 503")
+        return "ok"
+
+    def session(_):
+        try:
+            return flight.do("q", flaky)[0]
+        except RuntimeError as e:
+            return f"error: {e}"
+
+    with ThreadPoolExecutor(8) as pool:
+        outcomes = list(pool.map(session, range(8)))
+    print(f"Leader gagal: hasil 8 sesi = {sorted(set(outcomes))}, komputasi dijalankan {len(attempts)}x "
+          f"(leader + 1 leader pengganti) | {flight.stats()}")
+
+    slow = SingleFlight(timeout=0.1)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(slow.do, "q", lambda: time.sleep(0.5) or "ok") for _ in range(4)]
+        waited = [f.result() for f in futures]
+    print(f"Leader lambat (timeout follower 0.1 detik): {len(waited)} sesi selesai, "
+          f"{slow.stats()['timeouts']} follower menjalankan sendiri")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=16, help="Sesi bersamaan per tombol contoh.")
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    args = parser.parse_args()
+    # Parameter yang dibutuhkan Environment benchmark suite
+    args.runtime, args.concurrency = "sync", [len(EXAMPLE_QUESTIONS) * args.users]
+    args.timeout, args.token_latency = 120.0, 0.0
+    args.embed_latency, args.search_latency, args.sql_direct = 0.01, 0.005, False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = Environment(load_movies(), tmp, args)
+        print(f"{len(EXAMPLE_QUESTIONS)} pertanyaan x {args.users} sesi bersamaan, LLM {args.llm_latency * 1000:.0f}ms/panggilan\n")
+        print(f"{'skenario':<10} {'mode':<22} {'LLM calls':>9} {'p50':>8} {'maks':>8}  dihemat")
+        for scenario in ("sql_tool", "agent"):
+            modes = [("tanpa single-flight", None, False), ("level tool", SingleFlight(), False)]
+            if scenario == "agent":
+                modes.append(("tool + turn agent", SingleFlight(), True))
+            for name, flight, coalesce_turns in modes:
+                env.resources.single_flight = flight
+                latencies, calls, stats = burst(env, scenario, args.users, coalesce_turns)
+                saved = stats["upstream_calls_saved"] if stats else 0
+                print(f"{scenario:<10} {name:<22} {calls:>9} {statistics.median(latencies) * 1000:>6.0f}ms "
+                      f"{max(latencies) * 1000:>6.0f}ms  {saved}")
+        print()
+        error_and_timeout_demo()
+
+
+if __name__ == "__main__":
+    main()
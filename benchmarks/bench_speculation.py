@@ -0,0 +1,146 @@
+"""
+Benchmark retrieval spekulatif (`cinebot.speculation`) pada turn agent penuh.
+
+- Resource CineBot asli di atas backend palsu (`benchmarks.bench_suite.Environment`), latensi LLM / embedding /
+  pencarian bisa diatur (default mendekati OpenAI + Qdrant Cloud).
+- Turn agent penuh (tanpa fast path, seperti pertanyaan ambigu di main.py) untuk pertanyaan rekomendasi & SQL
+  korpus, dengan dan tanpa spekulasi. Seperti main.py, spekulasi hanya dimulai jika router condong ke
+  rekomendasi (`Router.leans_recommendation`): latensi p50 per kategori, turn yang dispekulasikan, hit rate,
+  latensi yang dihemat per turn, alasan miss, job dibatalkan/dibuang, dan embedding ekstra untuk pertanyaan SQL.
+- Cek perilaku: argumen yang diparafrasekan tetap hit (tool dipanggil setelah hop LLM pemilihan tool, jadi
+  hemat ~ min(hop LLM, embedding + pencarian)); argumen lain / tool lain / turn tanpa tool saat embedding
+  spekulatif masih berjalan -> miss, job berhenti sebelum pencarian vektor (`cancelled`), tool menjalankan
+  pekerjaannya sendiri.
+
+Contoh: python -m benchmarks.bench_speculation --llm-latency 0.4 --embed-latency 0.1 --search-latency 0.05
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import wait
+
+from benchmarks.bench_suite import CORPUS, RECOMMENDATION, Environment
+from benchmarks.data import load_movies
+from cinebot.metrics import MetricsCallbackHandler, StageMetrics, activate
+from cinebot.speculation import compatible, speculating
+from cinebot.tool_payloads import parse_payload
+from cinebot.tools import get_factual_movie_data, get_movie_recommendations, start_speculation
+
+
+def run_turns(env, questions, repeat):
+    latencies = {}
+    for _ in range(repeat):
+        for category, question in questions:
+            metrics = StageMetrics()
+            started = time.perf_counter()
+            with activate(metrics):
+                env.turn("agent", question, {"callbacks": [MetricsCallbackHandler(metrics)]})
+            latencies.setdefault(category, []).append(time.perf_counter() - started)
+    return latencies
+
+
+def latency_section(env, args):
+    questions = [("rag" if category == RECOMMENDATION else "sql", question) for category, question, _ in CORPUS]
+    speculator = env.resources.speculator
+    print(f"{'spekulasi':<10} {'p50 rag ms':>11} {'p50 sql ms':>11} {'embedding':>10}")
+    p50, embeds = {}, {}
+    for enabled in (False, True):
+        env.speculate = enabled
+        before, embeds_before = speculator.stats(), env.embeddings.query_calls
+        latencies = run_turns(env, questions, args.repeat)
+        p50[enabled] = {category: statistics.median(values) * 1000 for category, values in latencies.items()}
+        embeds[enabled] = env.embeddings.query_calls - embeds_before
+        print(f"{'ya' if enabled else 'tidak':<10} {p50[enabled]['rag']:>11.1f} {p50[enabled]['sql']:>11.1f} "
+              f"{embeds[enabled]:>10}")
+    stats = speculator.stats()
+    started = stats["started"] - before["started"]
+    hits, misses = stats["hits"] - before["hits"], stats["misses"] - before["misses"]
+    saved = stats["saved_seconds"] - before["saved_seconds"]
+    turns = len(questions) * args.repeat
+    print(f"\nDispekulasikan {started}/{turns} turn; hit rate {hits}/{hits + misses} "
+          f"({hits / max(hits + misses, 1):.0%}), hemat rata-rata {saved / max(hits, 1) * 1000:.1f}ms per hit; "
+          f"miss: {stats['miss_reasons']}, dibatalkan: {stats['cancelled'] - before['cancelled']}, "
+          f"dibuang: {stats['discarded'] - before['discarded']}")
+    saving = p50[False]["rag"] - p50[True]["rag"]
+    print(f"p50 turn rekomendasi turun {saving:.1f}ms (embedding + pencarian {args.embed_latency * 1000 + args.search_latency * 1000:.0f}ms), "
+          f"embedding ekstra karena spekulasi: {embeds[True] - embeds[False]}")
+    rag_turns = sum(category == "rag" for category, _ in questions) * args.repeat
+    assert started <= rag_turns + args.repeat, "spekulasi dimulai untuk pertanyaan SQL"
+    assert embeds[True] - embeds[False] <= args.repeat, "spekulasi membuang embedding untuk pertanyaan SQL"
+    assert saving > 0.5 * (args.embed_latency + args.search_latency) * 1000, "spekulasi tidak menghemat latensi"
+
+
+def behaviour_section(env, args):
+    env.speculate = True
+    speculator = env.resources.speculator
+    question = "Cari film tentang perjalanan waktu"
+
+    # Parafrase ringan (argumen dari LLM pemilih tool) tetap memakai hasil prefetch
+    assert compatible(question, "cari film tentang perjalanan waktu!")
+    assert compatible("Rekomendasi film tentang perjalanan waktu", "film tentang perjalanan waktu")
+    assert not compatible(question, "Cari film tentang perjalanan waktu sebelum tahun 1990"), "filter berbeda"
+    assert not compatible(question, "film horor tentang rumah berhantu")
+
+    # Tool dipanggil setelah hop LLM pemilihan tool (hit), atau saat embedding spekulatif masih berjalan (miss)
+    during_embedding = args.embed_latency / 2
+    cases = [
+        ("parafrase", "get_movie_recommendations", "cari film tentang perjalanan waktu", "hit", args.llm_latency),
+        ("argumen lain", "get_movie_recommendations", "film horor tentang rumah berhantu", "args", during_embedding),
+        ("tool lain", "get_factual_movie_data", "Top 10 film gross tertinggi", "other_tool", during_embedding),
+        ("tanpa tool", None, None, "no_tool", during_embedding),
+    ]
+    print(f"\n{'kasus':<14} {'hasil':<20} {'job'}")
+    for name, tool_name, argument, expected, delay in cases:
+        cancelled_before = speculator.stats()["cancelled"]
+        speculation = start_speculation(question)
+        with speculating(speculation):
+            time.sleep(delay)
+            output = None
+            if tool_name == "get_movie_recommendations":
+                output = get_movie_recommendations.invoke({"question": argument})
+            elif tool_name == "get_factual_movie_data":
+                output = get_factual_movie_data.invoke({"question": argument})
+        wait([speculation.future])
+        job = "dibatalkan" if speculation.cancelled else "selesai"
+        print(f"{name:<14} {speculation.describe():<20} {job}")
+        assert speculation.outcome == expected, (name, speculation.outcome)
+        if expected == "hit":
+            head_start = min(args.llm_latency, args.embed_latency + args.search_latency)
+            assert speculation.saved_seconds > 0.5 * head_start, (name, speculation.saved_seconds)
+        else:
+            assert speculation.cancelled and speculator.stats()["cancelled"] == cancelled_before + 1, name
+        if output is not None:
+            assert parse_payload(output)["type"] != "error"
+    print(f"stats(): {speculator.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Detik per panggilan LLM (simulasi).")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="Detik per embedding pertanyaan.")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Detik per pencarian Qdrant.")
+    parser.add_argument("--runtime", choices=["sync", "async"], default="sync")
+    parser.add_argument("--repeat", type=int, default=2, help="Putaran korpus per mode.")
+    args = parser.parse_args()
+    # Parameter yang dibutuhkan Environment benchmark suite
+    args.concurrency, args.timeout, args.token_latency, args.sql_direct = [1], 120.0, 0.0, False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = Environment(load_movies(), tmp, args)
+        env.resources.single_flight = None
+        env.resources.speculator.log = lambda message: None
+        if args.runtime == "async":
+            # Turn async dijalankan di loop runner (seperti main.py), satu per satu
+            sync_turn = env.turn
+            env.turn = lambda scenario, question, config: env.runner.run(env.aturn(scenario, question, config))
+        print(f"Runtime {args.runtime}, LLM {args.llm_latency * 1000:.0f}ms, embedding {args.embed_latency * 1000:.0f}ms, "
+              f"pencarian {args.search_latency * 1000:.0f}ms per panggilan\n")
+        latency_section(env, args)
+        if args.runtime == "async":
+            env.turn = sync_turn
+        behaviour_section(env, args)
+
+
+if __name__ == "__main__":
+    main()
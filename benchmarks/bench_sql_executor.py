@@ -0,0 +1,133 @@
+"""
+Benchmark & verifikasi lapisan eksekusi `sql_db_query` (`cinebot.sql_executor`) vs `SQLDatabase.run_no_throw`.
+
+- Latensi per query untuk SQL korpus benchmark (`benchmarks.bench_suite.SQL_SCRIPT`): SQLAlchemy lama,
+  pool read-only tanpa cache, dan cache hit (SQL yang sama dengan spasi/kapitalisasi berbeda).
+- Throughput konkuren (`--threads`) tanpa cache: SQLDatabase vs pool.
+- Guard: DML/DDL/PRAGMA/multi-statement ditolak, cross join tanpa LIMIT dihentikan oleh timeout,
+  hasil besar dipotong di batas baris.
+- Invalidasi: setup.py menulis ulang movies.db (os.replace) -> cache dikosongkan, hasil baru terbaca.
+- Sub-agent SQL end-to-end (ScriptedSQLChatModel): pertanyaan berulang -> `sql_db_query` kena cache.
+
+Contoh: python -m benchmarks.bench_sql_executor --repeat 200 --threads 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.utilities import SQLDatabase
+
+from benchmarks.bench_suite import SQL_SCRIPT
+from benchmarks.data import load_movies
+from benchmarks.fakes import ScriptedSQLChatModel
+from cinebot.ingest import write_sql_database
+from cinebot.sql_agent import build_sql_agent
+from cinebot.sql_executor import ReadOnlySQLExecutor
+from cinebot.sql_schema import agent_tables
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+GUARD_CASES = [
+    ("DML", "DELETE FROM movies"),
+    ("DDL", "DROP TABLE movies"),
+    ("multi-statement", "SELECT 1; DROP TABLE movies"),
+    ("PRAGMA", "PRAGMA table_info(movies)"),
+    ("CTE + DML", "WITH x AS (SELECT 1) DELETE FROM movies"),
+    ("cross join tanpa LIMIT", "SELECT COUNT(*) FROM movies a, movies b, movies c"),
+    ("hasil besar", "SELECT Movie_ID, Series_Title, Overview FROM movies"),
+]
+
+
+def per_query_ms(fn, queries, repeat):
+    durations = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            fn(query)
+            durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), statistics.quantiles(durations, n=20)[18]
+
+
+def throughput(fn, queries, threads, total):
+    jobs = [queries[i % len(queries)] for i in range(total)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fn, jobs))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=1.0, help="Timeout statement (detik) untuk uji guard.")
+    args = parser.parse_args()
+    quiet = lambda _: None
+    queries = list(dict.fromkeys(SQL_SCRIPT.values()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        df = load_movies()
+        write_sql_database(df, db_path, None, True)
+        db = SQLDatabase.from_uri(f"sqlite:///{db_path}", include_tables=agent_tables(db_path) or None)
+        uncached = ReadOnlySQLExecutor(db_path, cache_size=0, log=quiet)
+        cached = ReadOnlySQLExecutor(db_path, log=quiet)
+        rows = {
+            "SQLDatabase.run_no_throw": per_query_ms(db.run_no_throw, queries, args.repeat),
+            "pool read-only (tanpa cache)": per_query_ms(uncached.run, queries, args.repeat),
+            "cache hit (SQL dinormalisasi)": per_query_ms(
+                cached.run, [f"  {q.lower()};  " for q in queries], args.repeat),
+        }
+        total = args.repeat * len(queries)
+        concurrent = {
+            "SQLDatabase.run_no_throw": throughput(db.run_no_throw, queries, args.threads, total),
+            "pool read-only (tanpa cache)": throughput(uncached.run, queries, args.threads, total),
+        }
+
+        print(f"{len(queries)} query korpus x {args.repeat}\n")
+        print(f"{'jalur':<32} {'p50':>8} {'p95':>8}")
+        for name, (p50, p95) in rows.items():
+            print(f"{name:<32} {p50:>6.3f}ms {p95:>6.3f}ms")
+        print(f"\nThroughput {args.threads} thread:")
+        for name, qps in concurrent.items():
+            print(f"  {name:<32} {qps:>8.0f} query/detik")
+
+        guarded = ReadOnlySQLExecutor(db_path, timeout=args.timeout, max_rows=200, log=quiet)
+        print(f"\nGuard (timeout {args.timeout:g} detik, batas 200 baris):")
+        for name, sql in GUARD_CASES:
+            started = time.perf_counter()
+            try:
+                result = guarded.execute(sql)
+                outcome = f"{len(result.rows)} baris" + (" (dipotong)" if result.truncated else "")
+            except Exception as e:
+                outcome = f"{type(e).__name__}: {e}"
+            print(f"  {name:<24} {(time.perf_counter() - started) * 1000:>8.1f}ms  {outcome}")
+        probe = "SELECT COUNT(*) FROM movies"
+        assert cached.execute(probe).rows[0][0] == len(df)
+        assert cached.execute(probe).cached
+
+        # Invalidasi: setup.py menulis ulang movies.db (file sementara + os.replace)
+        write_sql_database(df.iloc[:-10], db_path, None, True)
+        after = cached.execute(probe)
+        print(f"\nSetelah movies.db ditulis ulang: COUNT(*) = {after.rows[0][0]} (cache: {after.cached}), "
+              f"invalidasi = {cached.stats()['invalidations']}")
+        assert after.rows[0][0] == len(df) - 10 and not after.cached
+
+        # Sub-agent end-to-end: pertanyaan yang sama dua kali
+        executor = ReadOnlySQLExecutor(db_path, log=quiet)
+        agent = build_sql_agent(ScriptedSQLChatModel(sql_script=SQL_SCRIPT, explore=False), db, executor=executor)
+        question = next(iter(SQL_SCRIPT))
+        for attempt in (1, 2):
+            agent.invoke({"messages": [{"role": "user", "content": question}]})
+            stats = executor.stats()
+            print(f"Sub-agent run {attempt}: hit={stats['hits']} miss={stats['misses']} "
+                  f"eksekusi={stats['executions']} ({stats['avg_execution_ms']:.2f}ms rata-rata)")
+        assert executor.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark skema SQLite: tabel datar lama (`df.to_sql`) vs skema bertipe & ber-index (`cinebot.sql_schema`).
+
+- Dataset diperbanyak `--scale` kali (judul diberi sufiks agar unik).
+- Untuk setiap pertanyaan tipikal (sutradara, tahun, top gross, genre, aktor, kata kunci judul/sinopsis)
+  dijalankan query versi lama (full scan / LIKE) dan versi baru (index / junction table / FTS5).
+- Laporan: EXPLAIN QUERY PLAN kedua versi, latensi rata-rata & p95 (ms), dan jumlah baris.
+  (FTS5 mencocokkan token, bukan substring, jadi jumlah baris kata kunci bisa lebih sedikit dari LIKE.)
+
+Contoh: python -m benchmarks.bench_sql_schema --scale 50 --repeat 20
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_ingest import scaled_dataframe
+from benchmarks.bench_retrieval import percentile
+from benchmarks.data import load_movies
+from cinebot.sql_schema import MOVIE_COLUMNS, build_movie_database
+
+# (nama, query lama, query baru, parameter)
+QUERIES = [
+    (
+        "film per sutradara",
+        "SELECT Series_Title, IMDB_Rating FROM movies WHERE Director = ? ORDER BY IMDB_Rating DESC",
+        "SELECT Series_Title, IMDB_Rating FROM movies WHERE Director = ? ORDER BY IMDB_Rating DESC",
+        ("Christopher Nolan",),
+    ),
+    (
+        "film per tahun",
+        "SELECT Series_Title FROM movies WHERE Released_Year = ? ORDER BY IMDB_Rating DESC LIMIT 5",
+        "SELECT Series_Title FROM movies WHERE Released_Year = ? ORDER BY IMDB_Rating DESC LIMIT 5",
+        (2010,),
+    ),
+    (
+        "top 5 gross",
+        "SELECT Series_Title, Gross FROM movies ORDER BY Gross DESC LIMIT 5",
+        "SELECT Series_Title, Gross FROM movies ORDER BY Gross DESC LIMIT 5",
+        (),
+    ),
+    (
+        "genre Sci-Fi",
+        "SELECT Series_Title FROM movies WHERE Genre LIKE '%' || ? || '%'",
+        "SELECT m.Series_Title FROM movies m JOIN movie_genres mg ON mg.Movie_ID = m.Movie_ID "
+        "JOIN genres g ON g.Genre_ID = mg.Genre_ID WHERE g.Name = ?",
+        ("Sci-Fi",),
+    ),
+    (
+        "film per aktor",
+        "SELECT Series_Title FROM movies WHERE Star1 = ?1 OR Star2 = ?1 OR Star3 = ?1 OR Star4 = ?1",
+        "SELECT m.Series_Title FROM movies m JOIN movie_stars ms ON ms.Movie_ID = m.Movie_ID "
+        "JOIN stars s ON s.Star_ID = ms.Star_ID WHERE s.Name = ?1",
+        ("Tom Hanks",),
+    ),
+    (
+        "kata kunci sinopsis",
+        "SELECT Series_Title FROM movies WHERE Overview LIKE '%' || ? || '%'",
+        "SELECT m.Series_Title FROM movies_fts f JOIN movies m ON m.Movie_ID = f.rowid WHERE movies_fts MATCH ?",
+        ("detective",),
+    ),
+]
+
+
+def build_legacy_database(db_path, df):
+    """Perilaku lama setup.py: `to_sql` tanpa tipe eksplisit & tanpa index."""
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        df[[name for name, _ in MOVIE_COLUMNS]].to_sql("movies", engine, if_exists="replace", index=False)
+    finally:
+        engine.dispose()
+
+
+def time_query(conn, sql, params, repeat):
+    timings, rows = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - t0)
+    return timings, len(rows)
+
+
+def query_plan(conn, sql, params):
+    return "; ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=50, help="Perbanyak dataset N kali.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = scaled_dataframe(load_movies(), args.scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        typed_path = os.path.join(tmp, "typed.db")
+
+        t0 = time.perf_counter()
+        build_legacy_database(legacy_path, df)
+        legacy_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        summary = build_movie_database(typed_path, df)
+        typed_build = time.perf_counter() - t0
+        print(f"{len(df)} film | build lama {legacy_build:.2f}s ({os.path.getsize(legacy_path) / 1e6:.1f} MB), "
+              f"build baru {typed_build:.2f}s ({os.path.getsize(typed_path) / 1e6:.1f} MB), FTS5={summary['fts']}\n")
+
+        legacy = sqlite3.connect(legacy_path)
+        typed = sqlite3.connect(typed_path)
+        try:
+            for name, legacy_sql, typed_sql, params in QUERIES:
+                old_times, old_rows = time_query(legacy, legacy_sql, params, args.repeat)
+                new_times, new_rows = time_query(typed, typed_sql, params, args.repeat)
+                old_ms = [t * 1000 for t in old_times]
+                new_ms = [t * 1000 for t in new_times]
+                print(f"== {name} ({old_rows} vs {new_rows} baris)")
+                print(f"   lama: {query_plan(legacy, legacy_sql, params)}")
+                print(f"   baru: {query_plan(typed, typed_sql, params)}")
+                print(f"   lama mean={statistics.mean(old_ms):.3f}ms p95={percentile(old_ms, 95):.3f}ms | "
+                      f"baru mean={statistics.mean(new_ms):.3f}ms p95={percentile(new_ms, 95):.3f}ms | "
+                      f"speedup {statistics.mean(old_ms) / max(statistics.mean(new_ms), 1e-9):.1f}x")
+        finally:
+            legacy.close()
+            typed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark cold start & overhead per rerun aplikasi Streamlit (`main.py`), plus cek regresi.
+
+Streamlit menjalankan ulang `main.py` di setiap interaksi. Resource berat (CineBotResources, ChatOpenAI,
+OpenAIEmbeddings, graph `create_agent`, client Langfuse) harus dibangun SEKALI per proses lewat factory
+ber-cache; rerun hanya boleh mengerjakan UI.
+
+- Proses anak baru (import dingin) menjalankan `main.py` lewat `streamlit.testing.v1.AppTest`
+  di direktori sementara berisi `movies.db` hasil CSV dan index NumPy lokal (HashEmbeddings,
+  `CINEBOT_RETRIEVER=numpy`), jadi tidak butuh server Qdrant, jaringan, maupun panggilan LLM.
+- Run pertama = cold start (import + konstruksi). Setelah itu konstruktor di atas dibungkus penghitung,
+  lalu `--reruns` rerun diukur. Import Langfuse hanya terjadi jika kuncinya dikonfigurasi.
+- `--check`: exit code 1 jika ada konstruksi berat di rerun, atau jika `langfuse` ter-import tanpa kunci.
+
+Contoh: python -m benchmarks.bench_startup --reruns 20 --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+RESULT_PREFIX = "STARTUP_RESULT "
+
+
+def count_calls(owner, name, counts, key):
+    """Bungkus `owner.name` (fungsi modul atau __init__ kelas) agar setiap panggilan tercatat di `counts[key]`."""
+    original = getattr(owner, name)
+
+    def wrapper(*args, **kwargs):
+        counts[key] += 1
+        return original(*args, **kwargs)
+
+    setattr(owner, name, wrapper)
+
+
+def child(reruns):
+    """Dijalankan di proses anak (cwd = direktori sementara berisi movies.db)."""
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    app = AppTest.from_file(MAIN_PATH, default_timeout=120)
+    app.secrets["OPENAI_API_KEY"] = "sk-bench"
+    app.secrets["QDRANT_URL"] = "http://127.0.0.1:9"
+    app.secrets["QDRANT_API_KEY"] = ""
+    app.run()
+    cold = time.perf_counter() - started
+    errors = [str(e.value) for e in app.exception]
+
+    import langchain.agents
+    import langchain_openai
+    import cinebot.resources
+
+    counts = {"CineBotResources": 0, "ChatOpenAI": 0, "OpenAIEmbeddings": 0, "create_agent": 0}
+    count_calls(cinebot.resources.CineBotResources, "__init__", counts, "CineBotResources")
+    count_calls(langchain_openai.ChatOpenAI, "__init__", counts, "ChatOpenAI")
+    count_calls(langchain_openai.OpenAIEmbeddings, "__init__", counts, "OpenAIEmbeddings")
+    count_calls(langchain.agents, "create_agent", counts, "create_agent")
+    langfuse_imported = "langfuse" in sys.modules
+
+    durations = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        durations.append(time.perf_counter() - started)
+        errors += [str(e.value) for e in app.exception]
+
+    print(RESULT_PREFIX + json.dumps({
+        "cold_seconds": cold,
+        "rerun_seconds": durations,
+        "constructions_per_rerun": counts,
+        "langfuse_imported": langfuse_imported or "langfuse" in sys.modules,
+        "errors": errors,
+    }))
+
+
+def prepare_workdir(path):
+    """Isi `path` dengan movies.db dan index NumPy lokal (data/index) seperti hasil setup.py."""
+    from benchmarks.data import load_movies
+    from benchmarks.fakes import HashEmbeddings
+    from cinebot.ingest import records_from_dataframe, write_sql_database
+    from cinebot.local_index import export_local_index
+
+    df = load_movies()
+    write_sql_database(df, os.path.join(path, "movies.db"), None, True)
+    records = records_from_dataframe(df)
+    vectors = HashEmbeddings().embed_documents([r.text for r in records])
+    export_local_index(os.path.join(path, "data", "index"), [r.point_id for r in records], vectors,
+                       [r.payload() for r in records], embedding_model="hash")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--check", action="store_true", help="Gagal (exit 1) jika rerun membangun ulang resource.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.reruns)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_workdir(tmp)
+        repo_root = os.path.dirname(MAIN_PATH)
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("LANGFUSE_", "CINEBOT_"))}
+        env["CINEBOT_RETRIEVER"] = "numpy"
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, env.get("PYTHONPATH")]))
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--reruns", str(args.reruns)],
+            cwd=tmp, env=env, capture_output=True, text=True,
+        )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if proc.returncode != 0 or not lines:
+        print(proc.stdout[-2000:], proc.stderr[-4000:], sep="\n")
+        sys.exit(1)
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+
+    reruns = [t * 1000 for t in result["rerun_seconds"]]
+    print(f"Cold start (import + konstruksi, run pertama): {result['cold_seconds']:.2f} detik")
+    print(f"Rerun ({len(reruns)}x): p50={statistics.median(reruns):.1f}ms max={max(reruns):.1f}ms")
+    print(f"Konstruksi selama rerun: {result['constructions_per_rerun']}")
+    print(f"Paket langfuse ter-import tanpa kunci: {result['langfuse_imported']}")
+    for error in result["errors"]:
+        print(f"Exception di app: {error}")
+
+    if args.check:
+        failures = [f"{name} dibangun {count}x selama rerun"
+                    for name, count in result["constructions_per_rerun"].items() if count]
+        if result["langfuse_imported"]:
+            failures.append("langfuse di-import padahal tidak dikonfigurasi")
+        failures += [f"exception: {error}" for error in result["errors"]]
+        if failures:
+            print("\nCEK GAGAL:\n  - " + "\n  - ".join(failures))
+            sys.exit(1)
+        print("\nCek lolos: rerun hanya mengerjakan UI.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark & verifikasi ingestion streaming (`cinebot.stream_ingest`, `setup.py --stream`).
+
+- CSV sintetis besar (`--rows`, salinan IMDb Top 1000 dengan judul/tahun/poster unik, sebagian baris tanpa
+  rating agar ikut dibuang) ditulis per salinan, jadi pembuatannya sendiri tidak memuat semuanya ke memori.
+- Setiap ukuran di-ingest di proses anak baru (puncak RSS = `ru_maxrss` proses itu saja):
+  * eager  : jalur `setup.py` biasa (read_csv -> SQLite -> semua record -> sync_collection)
+  * stream : `stream_ingest` per chunk (`--chunk-size`)
+  Qdrant diganti `benchmarks.fakes.DiskQdrantClient` (point di file SQLite, seperti server Qdrant yang
+  menyimpan point di luar proses setup.py), embedding memakai HashEmbeddings.
+- Cek memori: kenaikan puncak RSS mode stream dari ukuran terkecil ke terbesar harus < `--max-growth-mb`.
+- Crash & resume: proses anak dimatikan (`os._exit`) di tengah chunk setelah `--crash-after` dokumen
+  di-embed, lalu dijalankan ulang: harus melanjutkan dari checkpoint, tidak meng-embed ulang yang sudah
+  ter-upsert, dan menghasilkan database & koleksi yang sama dengan run tanpa crash.
+
+Contoh: python -m benchmarks.bench_stream_ingest --rows 20000 100000 --chunk-size 5000
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RESULT_PREFIX = "STREAM_INGEST_RESULT "
+CSV_PATH = "data/imdb_top_1000_cleaned.csv"
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    """Salinan ke-i: judul + " (i)", tahun digeser, poster diberi query unik; 1 baris per salinan tanpa rating."""
+    base = pd.read_csv(CSV_PATH)
+    written, copy_index = 0, 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            copy = base.iloc[:rows - written].copy()
+            if copy_index:
+                copy["Series_Title"] = copy["Series_Title"] + f" ({copy_index})"
+                copy["Released_Year"] = copy["Released_Year"] + (copy_index + seed) % 7 - 3
+                copy["Poster_Link"] = copy["Poster_Link"] + f"?copy={copy_index}"
+                copy.iloc[copy_index % len(copy), copy.columns.get_loc("IMDB_Rating")] = None
+            copy.to_csv(f, index=False, header=copy_index == 0)
+            written += len(copy)
+            copy_index += 1
+
+
+def db_digest(db_path):
+    """Hash isi database (tanpa tabel statistik) untuk membandingkan dua hasil ingest."""
+    conn = sqlite3.connect(db_path)
+    try:
+        digest = hashlib.sha256()
+        for line in conn.iterdump():
+            if "sqlite_stat" not in line:
+                digest.update(line.encode("utf-8"))
+        return digest.hexdigest()
+    finally:
+        conn.close()
+
+
+# === Proses anak ===
+def child(args):
+    from benchmarks.fakes import DiskQdrantClient, HashEmbeddings
+    from cinebot.stream_ingest import peak_rss_mb
+
+    embeddings = HashEmbeddings()
+    if args.crash_after:
+        embed_documents = embeddings.embed_documents
+
+        def crashing(texts):
+            if embeddings.embedded_texts >= args.crash_after:
+                os._exit(3)  # crash keras: tanpa finally/flush, seperti proses yang di-kill
+            return embed_documents(texts)
+        embeddings.embed_documents = crashing
+
+    client = DiskQdrantClient(os.path.join(args.workdir, "qdrant.sqlite"))
+    db_file = os.path.join(args.workdir, "movies.db")
+    started = time.perf_counter()
+    if args.child == "eager":
+        from cinebot.ingest import records_from_dataframe, sync_collection, write_sql_database
+        df = pd.read_csv(args.csv)
+        write_sql_database(df, db_file, force=True)
+        records = records_from_dataframe(df)
+        result = sync_collection(client, "movies", records, embeddings, batch_size=args.batch_size,
+                                 embedding_model="hash", log=lambda message: None)
+        summary = {"rows": len(records), "embedded": result["embedded_documents"], "resumed_from_row": 0}
+    else:
+        from cinebot.stream_ingest import stream_ingest
+        result = stream_ingest(client, "movies", args.csv, db_file, embeddings, chunk_size=args.chunk_size,
+                               batch_size=args.batch_size, embedding_model="hash",
+                               log=print if args.verbose else (lambda message: None))
+        summary = {"rows": result["stream"]["rows"], "embedded": embeddings.embedded_texts,
+                   "resumed_from_row": result["stream"]["resumed_from_row"], "dropped": result["stream"]["dropped"]}
+    summary.update({
+        "seconds": time.perf_counter() - started,
+        "peak_rss_mb": peak_rss_mb(),
+        "points": client.count("movies").count,
+        "db_digest": db_digest(db_file),
+    })
+    print(RESULT_PREFIX + json.dumps(summary))
+
+
+def run_child(mode, csv_path, workdir, args, crash_after=0):
+    os.makedirs(workdir, exist_ok=True)
+    command = [sys.executable, "-m", "benchmarks.bench_stream_ingest", "--child", mode, "--csv", csv_path,
+               "--workdir", workdir, "--chunk-size", str(args.chunk_size), "--batch-size", str(args.batch_size)]
+    if crash_after:
+        command += ["--crash-after", str(crash_after)]
+    if args.verbose:
+        command.append("--verbose")
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if args.verbose:
+        print(proc.stdout.rstrip())
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if crash_after:
+        assert proc.returncode == 3 and not lines, "proses anak seharusnya crash"
+        return None
+    if proc.returncode != 0 or not lines:
+        print(proc.stdout[-2000:], proc.stderr[-4000:], sep="\n")
+        sys.exit(1)
+    return json.loads(lines[-1][len(RESULT_PREFIX):])
+
+
+def memory_section(tmp, args):
+    print(f"{'baris':>8} {'mode':<7} {'RSS puncak':>10} {'detik':>7} {'baris/detik':>12} {'dibuang':>8}")
+    peaks = {"eager": [], "stream": []}
+    for rows in args.rows:
+        csv_path = os.path.join(tmp, f"movies_{rows}.csv")
+        write_synthetic_csv(csv_path, rows)
+        for mode in ("eager", "stream"):
+            result = run_child(mode, csv_path, os.path.join(tmp, f"{mode}_{rows}"), args)
+            peaks[mode].append(result["peak_rss_mb"])
+            print(f"{rows:>8} {mode:<7} {result['peak_rss_mb']:>7.0f} MB {result['seconds']:>7.1f} "
+                  f"{result['rows'] / result['seconds']:>12.0f} {result.get('dropped', '-'):>8}")
+            assert result["points"] == result["rows"], "jumlah point Qdrant != jumlah film"
+        os.remove(csv_path)
+
+    growth = {mode: values[-1] - values[0] for mode, values in peaks.items()}
+    print(f"\nKenaikan RSS puncak {args.rows[0]} -> {args.rows[-1]} baris: "
+          f"eager +{growth['eager']:.0f} MB, stream +{growth['stream']:.0f} MB")
+    assert growth["stream"] < args.max_growth_mb, f"RSS stream naik {growth['stream']:.0f} MB"
+
+
+def resume_section(tmp, args):
+    csv_path = os.path.join(tmp, "resume.csv")
+    write_synthetic_csv(csv_path, args.chunk_size * 4)
+    reference = run_child("stream", csv_path, os.path.join(tmp, "reference"), args)
+
+    workdir = os.path.join(tmp, "resume")
+    crash_after = args.chunk_size * 2 + args.chunk_size // 2
+    run_child("stream", csv_path, workdir, args, crash_after=crash_after)
+    resumed = run_child("stream", csv_path, workdir, args)
+    print(f"\nCrash setelah {crash_after} dokumen di-embed (di tengah chunk 3), lalu run ulang:")
+    print(f"  dilanjutkan dari baris sumber {resumed['resumed_from_row']}, "
+          f"{resumed['embedded']} dokumen di-embed pada run lanjutan "
+          f"(total {crash_after + resumed['embedded']} untuk {resumed['rows']} film)")
+    assert resumed["resumed_from_row"] == args.chunk_size * 2
+    assert crash_after + resumed["embedded"] <= resumed["rows"] + args.batch_size * 8
+    assert resumed["db_digest"] == reference["db_digest"], "database hasil resume != run tanpa crash"
+    assert resumed["points"] == reference["points"] == reference["rows"]
+    print("  database & jumlah point identik dengan run tanpa crash")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--max-growth-mb", type=float, default=40.0,
+                        help="Batas kenaikan RSS puncak mode stream dari ukuran terkecil ke terbesar.")
+    parser.add_argument("--child", choices=["eager", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--crash-after", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--verbose", action="store_true", help="Cetak progres per chunk proses anak.")
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory_section(tmp, args)
+        resume_section(tmp, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark time-to-first-token (TTFT): render sekali di akhir vs streaming token (`cinebot.chat.stream_*`).
+
+- Offline: FakeToolChatModel dengan latensi sampai token pertama (`--llm-latency`) dan jeda per kata
+  (`--token-latency`); tool diganti stub dengan nama yang sama (lihat bench_router).
+- Tanpa streaming, token pertama baru terlihat setelah turn selesai (TTFT = total).
+- Jalur: agent penuh dan fast path router, masing-masing sync dan async (`AsyncRunner.iterate`).
+
+Contoh: python -m benchmarks.bench_streaming --llm-latency 0.5 --token-latency 0.02 --answer-words 150
+"""
+import argparse
+import statistics
+import time
+
+from langchain.agents import create_agent
+
+from benchmarks.bench_retrieval import percentile
+from benchmarks.bench_router import STUB_TOOLS
+from benchmarks.fakes import FakeToolChatModel
+from cinebot.async_runtime import AsyncRunner
+from cinebot.chat import (
+    astream_agent_turn, astream_fast_path_turn, run_agent_turn, run_fast_path_turn,
+    stream_agent_turn, stream_fast_path_turn, to_langchain_messages,
+)
+from cinebot.router import FACTUAL, RouteDecision
+
+QUESTION = "Kasih tau daftar film dari Christopher Nolan"
+
+
+def consume(events):
+    """Kembalikan (ttft, total) seperti yang dilihat UI: waktu token pertama & waktu event result."""
+    started = time.perf_counter()
+    ttft = None
+    for event in events:
+        if event.kind == "token" and ttft is None:
+            ttft = time.perf_counter() - started
+    total = time.perf_counter() - started
+    return (ttft if ttft is not None else total), total
+
+
+def blocking(fn):
+    started = time.perf_counter()
+    fn()
+    total = time.perf_counter() - started
+    return total, total
+
+
+def report(name, samples):
+    ttft = [t * 1000 for t, _ in samples]
+    total = [t * 1000 for _, t in samples]
+    print(f"  {name:<20} TTFT p50={statistics.median(ttft):7.1f}ms p95={percentile(ttft, 95):7.1f}ms | "
+          f"total p50={statistics.median(total):7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Detik sampai token pertama per panggilan LLM.")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Detik per kata berikutnya.")
+    parser.add_argument("--answer-words", type=int, default=120, help="Panjang jawaban sintesis (kata).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    llm = FakeToolChatModel(latency=args.llm_latency, token_latency=args.token_latency, answer_words=args.answer_words)
+    agent = create_agent(llm, STUB_TOOLS)
+    messages = to_langchain_messages([{"role": "user", "content": QUESTION}])
+    decision = RouteDecision(FACTUAL, 1.0, "benchmark", None, {})
+    fast_path_args = (llm, "system", messages, decision, STUB_TOOLS, None)
+    runner = AsyncRunner()
+
+    runs = {
+        "agent (blocking)": lambda: blocking(lambda: run_agent_turn(agent, messages)),
+        "agent stream": lambda: consume(stream_agent_turn(agent, messages)),
+        "agent astream": lambda: consume(runner.iterate(astream_agent_turn(agent, messages))),
+        "fast path (blocking)": lambda: blocking(lambda: run_fast_path_turn(*fast_path_args)),
+        "fast path stream": lambda: consume(stream_fast_path_turn(*fast_path_args)),
+        "fast path astream": lambda: consume(runner.iterate(astream_fast_path_turn(*fast_path_args))),
+    }
+    print(f"LLM: {args.llm_latency * 1000:.0f}ms ke token pertama, {args.token_latency * 1000:.0f}ms/kata, "
+          f"jawaban {args.answer_words} kata\n")
+    try:
+        for name, run in runs.items():
+            run()  # warm-up
+            report(name, [run() for _ in range(args.repeat)])
+    finally:
+        runner.close()
+
+
+if __name__ == "__main__":
+    main()
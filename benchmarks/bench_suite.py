@@ -0,0 +1,423 @@
+"""
+Suite benchmark & load test offline untuk tool dan agent CineBot (deteksi regresi performa).
+
+Mode load (default): resource CineBot ASLI (tools, router, sub-agent SQL, payload, metrik) tanpa jaringan:
+- Qdrant in-memory diisi dari `data/imdb_top_1000_cleaned.csv` dengan HashEmbeddings (deterministik),
+  SQLite `movies.db` sementara dengan skema yang sama dengan setup.py.
+- Agent utama: FakeToolChatModel; tool SQL: ScriptedSQLChatModel (`--sql-mode single_shot`: satu panggilan menulis
+  SQL yang divalidasi lokal; `agent`: list tables -> schema -> query -> jawaban) sehingga tool `sql_db_*` asli ikut
+  dieksekusi. Latensi LLM / embedding / pencarian bisa diatur.
+- Korpus pertanyaan realistis (rekomendasi, daftar sutradara/aktor, top-N gross, rating per tahun, genre,
+  fakta tunggal) di-replay pada beberapa level konkurensi (closed loop: C worker, `--requests` total).
+- Skenario: `rag_tool`, `sql_tool` (tool langsung), `agent` (agent penuh), `app` (router fast path + fallback agent,
+  seperti main.py). Turn agent memulai retrieval spekulatif seperti main.py (hanya jika router condong ke rekomendasi;
+  `--no-speculation` untuk mematikan). Runtime `sync` (thread per turn) atau `async` (`AsyncRunner`, tool async, AsyncQdrantClient).
+- Laporan: throughput, latensi p50/p95/p99, panggilan LLM per turn (agent utama + sub-agent SQL), RSS memori,
+  dan p50 per tahap dari `cinebot.metrics`. `--output hasil.json` menyimpan angka untuk dibandingkan antar commit.
+
+Mode skala (`--scale 10 100 1000`): dataset diperbesar sintetis (`benchmarks.data.synthetic_movies`) untuk mengukur
+ingestion (record + embed + upsert, dok/detik) dan latensi retrieval Qdrant vs index NumPy lokal di setiap ukuran.
+
+Contoh:
+  python -m benchmarks.bench_suite --scenarios agent app --concurrency 1 8 32 --requests 200 --llm-latency 0.2
+  python -m benchmarks.bench_suite --runtime async --concurrency 64 --requests 512
+  python -m benchmarks.bench_suite --scale 1 10 100
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import create_agent
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+
+import cinebot.resources as cinebot_resources
+from benchmarks.bench_retrieval import percentile
+from benchmarks.data import load_movies, synthetic_movies
+from benchmarks.fakes import (
+    DelayedAsyncQdrantClient, FakeToolChatModel, HashEmbeddings, ScriptedSQLChatModel, SerializedQdrantClient,
+)
+from cinebot.chat import arun_agent_turn, arun_fast_path_turn, run_agent_turn, run_fast_path_turn, to_langchain_messages
+from cinebot.config import Settings
+from cinebot.ingest import records_from_dataframe, sync_collection, write_sql_database
+from cinebot.local_index import NumpyIndex, export_from_qdrant
+from cinebot.metrics import MetricsCallbackHandler, StageMetrics, activate
+from cinebot.speculation import speculating
+from cinebot.sql_agent import build_sql_agent
+from cinebot.tools import get_factual_movie_data, get_movie_recommendations, start_speculation, tools
+
+COLLECTION = "bench_suite"
+SYSTEM_PROMPT = "CineBot (benchmark)"
+RECOMMENDATION = "recommendation"
+
+# (kategori, pertanyaan, SQL yang "ditulis" sub-agent SQL untuk pertanyaan itu)
+CORPUS = [
+    (RECOMMENDATION, "Rekomendasi film yang mirip Inception", None),
+    (RECOMMENDATION, "Cari film tentang perjalanan waktu", None),
+    (RECOMMENDATION, "film tentang persahabatan dan keluarga", None),
+    (RECOMMENDATION, "film tentang perang yang emosional", None),
+    (RECOMMENDATION, "Rekomendasi film seperti thriller detektif dengan plot twist", None),
+    (RECOMMENDATION, "film tentang mafia dan keluarga kriminal sebelum tahun 1990", None),
+    ("director", "Kasih tau daftar film dari Christopher Nolan",
+     "SELECT Movie_ID, Series_Title, Released_Year, IMDB_Rating FROM movies "
+     "WHERE Director = 'Christopher Nolan' ORDER BY IMDB_Rating DESC LIMIT 5"),
+    ("director", "Rekomendasi film Steven Spielberg",
+     "SELECT Movie_ID, Series_Title, Released_Year, IMDB_Rating FROM movies "
+     "WHERE Director = 'Steven Spielberg' ORDER BY IMDB_Rating DESC LIMIT 5"),
+    ("top_gross", "Apa 5 film dengan pendapatan (gross) tertinggi?",
+     "SELECT Movie_ID, Series_Title, Gross FROM movies ORDER BY Gross DESC LIMIT 5"),
+    ("top_gross", "Top 10 film gross tertinggi",
+     "SELECT Movie_ID, Series_Title, Gross FROM movies ORDER BY Gross DESC LIMIT 10"),
+    ("top_rating", "Top 5 film rating tertinggi tahun 2010",
+     "SELECT Movie_ID, Series_Title, IMDB_Rating FROM movies WHERE Released_Year = 2010 "
+     "ORDER BY IMDB_Rating DESC LIMIT 5"),
+    ("star", "Kasih tau semua film Tom Hanks",
+     "SELECT m.Movie_ID, m.Series_Title, m.Released_Year FROM movies m JOIN movie_stars ms ON ms.Movie_ID = m.Movie_ID "
+     "JOIN stars s ON s.Star_ID = ms.Star_ID WHERE s.Name = 'Tom Hanks' ORDER BY m.IMDB_Rating DESC LIMIT 5"),
+    ("genre", "Daftar film genre Sci-Fi terbaik",
+     "SELECT m.Movie_ID, m.Series_Title, m.IMDB_Rating FROM movies m JOIN movie_genres mg ON mg.Movie_ID = m.Movie_ID "
+     "JOIN genres g ON g.Genre_ID = mg.Genre_ID WHERE g.Name = 'Sci-Fi' ORDER BY m.IMDB_Rating DESC LIMIT 5"),
+    ("fact", "Siapa sutradara film The Dark Knight?",
+     "SELECT Movie_ID, Series_Title, Director FROM movies WHERE Series_Title = 'The Dark Knight'"),
+    ("fact", "Berapa durasi film Interstellar?",
+     "SELECT Movie_ID, Series_Title, Runtime FROM movies WHERE Series_Title = 'Interstellar'"),
+    ("aggregate", "Berapa rata-rata rating film Quentin Tarantino?",
+     "SELECT AVG(IMDB_Rating) FROM movies WHERE Director = 'Quentin Tarantino'"),
+]
+SQL_SCRIPT = {question: sql for _, question, sql in CORPUS if sql}
+
+# Qdrant local mode selalu brute-force; peringatan search_params tidak relevan untuk benchmark
+warnings.filterwarnings("ignore", message="Local mode performs exact")
+
+
+def rss_mb():
+    """RSS proses saat ini (MB, Linux /proc) dan puncaknya (ru_maxrss, KB di Linux)."""
+    current = 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        pass
+    return current, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_collection(df, embeddings):
+    """Isi koleksi Qdrant in-memory; kembalikan (client, detik membangun record, detik total ingestion)."""
+    client = QdrantClient(":memory:")
+    started = time.perf_counter()
+    records = records_from_dataframe(df)
+    records_seconds = time.perf_counter() - started
+    sync_collection(client, COLLECTION, records, embeddings, batch_size=256, full=True,
+                    embedding_model="hash", log=lambda *_: None)
+    return client, records_seconds, time.perf_counter() - started
+
+
+async def copy_to_async_client(client):
+    """Salin koleksi in-memory ke AsyncQdrantClient local mode (jalur async memakai client terpisah)."""
+    async_client = AsyncQdrantClient(":memory:")
+    info = client.get_collection(COLLECTION)
+    await async_client.create_collection(COLLECTION, vectors_config=info.config.params.vectors)
+    offset = None
+    while True:
+        points, offset = client.scroll(COLLECTION, limit=512, offset=offset, with_vectors=True, with_payload=True)
+        await async_client.upsert(COLLECTION, points=[
+            models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points
+        ])
+        if offset is None:
+            return async_client
+
+
+class Environment:
+    """Resource CineBot asli di atas backend palsu + fungsi turn per skenario."""
+
+    def __init__(self, df, tmp, args):
+        self.embeddings = HashEmbeddings()
+        client, _, _ = load_collection(df, self.embeddings)
+        self.embeddings.latency = args.embed_latency  # latensi hanya untuk embedding pertanyaan
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(df, db_path, None, True)
+
+        settings = Settings(
+            openai_api_key="bench", qdrant_url="http://localhost", qdrant_collection_name=COLLECTION,
+            sql_db_uri=f"sqlite:///{db_path}", answer_cache_enabled=False, embedding_cache_enabled=False,
+            async_enabled=args.runtime == "async", max_concurrent_turns=max(args.concurrency),
+            request_timeout=args.timeout, metrics_enabled=False,
+        )
+        self.llm = FakeToolChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+        self.sql_llm = ScriptedSQLChatModel(latency=args.llm_latency, sql_script=SQL_SCRIPT,
+                                            explore=not args.sql_direct)
+        self.resources = cinebot_resources.CineBotResources(
+            settings, llm=self.llm, embeddings=self.embeddings,
+            qdrant_client=SerializedQdrantClient(client, args.search_latency),
+        )
+        cinebot_resources._resources = self.resources
+        self.resources.sql_agent = build_sql_agent(self.sql_llm, self.resources.db, top_k=settings.sql_top_k,
+                                                   executor=self.resources.sql_executor)
+        # Tool SQL: single-shot & fallback ReAct memakai LLM SQL berskrip yang sama
+        self.resources.text_to_sql.llm = self.sql_llm
+        self.resources.text_to_sql.agent = self.resources.sql_agent
+        self.resources.text_to_sql.mode = getattr(args, "sql_mode", "single_shot")
+        self.agent = create_agent(self.llm, tools, system_prompt=SYSTEM_PROMPT)
+        self.speculate = getattr(args, "speculation", True)
+        self.runner = self.resources.runner
+        if self.runner is not None:
+            async_client = asyncio.run_coroutine_threadsafe(copy_to_async_client(client), self.runner.loop).result()
+            self.resources.async_qdrant_client = DelayedAsyncQdrantClient(async_client, args.search_latency)
+
+    def llm_calls(self):
+        return self.llm.calls + self.sql_llm.calls
+
+    # --- Turn per skenario (sync & async), semuanya mengembalikan sumber jawaban ---
+    def turn(self, scenario, question, config):
+        if scenario == "rag_tool":
+            get_movie_recommendations.invoke({"question": question}, config=config)
+            return "tool"
+        if scenario == "sql_tool":
+            get_factual_movie_data.invoke({"question": question}, config=config)
+            return "tool"
+        messages = to_langchain_messages([{"role": "user", "content": question}])
+        decision = self.fast_path_decision(scenario, question)
+        if decision is not None:
+            return run_fast_path_turn(self.llm, SYSTEM_PROMPT, messages, decision, tools,
+                                      self.resources.sql_db_path, config=config).source
+        with speculating(self.speculation(scenario, question)):
+            return run_agent_turn(self.agent, messages, config).source
+
+    async def aturn(self, scenario, question, config):
+        if scenario == "rag_tool":
+            await get_movie_recommendations.ainvoke({"question": question}, config=config)
+            return "tool"
+        if scenario == "sql_tool":
+            await get_factual_movie_data.ainvoke({"question": question}, config=config)
+            return "tool"
+        messages = to_langchain_messages([{"role": "user", "content": question}])
+        decision = self.fast_path_decision(scenario, question)
+        if decision is not None:
+            result = await arun_fast_path_turn(self.llm, SYSTEM_PROMPT, messages, decision, tools,
+                                               self.resources.sql_db_path, config=config)
+            return result.source
+        with speculating(self.speculation(scenario, question)):
+            return (await arun_agent_turn(self.agent, messages, config)).source
+
+    def fast_path_decision(self, scenario, question):
+        router = self.resources.router
+        if scenario != "app" or router is None:
+            return None
+        decision = router.route(question)
+        return decision if router.is_confident(decision) else None
+
+    def speculation(self, scenario, question):
+        """Seperti main.py: retrieval spekulatif untuk turn agent hanya jika router condong ke rekomendasi."""
+        if not self.speculate:
+            return None
+        router = self.resources.router
+        if router is not None and not router.leans_recommendation(question):
+            return None
+        return start_speculation(question)
+
+
+def scenario_questions(scenario):
+    if scenario == "rag_tool":
+        return [q for category, q, _ in CORPUS if category == RECOMMENDATION]
+    if scenario == "sql_tool":
+        return [q for category, q, _ in CORPUS if category != RECOMMENDATION]
+    return [q for _, q, _ in CORPUS]
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies = []
+        self.metrics = []
+        self.sources = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, latency, metrics, source):
+        with self._lock:
+            self.latencies.append(latency)
+            self.metrics.append(metrics)
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+
+def run_sync_level(env, scenario, questions, concurrency, requests):
+    result, counter = LoadResult(), itertools.count()
+
+    def worker():
+        while (i := next(counter)) < requests:
+            metrics = StageMetrics()
+            config = {"callbacks": [MetricsCallbackHandler(metrics)]}
+            started = time.perf_counter()
+            try:
+                with activate(metrics):
+                    source = env.turn(scenario, questions[i % len(questions)], config)
+                result.add(time.perf_counter() - started, metrics, source)
+            except Exception:
+                result.error()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return result
+
+
+def run_async_level(env, scenario, questions, concurrency, requests):
+    result, counter = LoadResult(), itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            metrics = StageMetrics()
+            config = {"callbacks": [MetricsCallbackHandler(metrics)]}
+            started = time.perf_counter()
+            try:
+                with activate(metrics):
+                    source = await env.runner.guarded(env.aturn(scenario, questions[i % len(questions)], config))
+                result.add(time.perf_counter() - started, metrics, source)
+            except Exception:
+                result.error()
+
+    async def drive():
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    asyncio.run_coroutine_threadsafe(drive(), env.runner.loop).result()
+    return result
+
+
+def stage_p50(results):
+    """p50 (ms) per tahap atas semua turn; tahap yang muncul >1x per turn dijumlahkan dulu per turn."""
+    per_stage = {}
+    for metrics in results.metrics:
+        for name, _, seconds in metrics.breakdown():
+            per_stage.setdefault(name, []).append(seconds * 1000)
+    return {name: round(statistics.median(values), 2) for name, values in per_stage.items()}
+
+
+def sql_label(args):
+    if args.sql_mode == "single_shot":
+        return "single-shot (fallback ReAct)"
+    return "sub-agent " + ("langsung query" if args.sql_direct else "ReAct 4 langkah")
+
+
+def run_load(args):
+    df = load_movies()
+    report = {"mode": "load", "runtime": args.runtime, "sql_mode": args.sql_mode, "llm_latency": args.llm_latency,
+              "embed_latency": args.embed_latency, "search_latency": args.search_latency, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = Environment(df, tmp, args)
+        run_level = run_async_level if args.runtime == "async" else run_sync_level
+        print(f"Runtime {args.runtime}, latensi LLM {args.llm_latency:.3f}s, embedding {args.embed_latency:.3f}s, "
+              f"pencarian {args.search_latency:.3f}s; SQL {sql_label(args)}")
+        print(f"{'skenario':<9} {'C':>4} {'n':>5} {'err':>4} {'turn/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'LLM/turn':>8} {'RSS MB':>7}")
+        for scenario in args.scenarios:
+            questions = scenario_questions(scenario)
+            run_level(env, scenario, questions, 1, min(len(questions), args.requests))  # warm-up
+            for concurrency in args.concurrency:
+                calls_before = env.llm_calls()
+                started = time.perf_counter()
+                result = run_level(env, scenario, questions, concurrency, args.requests)
+                wall = time.perf_counter() - started
+                calls = (env.llm_calls() - calls_before) / max(len(result.latencies) + result.errors, 1)
+                latencies = [t * 1000 for t in result.latencies] or [0.0]
+                current_rss, peak_rss = rss_mb()
+                row = {
+                    "scenario": scenario, "concurrency": concurrency, "requests": len(result.latencies),
+                    "errors": result.errors, "throughput": len(result.latencies) / wall,
+                    "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+                    "p99_ms": percentile(latencies, 99), "llm_calls_per_turn": calls,
+                    "rss_mb": current_rss, "peak_rss_mb": peak_rss,
+                    "sources": result.sources, "stage_p50_ms": stage_p50(result),
+                }
+                report["results"].append(row)
+                print(f"{scenario:<9} {concurrency:>4} {row['requests']:>5} {row['errors']:>4} {row['throughput']:>8.1f} "
+                      f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {calls:>8.2f} {current_rss:>7.0f}")
+            stages = ", ".join(f"{name}={ms:.1f}" for name, ms in row["stage_p50_ms"].items())
+            print(f"          p50 per tahap (ms, C={concurrency}): {stages}")
+        env.resources.close()
+    return report
+
+
+def run_scale(args):
+    base = load_movies()
+    queries = [q for category, q, _ in CORPUS if category == RECOMMENDATION]
+    report = {"mode": "scale", "results": []}
+    print(f"{'skala':>6} {'dokumen':>9} {'record s':>9} {'ingest s':>9} {'dok/s':>8} {'RSS MB':>7} "
+          f"{'qdrant p50/p95/p99 ms':>24} {'numpy p50/p95/p99 ms':>23}")
+    for scale in args.scale:
+        df = synthetic_movies(base, scale, seed=args.seed)
+        embeddings = HashEmbeddings()
+        client, records_seconds, ingest_seconds = load_collection(df, embeddings)
+        vectors = [embeddings.embed_query(q) for q in queries]
+
+        qdrant_times = []
+        for i in range(args.queries):
+            started = time.perf_counter()
+            client.query_points(COLLECTION, query=vectors[i % len(vectors)], limit=3, with_payload=True)
+            qdrant_times.append((time.perf_counter() - started) * 1000)
+        with tempfile.TemporaryDirectory() as tmp:
+            export_from_qdrant(client, COLLECTION, tmp, embedding_model="hash")
+            index = NumpyIndex.load(tmp)
+            numpy_times = []
+            for i in range(args.queries):
+                started = time.perf_counter()
+                index.search(vectors[i % len(vectors)], k=3)
+                numpy_times.append((time.perf_counter() - started) * 1000)
+            del index
+        current_rss, _ = rss_mb()
+        row = {
+            "scale": scale, "documents": len(df), "records_seconds": records_seconds,
+            "ingest_seconds": ingest_seconds, "docs_per_sec": len(df) / ingest_seconds, "rss_mb": current_rss,
+            "qdrant_ms": [percentile(qdrant_times, p) for p in (50, 95, 99)],
+            "numpy_ms": [percentile(numpy_times, p) for p in (50, 95, 99)],
+        }
+        report["results"].append(row)
+        print(f"{scale:>6} {len(df):>9} {records_seconds:>9.2f} {ingest_seconds:>9.2f} {row['docs_per_sec']:>8.0f} "
+              f"{current_rss:>7.0f} {'/'.join(f'{v:.2f}' for v in row['qdrant_ms']):>24} "
+              f"{'/'.join(f'{v:.2f}' for v in row['numpy_ms']):>23}")
+        client.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=["rag_tool", "sql_tool", "agent", "app"],
+                        choices=["rag_tool", "sql_tool", "agent", "app"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=96, help="Jumlah turn per level konkurensi.")
+    parser.add_argument("--runtime", choices=["sync", "async"], default="sync")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Detik per panggilan LLM (simulasi).")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Detik per kata jawaban (simulasi).")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Detik per embedding pertanyaan.")
+    parser.add_argument("--search-latency", type=float, default=0.01, help="Detik per pencarian Qdrant.")
+    parser.add_argument("--sql-mode", choices=["single_shot", "agent"], default="single_shot",
+                        help="Mode tool SQL (CINEBOT_SQL_MODE).")
+    parser.add_argument("--sql-direct", action="store_true", help="Sub-agent SQL langsung query (tanpa list/schema).")
+    parser.add_argument("--no-speculation", dest="speculation", action="store_false",
+                        help="Matikan retrieval spekulatif di turn agent.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout per turn (runtime async).")
+    parser.add_argument("--scale", type=int, nargs="+", help="Mode skala: perbesar dataset N kali (mis. 10 100 1000).")
+    parser.add_argument("--queries", type=int, default=200, help="Query retrieval per ukuran (mode skala).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON (untuk dibandingkan antar commit).")
+    args = parser.parse_args()
+
+    report = run_scale(args) if args.scale else run_load(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=float)
+        print(f"\nHasil disimpan di '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark tool SQL: text-to-SQL single-shot (`cinebot.text_to_sql`) vs sub-agent ReAct.
+
+- Resource CineBot asli di atas backend palsu (`benchmarks.bench_suite.Environment`): SQLite sementara dengan skema
+  setup.py, LLM SQL = ScriptedSQLChatModel (SQL dari korpus benchmark, latensi `--llm-latency` per panggilan).
+- Pertanyaan SQL korpus (`benchmarks.bench_suite.CORPUS`) lewat tool `get_factual_movie_data` di dua mode
+  (`CINEBOT_SQL_MODE`): `agent` (list tables -> schema -> query -> jawaban) dan `single_shot`
+  (satu panggilan menulis SQL, validasi guard + EXPLAIN, eksekusi lokal). Laporan: round trip LLM per
+  pertanyaan dan latensi p50/maks; SQL yang dieksekusi kedua mode harus sama.
+- Fallback: jawaban single-shot dipaksa salah (kolom tidak ada, statement tulis, NO_SQL) -> harus ditolak lokal
+  sebelum eksekusi lalu dijawab sub-agent ReAct (1 + 4 round trip), dengan alasan tercatat di `stats()`.
+
+Contoh: python -m benchmarks.bench_text_to_sql --llm-latency 0.2
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_suite import CORPUS, RECOMMENDATION, Environment
+from benchmarks.data import load_movies
+from cinebot.tool_payloads import parse_payload
+from cinebot.tools import get_factual_movie_data
+
+# (pertanyaan, jawaban single-shot yang salah, alasan fallback yang diharapkan, SQL yang ditulis sub-agent ReAct)
+FALLBACK_CASES = [
+    ("Film apa yang paling lama durasinya?", "SELECT Movie_ID, Series_Title, Duration FROM movies LIMIT 1",
+     "invalid", "SELECT Movie_ID, Series_Title, Runtime FROM movies ORDER BY Runtime DESC LIMIT 1"),
+    ("Hapus film dengan rating terendah", "```sql\nDELETE FROM movies WHERE IMDB_Rating < 7.7;\n```",
+     "invalid", "SELECT Movie_ID, Series_Title, IMDB_Rating FROM movies ORDER BY IMDB_Rating ASC LIMIT 5"),
+    ("Berapa film yang dirilis di bulan Desember?", "NO_SQL",
+     "no_sql", "SELECT COUNT(*) FROM movies"),
+]
+
+
+def run_questions(env, questions):
+    """Jalankan tool per pertanyaan; kembalikan [(pertanyaan, panggilan LLM, detik, payload)]."""
+    rows = []
+    for question in questions:
+        calls_before = env.sql_llm.calls
+        started = time.perf_counter()
+        output = get_factual_movie_data.invoke({"question": question})
+        seconds = time.perf_counter() - started
+        rows.append((question, env.sql_llm.calls - calls_before, seconds, parse_payload(output)))
+    return rows
+
+
+def mode_section(env, questions):
+    print(f"{'mode':<12} {'pertanyaan':>10} {'LLM/pertanyaan':>15} {'p50 ms':>8} {'maks ms':>8}")
+    results = {}
+    for mode in ("agent", "single_shot"):
+        env.resources.text_to_sql.mode = mode
+        env.resources.sql_executor._cache.clear()  # eksekusi SQL diukur tanpa cache hasil dari mode sebelumnya
+        rows = run_questions(env, questions)
+        results[mode] = rows
+        calls = [row[1] for row in rows]
+        latencies = [row[2] * 1000 for row in rows]
+        print(f"{mode:<12} {len(rows):>10} {statistics.mean(calls):>15.2f} {statistics.median(latencies):>8.1f} "
+              f"{max(latencies):>8.1f}")
+        for _, _, _, payload in rows:
+            assert payload is not None and payload["type"] != "error", payload
+
+    for (question, _, _, react), (_, calls, _, single) in zip(results["agent"], results["single_shot"]):
+        assert calls == 1, f"single-shot '{question}': {calls} panggilan LLM"
+        assert single["sql"] == react["sql"], f"SQL berbeda untuk '{question}'"
+        if "Movie_ID" in single["sql"]:
+            assert single["type"] == "movies" and all(m["poster"].startswith("poster:") for m in single["movies"])
+        else:
+            assert single["type"] == "sql" and single["answer"]
+    return results
+
+
+def fallback_section(env):
+    text_to_sql = env.resources.text_to_sql
+    text_to_sql.mode = "single_shot"
+    env.sql_llm.single_shot_script = {question: reply for question, reply, _, _ in FALLBACK_CASES}
+    env.sql_llm.sql_script.update({question: sql for question, _, _, sql in FALLBACK_CASES})
+    before = text_to_sql.stats()
+    executions_before = env.resources.sql_executor.stats()["executions"]
+
+    print(f"\n{'fallback':<46} {'alasan':<10} {'LLM':>4} {'ms':>8}")
+    rows = run_questions(env, [question for question, _, _, _ in FALLBACK_CASES])
+    for (question, reply, reason, sql), (_, calls, seconds, payload) in zip(FALLBACK_CASES, rows):
+        print(f"{question:<46} {reason:<10} {calls:>4} {seconds * 1000:>8.1f}")
+        assert calls == 1 + 4, f"'{question}': {calls} panggilan LLM (harapan 1 single-shot + 4 ReAct)"
+        assert payload["type"] == "sql" and payload["sql"] == sql, payload
+
+    stats = text_to_sql.stats()
+    reasons = {reason: stats["fallback_reasons"].get(reason, 0) - before["fallback_reasons"].get(reason, 0)
+               for reason in stats["fallback_reasons"]}
+    expected = {}
+    for _, _, reason, _ in FALLBACK_CASES:
+        expected[reason] = expected.get(reason, 0) + 1
+    assert reasons == expected, reasons
+    # SQL yang ditolak tidak pernah dieksekusi: hanya query sub-agent ReAct yang sampai ke SQLite
+    executions = env.resources.sql_executor.stats()["executions"] - executions_before
+    assert executions == len(FALLBACK_CASES), executions
+    print(f"\nstats(): {stats['questions']} pertanyaan, rata-rata LLM single-shot "
+          f"{stats['avg_llm_calls_single_shot']:.2f}, fallback {stats['avg_llm_calls_fallback']:.2f}, "
+          f"agent {stats['avg_llm_calls_agent']:.2f}; fallback rate {stats['fallback_rate']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Detik per panggilan LLM (simulasi).")
+    args = parser.parse_args()
+    # Parameter yang dibutuhkan Environment benchmark suite
+    args.runtime, args.concurrency, args.timeout = "sync", [1], 120.0
+    args.token_latency, args.embed_latency, args.search_latency, args.sql_direct = 0.0, 0.0, 0.0, False
+
+    questions = [question for category, question, _ in CORPUS if category != RECOMMENDATION]
+    with tempfile.TemporaryDirectory() as tmp:
+        env = Environment(load_movies(), tmp, args)
+        env.resources.single_flight = None
+        env.resources.text_to_sql.log = lambda message: None
+        env.resources.sql_executor.log = lambda message: None
+        print(f"{len(questions)} pertanyaan SQL korpus, LLM {args.llm_latency * 1000:.0f}ms/panggilan\n")
+        mode_section(env, questions)
+        fallback_section(env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark ukuran output tool: teks lama (`||POSTER||URL` + sinopsis penuh / `||SQL_QUERY||`) vs payload
+JSON ringkas (`cinebot.tool_payloads`) dengan referensi poster `poster:<Movie_ID>`.
+
+- RAG: top-3 dari Qdrant local mode (HashEmbeddings, offline) untuk beberapa pertanyaan tema.
+- Template SQL router: pertanyaan faktual yang ditangani `execute_template` (movies.db sementara).
+- Jawaban model: tabel Markdown 5 film dengan kolom Poster berisi URL vs referensi pendek
+  (token yang harus DITULIS model saat sintesis).
+Token dihitung dengan tiktoken jika tersedia (fallback ~4 karakter/token).
+
+Contoh: python -m benchmarks.bench_tool_payloads
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient
+
+from benchmarks.data import load_movies
+from benchmarks.fakes import HashEmbeddings
+from cinebot.history import build_token_counter
+from cinebot.ingest import records_from_dataframe, sync_collection, write_sql_database
+from cinebot.posters import PosterIndex
+from cinebot.router import Router, build_template, execute_template, format_template_rows
+from cinebot.tool_payloads import movie_from_document, movies_payload, parse_payload
+
+RAG_QUESTIONS = [
+    "film tentang perjalanan waktu",
+    "film bertema persahabatan dan keluarga",
+    "film tentang detektif yang memecahkan kasus pembunuhan",
+]
+SQL_QUESTIONS = [
+    "Kasih tau daftar film dari Christopher Nolan",
+    "Apa 5 film dengan pendapatan (gross) tertinggi?",
+    "Kasih tau semua film Tom Hanks",
+    "Daftar film genre Sci-Fi terbaik",
+]
+
+
+def legacy_rag_output(results):
+    """Format tool RAG sebelum payload JSON."""
+    formatted = "\n\n".join(
+        f"Judul: {doc.metadata.get('title', 'N/A')}\n"
+        f"Tahun: {doc.metadata.get('year', 'N/A')}\n"
+        f"Rating: {doc.metadata.get('rating', 'N/A')}\n"
+        f"Genre: {', '.join(doc.metadata.get('genre') or [])}\n"
+        f"Sinopsis: {doc.page_content.split('Sinopsis: ')[-1]}"
+        f"||POSTER||{doc.metadata.get('poster', 'No Poster URL')}"
+        for doc in results
+    )
+    return f"Berikut adalah {len(results)} film yang paling relevan berdasarkan pencarianmu:\n{formatted}"
+
+
+def legacy_template_output(template, payload, posters):
+    """Format template SQL sebelum payload JSON (baris teks + ||POSTER||URL + ||SQL_QUERY||)."""
+    lines = []
+    for i, movie in enumerate(payload.get("movies", []), start=1):
+        fields = ", ".join(f"{k}: {v}" for k, v in movie.items() if k not in ("id", "poster"))
+        lines.append(f"{i}. {fields} ||POSTER||{posters.url(movie.get('poster')) or 'No Poster URL'}")
+    return f"Hasil query ({len(lines)} film):\n" + "\n".join(lines) + f"||SQL_QUERY||{template.display_sql()}"
+
+
+def answer_table(movies, poster):
+    rows = [f"| ![Poster]({poster(m)}) | {m['title']} | {m.get('year', '')} | {m.get('rating', '')} | Wajib tonton! |"
+            for m in movies[:5]]
+    return "| Poster | Film | Tahun | Rating | Kenapa Wajib Tonton? |\n|---|---|---|---|---|\n" + "\n".join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+    count = build_token_counter(args.model)
+
+    df = load_movies()
+    embeddings = HashEmbeddings()
+    client = QdrantClient(":memory:")
+    sync_collection(client, "bench_payloads", records_from_dataframe(df), embeddings, full=True,
+                    embedding_model="hash", log=lambda _: None)
+    store = QdrantVectorStore(client=client, collection_name="bench_payloads", embedding=embeddings)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "movies.db")
+        write_sql_database(df, db_path, None, True)
+        posters = PosterIndex.from_sqlite(db_path)
+        router = Router.from_sqlite(db_path)
+
+        totals = {"lama": 0, "baru": 0}
+        print(f"{'output':<55} {'lama':>6} {'baru':>6}  (token)")
+        for question in RAG_QUESTIONS:
+            results = store.similarity_search(question, k=3)
+            old = count(legacy_rag_output(results))
+            new = count(movies_payload([movie_from_document(d, posters) for d in results], source="rag"))
+            totals["lama"] += old
+            totals["baru"] += new
+            print(f"RAG: {question[:50]:<50} {old:>6} {new:>6}")
+
+        answer_old = answer_new = 0
+        for question in SQL_QUESTIONS:
+            template = build_template(router.route(question))
+            output = execute_template(db_path, template)
+            payload = parse_payload(output)
+            old = count(legacy_template_output(template, payload, posters))
+            new = count(output)
+            totals["lama"] += old
+            totals["baru"] += new
+            print(f"SQL: {question[:50]:<50} {old:>6} {new:>6}")
+            answer_old += count(answer_table(payload["movies"], lambda m: posters.url(m["poster"])))
+            answer_new += count(answer_table(payload["movies"], lambda m: m["poster"]))
+
+        print(f"\nTotal token output tool (dibaca LLM saat sintesis): {totals['lama']} -> {totals['baru']} "
+              f"({1 - totals['baru'] / totals['lama']:.0%} lebih sedikit)")
+        print(f"Token tabel jawaban yang ditulis model ({len(SQL_QUESTIONS)} jawaban): {answer_old} -> {answer_new} "
+              f"({1 - answer_new / answer_old:.0%} lebih sedikit)")
+        # Sanity check: referensi poster ter-expand kembali ke URL yang sama saat render
+        conn = sqlite3.connect(db_path)
+        movie_id = conn.execute("SELECT Movie_ID FROM movies WHERE Series_Title = 'The Dark Knight'").fetchone()[0]
+        conn.close()
+        sample = format_template_rows(template, ["Movie_ID", "Series_Title"], [(movie_id, "The Dark Knight")])
+        ref = parse_payload(sample)["movies"][0]["poster"]
+        assert posters.expand(f"![Poster]({ref})") == f"![Poster]({posters.urls[movie_id]})"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Loader dataset IMDb untuk benchmark (teks embedding sama dengan yang dibuat `setup.py`).
+
+- `synthetic_movies`: perbesar dataset N kali (uji skala ingestion & retrieval) dengan salinan yang
+  sedikit berbeda, sehingga vektor & point ID tetap unik.
+"""
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+from cinebot.ingest import assign_movie_ids, build_text_for_embedding, movie_metadata
+
+CSV_PATH = "data/imdb_top_1000_cleaned.csv"
+
+
+def load_movies(csv_path=CSV_PATH):
+    df = pd.read_csv(csv_path)
+    df["text_for_embedding"] = build_text_for_embedding(df)
+    return df
+
+
+def movie_documents(df):
+    return [
+        Document(
+            page_content=row["text_for_embedding"],
+            metadata=movie_metadata(row["Movie_ID"], row),
+        )
+        for _, row in assign_movie_ids(df).iterrows()
+    ]
+
+
+def synthetic_movies(df, scale, seed=0):
+    """
+    Dataset `scale` kali lebih besar. Salinan ke-i: judul diberi akhiran " (i)", tahun/rating digeser
+    acak kecil, urutan kata sinopsis dirotasi, dan URL poster diberi query unik.
+    """
+    if scale <= 1:
+        return df
+    rng = np.random.default_rng(seed)
+    copies = [df]
+    for i in range(1, scale):
+        copy = df.copy()
+        copy["Series_Title"] = copy["Series_Title"] + f" ({i})"
+        copy["Released_Year"] = copy["Released_Year"] + rng.integers(-3, 4, len(copy))
+        copy["IMDB_Rating"] = (copy["IMDB_Rating"] + rng.choice([-0.2, -0.1, 0.0, 0.1], len(copy))).round(1)
+        shifts = rng.integers(0, 8, len(copy))
+        copy["Overview"] = [
+            " ".join(words[k % len(words):] + words[:k % len(words)]) if words else text
+            for text, k in zip(copy["Overview"], shifts)
+            for words in [text.split()]
+        ]
+        copy["Poster_Link"] = copy["Poster_Link"] + f"?copy={i}"
+        copies.append(copy)
+    grown = pd.concat(copies, ignore_index=True)
+    grown["text_for_embedding"] = build_text_for_embedding(grown)
+    return grown
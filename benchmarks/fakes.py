@@ -0,0 +1,366 @@
+"""
+Komponen palsu (tanpa jaringan) untuk benchmark.
+
+- HashEmbeddings: embedding deterministik berbasis hashing kata (bag-of-words),
+  sehingga teks yang mirip menghasilkan vektor yang mirip. Menghitung jumlah panggilan.
+- FakeToolChatModel: chat model dengan latensi tetap yang bisa memanggil tool (untuk agent/router),
+  termasuk streaming token (`token_latency` per kata).
+- ScriptedSQLChatModel: pengganti LLM sub-agent SQL dengan langkah ReAct tetap dan SQL dari skrip,
+  sehingga tool `sql_db_*` asli (SQLite) ikut dijalankan; tanpa tool ter-bind (mode single-shot
+  `cinebot.text_to_sql`) langsung menjawab SQL-nya dalam blok ```sql.
+- SerializedQdrantClient / DelayedAsyncQdrantClient: Qdrant local mode yang aman dipakai bersamaan
+  (thread / event loop) dengan latensi jaringan simulasi pada pencarian.
+Versi async keduanya memakai `asyncio.sleep` untuk latensi (tidak memblokir event loop).
+- DiskQdrantClient: pengganti server Qdrant berbasis SQLite (point di disk, bukan di RAM proses) untuk
+  mengukur memori ingestion streaming; hanya method yang dipakai `cinebot.ingest`/`cinebot.stream_ingest`.
+"""
+import array
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+from qdrant_client import models
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashEmbeddings(Embeddings):
+    """Embedding deterministik untuk benchmark; `query_calls`/`document_calls` menghitung panggilan."""
+
+    def __init__(self, size=256, latency=0.0):
+        self.size = size
+        self.latency = latency
+        self.query_calls = 0
+        self.document_calls = 0
+        self.embedded_texts = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for token in _TOKEN_RE.findall(text.casefold()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def embed_documents(self, texts):
+        self._count(document_calls=1, texts=len(texts))
+        self._sleep()
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        self._count(query_calls=1, texts=1)
+        self._sleep()
+        return self._embed(text)
+
+    def _count(self, query_calls=0, document_calls=0, texts=0):
+        with self._lock:
+            self.query_calls += query_calls
+            self.document_calls += document_calls
+            self.embedded_texts += texts
+
+    async def aembed_documents(self, texts):
+        self._count(document_calls=1, texts=len(texts))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    async def aembed_query(self, text):
+        self._count(query_calls=1, texts=1)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+
+class FakeToolChatModel(BaseChatModel):
+    """
+    Chat model palsu dengan latensi tetap per panggilan (simulasi round-trip LLM).
+    - Pesan terakhir bukan ToolMessage: memanggil satu tool (pilihan naif berbasis kata kunci).
+    - Setelah ToolMessage (atau tool_choice="none"): mengembalikan jawaban teks (`answer_words` kata).
+    `latency` = waktu sampai token pertama; `token_latency` = jeda per kata berikutnya (invoke & stream sama).
+    `calls` menghitung jumlah panggilan LLM.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    answer_words: int = 12
+    tool_choice: str = None
+    tools_bound: bool = False
+    counter: dict = Field(default_factory=lambda: {"calls": 0})  # dibagi dengan salinan hasil bind_tools
+
+    @property
+    def _llm_type(self):
+        return "fake-tool-chat"
+
+    @property
+    def calls(self):
+        return self.counter["calls"]
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.model_copy(update={"tool_choice": tool_choice, "tools_bound": True})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.counter["calls"] += 1
+        message = self._respond(messages)
+        time.sleep(self.latency + self.token_latency * max(len(self._words(message)) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.counter["calls"] += 1
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency + self.token_latency * max(len(self._words(message)) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.counter["calls"] += 1
+        message = self._respond(messages)
+        time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(message)):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            if run_manager and chunk.message.content:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.counter["calls"] += 1
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(message)):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            if run_manager and chunk.message.content:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    @staticmethod
+    def _words(message):
+        return re.findall(r"\S+\s*", message.content) if message.content else [""]
+
+    def _chunks(self, message):
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}
+            ]))
+            return
+        for word in self._words(message):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    def _respond(self, messages):
+        last = messages[-1]
+        if isinstance(last, ToolMessage) or self.tool_choice == "none":
+            filler = " ".join(["film"] * max(self.answer_words - 4, 0))
+            message = AIMessage(content=f"Jawaban berdasarkan data: {str(last.content)[:80]} {filler}".strip())
+        else:
+            question = str(last.content)
+            qualitative = any(word in question.casefold() for word in ("mirip", "tentang", "seperti"))
+            name = "get_movie_recommendations" if qualitative else "get_factual_movie_data"
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": {"question": question}, "id": f"call_{self.calls}"}
+            ])
+        return message
+
+
+class ScriptedSQLChatModel(FakeToolChatModel):
+    """
+    LLM sub-agent SQL palsu. Langkahnya tetap seperti ReAct yang diminta `SQL_SYSTEM_PROMPT`:
+    `sql_db_list_tables` -> `sql_db_schema(movies)` -> `sql_db_query` -> jawaban (`explore=False`: langsung query).
+    SQL diambil dari `sql_script` (potongan pertanyaan -> SQL), fallback `default_sql`.
+    Tanpa tool ter-bind (single-shot): satu jawaban teks berisi SQL yang sama, atau teks dari `single_shot_script`
+    (potongan pertanyaan -> jawaban mentah, mis. SQL salah / NO_SQL) untuk memicu fallback ReAct.
+    """
+
+    sql_script: dict = Field(default_factory=dict)
+    single_shot_script: dict = Field(default_factory=dict)
+    default_sql: str = "SELECT Movie_ID, Series_Title, IMDB_Rating FROM movies ORDER BY IMDB_Rating DESC LIMIT 5"
+    explore: bool = True
+
+    @staticmethod
+    def _lookup(script, question, default=None):
+        folded = question.casefold()
+        for fragment, value in script.items():
+            if fragment.casefold() in folded:
+                return value
+        return default
+
+    def sql_for(self, question):
+        return self._lookup(self.sql_script, question, self.default_sql)
+
+    def _respond(self, messages):
+        question = next((str(m.content) for m in messages if isinstance(m, HumanMessage)), "")
+        if not self.tools_bound:
+            reply = self._lookup(self.single_shot_script, question)
+            return AIMessage(content=reply if reply is not None else f"```sql\n{self.sql_for(question)};\n```")
+        steps = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        plan = [("sql_db_list_tables", {"tool_input": ""}), ("sql_db_schema", {"table_names": "movies"})] if self.explore else []
+        plan.append(("sql_db_query", {"query": self.sql_for(question)}))
+        if steps < len(plan):
+            name, args = plan[steps]
+            return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"sql_{steps}_{self.calls}"}])
+        rows = str(messages[-1].content)
+        return AIMessage(content=f"Berikut hasilnya: {rows[:300]}")
+
+
+class SerializedQdrantClient:
+    """
+    Bungkus QdrantClient local mode (tidak thread-safe): semua panggilan diserialisasi dengan lock.
+    `search_latency` disimulasikan di luar lock untuk `query_points`, jadi jeda jaringan tetap paralel.
+    """
+
+    def __init__(self, client, search_latency=0.0):
+        self.client = client
+        self.search_latency = search_latency
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            if name == "query_points" and self.search_latency:
+                time.sleep(self.search_latency)
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+class DelayedAsyncQdrantClient:
+    """Bungkus AsyncQdrantClient local mode: `query_points` diberi latensi jaringan (`asyncio.sleep`)."""
+
+    def __init__(self, client, search_latency=0.0):
+        self.client = client
+        self.search_latency = search_latency
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name != "query_points" or not self.search_latency:
+            return attr
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self.search_latency)
+            return await attr(*args, **kwargs)
+        return call
+
+
+class DiskQdrantClient:
+    """
+    Koleksi Qdrant palsu di file SQLite (vektor float32 + payload JSON per point). Qdrant local mode
+    menyimpan semua point di memori proses, jadi tidak bisa dipakai untuk mengukur puncak RSS ingestion;
+    server Qdrant sungguhan juga menyimpan point di luar proses setup.py. Aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY, size INTEGER, distance TEXT)")
+        self._lock = threading.Lock()
+
+    def _table(self, collection_name):
+        return "points_" + re.sub(r"\W", "_", collection_name)
+
+    def collection_exists(self, collection_name):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM collections WHERE name = ?", (collection_name,)).fetchone() is not None
+
+    def create_collection(self, collection_name, vectors_config, **kwargs):
+        with self._lock, self._conn:
+            self._conn.execute(f"DROP TABLE IF EXISTS {self._table(collection_name)}")
+            self._conn.execute(f"CREATE TABLE {self._table(collection_name)} "
+                               "(id TEXT PRIMARY KEY, vector BLOB, payload TEXT)")
+            self._conn.execute("INSERT OR REPLACE INTO collections VALUES (?, ?, ?)",
+                               (collection_name, vectors_config.size, str(vectors_config.distance.value)))
+        return True
+
+    def delete_collection(self, collection_name):
+        with self._lock, self._conn:
+            self._conn.execute(f"DROP TABLE IF EXISTS {self._table(collection_name)}")
+            self._conn.execute("DELETE FROM collections WHERE name = ?", (collection_name,))
+        return True
+
+    def get_collection(self, collection_name):
+        with self._lock:
+            size, distance = self._conn.execute(
+                "SELECT size, distance FROM collections WHERE name = ?", (collection_name,)).fetchone()
+        params = SimpleNamespace(vectors=models.VectorParams(size=size, distance=models.Distance(distance)))
+        return SimpleNamespace(config=SimpleNamespace(params=params), payload_schema={},
+                               points_count=self.count(collection_name).count)
+
+    def update_collection(self, collection_name, **kwargs):
+        return True
+
+    def create_payload_index(self, collection_name, field_name, field_schema=None, **kwargs):
+        return None
+
+    def upsert(self, collection_name, points, **kwargs):
+        rows = [(str(p.id), array.array("f", p.vector).tobytes(), json.dumps(p.payload, ensure_ascii=False)) for p in points]
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self._table(collection_name)} VALUES (?, ?, ?)", rows)
+
+    def batch_update_points(self, collection_name, update_operations, **kwargs):
+        table = self._table(collection_name)
+        with self._lock, self._conn:
+            for operation in update_operations:
+                payload = operation.overwrite_payload
+                for point_id in payload.points:
+                    self._conn.execute(f"UPDATE {table} SET payload = ? WHERE id = ?",
+                                       (json.dumps(payload.payload, ensure_ascii=False), str(point_id)))
+
+    def _record(self, point_id, payload, with_payload):
+        payload = json.loads(payload)
+        if isinstance(with_payload, (list, tuple)):
+            payload = {key: payload[key] for key in with_payload if key in payload}
+        elif not with_payload:
+            payload = None
+        return models.Record(id=point_id, payload=payload)
+
+    def retrieve(self, collection_name, ids, with_payload=True, with_vectors=False, **kwargs):
+        ids = [str(i) for i in ids]
+        records = []
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                placeholders = ", ".join("?" * len(part))
+                records.extend(self._conn.execute(
+                    f"SELECT id, payload FROM {self._table(collection_name)} WHERE id IN ({placeholders})", part))
+        return [self._record(point_id, payload, with_payload) for point_id, payload in records]
+
+    def scroll(self, collection_name, limit=10, offset=None, with_payload=True, with_vectors=False, **kwargs):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, payload FROM {self._table(collection_name)} WHERE id >= ? ORDER BY id LIMIT ?",
+                (str(offset or ""), limit + 1),
+            ).fetchall()
+        next_offset = rows[limit][0] if len(rows) > limit else None
+        return [self._record(point_id, payload, with_payload) for point_id, payload in rows[:limit]], next_offset
+
+    def delete(self, collection_name, points_selector, **kwargs):
+        with self._lock, self._conn:
+            self._conn.executemany(f"DELETE FROM {self._table(collection_name)} WHERE id = ?",
+                                   [(str(i),) for i in points_selector.points])
+
+    def count(self, collection_name, **kwargs):
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {self._table(collection_name)}").fetchone()[0]
+        return SimpleNamespace(count=total)
+
+    def close(self):
+        self._conn.close()
+
@@ -0,0 +1,6 @@
+"""
+CineBot — modul pendukung untuk `main.py` (aplikasi Streamlit) dan `setup.py` (ingestion data).
+
+Semua komponen berat (client Qdrant, LLM, sub-agent SQL, dsb.) dibangun di sini sekali per proses,
+sehingga script Streamlit yang dieksekusi ulang di setiap interaksi cukup melakukan pekerjaan UI.
+"""
@@ -0,0 +1,156 @@
+"""
+Cache jawaban (semantic answer cache) di depan agent utama.
+
+Setiap turn agent butuh panggilan LLM untuk memilih tool, eksekusi tool, lalu panggilan LLM
+untuk sintesis — padahal pertanyaan yang sama/nyaris sama (mis. "Top 5 film terlaris")
+sering baru saja dijawab. Dua tier:
+- exact: kunci = pertanyaan ternormalisasi + konteks history yang relevan.
+- similar: embedding pertanyaan baru dibandingkan dengan entri dengan konteks yang sama;
+  dipakai jika cosine similarity >= threshold DAN tanda pertanyaannya sama: filter tahun/rating/genre
+  (`cinebot.query_filters`), semua angka, dan nama sutradara/pemeran/judul (`entities`, mis.
+  `Router.entities`). Embedding hampir buta terhadap angka dan nama, sehingga "top 5 film terbaik 2018"
+  dan "top 10 film terbaik 2019" bisa ber-cosine >= 0.95 padahal jawabannya berbeda.
+Yang disimpan adalah `TurnResult` lengkap (jawaban + metadata tool), sehingga expander
+"Proses Berpikir" tetap menampilkan isi yang benar. Entri punya TTL dan dievict secara LRU.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from cinebot.normalize import cache_key, normalize_question
+from cinebot.query_filters import extract_filters
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+@dataclass
+class _Entry:
+    result: object
+    context: str
+    embedding: np.ndarray
+    stored_at: float
+    signature: tuple = None
+
+
+class AnswerCache:
+    def __init__(self, embeddings=None, similarity_threshold=0.95, ttl=3600, max_entries=512, history_turns=1,
+                 entities=None):
+        self.embeddings = embeddings
+        # question -> nama yang disebut (frozenset); tanpa ini hanya filter & angka yang dibandingkan
+        self.entities = entities
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.history_turns = history_turns
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                        "signature_rejects": 0}
+
+    # --- Kunci ---
+    def context_key(self, history):
+        """
+        Konteks yang relevan: N pertanyaan user terakhir SEBELUM pertanyaan saat ini.
+        Jawaban CineBot bisa merujuk pola di history ("ATURAN HISTORY"), jadi jawaban
+        hanya dipakai ulang jika konteks ini sama.
+        """
+        if self.history_turns <= 0:
+            return ""
+        previous = [normalize_question(m["content"]) for m in history if m["role"] == "user"]
+        return "\n".join(previous[-self.history_turns:])
+
+    def _key(self, question, context):
+        return cache_key(normalize_question(question), context)
+
+    def signature(self, question):
+        """Bagian pertanyaan yang harus sama persis agar jawaban pertanyaan mirip boleh dipakai."""
+        q = normalize_question(question)
+        names = self.entities(q) if self.entities is not None else frozenset()
+        return extract_filters(q), tuple(_NUMBER_RE.findall(q)), names
+
+    def _embed(self, question):
+        if self.embeddings is None:
+            return None
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry.stored_at > self.ttl
+
+    # --- API ---
+    def lookup(self, question, history):
+        """Kembalikan (TurnResult, tier) atau (None, None). `history` = pesan SEBELUM pertanyaan ini."""
+        context = self.context_key(history)
+        key = self._key(question, context)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.metrics["exact_hits"] += 1
+                return replace(entry.result, source="cache:exact"), "exact"
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e.context == context and e.embedding is not None and not self._expired(e, now)
+            ]
+
+        if candidates and self.embeddings is not None:
+            query = self._embed(question)
+            matrix = np.stack([e.embedding for _, e in candidates])
+            scores = matrix @ query
+            signature = self.signature(question)
+            same = np.array([e.signature == signature for _, e in candidates])
+            if scores.max() >= self.similarity_threshold and not same[int(np.argmax(scores))]:
+                # Pertanyaan nyaris sama dengan angka/tahun/nama berbeda: jawabannya tidak boleh dipakai
+                with self._lock:
+                    self.metrics["signature_rejects"] += 1
+            scores = np.where(same, scores, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                best_key, best_entry = candidates[best]
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                    self.metrics["similar_hits"] += 1
+                return replace(best_entry.result, source="cache:similar"), "similar"
+
+        with self._lock:
+            self.metrics["misses"] += 1
+        return None, None
+
+    def store(self, question, history, result):
+        """Simpan hasil turn (hasil error tidak di-cache)."""
+        if getattr(result, "is_error", False):
+            return
+        context = self.context_key(history)
+        key = self._key(question, context)
+        entry = _Entry(result=result, context=context, embedding=self._embed(question), stored_at=time.time(),
+                       signature=self.signature(question))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.metrics["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["entries"] = len(self._entries)
+        lookups = metrics["exact_hits"] + metrics["similar_hits"] + metrics["misses"]
+        metrics["hit_rate"] = (metrics["exact_hits"] + metrics["similar_hits"]) / lookups if lookups else 0.0
+        return metrics
@@ -0,0 +1,120 @@
+"""
+Runtime async untuk jalur request CineBot.
+
+Streamlit menjalankan script di thread per sesi; sebelumnya seluruh turn (LLM, embedding, Qdrant,
+sub-agent SQL) berupa I/O blocking di thread tersebut. Di sini:
+- Satu event loop latar belakang per proses (`AsyncRunner`) menjalankan semua turn async
+  (`astream`, tool async, `AsyncQdrantClient`, LLM/embeddings async) secara multipleks.
+- Jumlah turn yang berjalan bersamaan dibatasi semaphore (`max_concurrency`), dan setiap turn
+  punya timeout (`timeout`), keduanya dari `Settings`.
+- Pool koneksi HTTP async (`httpx.AsyncClient`) dibagi oleh LLM & embeddings OpenAI.
+Thread pemanggil (script Streamlit) hanya menunggu hasilnya.
+"""
+import asyncio
+import queue
+import threading
+
+import httpx
+
+
+class TurnTimeoutError(TimeoutError):
+    """Turn melebihi batas waktu `request_timeout`."""
+
+
+def build_async_http_client(settings):
+    """Pool koneksi HTTP async bersama (keep-alive) untuk OpenAI."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+        ),
+        timeout=httpx.Timeout(settings.llm_timeout),
+    )
+
+
+class AsyncRunner:
+    """Event loop di thread daemon; `run(coro)` dipanggil dari thread mana pun (mis. script Streamlit)."""
+
+    def __init__(self, max_concurrency=64, timeout=120.0, name="cinebot-async"):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self.stats = {"started": 0, "completed": 0, "timeouts": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        # Semaphore dibuat di dalam loop yang memakainya
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    async def guarded(self, coro, timeout=None):
+        """Jalankan `coro` dengan batas konkurensi & timeout (dipakai langsung oleh kode async)."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            self._count("started")
+            self._count("in_flight")
+            try:
+                return await asyncio.wait_for(coro, timeout)
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                raise TurnTimeoutError(f"Turn melebihi batas waktu {timeout:.0f} detik.") from None
+            except Exception:
+                self._count("errors")
+                raise
+            finally:
+                self._count("in_flight", -1)
+                self._count("completed")
+
+    def submit(self, coro, timeout=None):
+        """Jadwalkan coroutine di loop latar; kembalikan `concurrent.futures.Future`."""
+        return asyncio.run_coroutine_threadsafe(self.guarded(coro, timeout), self.loop)
+
+    def run(self, coro, timeout=None):
+        """Blokir thread pemanggil sampai coroutine selesai (atau timeout)."""
+        return self.submit(coro, timeout).result()
+
+    def iterate(self, agen, timeout=None):
+        """
+        Konsumsi async generator di loop latar dan yield item-nya di thread pemanggil (streaming ke UI).
+        Batas konkurensi & timeout berlaku untuk seluruh stream; jika pemanggil berhenti lebih awal,
+        task di loop dibatalkan.
+        """
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            async for item in agen:
+                items.put(item)
+
+        future = self.submit(pump(), timeout)
+        future.add_done_callback(lambda _: items.put(done))
+        try:
+            while (item := items.get()) is not done:
+                yield item
+            future.result()  # TurnTimeoutError / error dari stream diteruskan ke pemanggil
+        finally:
+            future.cancel()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self, timeout=5.0):
+        if not self.loop.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
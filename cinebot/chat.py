@@ -0,0 +1,351 @@
+"""
+Satu giliran (turn) percakapan CineBot di luar UI Streamlit.
+
+- `TurnResult`: jawaban akhir + info "Proses Berpikir" (tool dipilih, argumen, payload tool, query SQL).
+- `to_langchain_messages`: konversi history `st.session_state.messages` ke BaseMessage LangChain.
+- `run_agent_turn`: stream agent utama dan kumpulkan `TurnResult`.
+- `run_fast_path_turn`: jalur cepat dari `cinebot.router` — tool/template dijalankan langsung,
+  lalu hanya satu panggilan LLM untuk sintesis jawaban (hop pemilihan tool dilewati).
+- `arun_agent_turn` / `arun_fast_path_turn`: versi async keduanya (lihat `cinebot.async_runtime`).
+- `stream_*` / `astream_*`: versi streaming — menghasilkan `TurnEvent` (status proses, token jawaban,
+  lalu `TurnResult` akhir) agar UI bisa merender jawaban token demi token; mencatat TTFT & total.
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from cinebot.router import build_template, execute_template
+from cinebot.tool_payloads import LEGACY_SQL_DELIMITER, is_error_output, parse_payload, payload_sql
+
+FALLBACK_ANSWER = "Maaf, terjadi kesalahan."
+
+
+@dataclass
+class TurnResult:
+    answer: str
+    tool_call_info: dict = None
+    tool_output: str = ""
+    sql_query: str = None
+    source: str = "agent"
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def tool_payload(self):
+        """Payload terstruktur output tool (`cinebot.tool_payloads`); None untuk output format lama."""
+        return parse_payload(self.tool_output)
+
+    @property
+    def display_tool_output(self):
+        """Output mentah tool format lama tanpa bagian query SQL (untuk expander)."""
+        return (self.tool_output or "").split(LEGACY_SQL_DELIMITER)[0]
+
+    @property
+    def is_error(self):
+        return (
+            self.answer == FALLBACK_ANSWER
+            or self.source.startswith("error")
+            or is_error_output(self.tool_output)
+        )
+
+
+def to_langchain_messages(messages):
+    """Convert chat history from dicts to LangChain BaseMessage objects."""
+    return [
+        HumanMessage(content=msg["content"]) if msg["role"] == "user" else AIMessage(content=msg["content"])
+        for msg in messages
+    ]
+
+
+def parse_sql_query(tool_call_info, tool_output):
+    """Ambil query SQL dari output tool (payload JSON; fallback format lama) jika tool SQL dipakai."""
+    if not tool_call_info or tool_call_info['name'] != 'get_factual_movie_data':
+        return None
+    return payload_sql(tool_output) or "Query tidak dapat diekstrak dari tool."
+
+
+class _TurnCollector:
+    """Kumpulkan jawaban + info proses berpikir dari chunk stream_mode="values" (dipakai jalur sync & async)."""
+
+    def __init__(self):
+        self.tool_call_info = None
+        self.full_tool_output = ""
+        self.last_valid_state = None
+        self.timings = {}
+        self.started = time.perf_counter()
+
+    def add(self, chunk):
+        if "messages" not in chunk:
+            return
+        self.last_valid_state = chunk
+        last_message = chunk["messages"][-1]
+
+        # Capture tool call information when the agent decides to use a tool
+        if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+            # Latensi hop pemilihan tool (panggilan LLM pertama) — dipakai router untuk estimasi penghematan
+            self.timings.setdefault("selection_seconds", time.perf_counter() - self.started)
+            call = last_message.tool_calls[0]
+            self.tool_call_info = {
+                "name": call['name'],
+                "args": call['args']
+            }
+
+        # Capture raw tool output if the message type is 'tool'
+        if hasattr(last_message, "type") and last_message.type == "tool":
+            self.full_tool_output = last_message.content
+
+    def result(self):
+        # Ambil jawaban akhir (setelah stream selesai)
+        if self.last_valid_state:
+            display_answer = self.last_valid_state["messages"][-1].content
+        else:
+            display_answer = FALLBACK_ANSWER
+        self.timings["total_seconds"] = time.perf_counter() - self.started
+
+        return TurnResult(
+            answer=display_answer,
+            tool_call_info=self.tool_call_info,
+            tool_output=self.full_tool_output,
+            sql_query=parse_sql_query(self.tool_call_info, self.full_tool_output),
+            timings=self.timings,
+        )
+
+
+def run_agent_turn(agent_runnable, langchain_messages, config=None):
+    """Jalankan agent utama (stream_mode="values") dan kumpulkan jawaban + info proses berpikir."""
+    collector = _TurnCollector()
+    stream = agent_runnable.stream(
+        {"messages": langchain_messages},
+        stream_mode="values",
+        config=config
+    )
+    for chunk in stream:
+        collector.add(chunk)
+    return collector.result()
+
+
+async def arun_agent_turn(agent_runnable, langchain_messages, config=None):
+    """Versi async `run_agent_turn` (astream + tool async); dijalankan di `cinebot.async_runtime.AsyncRunner`."""
+    collector = _TurnCollector()
+    async for chunk in agent_runnable.astream(
+        {"messages": langchain_messages},
+        stream_mode="values",
+        config=config
+    ):
+        collector.add(chunk)
+    return collector.result()
+
+
+def _fast_path_call(decision, question):
+    tool_name = decision.tool_name
+    args = {"question": question}
+    info_args = {**args, "template": decision.template, **decision.params} if decision.template else args
+    return tool_name, args, {"name": tool_name, "args": info_args}
+
+
+def _tool_config(config):
+    """Config turn untuk tool yang dipanggil langsung (callback tracing/metrik ikut), tanpa `run_name` turn."""
+    return {k: v for k, v in (config or {}).items() if k != "run_name"}
+
+
+def _synthesis_messages(system_prompt, langchain_messages, tool_name, args, tool_output):
+    call_id = f"router-{uuid.uuid4().hex[:12]}"
+    return [
+        SystemMessage(content=system_prompt),
+        *langchain_messages,
+        AIMessage(content="", tool_calls=[{"name": tool_name, "args": args, "id": call_id}]),
+        ToolMessage(content=tool_output, tool_call_id=call_id),
+    ]
+
+
+def _fast_path_result(decision, response, tool_call_info, tool_output, started, tool_seconds):
+    total_seconds = time.perf_counter() - started
+    return TurnResult(
+        answer=response.content or FALLBACK_ANSWER,
+        tool_call_info=tool_call_info,
+        tool_output=tool_output,
+        sql_query=parse_sql_query(tool_call_info, tool_output),
+        source=f"router:{decision.template or decision.target}",
+        timings={
+            "tool_seconds": tool_seconds,
+            "synthesis_seconds": total_seconds - tool_seconds,
+            "total_seconds": total_seconds,
+        },
+    )
+
+
+def run_fast_path_turn(llm, system_prompt, langchain_messages, decision, tools, db_path, config=None):
+    """
+    Jalankan keputusan router tanpa hop pemilihan tool:
+    1. Template SQL berparameter (jika ada) atau tool yang dipilih router dijalankan langsung.
+    2. Hasilnya disisipkan sebagai pasangan AIMessage(tool_call) + ToolMessage, lalu LLM dipanggil
+       SEKALI untuk sintesis dengan system prompt yang sama (format tabel, poster, follow-up).
+    """
+    started = time.perf_counter()
+    tool_name, args, tool_call_info = _fast_path_call(decision, langchain_messages[-1].content)
+    if decision.template:
+        tool_output = execute_template(db_path, build_template(decision))
+    else:
+        tool_output = {t.name: t for t in tools}[tool_name].invoke(args, config=_tool_config(config))
+    tool_seconds = time.perf_counter() - started
+
+    messages = _synthesis_messages(system_prompt, langchain_messages, tool_name, args, tool_output)
+    # tool_choice="none": model hanya menyintesis jawaban, tidak memanggil tool lagi
+    response = llm.bind_tools(tools, tool_choice="none").invoke(messages, config=config)
+    return _fast_path_result(decision, response, tool_call_info, tool_output, started, tool_seconds)
+
+
+async def arun_fast_path_turn(llm, system_prompt, langchain_messages, decision, tools, db_path, config=None):
+    """Versi async `run_fast_path_turn` (template SQL dijalankan di thread executor)."""
+    started = time.perf_counter()
+    tool_name, args, tool_call_info = _fast_path_call(decision, langchain_messages[-1].content)
+    if decision.template:
+        tool_output = await asyncio.to_thread(execute_template, db_path, build_template(decision))
+    else:
+        tool_output = await {t.name: t for t in tools}[tool_name].ainvoke(args, config=_tool_config(config))
+    tool_seconds = time.perf_counter() - started
+
+    messages = _synthesis_messages(system_prompt, langchain_messages, tool_name, args, tool_output)
+    response = await llm.bind_tools(tools, tool_choice="none").ainvoke(messages, config=config)
+    return _fast_path_result(decision, response, tool_call_info, tool_output, started, tool_seconds)
+
+
+# --- Streaming token (stream_mode=["messages", "updates"]) ---
+STATUS_SELECTING = "CineBot sedang memilih tool..."
+STATUS_SYNTHESIZING = "Data didapat, CineBot menyusun jawaban..."
+
+
+@dataclass
+class TurnEvent:
+    """Event streaming: "status" (langkah proses), "token" (potongan jawaban), "result" (TurnResult akhir)."""
+    kind: str
+    text: str = ""
+    result: TurnResult = None
+
+
+def tool_status(tool_name, template=None):
+    if template:
+        return f"Menjalankan template SQL `{template}`..."
+    return f"Menjalankan tool `{tool_name}`..."
+
+
+class _StreamCollector(_TurnCollector):
+    """Seperti `_TurnCollector`, tapi dari chunk (mode, data) stream_mode=["messages", "updates"]."""
+
+    def token(self, text):
+        self.timings.setdefault("ttft_seconds", time.perf_counter() - self.started)
+        return TurnEvent("token", text)
+
+    def add_stream(self, mode, data):
+        if mode == "messages":
+            chunk, metadata = data
+            # Hanya token dari node model agent utama (bukan dari sub-agent di dalam tool)
+            if metadata.get("langgraph_node") != "model" or "|" in metadata.get("langgraph_checkpoint_ns", ""):
+                return []
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if not text or getattr(chunk, "tool_call_chunks", None):
+                return []
+            return [self.token(text)]
+
+        # mode "updates": {nama_node: {"messages": [...]}} — status proses + tool call/output untuk expander
+        events = []
+        for update in (data or {}).values():
+            if not isinstance(update, dict) or not update.get("messages"):
+                continue
+            self.add(update)
+            last_message = update["messages"][-1]
+            if getattr(last_message, "tool_calls", None):
+                events.append(TurnEvent("status", tool_status(last_message.tool_calls[0]["name"])))
+            elif getattr(last_message, "type", None) == "tool":
+                events.append(TurnEvent("status", STATUS_SYNTHESIZING))
+        return events
+
+
+def stream_agent_turn(agent_runnable, langchain_messages, config=None):
+    """Versi streaming `run_agent_turn`: yield `TurnEvent`, diakhiri event "result"."""
+    collector = _StreamCollector()
+    yield TurnEvent("status", STATUS_SELECTING)
+    for mode, data in agent_runnable.stream(
+        {"messages": langchain_messages},
+        stream_mode=["messages", "updates"],
+        config=config
+    ):
+        yield from collector.add_stream(mode, data)
+    yield TurnEvent("result", result=collector.result())
+
+
+async def astream_agent_turn(agent_runnable, langchain_messages, config=None):
+    """Versi async `stream_agent_turn` (dikonsumsi lewat `AsyncRunner.iterate`)."""
+    collector = _StreamCollector()
+    yield TurnEvent("status", STATUS_SELECTING)
+    async for mode, data in agent_runnable.astream(
+        {"messages": langchain_messages},
+        stream_mode=["messages", "updates"],
+        config=config
+    ):
+        for event in collector.add_stream(mode, data):
+            yield event
+    yield TurnEvent("result", result=collector.result())
+
+
+def _merge_chunk(response, chunk):
+    return chunk if response is None else response + chunk
+
+
+def _streamed_fast_path_result(decision, response, tool_call_info, tool_output, started, tool_seconds, first_token_at):
+    result = _fast_path_result(
+        decision, response or AIMessage(content=""), tool_call_info, tool_output, started, tool_seconds
+    )
+    if first_token_at is not None:
+        result.timings["ttft_seconds"] = first_token_at - started
+    return result
+
+
+def stream_fast_path_turn(llm, system_prompt, langchain_messages, decision, tools, db_path, config=None):
+    """Versi streaming `run_fast_path_turn`: status tool/template, lalu token sintesis."""
+    started = time.perf_counter()
+    tool_name, args, tool_call_info = _fast_path_call(decision, langchain_messages[-1].content)
+    yield TurnEvent("status", tool_status(tool_name, decision.template))
+    if decision.template:
+        tool_output = execute_template(db_path, build_template(decision))
+    else:
+        tool_output = {t.name: t for t in tools}[tool_name].invoke(args, config=_tool_config(config))
+    tool_seconds = time.perf_counter() - started
+    yield TurnEvent("status", STATUS_SYNTHESIZING)
+
+    messages = _synthesis_messages(system_prompt, langchain_messages, tool_name, args, tool_output)
+    response, first_token_at = None, None
+    for chunk in llm.bind_tools(tools, tool_choice="none").stream(messages, config=config):
+        response = _merge_chunk(response, chunk)
+        if isinstance(chunk.content, str) and chunk.content:
+            first_token_at = first_token_at or time.perf_counter()
+            yield TurnEvent("token", chunk.content)
+    yield TurnEvent("result", result=_streamed_fast_path_result(
+        decision, response, tool_call_info, tool_output, started, tool_seconds, first_token_at
+    ))
+
+
+async def astream_fast_path_turn(llm, system_prompt, langchain_messages, decision, tools, db_path, config=None):
+    """Versi async `stream_fast_path_turn`."""
+    started = time.perf_counter()
+    tool_name, args, tool_call_info = _fast_path_call(decision, langchain_messages[-1].content)
+    yield TurnEvent("status", tool_status(tool_name, decision.template))
+    if decision.template:
+        tool_output = await asyncio.to_thread(execute_template, db_path, build_template(decision))
+    else:
+        tool_output = await {t.name: t for t in tools}[tool_name].ainvoke(args, config=_tool_config(config))
+    tool_seconds = time.perf_counter() - started
+    yield TurnEvent("status", STATUS_SYNTHESIZING)
+
+    messages = _synthesis_messages(system_prompt, langchain_messages, tool_name, args, tool_output)
+    response, first_token_at = None, None
+    async for chunk in llm.bind_tools(tools, tool_choice="none").astream(messages, config=config):
+        response = _merge_chunk(response, chunk)
+        if isinstance(chunk.content, str) and chunk.content:
+            first_token_at = first_token_at or time.perf_counter()
+            yield TurnEvent("token", chunk.content)
+    yield TurnEvent("result", result=_streamed_fast_path_result(
+        decision, response, tool_call_info, tool_output, started, tool_seconds, first_token_at
+    ))
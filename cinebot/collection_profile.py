@@ -0,0 +1,182 @@
+"""
+Profil tuning koleksi Qdrant (eksplisit & berversi).
+
+Sebelumnya `setup.py` menyalin konfigurasi vektor dari koleksi yang sudah ada, sehingga crash di
+cluster baru dan tidak ada kontrol atas memori maupun kecepatan pencarian. Profil di sini mengatur:
+- distance & ukuran vektor (diturunkan dari model embedding),
+- parameter HNSW (m, ef_construct) dan `ef` saat pencarian,
+- quantization opsional (scalar int8 / binary) dengan rescoring + oversampling,
+- penyimpanan vektor asli di disk.
+
+Selain itu koleksi selalu punya payload index untuk filter rekomendasi (`cinebot.query_filters`):
+`metadata.year` (integer), `metadata.rating` (float), `metadata.genre` (keyword, disimpan sebagai array).
+
+Profil dipilih lewat `CINEBOT_COLLECTION_PROFILE` (aplikasi) / `--profile` (setup.py),
+dan nama+versinya dicatat di manifest ingestion.
+"""
+from dataclasses import asdict, dataclass
+
+from qdrant_client import models
+
+from cinebot.pipeline import is_local_client
+
+# Dimensi vektor per model embedding OpenAI (hindari panggilan API hanya untuk mengukur dimensi)
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def vector_size_for(embedding_model, embeddings=None):
+    """Ukuran vektor dari tabel model; fallback ke satu embedding contoh untuk model yang tidak dikenal."""
+    if embedding_model in EMBEDDING_DIMENSIONS:
+        return EMBEDDING_DIMENSIONS[embedding_model]
+    if embeddings is None:
+        raise ValueError(f"Dimensi untuk model embedding '{embedding_model}' tidak diketahui.")
+    return len(embeddings.embed_query("dimensi vektor"))
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    name: str
+    version: int
+    distance: str = "Cosine"
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: int = 64
+    quantization: str = None  # None | "scalar" | "binary"
+    quantization_always_ram: bool = True
+    rescore: bool = True
+    oversampling: float = 2.0
+    on_disk: bool = False
+
+    @property
+    def label(self):
+        return f"{self.name}@v{self.version}"
+
+    def vectors_config(self, size):
+        return models.VectorParams(
+            size=size,
+            distance=models.Distance(self.distance),
+            on_disk=self.on_disk,
+        )
+
+    def hnsw_config(self):
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self):
+        """Parameter pencarian yang sesuai dengan profil (dipakai tool RAG)."""
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+    def estimated_ram_bytes(self, count, size):
+        """Perkiraan RAM untuk vektor (tanpa graph HNSW & payload)."""
+        original = count * size * 4
+        quantized = {"scalar": count * size, "binary": count * size // 8}.get(self.quantization, 0)
+        in_ram_original = 0 if self.on_disk else original
+        in_ram_quantized = quantized if self.quantization_always_ram else 0
+        return in_ram_original + in_ram_quantized
+
+    def as_dict(self):
+        return {"label": self.label, **asdict(self)}
+
+
+PROFILES = {
+    # Seimbang: semua vektor float32 di RAM, HNSW standar
+    "default": CollectionProfile(name="default", version=1),
+    # Hemat memori: int8 di RAM untuk pencarian, vektor asli di disk untuk rescoring
+    "memory": CollectionProfile(name="memory", version=1, quantization="scalar", on_disk=True, oversampling=2.0),
+    # Paling hemat & cepat: binary quantization (cocok untuk model OpenAI dimensi besar), rescoring wajib
+    "binary": CollectionProfile(name="binary", version=1, quantization="binary", on_disk=True, oversampling=3.0),
+    # Akurasi tinggi: graph lebih padat dan ef pencarian lebih besar
+    "accuracy": CollectionProfile(name="accuracy", version=1, hnsw_m=32, hnsw_ef_construct=256, search_ef=256),
+}
+DEFAULT_PROFILE = "default"
+
+# Payload index untuk filter native (tahun, rating, genre) di payload format LangChain
+PAYLOAD_INDEXES = {
+    "metadata.year": models.PayloadSchemaType.INTEGER,
+    "metadata.rating": models.PayloadSchemaType.FLOAT,
+    "metadata.genre": models.PayloadSchemaType.KEYWORD,
+}
+
+
+def get_profile(name=None):
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Profil koleksi '{name}' tidak dikenal. Pilihan: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def create_collection(client, collection_name, profile, vector_size):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=profile.vectors_config(vector_size),
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config(),
+    )
+
+
+def apply_profile(client, collection_name, profile, vector_size):
+    """
+    Pastikan koleksi ada & sesuai profil.
+    - Belum ada: dibuat dari profil. Kembalikan True.
+    - Sudah ada: HNSW/quantization/on_disk diperbarui di tempat (tanpa re-embed).
+      Ukuran vektor / distance yang berbeda butuh `setup.py --full`.
+    `vector_size=None` berarti ukuran tidak dicek (hanya boleh untuk koleksi yang sudah ada).
+    """
+    if not client.collection_exists(collection_name):
+        create_collection(client, collection_name, profile, vector_size)
+        return True
+
+    params = client.get_collection(collection_name).config.params
+    vectors = params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get("", next(iter(vectors.values())))
+    if (vector_size is not None and vectors.size != vector_size) or vectors.distance != models.Distance(profile.distance):
+        raise ValueError(
+            f"Koleksi '{collection_name}' memakai size={vectors.size}/{vectors.distance}, "
+            f"profil {profile.label} butuh size={vector_size}/{profile.distance}. Jalankan setup.py --full."
+        )
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=profile.on_disk)},
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config() or models.Disabled.DISABLED,
+    )
+    return False
+
+
+def ensure_payload_indexes(client, collection_name):
+    """
+    Buat payload index yang belum ada. Kembalikan daftar field yang baru dibuat.
+    Qdrant local mode (":memory:"/path) tidak memakai payload index (filter tetap jalan), jadi dilewati.
+    """
+    if is_local_client(client):
+        return []
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        if field_name in existing and existing[field_name].data_type == schema:
+            continue
+        client.create_payload_index(collection_name, field_name=field_name, field_schema=schema, wait=True)
+        created.append(field_name)
+    return created
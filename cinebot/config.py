@@ -0,0 +1,152 @@
+"""
+Konfigurasi CineBot.
+
+- Kredensial (OpenAI, Qdrant) dibaca oleh pemanggil (Streamlit secrets / .env) lalu diteruskan ke `Settings`.
+- Knob performa dibaca dari environment variable berawalan `CINEBOT_`.
+- `Settings` bersifat frozen & hashable, sehingga perubahan konfigurasi mudah dideteksi
+  (dipakai oleh `cinebot.resources` untuk membangun ulang resource).
+"""
+import os
+from dataclasses import dataclass, field
+
+
+def env_str(name, default=None):
+    """Ambil string dari environment; string kosong dianggap tidak diset."""
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name, default):
+    """Ambil integer dari environment, fallback ke default jika tidak valid."""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_float(name, default):
+    """Ambil float dari environment, fallback ke default jika tidak valid."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_flag(name, default=False):
+    """Ambil boolean dari environment ('1', 'true', 'yes', 'on' dianggap True)."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Seluruh konfigurasi yang menentukan bagaimana resource CineBot dibangun."""
+    openai_api_key: str = None
+    qdrant_url: str = None
+    qdrant_api_key: str = None
+
+    # Konstanta aplikasi (nama koleksi Qdrant & URI SQLite)
+    qdrant_collection_name: str = "imdb_movies"
+    sql_db_uri: str = "sqlite:///movies.db"
+
+    # Model
+    llm_model: str = "gpt-4o-mini"
+    embedding_model: str = "text-embedding-3-small"
+
+    # Koneksi Qdrant: gRPC jika tersedia, timeout, dan interval health-check (detik)
+    qdrant_prefer_grpc: bool = field(default_factory=lambda: env_flag("CINEBOT_QDRANT_PREFER_GRPC", True))
+    qdrant_timeout: int = field(default_factory=lambda: env_int("CINEBOT_QDRANT_TIMEOUT", 30))
+    health_check_interval: float = field(default_factory=lambda: env_float("CINEBOT_HEALTH_CHECK_INTERVAL", 60.0))
+
+    # Cache embedding pertanyaan: LRU memori (ukuran & TTL) + SQLite di disk (dibagi antar worker)
+    embedding_cache_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_EMBEDDING_CACHE", True))
+    embedding_cache_size: int = field(default_factory=lambda: env_int("CINEBOT_EMBEDDING_CACHE_SIZE", 1024))
+    embedding_cache_ttl: float = field(default_factory=lambda: env_float("CINEBOT_EMBEDDING_CACHE_TTL", 7 * 24 * 3600))
+    embedding_cache_path: str = field(default_factory=lambda: env_str("CINEBOT_EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite"))
+    # Batas baris tier disk (~12 KB per vektor 1536 dimensi); yang tertua dipangkas
+    embedding_cache_max_rows: int = field(default_factory=lambda: env_int("CINEBOT_EMBEDDING_CACHE_MAX_ROWS", 20000))
+
+    # Profil koleksi Qdrant (harus sama dengan yang dipakai setup.py) -> menentukan search params
+    collection_profile: str = field(default_factory=lambda: env_str("CINEBOT_COLLECTION_PROFILE", "default"))
+
+    # Retriever untuk tool RAG: "qdrant" (remote) atau "numpy" (index lokal hasil export setup.py)
+    retriever: str = field(default_factory=lambda: env_str("CINEBOT_RETRIEVER", "qdrant"))
+    local_index_path: str = field(default_factory=lambda: env_str("CINEBOT_LOCAL_INDEX_PATH", "data/index"))
+    # Graf tetangga (cinebot/neighbors.py, dihitung setup.py di folder index lokal): "mirip <film>" dijawab
+    # dari tetangga film itu tanpa embedding & pencarian vektor; tetap berlaku untuk retriever Qdrant
+    neighbor_graph_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_NEIGHBOR_GRAPH", True))
+
+    # Cache jawaban agent: tier exact + tier similarity (threshold cosine), TTL, ukuran, dan
+    # berapa pertanyaan user sebelumnya yang ikut menjadi konteks kunci cache
+    answer_cache_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_ANSWER_CACHE", True))
+    answer_cache_threshold: float = field(default_factory=lambda: env_float("CINEBOT_ANSWER_CACHE_THRESHOLD", 0.95))
+    answer_cache_ttl: float = field(default_factory=lambda: env_float("CINEBOT_ANSWER_CACHE_TTL", 3600))
+    answer_cache_size: int = field(default_factory=lambda: env_int("CINEBOT_ANSWER_CACHE_SIZE", 512))
+    answer_cache_history_turns: int = field(default_factory=lambda: env_int("CINEBOT_ANSWER_CACHE_HISTORY_TURNS", 1))
+
+    # Router fast path: pertanyaan dengan confidence >= ambang dikirim langsung ke tool/template SQL
+    router_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_ROUTER", True))
+    router_min_confidence: float = field(default_factory=lambda: env_float("CINEBOT_ROUTER_MIN_CONFIDENCE", 0.85))
+
+    # Jalur async: satu event loop per proses (astream, tool async, AsyncQdrantClient), batas turn
+    # bersamaan, timeout per turn & per panggilan LLM/embedding, dan ukuran pool koneksi HTTP bersama.
+    # p95 per turn tetap dekat baseline selama sesi bersamaan <= max_concurrent_turns; di atasnya turn
+    # antre di semaphore dan p95 naik (~ceil(sesi / batas) x latensi turn, lihat benchmarks/bench_async_load.py).
+    # Naikkan batas hanya jika kuota rate limit OpenAI mengizinkan
+    async_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_ASYNC", True))
+    max_concurrent_turns: int = field(default_factory=lambda: env_int("CINEBOT_MAX_CONCURRENT_TURNS", 64))
+    request_timeout: float = field(default_factory=lambda: env_float("CINEBOT_REQUEST_TIMEOUT", 120.0))
+    llm_timeout: float = field(default_factory=lambda: env_float("CINEBOT_LLM_TIMEOUT", 60.0))
+    http_max_connections: int = field(default_factory=lambda: env_int("CINEBOT_HTTP_MAX_CONNECTIONS", 100))
+    http_max_keepalive: int = field(default_factory=lambda: env_int("CINEBOT_HTTP_MAX_KEEPALIVE", 20))
+    # Resource yang diganti (konfigurasi berubah / rebuild) ditutup setelah turn terakhirnya selesai,
+    # paling lambat setelah sekian detik
+    resources_close_grace: float = field(default_factory=lambda: env_float("CINEBOT_RESOURCES_CLOSE_GRACE", 120.0))
+
+    # Riwayat percakapan: anggaran token prompt history; `keep_turns` turn terakhir dikirim utuh,
+    # jawaban yang lebih lama diringkas jadi daftar judul (tanpa URL poster)
+    history_compaction: bool = field(default_factory=lambda: env_flag("CINEBOT_HISTORY_COMPACTION", True))
+    history_token_budget: int = field(default_factory=lambda: env_int("CINEBOT_HISTORY_TOKEN_BUDGET", 3000))
+    history_keep_turns: int = field(default_factory=lambda: env_int("CINEBOT_HISTORY_KEEP_TURNS", 2))
+
+    # Streaming token jawaban ke UI (stream_mode=["messages", "updates"]); 0 = render sekali di akhir
+    streaming_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_STREAMING", True))
+
+    # Metrik latensi per tahap (cinebot/metrics.py): sink JSONL lokal (kosong = nonaktif), port endpoint
+    # Prometheus /metrics (0 = nonaktif), dan default toggle rincian waktu di expander UI
+    metrics_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_METRICS", True))
+    metrics_jsonl_path: str = field(default_factory=lambda: env_str("CINEBOT_METRICS_PATH", ".cache/metrics.jsonl"))
+    metrics_port: int = field(default_factory=lambda: env_int("CINEBOT_METRICS_PORT", 0))
+    show_timings: bool = field(default_factory=lambda: env_flag("CINEBOT_SHOW_TIMINGS", False))
+
+    # Cache poster lokal (cinebot/poster_cache.py, diisi setup.py): disajikan lewat static serving Streamlit
+    # (`static/` -> `app/static/`, lihat .streamlit/config.toml); URL remote hanya jika salinan lokal tidak ada
+    poster_cache_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_POSTER_CACHE", True))
+    poster_cache_dir: str = field(default_factory=lambda: env_str("CINEBOT_POSTER_CACHE_DIR", "static/posters"))
+    poster_url_prefix: str = field(default_factory=lambda: env_str("CINEBOT_POSTER_URL_PREFIX", "app/static/posters"))
+
+    # Single-flight (cinebot/single_flight.py): turn agent & panggilan tool identik yang bersamaan berbagi satu
+    # eksekusi; follower berhenti menunggu leader setelah timeout (detik) lalu menjalankan sendiri
+    single_flight_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_SINGLE_FLIGHT", True))
+    single_flight_timeout: float = field(default_factory=lambda: env_float("CINEBOT_SINGLE_FLIGHT_TIMEOUT", 60.0))
+
+    # Eksekusi spekulatif (cinebot/speculation.py): retrieval rekomendasi dimulai paralel dengan hop LLM pemilihan
+    # tool di turn agent; dipakai jika agent memilih tool itu dengan argumen yang kata-katanya tumpang tindih
+    # >= min_overlap (Jaccard, filter harus sama), selain itu dibatalkan. Workers = thread pool jalur sync
+    speculation_enabled: bool = field(default_factory=lambda: env_flag("CINEBOT_SPECULATION", True))
+    speculation_min_overlap: float = field(default_factory=lambda: env_float("CINEBOT_SPECULATION_MIN_OVERLAP", 0.75))
+    speculation_workers: int = field(default_factory=lambda: env_int("CINEBOT_SPECULATION_WORKERS", 4))
+
+    # Sub-agent SQL: batas jumlah baris default di prompt
+    sql_top_k: int = field(default_factory=lambda: env_int("CINEBOT_SQL_TOP_K", 5))
+    # Tool SQL (cinebot/text_to_sql.py): "single_shot" = skema di prompt, satu panggilan LLM menulis SQL yang
+    # divalidasi lokal (fallback sub-agent ReAct jika gagal); "agent" = selalu sub-agent ReAct
+    sql_mode: str = field(default_factory=lambda: env_str("CINEBOT_SQL_MODE", "single_shot"))
+    # Eksekusi `sql_db_query` (cinebot/sql_executor.py): pool koneksi read-only, timeout per statement (detik),
+    # batas baris hasil, dan ukuran cache hasil per SQL ternormalisasi (0 = tanpa cache)
+    sql_pool_size: int = field(default_factory=lambda: env_int("CINEBOT_SQL_POOL_SIZE", 4))
+    sql_timeout: float = field(default_factory=lambda: env_float("CINEBOT_SQL_TIMEOUT", 5.0))
+    sql_max_rows: int = field(default_factory=lambda: env_int("CINEBOT_SQL_MAX_ROWS", 200))
+    sql_result_cache_size: int = field(default_factory=lambda: env_int("CINEBOT_SQL_RESULT_CACHE_SIZE", 256))
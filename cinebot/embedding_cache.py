@@ -0,0 +1,242 @@
+"""
+Cache embedding pertanyaan (dua tingkat) untuk tool RAG.
+
+Pertanyaan yang sama (mis. dari tombol contoh "Rekomendasi film yang mirip Inception")
+tidak perlu dikirim ulang ke OpenAIEmbeddings:
+- Tier 1 (memori): LRU dengan batas ukuran & TTL, per proses.
+- Tier 2 (disk): SQLite (mode WAL) yang bertahan setelah restart dan dibagi antar worker Streamlit.
+  Entri kedaluwarsa dan kelebihan baris (`max_rows`, yang tertua dibuang) dipangkas saat start dan
+  setiap `prune_every` penulisan. Error SQLite (file terkunci/rusak) tidak pernah menggagalkan tool:
+  dihitung sebagai miss dan dicatat di `stats()`.
+Kunci cache = nama model embedding + pertanyaan yang sudah dinormalisasi.
+"""
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from cinebot.normalize import cache_key, normalize_question
+
+
+class MemoryLRU:
+    """LRU thread-safe dengan batas jumlah entri dan TTL (detik)."""
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteVectorStore:
+    """
+    Tier disk: vektor disimpan sebagai BLOB float64 di SQLite.
+    Mode WAL membuat banyak proses bisa membaca sambil satu proses menulis.
+    """
+
+    def __init__(self, path, ttl=None, max_rows=None, prune_every=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+        conn.commit()
+        try:
+            self.prune()
+        except sqlite3.OperationalError:
+            pass  # DB sedang ditulis proses lain; dipangkas lagi setelah `prune_every` penulisan
+
+    def _connection(self):
+        # Satu koneksi per thread (objek sqlite3 tidak boleh dipakai lintas thread)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        blob, created_at = row
+        if self.ttl is not None and time.time() - created_at > self.ttl:
+            return None
+        vector = array("d")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def set(self, key, model, vector):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO embeddings (key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+            (key, model, array("d", vector).tobytes(), time.time()),
+        )
+        conn.commit()
+        with self._writes_lock:
+            self._writes += 1
+            due = self.prune_every and self._writes % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Hapus entri yang melewati TTL dan baris tertua di atas `max_rows`; kembalikan jumlah baris yang dihapus."""
+        conn = self._connection()
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+        if self.max_rows is not None:
+            removed += conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            ).rowcount
+        conn.commit()
+        return removed
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrapper `Embeddings` dengan cache dua tingkat untuk `embed_query`.
+    `embed_documents` (dipakai saat ingestion) diteruskan apa adanya.
+    """
+
+    def __init__(self, embeddings, model_name, max_size=1024, ttl=None, db_path=None, max_disk_rows=None, log=print):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.log = log
+        self.memory = MemoryLRU(max_size=max_size, ttl=ttl)
+        self.disk = None
+        if db_path:
+            try:
+                self.disk = SQLiteVectorStore(db_path, ttl=ttl, max_rows=max_disk_rows)
+            except sqlite3.Error as e:
+                self.log(f"Peringatan: Cache embedding disk tidak aktif ('{db_path}'). Error: {e}")
+        self._stats_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    def _key(self, text):
+        return cache_key(self.model_name, normalize_question(text))
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _lookup(self, key):
+        vector = self.memory.get(key)
+        if vector is not None:
+            self._count("memory_hits")
+            return vector
+        if self.disk is not None:
+            try:
+                vector = self.disk.get(key)
+            except sqlite3.Error as e:
+                # Best-effort seperti penulisan: file terkunci/rusak = miss, embedding diminta ke upstream
+                self._count("disk_errors")
+                self.log(f"Peringatan: Gagal membaca cache embedding dari disk. Error: {e}")
+                return None
+            if vector is not None:
+                self._count("disk_hits")
+                self.memory.set(key, vector)
+                return vector
+        return None
+
+    def _store(self, key, vector):
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, self.model_name, vector)
+            except sqlite3.Error as e:
+                # Cache disk bersifat best-effort: jangan gagalkan request karena disk sibuk/terkunci
+                self._count("disk_errors")
+                self.log(f"Peringatan: Gagal menulis cache embedding ke disk. Error: {e}")
+
+    def embed_query(self, text):
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            self._count("misses")
+            vector = self.embeddings.embed_query(text.strip())
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            self._count("misses")
+            vector = await self.embeddings.aembed_query(text.strip())
+            self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self):
+        """Counter hit/miss per tier untuk monitoring."""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_errors": self.disk_errors,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_entries": len(self.memory),
+        }
@@ -0,0 +1,198 @@
+"""
+Riwayat percakapan dengan anggaran token (compaction).
+
+Sebelumnya setiap turn mengirim SELURUH `st.session_state.messages` ke model, termasuk jawaban lama
+berisi tabel Markdown penuh URL poster Amazon yang panjang — ukuran prompt, latensi, dan biaya
+tumbuh linear sepanjang sesi. `HistoryManager`:
+- Menyimpan `keep_turns` turn terakhir apa adanya (verbatim).
+- Meringkas jawaban asisten yang lebih lama: markup poster/URL dibuang, yang disimpan hanya judul
+  (dan tahun) film yang dibahas — cukup untuk perilaku "ATURAN HISTORY" (mengenali pola, mis. user
+  terus bertanya film Nolan).
+- Jika masih melebihi `token_budget`, semua turn lama digabung menjadi satu catatan ringkas
+  (pertanyaan + judul film yang sudah dibahas).
+- Melaporkan jumlah token prompt sebelum dan sesudah compaction (`HistoryStats`).
+"""
+import re
+from dataclasses import dataclass
+
+from cinebot.chat import to_langchain_messages
+
+SUMMARY_PREFIX = "[Ringkasan jawaban sebelumnya]"
+EARLIER_PREFIX = "[Ringkasan percakapan lebih awal]"
+
+_POSTER_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_URL_RE = re.compile(r"https?://\S+")
+_BOLD_RE = re.compile(r"\*\*([^*]{2,80})\*\*")
+_TITLE_HEADERS = ("film", "judul", "title", "movie")
+_YEAR_HEADERS = ("tahun", "year")
+# Teks tebal yang bukan judul film (heading follow-up di system prompt)
+_NOT_TITLES = ("rekomendasi", "mulai dari", "kenapa", "tips", "catatan")
+
+
+def estimate_tokens(text):
+    """Perkiraan kasar (~4 karakter per token) jika tokenizer tidak tersedia."""
+    return (len(text) + 3) // 4
+
+
+def build_token_counter(model_name):
+    """Penghitung token tiktoken untuk model; fallback ke `estimate_tokens` (mis. offline/tanpa tiktoken)."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model_name)
+    except Exception:
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def strip_posters(text):
+    """Buang sintaks gambar poster dan URL mentah."""
+    return _URL_RE.sub("", _POSTER_RE.sub("", text))
+
+
+def _cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _plain(cell):
+    return re.sub(r"[*_`]", "", cell).strip()
+
+
+def extract_titles(answer):
+    """Judul film (dengan tahun jika ada) dari tabel Markdown jawaban; fallback ke teks tebal."""
+    titles = []
+    header = None
+    for line in answer.splitlines():
+        if not line.strip().startswith("|"):
+            header = None
+            continue
+        cells = _cells(line)
+        if all(set(cell) <= set("-: ") for cell in cells):
+            continue  # baris pemisah |---|---|
+        if header is None:
+            header = [c.casefold() for c in cells]
+            continue
+        title_idx = next((i for i, h in enumerate(header) if _plain(h) in _TITLE_HEADERS), None)
+        year_idx = next((i for i, h in enumerate(header) if _plain(h) in _YEAR_HEADERS), None)
+        if title_idx is None or title_idx >= len(cells):
+            continue
+        title = _plain(strip_posters(cells[title_idx]))
+        if year_idx is not None and year_idx < len(cells) and _plain(cells[year_idx]).isdigit():
+            title = f"{title} ({_plain(cells[year_idx])})"
+        if title and title not in titles:
+            titles.append(title)
+    if not titles:
+        for match in _BOLD_RE.finditer(strip_posters(answer)):
+            title = match.group(1).strip(" :?!.")
+            if title and not title.casefold().startswith(_NOT_TITLES) and title not in titles:
+                titles.append(title)
+    return titles
+
+
+def summarize_answer(answer, titles=None, max_chars=200):
+    """Ringkasan jawaban lama: daftar judul yang dibahas, atau kalimat pertama tanpa markup poster."""
+    titles = extract_titles(answer) if titles is None else titles
+    if titles:
+        return f"{SUMMARY_PREFIX} Film yang dibahas: {', '.join(titles)}."
+    text = " ".join(strip_posters(answer).split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "..."
+    return f"{SUMMARY_PREFIX} {text}"
+
+
+def _truncate(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+@dataclass
+class HistoryStats:
+    tokens_before: int
+    tokens_after: int
+    messages_before: int
+    messages_after: int
+    summarized: int = 0
+    merged: int = 0
+
+    @property
+    def saved_ratio(self):
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+    def describe(self):
+        return (f"{self.tokens_before} -> {self.tokens_after} token "
+                f"({self.messages_before} -> {self.messages_after} pesan, {self.summarized} diringkas, "
+                f"{self.merged} digabung)")
+
+
+class HistoryManager:
+    """Bangun `langchain_messages` dari riwayat chat (list of dict) dalam batas `token_budget`."""
+
+    def __init__(self, token_budget=3000, keep_turns=2, count_tokens=estimate_tokens,
+                 max_question_chars=300, merged_titles_per_answer=3):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.count_tokens = count_tokens
+        self.max_question_chars = max_question_chars
+        self.merged_titles_per_answer = merged_titles_per_answer
+
+    def _tokens(self, messages):
+        return sum(self.count_tokens(m["content"]) for m in messages)
+
+    def _split(self, messages):
+        """Pisahkan pesan lama (boleh diringkas) dari `keep_turns` turn terakhir + pertanyaan sekarang."""
+        user_indexes = [i for i, m in enumerate(messages) if m["role"] == "user"]
+        # Pertanyaan sekarang (user terakhir) + keep_turns pertanyaan sebelumnya beserta jawabannya
+        keep_from = user_indexes[-(self.keep_turns + 1)] if len(user_indexes) > self.keep_turns else 0
+        return messages[:keep_from], messages[keep_from:]
+
+    def _summarize(self, message):
+        if message["role"] == "user":
+            return {"role": "user", "content": _truncate(message["content"], self.max_question_chars)}
+        titles = extract_titles(message["content"])
+        return {"role": "assistant", "content": summarize_answer(message["content"], titles), "titles": titles}
+
+    def _merge(self, messages):
+        """Gabungkan pesan-pesan ringkas menjadi satu catatan (pertanyaan user + judul film yang dibahas)."""
+        questions = [_truncate(m["content"], 80) for m in messages if m["role"] == "user"]
+        # Beberapa judul teratas dari SETIAP jawaban, agar turn paling awal tetap terwakili
+        titles = []
+        for m in messages:
+            for title in m.get("titles", [])[:self.merged_titles_per_answer]:
+                if title not in titles:
+                    titles.append(title)
+        parts = []
+        if questions:
+            parts.append("User sempat bertanya: " + "; ".join(f'"{q}"' for q in questions) + ".")
+        if titles:
+            parts.append("Film yang sudah dibahas: " + ", ".join(titles) + ".")
+        return {"role": "assistant", "content": f"{EARLIER_PREFIX} {' '.join(parts)}"}
+
+    def compact(self, messages):
+        """Kembalikan (list[BaseMessage], HistoryStats). `messages`: riwayat termasuk pertanyaan sekarang."""
+        tokens_before = self._tokens(messages)
+        older, recent = self._split(messages)
+        # Salam pembuka otomatis (sebelum pertanyaan pertama) tidak membawa konteks
+        if older and older[0]["role"] == "assistant":
+            older = older[1:]
+
+        # 1. Jawaban lama -> ringkasan judul (tanpa poster/URL)
+        compacted = [self._summarize(m) for m in older]
+        summarized = sum(1 for a, b in zip(older, compacted) if a["content"] != b["content"])
+
+        # 2. Masih di atas anggaran: semua turn lama digabung jadi satu catatan ringkas. Catatan ini tetap
+        #    dikirim (kecil, dan membawa pola untuk ATURAN HISTORY); turn terbaru selalu utuh, jadi
+        #    anggaran bisa terlampaui jika `keep_turns` turn terakhir sendiri sudah lebih besar.
+        merged = 0
+        if len(compacted) > 1 and self._tokens(compacted + recent) > self.token_budget:
+            merged = len(compacted)
+            compacted = [self._merge(compacted)]
+
+        final = compacted + recent
+        stats = HistoryStats(
+            tokens_before=tokens_before,
+            tokens_after=self._tokens(final),
+            messages_before=len(messages),
+            messages_after=len(final),
+            summarized=summarized,
+            merged=merged,
+        )
+        return to_langchain_messages(final), stats
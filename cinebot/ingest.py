@@ -0,0 +1,340 @@
+"""
+Ingestion inkremental & idempoten untuk `setup.py`.
+
+- Setiap baris film mendapat point ID deterministik (uuid5 dari judul + tahun + sutradara)
+  dan content hash dari `text_for_embedding` + metadata-nya.
+- `Movie_ID` (SQLite, metadata `id` di Qdrant, referensi `poster:<Movie_ID>`) diturunkan dari kunci yang sama,
+  bukan dari posisi baris: menghapus/menyisipkan satu baris tidak menggeser ID (dan hash) baris lain.
+- Sinkronisasi membandingkan hash dengan payload `content_hash` di Qdrant:
+  hanya baris baru/berubah yang di-embed & di-upsert, baris yang hilang dihapus.
+  Jika hanya metadata yang berubah (teks embedding sama, mis. rating/poster diperbarui),
+  payload diperbarui tanpa embedding ulang.
+  Run kedua pada data yang sama tidak memanggil embedding sama sekali.
+- Database SQLite (skema bertipe & ber-index dari `cinebot.sql_schema`) ditulis ke file sementara
+  lalu di-`os.replace` (atomik), dan dilewati jika isi dataset & versi skema tidak berubah.
+- Koleksi dibuat/disesuaikan dari profil berversi (`cinebot.collection_profile`).
+- Embedding & upload berjalan lewat pipeline konkuren (`cinebot.pipeline`).
+- Setiap run dicatat ke manifest (JSONL).
+Dataset yang terlalu besar untuk dimuat sekaligus: `cinebot.stream_ingest` (per chunk, memori terbatas).
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from qdrant_client import models
+
+from cinebot.collection_profile import (
+    EMBEDDING_DIMENSIONS,
+    apply_profile,
+    ensure_payload_indexes,
+    get_profile,
+    vector_size_for,
+)
+from cinebot.metrics import stage
+from cinebot.pipeline import run_ingest_pipeline
+from cinebot.sql_schema import SCHEMA_VERSION, build_movie_database, schema_version, split_genres
+
+# Namespace tetap agar ID point sama di setiap run / mesin
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a5e-6a53-4c1e-9a8e-3e0b1f7c2d10")
+# Movie_ID = 31 bit teratas uuid5 point ID: stabil, dan referensi `poster:<Movie_ID>` tetap pendek (<= 10 digit)
+MOVIE_ID_SHIFT = 128 - 31
+
+
+@dataclass
+class MovieRecord:
+    """Satu film yang siap di-embed: ID point, teks embedding, metadata, dan hash-nya."""
+    point_id: str
+    text: str
+    metadata: dict
+    content_hash: str
+    text_hash: str
+
+    def payload(self):
+        # Format payload sama dengan QdrantVectorStore (page_content + metadata)
+        return {
+            "page_content": self.text,
+            "metadata": self.metadata,
+            "content_hash": self.content_hash,
+            "text_hash": self.text_hash,
+        }
+
+
+@dataclass
+class SyncPlan:
+    to_upsert: list = field(default_factory=list)
+    payload_only: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    to_delete: list = field(default_factory=list)
+    new_ids: set = field(default_factory=set)
+
+
+# === Membangun record dari DataFrame ===
+def build_text_for_embedding(df):
+    """Gabungkan field penting (judul, genre, director, cast, overview) menjadi teks embedding."""
+    return (
+        "Judul: " + df['Series_Title'] + "; " +
+        "Genre: " + df['Genre'] + "; " +
+        "Sutradara: " + df['Director'] + "; " +
+        "Pemeran: " + df['Star1'] + ", " + df['Star2'] + ", " + df['Star3'] + "; " +
+        "Sinopsis: " + df['Overview']
+    )
+
+
+def movie_metadata(movie_id, row):
+    """Metadata yang disimpan di payload Qdrant (tipe Python murni agar bisa di-hash & di-serialisasi)."""
+    return {
+        'id': int(movie_id),
+        'title': str(row['Series_Title']),
+        'year': int(row['Released_Year']),
+        'rating': float(row['IMDB_Rating']),
+        # Genre sebagai array keyword ("Crime, Drama" -> ["Crime", "Drama"]) agar bisa difilter native di Qdrant
+        'genre': split_genres(row['Genre']),
+        'poster': str(row['Poster_Link']),
+    }
+
+
+def point_id_for(row):
+    """ID point deterministik. Judul saja tidak unik (mis. 'Drishyam'), jadi tahun & sutradara ikut."""
+    key = f"{row['Series_Title']}|{row['Released_Year']}|{row['Director']}"
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
+
+def stable_movie_id(row):
+    return uuid.UUID(point_id_for(row)).int >> MOVIE_ID_SHIFT
+
+
+def assign_movie_ids(df, is_taken=None):
+    """
+    Salinan `df` dengan kolom `Movie_ID` stabil (lihat `stable_movie_id`).
+    Tabrakan (jarang; juga baris kembar judul+tahun+sutradara) digeser ke ID bebas berikutnya sesuai urutan baris.
+    `is_taken(movie_id)`: ID yang sudah dipakai di luar `df` (mis. chunk sebelumnya di ingestion streaming).
+    """
+    used = set()
+    movie_ids = []
+    for _, row in df.iterrows():
+        movie_id = stable_movie_id(row)
+        while movie_id in used or (is_taken is not None and is_taken(movie_id)):
+            movie_id += 1
+        used.add(movie_id)
+        movie_ids.append(movie_id)
+    return df.assign(Movie_ID=movie_ids)
+
+
+def content_hash(text, metadata):
+    data = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def records_from_dataframe(df):
+    if 'Movie_ID' not in df.columns:
+        df = assign_movie_ids(df)
+    if 'text_for_embedding' not in df.columns:
+        df = df.assign(text_for_embedding=build_text_for_embedding(df))
+    records = []
+    for _, row in df.iterrows():
+        metadata = movie_metadata(row['Movie_ID'], row)
+        text = row['text_for_embedding']
+        records.append(MovieRecord(
+            point_id_for(row), text, metadata, content_hash(text, metadata), text_hash(text)
+        ))
+    return records
+
+
+def dataset_hash(df):
+    """Hash isi seluruh dataset (untuk memutuskan apakah SQLite perlu ditulis ulang)."""
+    return hashlib.sha256(df.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+# === Diff terhadap Qdrant ===
+def fetch_existing_hashes(client, collection_name, page_size=512):
+    """{point_id: (content_hash, text_hash)} untuk semua point di koleksi (tanpa vektor)."""
+    existing = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=["content_hash", "text_hash"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            existing[str(point.id)] = (payload.get("content_hash"), payload.get("text_hash"))
+        if offset is None:
+            break
+    return existing
+
+
+def plan_sync(records, existing_hashes):
+    plan = SyncPlan()
+    seen = set()
+    for record in records:
+        seen.add(record.point_id)
+        if record.point_id not in existing_hashes:
+            plan.to_upsert.append(record)
+            plan.new_ids.add(record.point_id)
+            continue
+        current_content, current_text = existing_hashes[record.point_id]
+        if current_content == record.content_hash:
+            plan.unchanged.append(record)
+        elif current_text == record.text_hash:
+            plan.payload_only.append(record)
+        else:
+            plan.to_upsert.append(record)
+    plan.to_delete = [pid for pid in existing_hashes if pid not in seen]
+    return plan
+
+
+def upsert_records(client, collection_name, records, embeddings, batch_size=50, concurrency=4,
+                   requests_per_minute=None, log=print):
+    """Embed & upsert record lewat pipeline konkuren (lihat `cinebot.pipeline`)."""
+    return run_ingest_pipeline(
+        client,
+        collection_name,
+        records,
+        embeddings,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        requests_per_minute=requests_per_minute,
+        log=log,
+    )
+
+
+def prepare_collection(client, collection_name, embeddings, profile, embedding_model="text-embedding-3-small",
+                       full=False, log=print):
+    """Buat/sesuaikan koleksi dari profil (+ payload index). Kembalikan (koleksi baru dibuat?, field ter-index baru)."""
+    if full and client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    # Dimensi dari tabel model; probe embedding hanya jika model tak dikenal DAN koleksi harus dibuat
+    vector_size = EMBEDDING_DIMENSIONS.get(embedding_model)
+    if vector_size is None and not client.collection_exists(collection_name):
+        vector_size = vector_size_for(embedding_model, embeddings)
+    created = apply_profile(client, collection_name, profile, vector_size)
+    indexed_fields = ensure_payload_indexes(client, collection_name)
+    if indexed_fields:
+        log(f"Payload index dibuat: {', '.join(indexed_fields)}.")
+    return created, indexed_fields
+
+
+def update_payloads(client, collection_name, records, batch_size=50):
+    """Teks embedding sama: cukup ganti payload (vektor lama tetap valid), dikirim per batch."""
+    for i in range(0, len(records), batch_size):
+        client.batch_update_points(
+            collection_name=collection_name,
+            update_operations=[
+                models.OverwritePayloadOperation(
+                    overwrite_payload=models.SetPayload(payload=record.payload(), points=[record.point_id])
+                )
+                for record in records[i:i + batch_size]
+            ],
+        )
+
+
+def sync_collection(client, collection_name, records, embeddings, batch_size=50, full=False,
+                    concurrency=4, requests_per_minute=None, profile=None,
+                    embedding_model="text-embedding-3-small", log=print):
+    """
+    Sinkronkan koleksi Qdrant dengan `records`.
+    - full=False (default): hanya embed/upsert baris baru/berubah, hapus baris yang hilang.
+    - full=True: hapus koleksi lalu isi ulang semuanya.
+    - profile: `CollectionProfile` untuk membuat/menyesuaikan koleksi (default: profil "default").
+    Kembalikan ringkasan (dipakai untuk manifest).
+    """
+    profile = profile or get_profile()
+    created, indexed_fields = prepare_collection(
+        client, collection_name, embeddings, profile, embedding_model=embedding_model, full=full, log=log,
+    )
+
+    with stage("qdrant_scan_hashes"):
+        existing = {} if created else fetch_existing_hashes(client, collection_name)
+    plan = plan_sync(records, existing)
+    log(f"Rencana sinkronisasi: {len(plan.new_ids)} baru, "
+        f"{len(plan.to_upsert) - len(plan.new_ids)} berubah (embed ulang), "
+        f"{len(plan.payload_only)} hanya metadata, "
+        f"{len(plan.unchanged)} tidak berubah, {len(plan.to_delete)} dihapus.")
+
+    pipeline_stats = None
+    if plan.to_upsert:
+        with stage("embed_upload"):
+            pipeline_stats = upsert_records(
+                client, collection_name, plan.to_upsert, embeddings,
+                batch_size=batch_size, concurrency=concurrency, requests_per_minute=requests_per_minute, log=log,
+            )
+        log(f"Throughput embedding+upload: {pipeline_stats.docs_per_sec:.1f} dok/detik "
+            f"({pipeline_stats.documents} dokumen dalam {pipeline_stats.wall_seconds:.1f} detik, "
+            f"{pipeline_stats.retries} retry).")
+    with stage("qdrant_payload_update"):
+        update_payloads(client, collection_name, plan.payload_only, batch_size)
+    if plan.to_delete:
+        with stage("qdrant_delete"):
+            client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=plan.to_delete),
+            )
+
+    return {
+        "collection_created": created,
+        "inserted": sorted(plan.new_ids),
+        "updated": sorted(r.point_id for r in plan.to_upsert if r.point_id not in plan.new_ids),
+        "payload_updated": sorted(r.point_id for r in plan.payload_only),
+        "deleted": sorted(plan.to_delete),
+        "unchanged": len(plan.unchanged),
+        "embedded_documents": len(plan.to_upsert),
+        "pipeline": pipeline_stats.as_dict() if pipeline_stats else None,
+        "collection_profile": profile.as_dict(),
+        "payload_indexes_created": indexed_fields,
+    }
+
+
+# === SQLite (atomik) ===
+def write_sql_database(df, db_file, previous_hash=None, force=False):
+    """
+    Bangun database SQLite (skema bertipe & ber-index, lihat `cinebot.sql_schema`) di file sementara
+    lalu ganti file lama secara atomik.
+    Dilewati jika hash dataset sama dengan run sebelumnya, file DB masih ada, dan versi skemanya terbaru.
+    Movie_ID stabil ikut di-hash, jadi DB lama dengan Movie_ID posisi baris ditulis ulang sekali.
+    """
+    if 'Movie_ID' not in df.columns:
+        df = assign_movie_ids(df)
+    current_hash = dataset_hash(df)
+    if (not force and previous_hash == current_hash and os.path.exists(db_file)
+            and schema_version(db_file) == SCHEMA_VERSION):
+        return {"rewritten": False, "dataset_hash": current_hash}
+
+    tmp_file = db_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    summary = build_movie_database(tmp_file, df)
+    os.replace(tmp_file, db_file)
+    return {"rewritten": True, "dataset_hash": current_hash, "sql_schema": summary}
+
+
+# === Manifest ===
+def read_last_manifest(path):
+    """Entri terakhir dari manifest JSONL (atau None)."""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def append_manifest(path, entry):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    entry = {"finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **entry}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
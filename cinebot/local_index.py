@@ -0,0 +1,185 @@
+"""
+Index vektor in-process berbasis NumPy sebagai alternatif lokal untuk pencarian Qdrant remote.
+
+Korpus CineBot hanya ~1000 film, sehingga seluruh vektor muat di memori dan cosine top-k
+bisa dihitung dengan satu perkalian matriks tanpa round-trip jaringan.
+
+Artefak (dibuat oleh `setup.py`, default di `data/index/`):
+- vectors.npy   : matriks float32 (n, dim) yang sudah dinormalisasi L2, dibuka dengan mmap.
+- metadata.json : metadata kolumnar (id, title, year, rating, genre, poster, page_content).
+"""
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+METADATA_COLUMNS = ("title", "year", "rating", "genre", "poster")
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_local_index(path, point_ids, vectors, payloads, embedding_model=None):
+    """
+    Tulis artefak index lokal.
+    - point_ids: ID point Qdrant (agar hasil bisa dibandingkan 1:1 dengan Qdrant).
+    - payloads: payload format LangChain ({'page_content': ..., 'metadata': {...}}).
+    """
+    os.makedirs(path, exist_ok=True)
+    matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+    columns = {"point_id": [str(pid) for pid in point_ids]}
+    columns["page_content"] = [p.get("page_content", "") for p in payloads]
+    columns["id"] = [p.get("metadata", {}).get("id") for p in payloads]
+    for name in METADATA_COLUMNS:
+        columns[name] = [p.get("metadata", {}).get(name) for p in payloads]
+
+    # Tulis ke file sementara lalu os.replace agar pembaca tidak melihat artefak setengah jadi
+    vectors_tmp = os.path.join(path, VECTORS_FILE + ".tmp")
+    with open(vectors_tmp, "wb") as f:
+        np.save(f, matrix)
+    metadata_tmp = os.path.join(path, METADATA_FILE + ".tmp")
+    with open(metadata_tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"embedding_model": embedding_model, "dim": int(matrix.shape[1]) if matrix.size else 0,
+             "count": int(matrix.shape[0]), "columns": columns},
+            f, ensure_ascii=False,
+        )
+    os.replace(vectors_tmp, os.path.join(path, VECTORS_FILE))
+    os.replace(metadata_tmp, os.path.join(path, METADATA_FILE))
+    return matrix.shape[0]
+
+
+def export_from_qdrant(client, collection_name, path, embedding_model=None, page_size=256):
+    """Scroll seluruh point (beserta vektornya) dari koleksi Qdrant lalu ekspor ke artefak lokal."""
+    point_ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for point in points:
+            vector = point.vector
+            if isinstance(vector, dict):  # named vectors: ambil vektor default
+                vector = vector.get("", next(iter(vector.values())))
+            point_ids.append(point.id)
+            vectors.append(vector)
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+    return export_local_index(path, point_ids, vectors, payloads, embedding_model=embedding_model)
+
+
+def load_columns(path):
+    """Metadata kolumnar artefak (tanpa vektor) — dipakai juga oleh graf tetangga (`cinebot.neighbors`)."""
+    with open(os.path.join(path, METADATA_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def document_from_columns(columns, row, score=None):
+    """Bangun Document LangChain (bentuk sama dengan hasil QdrantVectorStore)."""
+    metadata = {"id": columns["id"][row]}
+    for name in METADATA_COLUMNS:
+        metadata[name] = columns[name][row]
+    metadata["_id"] = columns["point_id"][row]
+    if score is not None:
+        metadata["_score"] = score
+    return Document(page_content=columns["page_content"][row], metadata=metadata)
+
+
+class NumpyIndex:
+    """Cosine top-k tervektorisasi dengan pre-filter metadata opsional."""
+
+    def __init__(self, vectors, columns, embedding_model=None):
+        self.vectors = vectors
+        self.columns = columns
+        self.embedding_model = embedding_model
+        # Kolom numerik & genre diubah sekali menjadi array untuk masking cepat
+        self.years = np.array([_to_float(v) for v in columns["year"]], dtype=np.float64)
+        self.ratings = np.array([_to_float(v) for v in columns["rating"]], dtype=np.float64)
+        self.genre_sets = [_genre_set(v) for v in columns["genre"]]
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        meta = load_columns(path)
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap else None)
+        return cls(vectors, meta["columns"], embedding_model=meta.get("embedding_model"))
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def filter_mask(self, year_min=None, year_max=None, min_rating=None, max_rating=None, genres=None):
+        """Mask boolean baris yang lolos filter; None jika tidak ada filter."""
+        mask = None
+
+        def _and(current, other):
+            return other if current is None else current & other
+
+        if year_min is not None:
+            mask = _and(mask, self.years >= year_min)
+        if year_max is not None:
+            mask = _and(mask, self.years <= year_max)
+        if min_rating is not None:
+            mask = _and(mask, self.ratings >= min_rating)
+        if max_rating is not None:
+            mask = _and(mask, self.ratings <= max_rating)
+        if genres:
+            wanted = {g.casefold() for g in genres}
+            mask = _and(mask, np.array([bool(wanted & gs) for gs in self.genre_sets], dtype=bool))
+        return mask
+
+    def search_ids(self, query_vector, k=3, **filters):
+        """Kembalikan list (row_index, score) urut skor menurun."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.vectors @ query
+
+        mask = self.filter_mask(**filters)
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = candidates[top] if candidates is not None else top
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top)]
+
+    def document(self, row, score=None):
+        return document_from_columns(self.columns, row, score)
+
+    def search(self, query_vector, k=3, **filters):
+        return [self.document(row, score) for row, score in self.search_ids(query_vector, k=k, **filters)]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _genre_set(value):
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value or "").split(",")
+    return {item.strip().casefold() for item in items if item and item.strip()}
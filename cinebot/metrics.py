@@ -0,0 +1,367 @@
+"""
+Instrumentasi latensi per tahap (tanpa layanan eksternal).
+
+Sebelumnya satu-satunya visibilitas adalah Langfuse (butuh layanan eksternal, tidak ada rincian untuk setup.py).
+Sekarang setiap turn mencatat sendiri waktu tiap tahap hot path:
+- `embedding` / `qdrant_search`: embedding pertanyaan & pencarian vektor (`cinebot.resources`).
+- `sql_execution`: eksekusi SQL (template router, SQL single-shot, atau `sql_db_query` sub-agent).
+- `sql_validation`: validasi lokal SQL single-shot (guard + `EXPLAIN`, `cinebot.text_to_sql`).
+- `speculation_wait`: tool menunggu sisa hasil retrieval spekulatif (`cinebot.speculation`).
+- `selection` / `synthesis`: panggilan LLM agent utama (memilih tool vs menyusun jawaban).
+- `sql_agent_llm` / `sql_agent_tool:<nama>`: tiap langkah LLM & tool sub-agent SQL.
+- `tool:<nama>`: tool agent utama (mencakup tahap-tahap di dalamnya).
+Plus jumlah round trip LLM dan token prompt/completion per turn.
+
+Cara pakai:
+- `StageMetrics` dikumpulkan per turn; `activate(metrics)` memasangnya di contextvar sehingga `stage(name)`
+  di kode non-LangChain (resources, router) ikut tercatat — contextvar ikut terbawa ke event loop async
+  (`run_coroutine_threadsafe`) dan thread executor langgraph.
+- `MetricsCallbackHandler`: callback LangChain untuk LLM & tool (termasuk sub-agent SQL di dalam tool).
+- `MetricsRegistry`: agregat per proses (counter + histogram) untuk format teks Prometheus
+  (`render_prometheus`, endpoint opsional `serve_prometheus`) dan sink JSONL lokal (satu baris per turn).
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+STAGE_EMBEDDING = "embedding"
+STAGE_QDRANT_SEARCH = "qdrant_search"
+STAGE_SQL_EXECUTION = "sql_execution"
+STAGE_SQL_CACHE_HIT = "sql_cache_hit"
+STAGE_SQL_VALIDATION = "sql_validation"
+STAGE_SPECULATION_WAIT = "speculation_wait"
+STAGE_SINGLE_FLIGHT_WAIT = "single_flight_wait"
+STAGE_NEIGHBOR_LOOKUP = "neighbor_lookup"
+STAGE_SELECTION = "selection"
+STAGE_SYNTHESIS = "synthesis"
+STAGE_SQL_AGENT_LLM = "sql_agent_llm"
+
+# Tool sub-agent SQL yang mengeksekusi query (dihitung sebagai `sql_execution`)
+SQL_QUERY_TOOL = "sql_db_query"
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current = contextvars.ContextVar("cinebot_stage_metrics", default=None)
+
+
+class StageMetrics:
+    """Catatan satu turn (atau satu run setup.py): tahap berurutan, round trip LLM, dan token."""
+
+    def __init__(self):
+        self.stages = []  # (nama, detik), urut selesai
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.stages.append((name, seconds))
+
+    def record_llm(self, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def breakdown(self):
+        """[(tahap, jumlah, total detik)] urut kemunculan pertama."""
+        totals = {}
+        with self._lock:
+            for name, seconds in self.stages:
+                count, total = totals.get(name, (0, 0.0))
+                totals[name] = (count + 1, total + seconds)
+        return [(name, count, total) for name, (count, total) in totals.items()]
+
+    def as_dict(self):
+        return {
+            "stages": {name: {"count": count, "seconds": round(total, 4)} for name, count, total in self.breakdown()},
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "elapsed_seconds": round(time.perf_counter() - self.started, 4),
+        }
+
+    def describe(self):
+        stages = ", ".join(f"{name}={total:.2f}s" + (f" x{count}" if count > 1 else "")
+                           for name, count, total in self.breakdown())
+        return (f"{stages or '-'} | {self.llm_calls} panggilan LLM, "
+                f"{self.prompt_tokens}+{self.completion_tokens} token")
+
+
+@contextmanager
+def activate(metrics):
+    """Pasang `metrics` sebagai penampung `stage(...)` untuk konteks (thread/task) saat ini."""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def stage(name):
+    """Ukur satu tahap ke `StageMetrics` yang aktif; no-op jika tidak ada (mis. benchmark, skrip)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+
+def _usage(response):
+    """(prompt, completion) token dari LLMResult: usage_metadata pesan, fallback `llm_output.token_usage`."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    if not prompt and not completion:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+def _has_tool_calls(response):
+    return any(
+        getattr(getattr(generation, "message", None), "tool_calls", None)
+        for generations in response.generations
+        for generation in generations
+    )
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Callback LangChain yang mengisi `StageMetrics`: durasi tiap panggilan LLM & tool, token, dan round trip.
+    Run di bawah sebuah tool (sub-agent SQL) dibedakan dari run agent utama lewat rantai parent_run_id.
+    """
+
+    # Hanya operasi dict ringan: jalankan langsung (juga di event loop) tanpa thread executor
+    run_inline = True
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._parents = {}
+        self._tool_runs = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _enter(self, run_id, parent_run_id):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            self._started[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        return time.perf_counter() - started if started is not None else None
+
+    def _inside_tool(self, run_id):
+        with self._lock:
+            parent = self._parents.get(run_id)
+            while parent is not None:
+                if parent in self._tool_runs:
+                    return True
+                parent = self._parents.get(parent)
+        return False
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._enter(run_id, parent_run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._enter(run_id, parent_run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        seconds = self._elapsed(run_id)
+        if seconds is None:
+            return
+        if self._inside_tool(run_id):
+            name = STAGE_SQL_AGENT_LLM
+        else:
+            name = STAGE_SELECTION if _has_tool_calls(response) else STAGE_SYNTHESIS
+        self.metrics.record(name, seconds)
+        self.metrics.record_llm(*_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        seconds = self._elapsed(run_id)
+        if seconds is not None:
+            self.metrics.record("llm_error", seconds)
+            self.metrics.record_llm()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        nested = self._inside_tool(parent_run_id) or parent_run_id in self._tool_runs
+        if nested:
+            label = STAGE_SQL_EXECUTION if name == SQL_QUERY_TOOL else f"sql_agent_tool:{name}"
+        else:
+            label = f"tool:{name}"
+        self._enter(run_id, parent_run_id)
+        with self._lock:
+            self._tool_runs[run_id] = label
+
+    def _end_tool(self, run_id):
+        seconds = self._elapsed(run_id)
+        with self._lock:
+            label = self._tool_runs.pop(run_id, None)
+        if seconds is not None and label is not None:
+            self.metrics.record(label, seconds)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class MetricsRegistry:
+    """Agregat metrik per proses + sink JSONL lokal (satu baris per turn / run setup.py)."""
+
+    def __init__(self, jsonl_path=None):
+        self.jsonl_path = jsonl_path
+        self.turns = {}
+        self.llm_calls = 0
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.turn_seconds = _Histogram()
+        self.stage_seconds = {}
+        self._lock = threading.Lock()
+
+    def observe_turn(self, metrics, source, total_seconds, ttft_seconds=None, **extra):
+        """Masukkan satu turn ke agregat dan tulis ke sink JSONL (jika diset)."""
+        with self._lock:
+            self.turns[source] = self.turns.get(source, 0) + 1
+            self.llm_calls += metrics.llm_calls
+            self.tokens["prompt"] += metrics.prompt_tokens
+            self.tokens["completion"] += metrics.completion_tokens
+            self.turn_seconds.observe(total_seconds)
+            for name, seconds in list(metrics.stages):
+                self.stage_seconds.setdefault(name, _Histogram()).observe(seconds)
+        self.write({
+            "kind": "turn",
+            "source": source,
+            "total_seconds": round(total_seconds, 4),
+            "ttft_seconds": round(ttft_seconds, 4) if ttft_seconds is not None else None,
+            **metrics.as_dict(),
+            **extra,
+        })
+
+    def write(self, record):
+        if not self.jsonl_path:
+            return
+        record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **record}
+        try:
+            directory = os.path.dirname(self.jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Peringatan: Gagal menulis metrik ke '{self.jsonl_path}'. Error: {e}")
+
+    def render_prometheus(self):
+        """Seluruh agregat dalam format teks eksposisi Prometheus."""
+        lines = ["# TYPE cinebot_turns_total counter"]
+        with self._lock:
+            lines += [f'cinebot_turns_total{{source="{_label(source)}"}} {count}' for source, count in self.turns.items()]
+            lines += ["# TYPE cinebot_llm_calls_total counter", f"cinebot_llm_calls_total {self.llm_calls}",
+                      "# TYPE cinebot_llm_tokens_total counter"]
+            lines += [f'cinebot_llm_tokens_total{{kind="{kind}"}} {count}' for kind, count in self.tokens.items()]
+            lines.append("# TYPE cinebot_turn_seconds histogram")
+            lines += self._histogram_lines("cinebot_turn_seconds", self.turn_seconds, "")
+            lines.append("# TYPE cinebot_stage_seconds histogram")
+            for name, histogram in self.stage_seconds.items():
+                lines += self._histogram_lines("cinebot_stage_seconds", histogram, f'stage="{_label(name)}"')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(metric, histogram, labels):
+        sep = "," if labels else ""
+        lines = [f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {count}'
+                 for bound, count in zip(HISTOGRAM_BUCKETS, histogram.counts)]
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines += [f"{metric}_sum{suffix} {histogram.sum:.6f}", f"{metric}_count{suffix} {histogram.count}"]
+        return lines
+
+
+# === Endpoint /metrics (opsional, satu per proses) ===
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_prometheus(registry, port, host="0.0.0.0"):
+    """
+    Jalankan endpoint HTTP `/metrics` (thread daemon) untuk di-scrape Prometheus.
+    Dipanggil ulang (mis. resource dibangun ulang) hanya mengganti registry yang disajikan.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.registry = registry
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = self.server.registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"Peringatan: Endpoint metrik di port {port} tidak aktif. Error: {e}")
+            return None
+        server.registry = registry
+        threading.Thread(target=server.serve_forever, name="cinebot-metrics", daemon=True).start()
+        _server = server
+        return server
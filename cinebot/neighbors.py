@@ -0,0 +1,242 @@
+"""
+Graf tetangga terdekat (top-k film paling mirip per film) untuk pertanyaan "mirip <film>".
+
+Pertanyaan seperti "film yang mirip Inception" menyebut film yang sudah ada di dataset, tetapi tool RAG
+meng-embed seluruh kalimat pertanyaan lalu mencari — lebih lambat dan kurang tepat dibanding memakai vektor
+film itu sendiri. Di sini:
+- `setup.py` menghitung top-k tetangga (cosine) untuk SEMUA film dari vektor index lokal, per batch
+  (satu perkalian matriks (batch, n) per batch, `argpartition` per baris), lalu menyimpannya sebagai
+  artefak `neighbors.npz` di samping `vectors.npy`/`metadata.json` (`cinebot.local_index`).
+- Refresh inkremental: setiap baris menyimpan hash vektornya. Run berikutnya hanya menghitung ulang
+  penuh baris baru/berubah dan baris yang daftar tetangganya memuat film yang berubah/dihapus; baris lain
+  cukup menggabungkan daftar lamanya dengan skor terhadap vektor yang berubah. Hasilnya sama dengan
+  hitung ulang penuh.
+- Aplikasi (`NeighborGraph`) memetakan judul (`cinebot.titles`) ke baris graf dan mengembalikan
+  Document dengan bentuk yang sama dengan hasil similarity search — tanpa embedding & tanpa pencarian vektor.
+"""
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from cinebot.local_index import VECTORS_FILE, document_from_columns, load_columns
+
+NEIGHBORS_FILE = "neighbors.npz"
+DEFAULT_K = 20
+
+
+@dataclass
+class NeighborTable:
+    """Isi artefak: `neighbors[i]` = indeks baris (di `point_ids`) tetangga film i, urut skor menurun."""
+    point_ids: np.ndarray   # (n,) str
+    neighbors: np.ndarray   # (n, k) int32
+    scores: np.ndarray      # (n, k) float32
+    digests: np.ndarray     # (n,) str, hash vektor per baris
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def __len__(self):
+        return len(self.point_ids)
+
+
+def vector_digests(matrix):
+    """Hash per baris vektor (deteksi baris yang berubah tanpa menyimpan vektor lama)."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return np.array([hashlib.blake2b(row.tobytes(), digest_size=8).hexdigest() for row in matrix])
+
+
+def _top_k(scores, k):
+    """Top-k per baris matriks skor: (indeks kolom, skor), urut skor menurun."""
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def compute_neighbors(matrix, k=DEFAULT_K, rows=None, batch_size=512):
+    """
+    Top-k tetangga cosine (matrix sudah dinormalisasi L2) untuk `rows` (default: semua baris), per batch.
+    Film tidak menjadi tetangga dirinya sendiri. Kembalikan (indices int32, scores float32).
+    """
+    n = matrix.shape[0]
+    rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    k = min(k, max(n - 1, 0))
+    indices = np.empty((len(rows), k), dtype=np.int32)
+    scores = np.empty((len(rows), k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        block = matrix[batch] @ matrix.T
+        block[np.arange(len(batch)), batch] = -np.inf
+        top, values = _top_k(block, k)
+        indices[start:start + len(batch)] = top
+        scores[start:start + len(batch)] = values
+    return indices, scores
+
+
+def refresh_neighbors(previous, point_ids, matrix, k=DEFAULT_K, batch_size=512):
+    """
+    Bangun tabel tetangga untuk (point_ids, matrix); pakai ulang `previous` (NeighborTable atau None) sebisanya.
+    Kembalikan (NeighborTable, ringkasan untuk manifest).
+    """
+    point_ids = np.asarray([str(pid) for pid in point_ids])
+    matrix = np.asarray(matrix, dtype=np.float32)
+    digests = vector_digests(matrix)
+    n = len(point_ids)
+    k = min(k, max(n - 1, 0))
+    summary = {"movies": n, "k": k, "mode": "full", "recomputed": n, "merged": 0, "unchanged": 0}
+
+    if previous is None or previous.k != k or len(previous) == 0:
+        neighbors, scores = compute_neighbors(matrix, k, batch_size=batch_size)
+        return NeighborTable(point_ids, neighbors, scores, digests), summary
+
+    # Baris baru -> baris lama dengan vektor identik (-1 = baru / vektor berubah)
+    old_row = {pid: i for i, pid in enumerate(previous.point_ids)}
+    same = np.array([old_row.get(pid, -1) for pid in point_ids], dtype=np.int64)
+    kept_mask = same >= 0
+    kept_mask[kept_mask] = previous.digests[same[kept_mask]] == digests[kept_mask]
+    kept = np.flatnonzero(kept_mask)
+    changed = np.flatnonzero(~kept_mask)
+
+    # Baris lama -> baris baru; tetangga yang dihapus/berubah menjadi -1
+    remap = np.full(len(previous), -1, dtype=np.int64)
+    remap[same[kept]] = kept
+    old_lists = remap[previous.neighbors[same[kept]]]
+    intact = (old_lists >= 0).all(axis=1)
+    clean, dirty = kept[intact], kept[~intact]
+
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    # Baris bersih: daftar lama tetap top-k di antara film yang tidak berubah; hanya vektor baru yang bisa masuk
+    clean_lists, clean_scores = old_lists[intact], previous.scores[same[clean]]
+    for start in range(0, len(clean), batch_size):
+        batch = slice(start, start + batch_size)
+        rows = clean[batch]
+        if changed.size:
+            block = matrix[rows] @ matrix[changed].T
+            merged = np.concatenate([clean_lists[batch], np.broadcast_to(changed, block.shape)], axis=1)
+            top, values = _top_k(np.concatenate([clean_scores[batch], block], axis=1), k)
+            neighbors[rows] = np.take_along_axis(merged, top, axis=1)
+            scores[rows] = values
+        else:
+            neighbors[rows] = clean_lists[batch]
+            scores[rows] = clean_scores[batch]
+
+    # Baris baru/berubah + baris yang kehilangan tetangga: hitung ulang penuh
+    recompute = np.concatenate([changed, dirty])
+    if recompute.size:
+        neighbors[recompute], scores[recompute] = compute_neighbors(matrix, k, rows=recompute, batch_size=batch_size)
+
+    summary.update({
+        "mode": "incremental",
+        "recomputed": int(recompute.size),
+        "merged": int(clean.size) if changed.size else 0,
+        "unchanged": 0 if changed.size else int(clean.size),
+        "changed": int(changed.size),
+        "removed": int(len(previous) - kept.size),
+    })
+    return NeighborTable(point_ids, neighbors, scores, digests), summary
+
+
+# === Artefak ===
+def save_neighbors(path, table):
+    """Tulis `neighbors.npz` (file sementara lalu os.replace, sama dengan artefak index lokal)."""
+    os.makedirs(path, exist_ok=True)
+    tmp = os.path.join(path, NEIGHBORS_FILE + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, point_ids=table.point_ids, neighbors=table.neighbors, scores=table.scores, digests=table.digests)
+    os.replace(tmp, os.path.join(path, NEIGHBORS_FILE))
+
+
+def load_neighbors(path):
+    """NeighborTable dari artefak; None jika belum pernah dibuat."""
+    file_path = os.path.join(path, NEIGHBORS_FILE)
+    if not os.path.exists(file_path):
+        return None
+    with np.load(file_path) as data:
+        return NeighborTable(data["point_ids"], data["neighbors"], data["scores"], data["digests"])
+
+
+def build_neighbor_graph(index_path, k=DEFAULT_K, batch_size=512, full=False):
+    """Dipanggil setup.py setelah export index lokal: refresh (inkremental) lalu simpan graf tetangga."""
+    started = time.perf_counter()
+    matrix = np.load(os.path.join(index_path, VECTORS_FILE))
+    point_ids = load_columns(index_path)["columns"]["point_id"]
+    previous = None if full else load_neighbors(index_path)
+    table, summary = refresh_neighbors(previous, point_ids, matrix, k=k, batch_size=batch_size)
+    save_neighbors(index_path, table)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+# === Dipakai aplikasi ===
+def _matches(columns, row, filters):
+    """Cek MovieFilters (`cinebot.query_filters`) terhadap metadata satu baris."""
+    year, rating = columns["year"][row], columns["rating"][row]
+    if filters.year_min is not None and (year is None or year < filters.year_min):
+        return False
+    if filters.year_max is not None and (year is None or year > filters.year_max):
+        return False
+    if filters.min_rating is not None and (rating is None or rating < filters.min_rating):
+        return False
+    if filters.max_rating is not None and (rating is None or rating > filters.max_rating):
+        return False
+    if filters.genres:
+        genre = columns["genre"][row]
+        items = genre if isinstance(genre, (list, tuple)) else str(genre or "").split(",")
+        if not {g.strip().casefold() for g in items} & {g.casefold() for g in filters.genres}:
+            return False
+    return True
+
+
+class NeighborGraph:
+    """Graf tetangga + metadata index lokal; `similar(title)` tanpa embedding & pencarian vektor."""
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns
+        # Baris graf -> baris metadata lewat point_id (graf & metadata bisa berasal dari export berbeda)
+        meta_row = {pid: i for i, pid in enumerate(columns["point_id"])}
+        self.meta_rows = np.array([meta_row.get(str(pid), -1) for pid in table.point_ids], dtype=np.int64)
+        self.by_title = {}
+        for row, meta in enumerate(self.meta_rows):
+            if meta >= 0:
+                self.by_title.setdefault(str(columns["title"][meta]).casefold(), []).append(row)
+
+    @classmethod
+    def load(cls, path):
+        """None jika artefak graf (atau metadata index lokal) belum ada."""
+        table = load_neighbors(path)
+        if table is None:
+            return None
+        return cls(table, load_columns(path)["columns"])
+
+    def __len__(self):
+        return len(self.table)
+
+    def seed_row(self, title):
+        """Baris graf untuk Series_Title; judul ganda (mis. remake) -> rating tertinggi."""
+        rows = self.by_title.get(str(title).casefold())
+        if not rows:
+            return None
+        return max(rows, key=lambda row: self.columns["rating"][self.meta_rows[row]] or 0)
+
+    def similar(self, title, k=3, filters=None):
+        """(Document film acuan, list Document tetangga) atau None jika judul tidak ada di graf."""
+        row = self.seed_row(title)
+        if row is None:
+            return None
+        results = []
+        for neighbor, score in zip(self.table.neighbors[row], self.table.scores[row]):
+            meta = self.meta_rows[neighbor]
+            if meta < 0 or (filters is not None and not _matches(self.columns, meta, filters)):
+                continue
+            results.append(document_from_columns(self.columns, meta, float(score)))
+            if len(results) == k:
+                break
+        return document_from_columns(self.columns, self.meta_rows[row]), results
@@ -0,0 +1,26 @@
+"""
+Normalisasi teks pertanyaan untuk kunci cache.
+
+Pertanyaan dari tombol contoh dan ketikan user sering hanya berbeda kapitalisasi,
+spasi ganda, atau tanda baca di akhir; semuanya dianggap pertanyaan yang sama.
+"""
+import hashlib
+import re
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT = " \t\n.,!?;:"
+
+
+def normalize_question(text):
+    """Casefold, rapikan spasi, dan buang tanda baca di akhir kalimat."""
+    text = _WHITESPACE_RE.sub(" ", (text or "").casefold()).strip()
+    return text.rstrip(_TRAILING_PUNCT)
+
+
+def cache_key(*parts):
+    """Kunci cache deterministik (sha256) dari beberapa bagian string."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
@@ -0,0 +1,202 @@
+"""
+Pipeline ingestion konkuren untuk `setup.py`: embedding dan upload berjalan tumpang-tindih.
+
+Sebelumnya setiap batch di-embed lalu di-upload secara berurutan, sehingga waktu embedding
+dan waktu jaringan tidak pernah overlap. Di sini:
+- `embed_documents` dijalankan di worker pool terbatas (`concurrency`), dengan rate limit
+  token-bucket (request/menit) dan retry + exponential backoff untuk error 429.
+- Setiap batch yang selesai di-embed langsung di-upsert oleh pool upload terpisah,
+  sementara batch berikutnya sedang di-embed.
+- Jumlah batch in-flight dibatasi agar memori tetap terkendali.
+- Statistik throughput (dokumen/detik) dilaporkan di akhir.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from qdrant_client import models
+
+
+class TokenBucket:
+    """Rate limiter token-bucket thread-safe (`rate` token per detik, burst sampai `capacity`)."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_for = (tokens - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+def is_rate_limit_error(error):
+    """Deteksi 429 dari SDK OpenAI (RateLimitError) maupun error HTTP generik."""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def embed_with_retry(embeddings, texts, bucket=None, max_retries=6, base_delay=1.0, max_delay=60.0, on_retry=None):
+    """Panggil `embed_documents` dengan rate limit & retry (exponential backoff + jitter) untuk 429."""
+    attempt = 0
+    while True:
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= max_retries:
+                raise
+            delay = _retry_after(e) or min(max_delay, base_delay * (2 ** attempt))
+            delay *= 1 + random.random() * 0.25
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, delay, e)
+            time.sleep(delay)
+
+
+def is_local_client(client):
+    """True untuk Qdrant local mode (":memory:" / path), yang tidak aman untuk upsert paralel."""
+    return type(getattr(client, "_client", None)).__name__ == "QdrantLocal"
+
+
+@dataclass
+class PipelineStats:
+    documents: int = 0
+    batches: int = 0
+    retries: int = 0
+    embed_seconds: float = 0.0
+    upload_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def docs_per_sec(self):
+        return self.documents / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "documents": self.documents,
+            "batches": self.batches,
+            "retries": self.retries,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "upload_seconds": round(self.upload_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "docs_per_sec": round(self.docs_per_sec, 2),
+        }
+
+
+def run_ingest_pipeline(
+    client,
+    collection_name,
+    records,
+    embeddings,
+    batch_size=50,
+    concurrency=4,
+    requests_per_minute=None,
+    max_retries=6,
+    upload_workers=2,
+    log=print,
+):
+    """
+    Embed (konkuren, rate-limited) lalu upsert (overlap dengan embedding batch berikutnya).
+    `records` adalah list `cinebot.ingest.MovieRecord`. Kembalikan `PipelineStats`.
+    """
+    stats = PipelineStats()
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    if not batches:
+        return stats
+
+    if is_local_client(client):
+        upload_workers = 1
+    bucket = TokenBucket(requests_per_minute / 60.0, capacity=concurrency) if requests_per_minute else None
+    in_flight = threading.BoundedSemaphore(concurrency * 2)
+    lock = threading.Lock()
+    upload_futures = []
+    errors = []
+    started = time.perf_counter()
+
+    def on_retry(attempt, delay, error):
+        with lock:
+            stats.retries += 1
+        log(f"Rate limit (429), retry #{attempt} dalam {delay:.1f} detik...")
+
+    def embed(batch):
+        t0 = time.perf_counter()
+        vectors = embed_with_retry(embeddings, [r.text for r in batch], bucket, max_retries, on_retry=on_retry)
+        with lock:
+            stats.embed_seconds += time.perf_counter() - t0
+        return vectors
+
+    def upload(batch, vectors):
+        try:
+            t0 = time.perf_counter()
+            client.upsert(
+                collection_name=collection_name,
+                points=[
+                    models.PointStruct(id=r.point_id, vector=v, payload=r.payload())
+                    for r, v in zip(batch, vectors)
+                ],
+            )
+            with lock:
+                stats.upload_seconds += time.perf_counter() - t0
+                stats.documents += len(batch)
+                stats.batches += 1
+                done, elapsed = stats.documents, time.perf_counter() - started
+            log(f"Mengunggah batch {stats.batches}/{len(batches)}... "
+                f"({done}/{len(records)} dokumen, {done / elapsed:.1f} dok/detik)")
+        except Exception as e:
+            errors.append(e)  # hentikan submit batch baru
+            raise
+        finally:
+            in_flight.release()
+
+    def on_embedded(batch, upload_pool):
+        def callback(future):
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+                in_flight.release()
+                return
+            with lock:
+                upload_futures.append(upload_pool.submit(upload, batch, future.result()))
+        return callback
+
+    with ThreadPoolExecutor(upload_workers, thread_name_prefix="upsert") as upload_pool:
+        # Pool embed ditutup (shutdown wait) lebih dulu: callback-nya berjalan di thread worker,
+        # jadi setelah blok ini selesai semua upload sudah pasti tersubmit.
+        with ThreadPoolExecutor(concurrency, thread_name_prefix="embed") as embed_pool:
+            for batch in batches:
+                in_flight.acquire()
+                if errors:
+                    in_flight.release()
+                    break
+                embed_pool.submit(embed, batch).add_done_callback(on_embedded(batch, upload_pool))
+
+        wait(upload_futures)
+
+    stats.wall_seconds = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return stats
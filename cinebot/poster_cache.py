@@ -0,0 +1,206 @@
+"""
+Cache poster lokal (content-addressed) + thumbnail, diisi oleh tahap prefetch di `setup.py`.
+
+Setiap tabel jawaban dulu membuat browser mengambil poster langsung dari m.media-amazon.com;
+CDN yang lambat/tidak tersedia membuat halaman terlihat rusak. Sekarang:
+- `prefetch_posters` mengunduh poster secara konkuren (worker pool terbatas) dengan retry +
+  exponential backoff untuk error sementara (timeout, 429, 5xx). 404/400 tidak di-retry.
+- Isi file disimpan berdasarkan SHA-256 (`originals/ab/<sha>.jpg`) sehingga poster identik hanya
+  disimpan sekali; thumbnail (`thumbs/<sha>.jpg`) dibuat dengan Pillow jika tersedia.
+- `manifest.json` memetakan Movie_ID -> {url, sha256, original, thumb} dan disimpan berkala (atomik),
+  jadi run yang terputus bisa dilanjutkan: entri dengan URL sama dan file yang masih ada dilewati.
+- Aplikasi menyajikan thumbnail lewat static serving Streamlit (`static/` -> `app/static/`);
+  URL remote hanya dipakai jika salinan lokal belum ada (`PosterIndex.display_url`).
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from io import BytesIO
+
+MANIFEST_FILE = "manifest.json"
+THUMB_SIZE = (120, 180)
+USER_AGENT = "CineBot-poster-prefetch/1.0"
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+
+class PermanentFetchError(Exception):
+    """Error yang tidak akan hilang dengan retry (mis. 404)."""
+
+
+def fetch_bytes(url, timeout=10.0, retries=3, base_delay=0.5, max_delay=8.0, on_retry=None):
+    """GET `url` -> (bytes, content_type); retry + backoff (jitter) untuk timeout, 429 dan 5xx."""
+    attempt = 0
+    while True:
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read(), response.headers.get_content_type()
+        except urllib.error.HTTPError as e:
+            if e.code != 429 and e.code < 500:
+                raise PermanentFetchError(f"HTTP {e.code} untuk {url}") from e
+            error = e
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            error = e
+        if attempt >= retries:
+            raise error
+        delay = min(max_delay, base_delay * (2 ** attempt)) * (1 + random.random() * 0.25)
+        attempt += 1
+        if on_retry is not None:
+            on_retry(attempt, delay, error)
+        time.sleep(delay)
+
+
+def make_thumbnail(data, size=THUMB_SIZE):
+    """Perkecil gambar (proporsional, tanpa upscale) ke JPEG; None jika Pillow tidak ada/gambar tidak terbaca."""
+    try:
+        from PIL import Image
+
+        with Image.open(BytesIO(data)) as image:
+            image = image.convert("RGB")
+            image.thumbnail(size)
+            out = BytesIO()
+            image.save(out, format="JPEG", quality=85, optimize=True)
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PosterCache:
+    """Penyimpanan poster di `root` (lihat docstring modul untuk layout)."""
+
+    def __init__(self, root):
+        self.root = root
+        self.entries = {}
+        self._lock = threading.Lock()
+        manifest_path = os.path.join(root, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    self.entries = {int(k): v for k, v in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"Peringatan: Manifest cache poster tidak terbaca, cache dibangun ulang. Error: {e}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def has(self, movie_id, url):
+        """True jika poster `url` untuk film ini sudah tersimpan lengkap (resume)."""
+        entry = self.entries.get(int(movie_id))
+        return (
+            entry is not None
+            and entry["url"] == url
+            and os.path.exists(os.path.join(self.root, entry["original"]))
+            and os.path.exists(os.path.join(self.root, entry["thumb"]))
+        )
+
+    def store(self, movie_id, url, data, content_type=None, thumb_size=THUMB_SIZE):
+        """Simpan bytes poster (content-addressed) + thumbnail, lalu catat di manifest (in-memory)."""
+        sha = hashlib.sha256(data).hexdigest()
+        original = f"originals/{sha[:2]}/{sha}{_EXTENSIONS.get(content_type, '.jpg')}"
+        if not os.path.exists(os.path.join(self.root, original)):
+            _write_atomic(os.path.join(self.root, original), data)
+        thumb = f"thumbs/{sha}.jpg"
+        if not os.path.exists(os.path.join(self.root, thumb)):
+            thumb_data = make_thumbnail(data, thumb_size)
+            if thumb_data is None:
+                thumb = original  # tanpa Pillow: sajikan file asli
+            else:
+                _write_atomic(os.path.join(self.root, thumb), thumb_data)
+        with self._lock:
+            self.entries[int(movie_id)] = {"url": url, "sha256": sha, "original": original, "thumb": thumb}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({str(k): v for k, v in sorted(self.entries.items())}, indent=0)
+        _write_atomic(os.path.join(self.root, MANIFEST_FILE), data.encode("utf-8"))
+
+    def local_urls(self, url_prefix):
+        """{Movie_ID: URL thumbnail lokal} untuk entri yang file-nya ada."""
+        prefix = url_prefix.rstrip("/")
+        return {
+            movie_id: f"{prefix}/{entry['thumb']}"
+            for movie_id, entry in self.entries.items()
+            if os.path.exists(os.path.join(self.root, entry["thumb"]))
+        }
+
+
+@dataclass
+class PrefetchStats:
+    total: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    retries: int = 0
+    bytes: int = 0
+    wall_seconds: float = 0.0
+
+    @property
+    def posters_per_sec(self):
+        return self.downloaded / self.wall_seconds if self.wall_seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "downloaded": self.downloaded,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "posters_per_sec": round(self.posters_per_sec, 2),
+        }
+
+
+def prefetch_posters(urls, cache, workers=8, retries=3, timeout=10.0, thumb_size=THUMB_SIZE,
+                     save_every=50, log=print):
+    """
+    Unduh poster `urls` ({Movie_ID: URL}) yang belum ada di `cache` dengan `workers` request paralel.
+    Kegagalan per poster hanya dicatat (aplikasi memakai URL remote untuk film tersebut). Kembalikan `PrefetchStats`.
+    """
+    stats = PrefetchStats(total=len(urls))
+    pending = {movie_id: url for movie_id, url in urls.items() if url and not cache.has(movie_id, url)}
+    stats.skipped = stats.total - len(pending)
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def on_retry(attempt, delay, error):
+        with lock:
+            stats.retries += 1
+
+    def download(movie_id, url):
+        data, content_type = fetch_bytes(url, timeout=timeout, retries=retries, on_retry=on_retry)
+        cache.store(movie_id, url, data, content_type, thumb_size)
+        return len(data)
+
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="poster") as pool:
+        futures = {pool.submit(download, movie_id, url): movie_id for movie_id, url in pending.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                size = future.result()
+                stats.downloaded += 1
+                stats.bytes += size
+            except Exception as e:
+                stats.failed += 1
+                log(f"Peringatan: Poster film {futures[future]} gagal diunduh: {e}")
+            if done % save_every == 0:
+                cache.save()
+                log(f"Poster {done}/{len(pending)} diproses...")
+
+    cache.save()
+    stats.wall_seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,92 @@
+"""
+Referensi poster pendek (`poster:<Movie_ID>`).
+
+URL poster Amazon panjang (~180 karakter) dulu ikut di setiap output tool dan jawaban LLM.
+Sekarang tool hanya mengirim `poster:<Movie_ID>`; model menulisnya apa adanya (`![Poster](poster:12)`)
+dan URL asli baru disisipkan saat render di UI (`PosterIndex.expand`).
+- Sumber pemetaan: tabel `movies` (Movie_ID, Poster_Link) di SQLite (skema `cinebot.sql_schema`).
+- Output lama/URL yang tidak dikenal tetap lolos apa adanya.
+- Jika cache poster lokal tersedia (`cinebot.poster_cache`), render memakai thumbnail lokal;
+  URL remote hanya dipakai untuk film yang salinan lokalnya belum ada.
+"""
+import re
+import sqlite3
+
+POSTER_REF_PREFIX = "poster:"
+# Referensi harus diakhiri `)`/spasi/tanda baca, agar `poster:1` yang masih setengah jalan saat
+# streaming tidak ter-expand jadi poster film lain (`poster:12`)
+_REF_RE = re.compile(r"poster:(\d+)(?=[)\s|,.;\]])")
+_IMAGE_REF_RE = re.compile(r"!\[([^\]]*)\]\(poster:(\d+)\)")
+_TAGGED_URL_RE = re.compile(r"\|\|POSTER\|\|\s*(\S+)")
+
+
+def poster_ref(movie_id):
+    return f"{POSTER_REF_PREFIX}{int(movie_id)}"
+
+
+class PosterIndex:
+    """Pemetaan Movie_ID <-> URL poster (remote), plus URL thumbnail lokal opsional untuk render."""
+
+    def __init__(self, urls=None, local_urls=None):
+        self.urls = dict(urls or {})
+        self.ids = {url: movie_id for movie_id, url in self.urls.items()}
+        self.local_urls = dict(local_urls or {})
+
+    @classmethod
+    def from_sqlite(cls, db_path, local_urls=None):
+        """Muat dari tabel `movies`; index kosong jika database/tabel belum ada."""
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                rows = conn.execute("SELECT Movie_ID, Poster_Link FROM movies WHERE Poster_Link IS NOT NULL").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Peringatan: Index poster tidak dimuat, URL poster dikirim utuh. Error: {e}")
+            rows = []
+        return cls(rows, local_urls)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def ref(self, url=None, movie_id=None):
+        """Referensi pendek untuk film; fallback ke URL asli jika tidak ada di index (None jika tanpa poster)."""
+        if movie_id is not None and int(movie_id) in self.urls:
+            return poster_ref(movie_id)
+        if url in self.ids:
+            return poster_ref(self.ids[url])
+        return url or None
+
+    def url(self, ref):
+        if ref and ref.startswith(POSTER_REF_PREFIX) and ref[len(POSTER_REF_PREFIX):].isdigit():
+            return self.urls.get(int(ref[len(POSTER_REF_PREFIX):]))
+        return ref
+
+    def display_url(self, ref):
+        """URL untuk ditampilkan: thumbnail lokal jika ada, selain itu URL remote (lihat `url`)."""
+        if ref and ref.startswith(POSTER_REF_PREFIX) and ref[len(POSTER_REF_PREFIX):].isdigit():
+            return self._display(int(ref[len(POSTER_REF_PREFIX):]))
+        return ref
+
+    def _display(self, movie_id):
+        return self.local_urls.get(movie_id) or self.urls.get(movie_id)
+
+    def compact(self, text):
+        """Ganti URL poster yang dikenal (termasuk tag lama `||POSTER||URL`) dengan referensi pendek."""
+        text = _TAGGED_URL_RE.sub(lambda m: self.ref(url=m.group(1)) or "N/A", text)
+        for url, movie_id in self.ids.items():
+            if url in text:
+                text = text.replace(url, poster_ref(movie_id))
+        return text
+
+    def expand(self, markdown):
+        """
+        Dipanggil saat render: `![Poster](poster:12)` -> gambar dengan thumbnail lokal (atau URL asli);
+        referensi tak dikenal -> "N/A".
+        """
+        def image(match):
+            url = self._display(int(match.group(2)))
+            return f"![{match.group(1)}]({url})" if url else "N/A"
+
+        markdown = _IMAGE_REF_RE.sub(image, markdown)
+        return _REF_RE.sub(lambda m: self._display(int(m.group(1))) or "N/A", markdown)
@@ -0,0 +1,204 @@
+"""
+Ekstraksi batasan terstruktur (tahun, rating, genre) dari pertanyaan rekomendasi.
+
+Sebelumnya `get_movie_recommendations` hanya melakukan similarity search murni, sehingga
+"film sci-fi tentang perjalanan waktu setelah 2000 dengan rating di atas 8" bisa mengembalikan film
+lama atau genre lain. Batasan di sini dikirim sebagai filter native Qdrant (payload index
+`metadata.year` / `metadata.rating` / `metadata.genre`, lihat `cinebot.collection_profile`)
+atau sebagai pre-filter index NumPy, sehingga top-k yang benar didapat dalam satu pencarian.
+"""
+import re
+from dataclasses import dataclass
+
+# Sinonim genre (Indonesia + Inggris) -> nama genre di dataset
+GENRE_SYNONYMS = {
+    "Sci-Fi": ("sci-fi", "scifi", "sci fi", "fiksi ilmiah", "science fiction"),
+    "Horror": ("horor", "horror", "seram"),
+    "Comedy": ("komedi", "comedy", "lucu"),
+    "Romance": ("romantis", "romance", "romansa", "cinta"),
+    "Animation": ("animasi", "animation", "kartun"),
+    "War": ("perang", "war"),
+    "Action": ("aksi", "action", "laga"),
+    "Adventure": ("petualangan", "adventure"),
+    "Mystery": ("misteri", "mystery"),
+    "Crime": ("kriminal", "crime", "kejahatan"),
+    "Drama": ("drama",),
+    "Fantasy": ("fantasi", "fantasy"),
+    "Family": ("keluarga", "family"),
+    "Biography": ("biografi", "biography", "biopik", "biopic"),
+    "History": ("sejarah", "history"),
+    "Musical": ("musikal", "musical"),
+    "Music": ("musik", "music"),
+    "Sport": ("olahraga", "sport", "sports"),
+    "Western": ("western", "koboi"),
+    "Thriller": ("thriller", "menegangkan"),
+    "Film-Noir": ("film-noir", "film noir", "noir"),
+}
+# Kata yang lebih sering berarti tema daripada genre ("tentang keluarga mafia", "kisah cinta")
+# -> tidak dipakai sebagai filter keras
+THEMATIC_GENRE_WORDS = {"cinta", "lucu", "seram", "keluarga", "sejarah", "kejahatan", "menegangkan",
+                        "musik", "olahraga", "perang", "war", "family", "history", "music"}
+
+_YEAR = r"(19[2-9]\d|20[0-2]\d)"
+# Skor IMDb 1-10 sebagai angka utuh: "rating imdb 250" / "skor 10/10" tidak boleh terbaca 2 / 1
+_RATING = r"(?<![\d.,])(10(?:[.,]0)?|[1-9](?:[.,]\d)?)(?!\d)"
+_AFTER_RE = re.compile(r"(?:setelah|sesudah|di atas|lebih dari|diatas|after|post)\s+(?:tahun\s+)?" + _YEAR)
+_SINCE_RE = re.compile(r"(?:sejak|mulai|dari tahun|from|since)\s+(?:tahun\s+)?" + _YEAR)
+_BEFORE_RE = re.compile(r"(?:sebelum|di bawah|dibawah|kurang dari|before|pre)\s+(?:tahun\s+)?" + _YEAR)
+_UNTIL_RE = re.compile(r"(?:sampai|hingga|until|up to)\s+(?:tahun\s+)?" + _YEAR)
+_BETWEEN_RE = re.compile(r"(?:antara\s+(?:tahun\s+)?|between\s+)?" + _YEAR + r"\s*(?:-|–|sampai|hingga|dan|and|to)\s*" + _YEAR)
+_DECADE_RE = re.compile(r"(?:tahun\s+)?\b((?:19|20)?\d0)\s*-?\s*(?:an|s)\b")
+_EXACT_YEAR_RE = re.compile(r"(?:tahun|rilis|year|in)\s+" + _YEAR)
+_RATING_WORD = r"(?:rating|skor|score|nilai|imdb)\s*(?:imdb\s*)?"
+# Grup: 1 batas bawah ketat, 2 batas bawah inklusif, 3 batas atas ketat, 4 batas atas inklusif, 5 nilai
+_RATING_RE = re.compile(
+    _RATING_WORD + r"(?:(di atas|diatas|lebih dari|above|over|>(?!=))|(minimal|min\.?|minimum|at least|>=|≥)"
+    r"|(di bawah|dibawah|kurang dari|below|under|<(?!=))|(maksimal|maks\.?|maximum|at most|<=|≤))?\s*"
+    + _RATING + r"(?:\s*/\s*10\b)?"
+)
+# "rating 7 sampai 9", "rating antara 7.5 dan 8.5": kedua batas inklusif
+_RATING_RANGE_RE = re.compile(
+    _RATING_WORD + r"(?:antara\s+|between\s+)?" + _RATING + r"\s*(?:-|–|sampai|hingga|dan|and|to)\s*" + _RATING
+)
+
+
+def _contains(text, phrase):
+    return re.search(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", text) is not None
+
+
+def find_genres(text, strict=False):
+    """Semua genre yang disebut di teks (urutan sesuai GENRE_SYNONYMS). `strict` melewati kata tematik."""
+    text = text.casefold()
+    found = []
+    for genre, words in GENRE_SYNONYMS.items():
+        words = [w for w in words if not (strict and w in THEMATIC_GENRE_WORDS)]
+        if any(_contains(text, w) for w in words) or (strict and _contains(text, f"genre {genre.casefold()}")):
+            found.append(genre)
+    return found
+
+
+@dataclass(frozen=True)
+class MovieFilters:
+    year_min: int = None
+    year_max: int = None
+    min_rating: float = None
+    max_rating: float = None
+    genres: tuple = ()
+
+    @property
+    def is_empty(self):
+        return (self.year_min is None and self.year_max is None and self.min_rating is None
+                and self.max_rating is None and not self.genres)
+
+    def to_qdrant(self):
+        """Filter native Qdrant atas payload LangChain (`metadata.*`); None jika tidak ada batasan."""
+        if self.is_empty:
+            return None
+        # Import lazy: qdrant_client (~1 detik) tidak dibutuhkan router / retriever NumPy
+        from qdrant_client import models
+
+        must = []
+        if self.year_min is not None or self.year_max is not None:
+            must.append(models.FieldCondition(key="metadata.year", range=models.Range(gte=self.year_min, lte=self.year_max)))
+        if self.min_rating is not None or self.max_rating is not None:
+            must.append(models.FieldCondition(key="metadata.rating",
+                                              range=models.Range(gte=self.min_rating, lte=self.max_rating)))
+        if self.genres:
+            must.append(models.FieldCondition(key="metadata.genre", match=models.MatchAny(any=list(self.genres))))
+        return models.Filter(must=must)
+
+    def as_kwargs(self):
+        """Argumen filter untuk `NumpyIndex.search`."""
+        return {
+            "year_min": self.year_min,
+            "year_max": self.year_max,
+            "min_rating": self.min_rating,
+            "max_rating": self.max_rating,
+            "genres": list(self.genres) or None,
+        }
+
+    def describe(self):
+        parts = []
+        if self.year_min is not None and self.year_min == self.year_max:
+            parts.append(f"tahun {self.year_min}")
+        else:
+            if self.year_min is not None:
+                parts.append(f"tahun >= {self.year_min}")
+            if self.year_max is not None:
+                parts.append(f"tahun <= {self.year_max}")
+        if self.min_rating is not None:
+            parts.append(f"rating >= {self.min_rating:g}")
+        if self.max_rating is not None:
+            parts.append(f"rating <= {self.max_rating:g}")
+        if self.genres:
+            parts.append("genre " + "/".join(self.genres))
+        return ", ".join(parts)
+
+
+def without_filters(question):
+    """
+    Pertanyaan (casefold) tanpa frasa yang bisa dibaca `extract_filters` sebagai filter tahun/rating/genre,
+    untuk mengecek apakah masih ada batasan lain ("yang lebih lucu") yang hanya tertangkap embedding.
+    Kata genre tematik ("seram", "keluarga") tidak dihapus karena tidak pernah menjadi filter keras.
+    """
+    q = question.casefold()
+    for pattern in (_BETWEEN_RE, _AFTER_RE, _SINCE_RE, _BEFORE_RE, _UNTIL_RE, _DECADE_RE, _EXACT_YEAR_RE, _RATING_RANGE_RE, _RATING_RE):
+        q = pattern.sub(" ", q)
+    for genre, words in GENRE_SYNONYMS.items():
+        for phrase in (f"genre {genre.casefold()}", *(w for w in words if w not in THEMATIC_GENRE_WORDS)):
+            q = re.sub(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", " ", q)
+    return q
+
+
+def extract_filters(question):
+    """Ambil batasan tahun/rating/genre dari pertanyaan. Bagian yang tidak dikenali diabaikan."""
+    q = question.casefold()
+    year_min = year_max = None
+
+    between = _BETWEEN_RE.search(q)
+    if between:
+        low, high = sorted((int(between.group(1)), int(between.group(2))))
+        year_min, year_max = low, high
+    else:
+        if m := _AFTER_RE.search(q):
+            year_min = int(m.group(1)) + 1
+        elif m := _SINCE_RE.search(q):
+            year_min = int(m.group(1))
+        if m := _BEFORE_RE.search(q):
+            year_max = int(m.group(1)) - 1
+        elif m := _UNTIL_RE.search(q):
+            year_max = int(m.group(1))
+        if year_min is None and year_max is None:
+            if m := _DECADE_RE.search(q):
+                decade = m.group(1)
+                if len(decade) == 2:  # "80-an" -> 1980, "10an" -> 2010
+                    decade = ("20" if decade[0] in "012" else "19") + decade
+                year_min = int(decade)
+                year_max = year_min + 9
+            elif m := _EXACT_YEAR_RE.search(q):
+                year_min = year_max = int(m.group(1))
+
+    min_rating = max_rating = None
+    if m := _RATING_RANGE_RE.search(q):
+        min_rating, max_rating = sorted(float(value.replace(",", ".")) for value in m.groups())
+    elif m := _RATING_RE.search(q):
+        strict_min, inclusive_min, strict_max, inclusive_max, value = m.groups()
+        value = float(value.replace(",", "."))
+        # Rating IMDb satu desimal: "di atas 8" -> >= 8.1, "di bawah 8" -> <= 7.9 (seperti "setelah 2000" -> 2001).
+        # Batas yang tidak menyisakan film apa pun ("skor 10/10", "rating di bawah 1") tidak dipakai
+        if strict_max and value > 1:
+            max_rating = round(value - 0.1, 1)
+        elif inclusive_max and value > 1:
+            max_rating = value
+        elif strict_min and value < 10:
+            min_rating = round(value + 0.1, 1)
+        elif not (strict_max or inclusive_max) and value < 10:
+            min_rating = value
+
+    return MovieFilters(
+        year_min=year_min,
+        year_max=year_max,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        genres=tuple(find_genres(q, strict=True)),
+    )
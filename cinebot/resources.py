@@ -0,0 +1,522 @@
+"""
+Resource layer CineBot: dibangun sekali per proses dan dibagi ke semua sesi Streamlit.
+
+Sebelumnya setiap panggilan tool membuat ulang `QdrantVectorStore.from_existing_collection(...)`
+(client baru + round-trip koleksi) dan `SQLDatabase` + `SQLDatabaseToolkit` + sub-agent SQL.
+Sekarang:
+- Client Qdrant dibuat sekali (gRPC jika tersedia), di-warm-up saat boot, dicek kesehatannya
+  secara berkala, dan di-reconnect otomatis jika koneksi bermasalah.
+- `SQLDatabase` dan sub-agent SQL dibangun sekali dan dipakai ulang (graph agent stateless per invoke);
+  query `sql_db_query` dieksekusi lewat pool SQLite read-only ber-guard + cache hasil (`cinebot.sql_executor`).
+- Tool SQL menulis query dalam satu panggilan LLM (skema di prompt, validasi lokal) dan baru memakai
+  sub-agent ReAct jika gagal (`cinebot.text_to_sql`, `CINEBOT_SQL_MODE`).
+- Retriever bisa diganti ke index NumPy lokal (`CINEBOT_RETRIEVER=numpy`, lihat `cinebot.local_index`).
+- Pencarian memakai search params (hnsw_ef, rescoring quantization) dari profil koleksi yang sama dengan setup.py.
+- Embedding pertanyaan melewati cache dua tingkat (`cinebot.embedding_cache`).
+- Cache jawaban agent (`cinebot.answer_cache`) ikut dibagi antar sesi; turn/tool identik yang sedang
+  berjalan bersamaan digabung (`cinebot.single_flight`).
+- Router fast path (`cinebot.router`) dibangun sekali dari kamus entitas tabel `movies`.
+- Turn agent memulai retrieval rekomendasi secara spekulatif paralel dengan hop LLM pemilihan tool
+  (`cinebot.speculation`, `CINEBOT_SPECULATION`).
+- "mirip <film>" dijawab dari graf tetangga hasil setup.py (`cinebot.neighbors`) lewat resolver judul
+  (`cinebot.titles`), tanpa embedding & pencarian vektor.
+- Jalur async (`cinebot.async_runtime`): event loop latar, `AsyncQdrantClient`, dan pool HTTP async
+  bersama untuk LLM/embeddings OpenAI.
+- Metrik latensi per tahap (`cinebot.metrics`): registry per proses + sink JSONL lokal, endpoint
+  Prometheus `/metrics` opsional (`CINEBOT_METRICS_PORT`).
+- Paket yang hanya dipakai satu jenis retriever (qdrant_client + langchain_qdrant, atau index NumPy)
+  di-import lazy saat resource dibangun, bukan saat modul di-import.
+- Poster dirender dari cache thumbnail lokal (`cinebot.poster_cache`) jika tersedia.
+- `get_resources(settings)` membangun ulang semua resource jika konfigurasi berubah; resource lama ditutup
+  setelah turn yang masih memakainya selesai (`in_use`) atau setelah `CINEBOT_RESOURCES_CLOSE_GRACE` detik.
+"""
+import asyncio
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_community.utilities import SQLDatabase
+from langchain_core.documents import Document
+
+from cinebot.answer_cache import AnswerCache
+from cinebot.async_runtime import AsyncRunner, build_async_http_client
+from cinebot.history import HistoryManager, build_token_counter
+from cinebot.poster_cache import PosterCache
+from cinebot.posters import PosterIndex
+from cinebot.embedding_cache import CachedEmbeddings
+from cinebot.metrics import (
+    STAGE_EMBEDDING,
+    STAGE_NEIGHBOR_LOOKUP,
+    STAGE_QDRANT_SEARCH,
+    MetricsRegistry,
+    serve_prometheus,
+    stage,
+)
+from cinebot.neighbors import NeighborGraph
+from cinebot.query_filters import extract_filters, without_filters
+from cinebot.router import SIMILARITY_MARKERS, Router, sqlite_path_from_uri
+from cinebot.single_flight import SingleFlight
+from cinebot.speculation import Speculator, check_cancelled
+from cinebot.sql_agent import build_sql_agent
+from cinebot.sql_executor import ReadOnlySQLExecutor
+from cinebot.sql_schema import agent_tables
+from cinebot.text_to_sql import TextToSQL
+from cinebot.titles import TitleResolver
+
+
+def build_qdrant_client(settings):
+    """Client Qdrant yang tetap hidup sepanjang proses (gRPC jika diizinkan)."""
+    from qdrant_client import QdrantClient
+
+    return QdrantClient(
+        url=settings.qdrant_url,
+        api_key=settings.qdrant_api_key,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        timeout=settings.qdrant_timeout,
+    )
+
+
+def build_async_qdrant_client(settings):
+    """Client Qdrant async; dibuat di dalam event loop `AsyncRunner` yang memakainya."""
+    from qdrant_client import AsyncQdrantClient
+
+    return AsyncQdrantClient(
+        url=settings.qdrant_url,
+        api_key=settings.qdrant_api_key,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        timeout=settings.qdrant_timeout,
+    )
+
+
+class CineBotResources:
+    """Kumpulan resource bersama: LLM, embeddings, Qdrant store, database SQL, dan sub-agent SQL."""
+
+    def __init__(self, settings, *, llm=None, embeddings=None, qdrant_client=None, async_qdrant_client=None):
+        self.settings = settings
+        self.search_params = None
+        self._lock = threading.RLock()
+        self._last_health_check = 0.0
+        # Jumlah turn yang sedang memakai resource ini (`in_use`); resource yang diganti baru ditutup saat 0
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._closed = False
+
+        # Jalur async: event loop latar + pool koneksi HTTP async bersama (LLM & embeddings)
+        self.runner = None
+        self.async_http_client = None
+        if settings.async_enabled:
+            self.runner = AsyncRunner(settings.max_concurrent_turns, settings.request_timeout)
+            self.async_http_client = build_async_http_client(settings)
+
+        self.llm = llm or ChatOpenAI(
+            model=settings.llm_model,
+            api_key=settings.openai_api_key,
+            temperature=0,
+            timeout=settings.llm_timeout,
+            # Token usage ikut dikirim saat streaming (dihitung per turn oleh cinebot.metrics)
+            stream_usage=True,
+            http_async_client=self.async_http_client,
+        )
+        self.embeddings = embeddings or OpenAIEmbeddings(
+            model=settings.embedding_model,
+            api_key=settings.openai_api_key,
+            request_timeout=settings.llm_timeout,
+            http_async_client=self.async_http_client,
+        )
+        if settings.embedding_cache_enabled:
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name=settings.embedding_model,
+                max_size=settings.embedding_cache_size,
+                ttl=settings.embedding_cache_ttl,
+                db_path=settings.embedding_cache_path,
+                max_disk_rows=settings.embedding_cache_max_rows,
+            )
+
+        # Retriever: index NumPy lokal (tanpa jaringan) atau Qdrant remote
+        self.local_index = None
+        self.qdrant_client = None
+        self.vector_store = None
+        self.async_qdrant_client = async_qdrant_client
+        if settings.retriever == "numpy":
+            from cinebot.local_index import NumpyIndex
+
+            self.local_index = NumpyIndex.load(settings.local_index_path)
+        else:
+            from cinebot.collection_profile import get_profile
+
+            self.search_params = get_profile(settings.collection_profile).search_params()
+            self.qdrant_client = qdrant_client or build_qdrant_client(settings)
+            self.vector_store = self._build_vector_store()
+
+        # Request identik yang berjalan bersamaan (tombol contoh) berbagi satu turn agent / panggilan tool
+        self.single_flight = SingleFlight(timeout=settings.single_flight_timeout) if settings.single_flight_enabled else None
+
+        # Retrieval spekulatif selama hop LLM pemilihan tool (task di loop runner, atau thread pool jalur sync)
+        self.speculator = None
+        if settings.speculation_enabled:
+            self.speculator = Speculator(self.runner, max_workers=settings.speculation_workers,
+                                         min_overlap=settings.speculation_min_overlap)
+
+        self.history = None
+        if settings.history_compaction:
+            self.history = HistoryManager(
+                token_budget=settings.history_token_budget,
+                keep_turns=settings.history_keep_turns,
+                count_tokens=build_token_counter(settings.llm_model),
+            )
+
+        # Sub-agent SQL melihat tabel datar `movies` + junction table genre/pemeran (skema `cinebot.sql_schema`)
+        self.sql_db_path = sqlite_path_from_uri(settings.sql_db_uri)
+        self.db = SQLDatabase.from_uri(settings.sql_db_uri, include_tables=agent_tables(self.sql_db_path) or None)
+        # `sql_db_query` berjalan lewat pool read-only ber-guard (timeout, batas baris, cache hasil)
+        self.sql_executor = ReadOnlySQLExecutor(
+            self.sql_db_path,
+            pool_size=settings.sql_pool_size,
+            timeout=settings.sql_timeout,
+            max_rows=settings.sql_max_rows,
+            cache_size=settings.sql_result_cache_size,
+        )
+        self.sql_agent = build_sql_agent(self.llm, self.db, top_k=settings.sql_top_k, executor=self.sql_executor)
+        # Movie_ID <-> URL poster: tool mengirim `poster:<Movie_ID>`, URL (thumbnail lokal jika ada) disisipkan saat render
+        local_posters = None
+        if settings.poster_cache_enabled:
+            local_posters = PosterCache(settings.poster_cache_dir).local_urls(settings.poster_url_prefix)
+        self.posters = PosterIndex.from_sqlite(self.sql_db_path, local_urls=local_posters)
+        # Tool SQL: SQL single-shot tervalidasi lokal, sub-agent di atas hanya sebagai fallback (atau mode "agent")
+        self.text_to_sql = TextToSQL(self.llm, self.sql_executor, self.sql_agent, posters=self.posters,
+                                     dialect=self.db.dialect, top_k=settings.sql_top_k, mode=settings.sql_mode)
+
+        # Metrik per tahap: agregat per proses (Prometheus) + satu baris JSONL per turn
+        self.metrics = None
+        if settings.metrics_enabled:
+            self.metrics = MetricsRegistry(jsonl_path=settings.metrics_jsonl_path)
+            if settings.metrics_port:
+                serve_prometheus(self.metrics, settings.metrics_port)
+
+        # Graf tetangga + resolver judul (exact/alias/fuzzy atas Series_Title); resolver dipakai juga oleh router
+        self.neighbors = None
+        self.titles = None
+        if settings.neighbor_graph_enabled:
+            try:
+                self.neighbors = NeighborGraph.load(settings.local_index_path)
+                if self.neighbors is None:
+                    print(f"Info: Graf tetangga belum ada di '{settings.local_index_path}' (jalankan setup.py); "
+                          f"pertanyaan 'mirip <film>' memakai pencarian vektor.")
+                else:
+                    self.titles = TitleResolver.from_sqlite(self.sql_db_path)
+            except Exception as e:
+                self.neighbors = None
+                print(f"Peringatan: Graf tetangga tidak aktif. Error: {e}")
+
+        self.router = None
+        if settings.router_enabled:
+            try:
+                self.router = Router.from_sqlite(self.sql_db_path, min_confidence=settings.router_min_confidence,
+                                                 resolver=self.titles)
+            except Exception as e:
+                print(f"Peringatan: Router fast path tidak aktif (kamus entitas gagal dimuat). Error: {e}")
+
+        # Hit "similar" hanya jika filter, angka, dan nama (kamus entitas router) di pertanyaan sama
+        self.answer_cache = None
+        if settings.answer_cache_enabled:
+            self.answer_cache = AnswerCache(
+                embeddings=self.embeddings,
+                similarity_threshold=settings.answer_cache_threshold,
+                ttl=settings.answer_cache_ttl,
+                max_entries=settings.answer_cache_size,
+                history_turns=settings.answer_cache_history_turns,
+                entities=self.router.entities if self.router is not None else None,
+            )
+
+    def _build_vector_store(self):
+        from langchain_qdrant import QdrantVectorStore
+
+        return QdrantVectorStore(
+            client=self.qdrant_client,
+            collection_name=self.settings.qdrant_collection_name,
+            embedding=self.embeddings,
+        )
+
+    # --- Lifecycle: warm-up, health-check, reconnect ---
+    def warm_up(self):
+        """Buka koneksi & muat metadata koleksi di awal agar request pertama tidak membayar biayanya."""
+        if self.local_index is not None:
+            # Sentuh seluruh halaman mmap sekali agar query pertama tidak kena page fault
+            float(self.local_index.vectors.sum())
+            return
+        try:
+            self.qdrant_client.get_collection(self.settings.qdrant_collection_name)
+            self._last_health_check = time.monotonic()
+        except Exception as e:
+            print(f"Peringatan: Warm-up Qdrant gagal, akan dicoba reconnect saat dibutuhkan. Error: {e}")
+
+    def is_healthy(self):
+        """Cek ringan ke Qdrant (daftar koleksi)."""
+        try:
+            self.qdrant_client.get_collections()
+            return True
+        except Exception:
+            return False
+
+    def reconnect(self):
+        """Tutup client lama lalu bangun ulang client + vector store."""
+        with self._lock:
+            try:
+                self.qdrant_client.close()
+            except Exception:
+                pass
+            self.qdrant_client = build_qdrant_client(self.settings)
+            self.vector_store = self._build_vector_store()
+            self._last_health_check = time.monotonic()
+            print("Koneksi Qdrant dibangun ulang.")
+
+    def ensure_healthy(self):
+        """Health-check paling sering sekali per `health_check_interval` detik; reconnect jika gagal."""
+        if self.qdrant_client is None:
+            return
+        if time.monotonic() - self._last_health_check < self.settings.health_check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_health_check < self.settings.health_check_interval:
+                return
+            if self.is_healthy():
+                self._last_health_check = time.monotonic()
+            else:
+                self.reconnect()
+
+    # --- Operasi yang dipakai tools ---
+    def similarity_search(self, question, k=3, filters=None, cancelled=None):
+        """
+        Similarity search (index lokal atau Qdrant); untuk Qdrant, reconnect lalu coba sekali lagi jika gagal.
+        `filters` (`cinebot.query_filters.MovieFilters`) dikirim sebagai filter native Qdrant / pre-filter NumPy.
+        Embedding pertanyaan dan pencarian vektor diukur sebagai tahap terpisah (`cinebot.metrics`).
+        `cancelled`: flag batal job spekulatif; dicek setelah embedding agar pencarian tidak dijalankan sia-sia.
+        """
+        with stage(STAGE_EMBEDDING):
+            vector = self.embeddings.embed_query(question)
+        check_cancelled(cancelled)
+        if self.local_index is not None:
+            kwargs = filters.as_kwargs() if filters is not None else {}
+            with stage(STAGE_QDRANT_SEARCH):
+                return self.local_index.search(vector, k=k, **kwargs)
+        qdrant_filter = filters.to_qdrant() if filters is not None else None
+        with stage(STAGE_QDRANT_SEARCH):
+            self.ensure_healthy()
+            try:
+                return self.vector_store.similarity_search_by_vector(
+                    vector, k=k, filter=qdrant_filter, search_params=self.search_params
+                )
+            except Exception as e:
+                print(f"Peringatan: Pencarian Qdrant gagal ({e}). Mencoba reconnect...")
+                self.reconnect()
+                return self.vector_store.similarity_search_by_vector(
+                    vector, k=k, filter=qdrant_filter, search_params=self.search_params
+                )
+
+    def similar_movies(self, question, k=3):
+        """
+        "mirip <film>" dari graf tetangga: (TitleMatch, MovieFilters, Document film acuan, list Document) atau
+        None jika graf tidak aktif / tidak ada judul yang dikenali setelah penanda kemiripan.
+        Batasan tahun/rating/genre diambil dari sisa pertanyaan (kata di judul seperti "True Romance" bukan filter).
+        Graf hanya dipakai jika sisa pertanyaan selain judul tinggal kata pengisi + filter tersebut; batasan lain
+        ("mirip The Matrix yang lebih baru", "seperti Gladiator tapi lebih lucu") -> None (pencarian vektor).
+        Murni CPU tanpa jaringan, sehingga dipakai juga oleh jalur async.
+        """
+        if self.neighbors is None:
+            return None
+        with stage(STAGE_NEIGHBOR_LOOKUP):
+            match = self.titles.find_after(question, SIMILARITY_MARKERS)
+            if match is None:
+                return None
+            rest = _without_title(question, match.span)
+            leftover = _constraint_words(rest)
+            if leftover:
+                print(f">> Graf tetangga dilewati: '{match.title}' + batasan lain ({' '.join(leftover)})")
+                return None
+            filters = extract_filters(rest)
+            found = self.neighbors.similar(match.title, k=k, filters=None if filters.is_empty else filters)
+        if found is None:
+            return None
+        return (match, filters, *found)
+
+    # --- Jalur async (dipanggil di dalam loop `self.runner`) ---
+    def _get_async_qdrant(self):
+        if self.async_qdrant_client is None:
+            self.async_qdrant_client = build_async_qdrant_client(self.settings)
+        return self.async_qdrant_client
+
+    async def _aquery(self, vector, k, qdrant_filter):
+        response = await self._get_async_qdrant().query_points(
+            collection_name=self.settings.qdrant_collection_name,
+            query=vector,
+            limit=k,
+            query_filter=qdrant_filter,
+            search_params=self.search_params,
+            with_payload=True,
+        )
+        # Bentuk Document sama dengan QdrantVectorStore (payload LangChain: page_content + metadata)
+        return [
+            Document(
+                page_content=(point.payload or {}).get("page_content", ""),
+                metadata={
+                    **((point.payload or {}).get("metadata") or {}),
+                    "_id": point.id,
+                    "_collection_name": self.settings.qdrant_collection_name,
+                },
+            )
+            for point in response.points
+        ]
+
+    async def asimilarity_search(self, question, k=3, filters=None, cancelled=None):
+        """Versi async `similarity_search`: embedding async + `AsyncQdrantClient` (reconnect sekali jika gagal)."""
+        with stage(STAGE_EMBEDDING):
+            vector = await self.embeddings.aembed_query(question)
+        check_cancelled(cancelled)
+        if self.local_index is not None:
+            kwargs = filters.as_kwargs() if filters is not None else {}
+            with stage(STAGE_QDRANT_SEARCH):
+                return self.local_index.search(vector, k=k, **kwargs)
+        qdrant_filter = filters.to_qdrant() if filters is not None else None
+        with stage(STAGE_QDRANT_SEARCH):
+            try:
+                return await self._aquery(vector, k, qdrant_filter)
+            except Exception as e:
+                print(f"Peringatan: Pencarian Qdrant async gagal ({e}). Mencoba reconnect...")
+                old_client, self.async_qdrant_client = self.async_qdrant_client, None
+                if old_client is not None:
+                    try:
+                        await old_client.close()
+                    except Exception:
+                        pass
+                return await self._aquery(vector, k, qdrant_filter)
+
+    @contextmanager
+    def in_use(self):
+        """Tandai satu turn yang sedang memakai resource ini (ditunggu oleh `retire` sebelum ditutup)."""
+        with self._idle:
+            self._in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._idle:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def retire(self, grace):
+        """
+        Tutup resource yang sudah diganti di thread latar: setelah turn yang masih berjalan selesai
+        (`in_use` kembali 0) atau paling lambat setelah `grace` detik.
+        """
+        def _close_when_idle():
+            deadline = time.monotonic() + grace
+            with self._idle:
+                while self._in_flight > 0:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"Resource lama ditutup paksa setelah {grace:g} detik ({self._in_flight} turn masih berjalan).")
+                        break
+                    self._idle.wait(remaining)
+            try:
+                self.close()
+            except Exception as e:
+                print(f"Gagal menutup resource lama: {e}")
+
+        thread = threading.Thread(target=_close_when_idle, name="cinebot-retire", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self.speculator is not None:
+            self.speculator.close()
+        if self.runner is not None:
+            async def _aclose():
+                if self.async_http_client is not None:
+                    await self.async_http_client.aclose()
+                if self.async_qdrant_client is not None:
+                    await self.async_qdrant_client.close()
+            try:
+                asyncio.run_coroutine_threadsafe(_aclose(), self.runner.loop).result(timeout=5)
+            except Exception:
+                pass
+            self.runner.close()
+        self.sql_executor.close()
+        if self.qdrant_client is None:
+            return
+        try:
+            self.qdrant_client.close()
+        except Exception:
+            pass
+
+
+# Kata yang boleh tersisa di pertanyaan "mirip <film>" (selain filter tahun/rating/genre) agar graf tetangga
+# dipakai; kata lain adalah batasan yang hanya tertangkap embedding seluruh pertanyaan
+_SIMILAR_FILLER_WORDS = frozenset("""
+    rekomendasi rekomendasiin rekomendasikan saran film filmnya movie movies judul yang yg dong sih ya deh nih
+    aja saja kasih kasi tau tahu cari carikan tolong mau pengen ingin aku saya gue buat dengan dgn sama dan atau
+    lain lainnya beberapa ada apa genre tahun rilis the a an and or some other please give me show recommend
+    films like
+""".split()) | {word for marker in SIMILARITY_MARKERS for word in marker.split()}
+
+
+def _constraint_words(rest):
+    """Kata di sisa pertanyaan (tanpa judul) yang bukan kata pengisi, angka, atau filter tahun/rating/genre."""
+    return [word for word in re.findall(r"\w+", without_filters(rest))
+            if word not in _SIMILAR_FILLER_WORDS and not word.isdigit()]
+
+
+def _without_title(question, span):
+    """Potong judul yang cocok (`TitleMatch.span`, posisi di pertanyaan asli) dari pertanyaan."""
+    start, end = span
+    return f"{question[:start]} {question[end:]}"
+
+
+# === Singleton per proses ===
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def get_resources(settings=None):
+    """
+    Ambil resource bersama.
+    - Tanpa argumen: kembalikan resource yang sudah ada (error jika belum diinisialisasi).
+    - Dengan `settings`: bangun (dan warm-up) jika belum ada atau jika konfigurasi berubah.
+    """
+    global _resources
+    if settings is None:
+        if _resources is None:
+            raise RuntimeError("Resource CineBot belum diinisialisasi. Panggil get_resources(settings) terlebih dahulu.")
+        return _resources
+    if _resources is not None and _resources.settings == settings:
+        return _resources
+    with _resources_lock:
+        if _resources is None or _resources.settings != settings:
+            _resources = _swap_resources(CineBotResources(settings))
+    return _resources
+
+
+def rebuild_resources(settings=None):
+    """Paksa bangun ulang semua resource (mis. setelah setup.py mengisi ulang data atau konfigurasi berubah)."""
+    global _resources
+    with _resources_lock:
+        settings = settings or (_resources.settings if _resources is not None else None)
+        if settings is None:
+            raise RuntimeError("Tidak ada konfigurasi untuk membangun resource CineBot.")
+        _resources = _swap_resources(CineBotResources(settings))
+    return _resources
+
+
+def _swap_resources(new_resources):
+    # Resource lama tidak langsung ditutup: sesi yang sedang berjalan mungkin masih memakainya. Thread latar
+    # menutupnya setelah turn terakhir selesai (`in_use`) atau setelah masa tenggang.
+    new_resources.warm_up()
+    old_resources = _resources
+    if old_resources is not None and old_resources is not new_resources:
+        old_resources.retire(new_resources.settings.resources_close_grace)
+    return new_resources
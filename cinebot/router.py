@@ -0,0 +1,434 @@
+"""
+Router deterministik (fast path) di depan agent utama.
+
+Setiap turn agent membayar satu panggilan LLM hanya untuk memilih antara
+`get_movie_recommendations` dan `get_factual_movie_data`. Router ini memutuskan secara lokal:
+- aturan kata kunci/pola (mirip/tentang -> RAG; top-N, gross, rating, siapa, berapa -> SQL),
+- classifier ringan atas entitas yang diketahui dari tabel `movies`
+  (sutradara, bintang, judul, genre); judul setelah penanda kemiripan dicocokkan lewat `cinebot.titles`
+  (exact, alias, fuzzy).
+Pertanyaan dengan confidence tinggi langsung dikirim ke tool yang benar atau ke template SQL
+berparameter (top-N per Gross/IMDB_Rating/No_of_Votes/Runtime naik atau turun, film per
+sutradara/bintang/genre, rentang tahun dari `cinebot.query_filters`).
+Pertanyaan ambigu (mis. follow-up yang merujuk history), pengecualian ("selain", "kecuali"), dan
+pertanyaan template yang masih punya kata di luar parameternya ("drama korea") tetap ke agent penuh:
+template yang diam-diam membuang sebagian pertanyaan memberi jawaban salah tanpa hop LLM yang bisa menangkapnya.
+"""
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+
+from cinebot.metrics import STAGE_SQL_EXECUTION, stage
+from cinebot.normalize import normalize_question
+from cinebot.query_filters import GENRE_SYNONYMS, extract_filters, find_genres
+from cinebot.sql_schema import SCHEMA_VERSION, schema_version
+from cinebot.titles import FUZZY, TitleResolver
+from cinebot.tool_payloads import error_payload, movie_from_row, movies_payload
+
+RECOMMENDATION = "recommendation"
+FACTUAL = "factual"
+AGENT = "agent"
+
+TOOL_FOR_TARGET = {
+    RECOMMENDATION: "get_movie_recommendations",
+    FACTUAL: "get_factual_movie_data",
+}
+
+# --- Kamus kata kunci (Indonesia + Inggris) ---
+SIMILARITY_MARKERS = ("mirip", "seperti", "kayak", "sejenis", "serupa", "similar to", "sebagus")
+THEME_MARKERS = ("tentang", "bertema", "tema", "plot", "cerita", "kisah", "about", "yang bikin", "suasana")
+AGGREGATE_MARKERS = ("rata-rata", "rata rata", "average", "total", "jumlah", "berapa", "how many", "how much")
+LIST_MARKERS = ("daftar", "list", "semua film", "film-film", "film film", "film dari", "film karya", "filmografi",
+                "rekomendasi film", "kasih tau", "terbaik", "top", "best")
+FACT_MARKERS = ("siapa sutradara", "siapa pemeran", "siapa yang", "tahun berapa", "kapan", "durasi", "runtime",
+                "who directed", "what year", "rilis tahun")
+# Follow-up yang butuh konteks history -> selalu ke agent
+FOLLOW_UP_MARKERS = ("yang tadi", "tadi", "itu", "tersebut", "yang kedua", "yang pertama", "yang terakhir",
+                     "dia", "mereka", "lagi", "lainnya", "sebelumnya", "yang mana")
+# Pengecualian tidak bisa diekspresikan template maupun tool RAG -> selalu ke agent
+EXCLUSION_MARKERS = ("selain", "kecuali", "bukan", "tanpa", "except", "excluding", "other than", "besides", "not")
+
+# Satu metrik per pertanyaan template; "tertinggi"/"paling" hanya arah urutan
+METRIC_MARKERS = {
+    "Gross": ("gross", "pendapatan", "terlaris", "laris", "box office", "penghasilan", "cuan", "highest grossing"),
+    "No_of_Votes": ("vote", "votes", "terpopuler", "paling populer", "popular"),
+    "Runtime": ("terpanjang", "paling panjang", "terpendek", "paling pendek", "longest", "shortest"),
+    "IMDB_Rating": ("rating", "terbaik", "best", "imdb", "highest rated", "terbagus", "paling bagus",
+                    "terburuk", "paling buruk", "terjelek", "paling jelek", "worst"),
+}
+ASCENDING_MARKERS = ("terendah", "paling rendah", "terburuk", "paling buruk", "terjelek", "paling jelek",
+                     "terpendek", "paling pendek", "paling sedikit", "tersedikit", "terkecil",
+                     "lowest", "worst", "shortest", "least")
+DESCENDING_MARKERS = ("tertinggi", "paling tinggi", "terbanyak", "paling banyak", "terbesar", "terlaris",
+                      "paling laris", "terbaik", "terbagus", "paling bagus", "terpopuler", "paling populer",
+                      "terpanjang", "paling panjang", "highest", "best", "most", "longest")
+
+# Kata pengisi yang boleh ada di pertanyaan template (selain entitas, angka top-N/tahun, dan penanda
+# metrik/urutan); kata lain berarti batasan yang tidak tertampung parameter template
+TEMPLATE_FILLER_WORDS = frozenset("""
+    apa aja saja yang yg dengan dari di ke untuk oleh film filmnya movie movies judul kasih kasi tau tahu dong sih
+    ya deh nih semua daftar list karya rekomendasi rekomendasiin rekomendasikan sebutkan tampilkan cari carikan
+    tolong mau pengen ingin aku saya gue buat the of by what which are is show me give please top paling
+    sutradara disutradarai dibintangi pemeran aktor aktris bintang main
+""".split())
+YEAR_WORDS = frozenset("""
+    tahun rilis era setelah sesudah sebelum sejak mulai sampai hingga antara atas bawah diatas dibawah lebih kurang
+    after before since until from in year an s post pre
+""".split())
+_MARKER_WORDS = frozenset(word for phrases in (*METRIC_MARKERS.values(), ASCENDING_MARKERS, DESCENDING_MARKERS,
+                                                LIST_MARKERS) for phrase in phrases for word in phrase.split())
+
+_TOP_N_RE = re.compile(r"\btop\s*(\d{1,2})\b|\b(\d{1,2})\s+(?:film|movie|judul)\b")
+_YEAR_RE = re.compile(r"\b(19[2-9]\d|20[0-2]\d)\b")
+_YEAR_TOKEN_RE = re.compile(r"(?:19[2-9]\d|20[0-2]\d)|(?:19|20)?\d0(?:an|s)?")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# --- Template SQL berparameter (kolom ORDER BY di-whitelist) ---
+# Movie_ID menjadi referensi poster pendek (`poster:<Movie_ID>`), URL poster tidak diambil
+SELECT_COLUMNS = "Movie_ID, Series_Title, Released_Year, IMDB_Rating, Gross, Director"
+ORDERABLE_COLUMNS = ("Gross", "IMDB_Rating", "No_of_Votes", "Runtime")
+TEMPLATES = ("top_n_by", "films_by_director", "films_by_star", "films_by_genre")
+# Filter genre/pemeran lewat junction table ber-index (skema `cinebot.sql_schema`), bukan LIKE
+GENRE_SUBQUERY = "SELECT mg.Movie_ID FROM movie_genres mg JOIN genres g ON g.Genre_ID = mg.Genre_ID WHERE g.Name = ?"
+STAR_SUBQUERY = "SELECT ms.Movie_ID FROM movie_stars ms JOIN stars s ON s.Star_ID = ms.Star_ID WHERE s.Name = ?"
+
+
+def _contains(text, phrase):
+    return re.search(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", text) is not None
+
+
+def _any(text, phrases):
+    return any(_contains(text, p) for p in phrases)
+
+
+@dataclass
+class RouteDecision:
+    target: str
+    confidence: float
+    reason: str
+    template: str = None
+    params: dict = field(default_factory=dict)
+
+    @property
+    def tool_name(self):
+        return TOOL_FOR_TARGET.get(self.target)
+
+
+@dataclass
+class SqlTemplate:
+    name: str
+    sql: str
+    params: tuple
+
+    def display_sql(self):
+        """SQL dengan parameter di-inline (hanya untuk ditampilkan di expander)."""
+        rendered = self.sql
+        for value in self.params:
+            literal = str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+            rendered = rendered.replace("?", literal, 1)
+        return rendered
+
+
+def build_template(decision):
+    """
+    Ubah keputusan router menjadi SqlTemplate yang siap dieksekusi. Semua template menerima rentang tahun
+    (`year_min`/`year_max`) dan urutan opsional (`order_by` + `ascending`); tanpa urutan, film diurutkan
+    per rating lalu jumlah vote.
+    """
+    p = decision.params
+    if decision.template not in TEMPLATES:
+        raise ValueError(f"Template tidak dikenal: {decision.template}")
+    where, params = [], []
+    if decision.template == "films_by_director":
+        where.append("Director = ?")
+        params.append(p["director"])
+    elif decision.template == "films_by_star":
+        where.append(f"Movie_ID IN ({STAR_SUBQUERY})")
+        params.append(p["star"])
+    if p.get("genre"):
+        where.append(f"Movie_ID IN ({GENRE_SUBQUERY})")
+        params.append(p["genre"])
+    year_min, year_max = p.get("year_min"), p.get("year_max")
+    if year_min is not None and year_min == year_max:
+        where.append("Released_Year = ?")
+        params.append(int(year_min))
+    else:
+        if year_min is not None:
+            where.append("Released_Year >= ?")
+            params.append(int(year_min))
+        if year_max is not None:
+            where.append("Released_Year <= ?")
+            params.append(int(year_max))
+
+    columns = SELECT_COLUMNS
+    column = p.get("order_by")
+    if column is None:
+        if decision.template == "top_n_by":
+            raise ValueError("Template top_n_by butuh kolom urutan")
+        order = "IMDB_Rating DESC, No_of_Votes DESC"
+    else:
+        if column not in ORDERABLE_COLUMNS:
+            raise ValueError(f"Kolom urutan tidak diizinkan: {column}")
+        where.append(f"{column} IS NOT NULL")
+        order = f"{column} {'ASC' if p.get('ascending') else 'DESC'}"
+        if column not in SELECT_COLUMNS.split(", "):
+            columns += f", {column}"
+    sql = f"SELECT {columns} FROM movies WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?"
+    return SqlTemplate(decision.template, sql, tuple(params) + (int(p.get("limit", 10)),))
+
+
+def format_template_rows(template, columns, rows):
+    """Payload tool SQL (`cinebot.tool_payloads`): daftar film terstruktur + SQL untuk expander."""
+    movies = [movie_from_row(columns, row) for row in rows]
+    note = None if rows else "Tidak ada film yang cocok dengan kriteria tersebut."
+    return movies_payload(movies, source="sql", note=note, sql=template.display_sql())
+
+
+def sqlite_path_from_uri(uri):
+    """'sqlite:///movies.db' -> 'movies.db'."""
+    return uri.split("sqlite:///", 1)[-1]
+
+
+def execute_template(db_path, template):
+    """Jalankan template SQL (koneksi read-only) dan kembalikan output berformat tool SQL."""
+    try:
+        with stage(STAGE_SQL_EXECUTION):
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                cursor = conn.execute(template.sql, template.params)
+                columns = [c[0] for c in cursor.description]
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        # Format error sama dengan tool SQL agar parsing tidak gagal
+        return error_payload(f"Terjadi error saat menjalankan query: {e}.", sql=template.display_sql())
+    return format_template_rows(template, columns, rows)
+
+
+class Router:
+    """Classifier berbasis aturan + kamus entitas dari tabel `movies`."""
+
+    def __init__(self, directors=(), stars=(), titles=(), min_confidence=0.85, resolver=None):
+        self.min_confidence = min_confidence
+        self.directors = {d.casefold(): d for d in directors if d}
+        self.stars = {s.casefold(): s for s in stars if s}
+        self.titles = {t.casefold(): t for t in titles if t}
+        self.resolver = resolver or TitleResolver(self.titles.values())
+        # Nama belakang sutradara yang unik ("film Nolan" -> Christopher Nolan)
+        surnames = {}
+        for key, name in self.directors.items():
+            surnames.setdefault(key.split()[-1], []).append(name)
+        self.director_surnames = {k: v[0] for k, v in surnames.items() if len(v) == 1 and len(k) > 3}
+        self._lock = threading.Lock()
+        self.stats = {"routed": {}, "fast_path_turns": 0, "agent_turns": 0,
+                      "selection_latency_ewma": None, "estimated_saved_seconds": 0.0}
+
+    @classmethod
+    def from_sqlite(cls, db_path, **kwargs):
+        if schema_version(db_path) < SCHEMA_VERSION:
+            raise ValueError(f"Skema '{db_path}' masih versi lama (tanpa junction table). Jalankan setup.py.")
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT Director, Star1, Star2, Star3, Star4, Series_Title FROM movies"
+            ).fetchall()
+        finally:
+            conn.close()
+        directors = {r[0] for r in rows}
+        stars = {s for r in rows for s in r[1:5]}
+        titles = {r[5] for r in rows}
+        return cls(directors, stars, titles, **kwargs)
+
+    # --- Deteksi entitas ---
+    def _longest_match(self, text, names):
+        best = None
+        for key, name in names.items():
+            if len(key) >= 4 and key in text and _contains(text, key) and (best is None or len(key) > len(best[0])):
+                best = (key, name)
+        return best[1] if best else None
+
+    def _without_titles(self, text):
+        """Hapus judul yang disebut (mis. "The Dark Knight") agar kata di judul tidak dianggap nama belakang."""
+        for key in self.titles:
+            if len(key) >= 4 and key in text and _contains(text, key):
+                text = text.replace(key, " ")
+        return text
+
+    def find_director(self, text):
+        return (self._longest_match(text, self.directors)
+                or self._longest_match(self._without_titles(text), self.director_surnames))
+
+    def find_star(self, text):
+        return self._longest_match(text, self.stars)
+
+    def entities(self, question):
+        """Nama sutradara/pemeran/judul yang disebut (pembeda pertanyaan mirip di `cinebot.answer_cache`)."""
+        q = normalize_question(question)
+        similar = self.find_similar_title(q)
+        found = {self.find_director(q), self.find_star(q), self._longest_match(q, self.titles),
+                 similar.title if similar else None}
+        found.discard(None)
+        return frozenset(found)
+
+    def find_similar_title(self, text):
+        """Judul yang muncul tepat setelah penanda kemiripan ("mirip Inception"); `TitleMatch` atau None."""
+        return self.resolver.find_after(text, SIMILARITY_MARKERS)
+
+    @staticmethod
+    def find_genre(text):
+        genres = find_genres(text)
+        return genres[0] if genres else None
+
+    @staticmethod
+    def find_metrics(text):
+        return [column for column, words in METRIC_MARKERS.items() if _any(text, words)]
+
+    @staticmethod
+    def _unexpressed_words(q, params, top_n):
+        """Kata yang tidak tertampung parameter template (batasan yang akan hilang diam-diam)."""
+        text = q
+        for name in (params.get("director"), params.get("star")):
+            if name:
+                # Nama lengkap, lalu nama belakang ("film Nolan")
+                text = text.replace(name.casefold(), " ")
+                text = re.sub(r"(?<!\w)" + re.escape(name.casefold().split()[-1]) + r"(?!\w)", " ", text)
+        allowed = TEMPLATE_FILLER_WORDS | _MARKER_WORDS
+        if params.get("genre"):
+            allowed |= {w for phrase in GENRE_SYNONYMS[params["genre"]] for w in _WORD_RE.findall(phrase)}
+            allowed |= {"genre"}
+        has_year = params.get("year_min") is not None or params.get("year_max") is not None
+        if has_year:
+            allowed |= YEAR_WORDS
+            if params.get("year_min") != params.get("year_max"):
+                allowed |= {"dan", "and"}  # "antara 1995 dan 2005"
+        numbers = {g for g in top_n.groups() if g} if top_n else set()
+        return [word for word in _WORD_RE.findall(text)
+                if word not in allowed and word not in numbers and not (has_year and _YEAR_TOKEN_RE.fullmatch(word))]
+
+    def _template(self, q, top_n, conflict, confidence, reason, template, params):
+        """Keputusan template, atau agent jika urutan ambigu / ada kata yang tidak bisa diekspresikan."""
+        if conflict:
+            return RouteDecision(AGENT, 0.0, f"{reason}: metrik/arah urutan ambigu")
+        leftover = self._unexpressed_words(q, params, top_n)
+        if leftover:
+            return RouteDecision(AGENT, 0.0, f"{reason}: tidak bisa diekspresikan template ({' '.join(leftover)})")
+        return RouteDecision(FACTUAL, confidence, reason, template=template, params=params)
+
+    # --- Klasifikasi ---
+    def route(self, question):
+        q = normalize_question(question)
+        top_n = _TOP_N_RE.search(q)
+        limit = int(top_n.group(1) or top_n.group(2)) if top_n else 10
+        limit = max(1, min(limit, 50))
+        filters = extract_filters(q)
+        years = {key: value for key, value in (("year_min", filters.year_min), ("year_max", filters.year_max))
+                 if value is not None}
+        if not years and (year := _YEAR_RE.search(q)):
+            # Tahun tanpa kata penanda ("top 5 film 2010") berarti tahun itu saja
+            years = {"year_min": int(year.group(1)), "year_max": int(year.group(1))}
+
+        similar = self.find_similar_title(q)
+        similar_title = similar.title if similar else None
+        has_similarity = _any(q, SIMILARITY_MARKERS)
+        has_theme = _any(q, THEME_MARKERS)
+        has_aggregate = _any(q, AGGREGATE_MARKERS)
+
+        if _any(q, FOLLOW_UP_MARKERS) and not similar_title:
+            return RouteDecision(AGENT, 0.0, "follow-up merujuk history")
+        if _any(q, EXCLUSION_MARKERS):
+            return RouteDecision(AGENT, 0.0, "pengecualian (selain/kecuali)")
+
+        if similar_title:
+            # Judul hasil fuzzy (typo) sedikit kurang pasti dibanding exact/alias
+            confidence = 0.9 if similar.method == FUZZY else 0.95
+            return RouteDecision(RECOMMENDATION, confidence, f"kemiripan dengan judul '{similar_title}' ({similar.method})",
+                                 params={"title": similar_title})
+
+        director = self.find_director(q)
+        star = None if director else self.find_star(q)
+        metrics = self.find_metrics(q)
+        metric = metrics[0] if len(metrics) == 1 else None
+        ascending = _any(q, ASCENDING_MARKERS)
+        descending = _any(q, DESCENDING_MARKERS)
+        conflict = len(metrics) > 1 or (ascending and descending)
+        order = {"order_by": metric, "ascending": ascending} if metric else {}
+        genre = self.find_genre(q)
+
+        if (has_similarity or has_theme) and not (director or star):
+            return RouteDecision(RECOMMENDATION, 0.9, "pertanyaan tema/plot/kemiripan")
+
+        if director and not has_similarity:
+            if director.casefold() in self.stars:
+                # Nama yang juga muncul sebagai pemeran: biarkan sub-agent SQL yang menafsirkan
+                return RouteDecision(FACTUAL, 0.85, f"'{director}' adalah sutradara sekaligus pemeran")
+            if has_aggregate or _any(q, FACT_MARKERS):
+                return RouteDecision(FACTUAL, 0.9, f"agregat/fakta tentang sutradara '{director}'")
+            return self._template(q, top_n, conflict, 0.95, f"daftar film sutradara '{director}'", "films_by_director",
+                                  {"director": director, "limit": limit, **years, **order})
+
+        if star and not has_similarity:
+            if has_aggregate or _any(q, FACT_MARKERS):
+                return RouteDecision(FACTUAL, 0.9, f"agregat/fakta tentang pemeran '{star}'")
+            return self._template(q, top_n, conflict, 0.9, f"daftar film pemeran '{star}'", "films_by_star",
+                                  {"star": star, "limit": limit, **years, **order})
+
+        if has_aggregate or _any(q, FACT_MARKERS):
+            return RouteDecision(FACTUAL, 0.85, "pertanyaan faktual/agregat")
+
+        if top_n and not metrics and (years or genre):
+            metric = "IMDB_Rating"
+            order = {"order_by": metric, "ascending": ascending}
+        if (metric or conflict) and (top_n or ascending or descending):
+            params = {"limit": limit if top_n else 5, **years, **order}
+            if genre:
+                params["genre"] = genre
+            return self._template(q, top_n, conflict, 0.9, f"top-N berdasarkan {metric or '/'.join(metrics)}",
+                                  "top_n_by", params)
+
+        if genre and _any(q, LIST_MARKERS):
+            return self._template(q, top_n, conflict, 0.85, f"daftar film genre {genre}", "films_by_genre",
+                                  {"genre": genre, "limit": limit, **years, **order})
+
+        return RouteDecision(AGENT, 0.0, "ambigu")
+
+    def is_confident(self, decision):
+        return decision.target != AGENT and decision.confidence >= self.min_confidence
+
+    def leans_recommendation(self, question, decision=None):
+        """
+        Turn agent yang condong ke tool rekomendasi (dipakai untuk memutuskan retrieval spekulatif): keputusan
+        RECOMMENDATION, atau AGENT dengan penanda tema/kemiripan tanpa sinyal faktual (angka, metrik, nama orang).
+        """
+        decision = decision or self.route(question)
+        if decision.target != AGENT:
+            return decision.target == RECOMMENDATION
+        q = normalize_question(question)
+        if (_any(q, AGGREGATE_MARKERS) or _any(q, FACT_MARKERS) or self.find_metrics(q) or _TOP_N_RE.search(q)
+                or self.find_director(q) or self.find_star(q)):
+            return False
+        return _any(q, SIMILARITY_MARKERS) or _any(q, THEME_MARKERS)
+
+    # --- Statistik & penghematan latensi ---
+    def record_agent_turn(self, selection_seconds):
+        """Catat latensi hop pemilihan tool (LLM) dari turn yang melewati agent penuh."""
+        with self._lock:
+            self.stats["agent_turns"] += 1
+            if selection_seconds is None:
+                return
+            ewma = self.stats["selection_latency_ewma"]
+            self.stats["selection_latency_ewma"] = selection_seconds if ewma is None else 0.8 * ewma + 0.2 * selection_seconds
+
+    def record_fast_path(self, decision):
+        """Catat turn fast path; penghematan = rata-rata (EWMA) latensi hop pemilihan tool yang dilewati."""
+        with self._lock:
+            key = decision.template or decision.target
+            self.stats["routed"][key] = self.stats["routed"].get(key, 0) + 1
+            self.stats["fast_path_turns"] += 1
+            if self.stats["selection_latency_ewma"] is not None:
+                self.stats["estimated_saved_seconds"] += self.stats["selection_latency_ewma"]
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "routed": dict(self.stats["routed"])}
@@ -0,0 +1,161 @@
+"""
+Single-flight: request identik yang sedang berjalan bersamaan berbagi satu komputasi.
+
+Tombol contoh di main.py membuat banyak user mengirim pertanyaan yang persis sama di waktu yang sama;
+cache jawaban baru membantu SETELAH turn pertama selesai, sementara selama turn itu berjalan setiap
+sesi memulai agent run penuh sendiri. Di sini:
+- Request pertama untuk sebuah kunci menjadi *leader* dan menjalankan komputasinya; request lain dengan
+  kunci yang sama selama leader berjalan menjadi *follower* dan menunggu hasil leader.
+- Kunci dibentuk pemanggil: pertanyaan ternormalisasi (`cinebot.normalize`) + konteks history yang relevan
+  (turn agent, lihat `turn_key`) atau jenis tool (level tool).
+- Error leader (exception, atau hasil yang tidak `shareable`, mis. jawaban fallback) tidak dibagikan:
+  follower memilih leader baru sekali lagi; jika leader pengganti juga gagal, follower menjalankan
+  komputasinya sendiri (exception-nya sendiri yang diteruskan).
+- Follower yang menunggu lebih lama dari `timeout` berhenti menunggu dan menjalankan komputasinya sendiri.
+- Versi sync (`do`, antar thread) dan async (`ado`, di event loop `AsyncRunner`) punya grup terpisah.
+- Counter: leader, follower yang dapat hasil bersama (= panggilan upstream yang dihemat), timeout, error.
+"""
+import asyncio
+import threading
+import time
+
+from cinebot.metrics import STAGE_SINGLE_FLIGHT_WAIT, current
+from cinebot.normalize import cache_key, normalize_question
+
+
+def turn_key(question, history, history_turns=1):
+    """Kunci turn agent: pertanyaan ternormalisasi + N pertanyaan user terakhir sebelumnya (sama dengan cache jawaban)."""
+    previous = [normalize_question(m["content"]) for m in history if m["role"] == "user"]
+    context = "\n".join(previous[-history_turns:]) if history_turns > 0 else ""
+    return cache_key("turn", normalize_question(question), context)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.shared = False  # True jika hasil leader boleh dipakai follower
+
+
+class _AsyncCall:
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class SingleFlight:
+    """Grup single-flight per proses (lihat docstring modul); `timeout` = batas tunggu follower (detik)."""
+
+    def __init__(self, timeout=60.0):
+        self.timeout = timeout
+        self._calls = {}
+        self._acalls = {}
+        self._lock = threading.Lock()
+        self.metrics = {"leaders": 0, "shared": 0, "timeouts": 0, "leader_errors": 0}
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.metrics[key] += value
+
+    @staticmethod
+    def _record_wait(started):
+        turn_metrics = current()
+        if turn_metrics is not None:
+            turn_metrics.record(STAGE_SINGLE_FLIGHT_WAIT, time.perf_counter() - started)
+
+    # --- Sync (antar thread) ---
+    def do(self, key, fn, *, timeout=None, shareable=None, on_wait=None, _retry=True):
+        """
+        Jalankan `fn()` sekali untuk semua pemanggil `key` yang bersamaan.
+        Kembalikan (hasil, shared) — `shared` True jika hasil diambil dari leader lain.
+        `on_wait()` dipanggil sekali saat pemanggil menjadi follower (mis. untuk update status UI).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.metrics["leaders"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                call.shared = shareable is None or shareable(call.result)
+                if not call.shared:
+                    self._count("leader_errors")
+                return call.result, False
+            except BaseException:
+                self._count("leader_errors")
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if on_wait is not None:
+            on_wait()
+        started = time.perf_counter()
+        finished = call.done.wait(self.timeout if timeout is None else timeout)
+        self._record_wait(started)
+        if not finished:
+            # Leader terlalu lama: jangan ikut menunggu tanpa batas, jalankan sendiri
+            self._count("timeouts")
+            return fn(), False
+        if call.shared:
+            self._count("shared")
+            return call.result, True
+        if _retry:
+            return self.do(key, fn, timeout=timeout, shareable=shareable, on_wait=None, _retry=False)
+        return fn(), False
+
+    # --- Async (dalam satu event loop) ---
+    async def ado(self, key, afn, *, timeout=None, shareable=None, _retry=True):
+        """Versi async `do`: `afn()` mengembalikan coroutine; follower menunggu future leader."""
+        with self._lock:
+            call = self._acalls.get(key)
+            leader = call is None
+            if leader:
+                call = self._acalls[key] = _AsyncCall()
+                self.metrics["leaders"] += 1
+
+        if leader:
+            try:
+                result = await afn()
+            except BaseException:
+                self._count("leader_errors")
+                call.future.set_result((None, False))
+                raise
+            else:
+                shared = shareable is None or shareable(result)
+                if not shared:
+                    self._count("leader_errors")
+                call.future.set_result((result, shared))
+                return result, False
+            finally:
+                with self._lock:
+                    self._acalls.pop(key, None)
+
+        started = time.perf_counter()
+        try:
+            result, shared = await asyncio.wait_for(asyncio.shield(call.future), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self._record_wait(started)
+            self._count("timeouts")
+            return await afn(), False
+        self._record_wait(started)
+        if shared:
+            self._count("shared")
+            return result, True
+        if _retry:
+            return await self.ado(key, afn, timeout=timeout, shareable=shareable, _retry=False)
+        return await afn(), False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._acalls)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["in_flight"] = self.in_flight()
+        metrics["upstream_calls_saved"] = metrics["shared"]
+        return metrics
@@ -0,0 +1,255 @@
+"""
+Eksekusi spekulatif: retrieval dimulai bersamaan dengan hop LLM pemilihan tool.
+
+Turn yang lewat agent penuh sebelumnya serial: LLM memilih tool dulu, baru `get_movie_recommendations`
+meng-embed pertanyaan dan mencari di Qdrant. Di sini, begitu user mengirim pertanyaan:
+- Pekerjaan tool rekomendasi (graf tetangga / embedding + pencarian vektor, lihat `cinebot.tools`)
+  langsung dijalankan di latar (`Speculator.start`): thread pool (jalur sync) atau task di event loop
+  `AsyncRunner` (jalur async), paralel dengan panggilan LLM pemilihan tool.
+- Spekulasi turn aktif dipasang di contextvar (`speculating`), ikut terbawa ke thread/task tool agent.
+  Tool memanggil `take`/`atake` dulu: jika agent memilih tool yang sama dengan argumen yang kompatibel
+  (pertanyaan ternormalisasi sama, atau filter tahun/rating/genre sama dan kata-katanya cukup tumpang
+  tindih), hasil prefetch dipakai (ditunggu sisanya jika belum selesai).
+- Tool lain, argumen tidak kompatibel, atau turn selesai tanpa tool: spekulasi dibatalkan. Job yang masih
+  antre tidak pernah jalan (`Future.cancel`); job yang sedang berjalan menerima flag batal (`threading.Event`)
+  dan berhenti di antara embedding dan pencarian vektor (`SpeculationCancelled`, lihat `check_cancelled`),
+  task async juga dibatalkan di titik `await` berikutnya. Hanya job yang benar-benar berhenti lebih awal
+  yang dihitung `cancelled`; yang sudah selesai dihitung `discarded` (hasilnya dibuang).
+- Pemanggil memutuskan kapan berspekulasi (main.py: hanya jika router condong ke rekomendasi,
+  `Router.leans_recommendation`), jadi turn faktual tidak membayar embedding + pencarian yang dibuang.
+- Counter hit/miss per alasan dan latensi yang dihemat (bagian pekerjaan yang sudah selesai saat tool
+  memintanya) per turn & total (`stats()`).
+Pekerjaan spekulatif tidak dicatat per tahap ke metrik turn; yang tercatat hanya `speculation_wait`
+(waktu tool menunggu sisa hasil prefetch).
+"""
+import asyncio
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from cinebot.metrics import STAGE_SPECULATION_WAIT, activate, current
+from cinebot.normalize import normalize_question
+from cinebot.query_filters import extract_filters
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_active = contextvars.ContextVar("cinebot_speculation", default=None)
+
+
+class SpeculationCancelled(Exception):
+    """Job spekulatif berhenti karena hasilnya sudah pasti tidak dipakai."""
+
+
+def check_cancelled(cancelled):
+    """Dipanggil job di antara langkah mahal; `cancelled` = flag dari `Speculator.start` (None di luar spekulasi)."""
+    if cancelled is not None and cancelled.is_set():
+        raise SpeculationCancelled()
+
+
+def compatible(speculated, actual, min_overlap=0.75):
+    """Argumen tool `actual` cukup dekat dengan pertanyaan yang dispekulasikan sehingga hasilnya bisa dipakai."""
+    speculated, actual = normalize_question(speculated), normalize_question(actual)
+    if speculated == actual:
+        return True
+    # Filter native menentukan kandidat secara pasti: harus sama persis
+    if extract_filters(speculated) != extract_filters(actual):
+        return False
+    words_a, words_b = set(_WORD_RE.findall(speculated)), set(_WORD_RE.findall(actual))
+    if not words_a or not words_b:
+        return False
+    return len(words_a & words_b) / len(words_a | words_b) >= min_overlap
+
+
+class Speculation:
+    """Satu prefetch spekulatif untuk satu turn (dibuat oleh `Speculator.start`)."""
+
+    def __init__(self, speculator, tool_name, question, future, started, cancel_flag):
+        self.speculator = speculator
+        self.tool_name = tool_name
+        self.question = question
+        self.future = future
+        self.started = started
+        self.finished = None
+        self.outcome = None  # "hit" / alasan miss, diisi sekali
+        self.saved_seconds = 0.0
+        self._cancel_flag = cancel_flag
+        self._counted = False
+        self._lock = threading.Lock()
+        future.add_done_callback(self._on_done)
+
+    @property
+    def cancelled(self):
+        """Job berhenti sebelum selesai (tidak pernah jalan, atau berhenti karena flag batal)."""
+        if not self.future.done():
+            return False
+        return self.future.cancelled() or isinstance(self.future.exception(), SpeculationCancelled)
+
+    def _on_done(self, _future):
+        self.finished = time.perf_counter()
+        if self.outcome not in (None, "hit"):
+            self._count_unused()
+
+    def _count_unused(self):
+        """Job yang tidak terpakai dihitung tepat sekali: saat dibatalkan jika sudah selesai, atau saat selesai."""
+        with self._lock:
+            if self._counted or not self.future.done():
+                return
+            self._counted = True
+        self.speculator._count("cancelled" if self.cancelled else "discarded")
+
+    def _claim(self, tool_name, question):
+        """Tentukan nasib spekulasi tepat sekali; True jika pemanggil boleh memakai hasilnya."""
+        with self._lock:
+            if self.outcome is not None:
+                return False
+            if tool_name != self.tool_name:
+                self.outcome = "other_tool"
+            elif not compatible(self.question, question, self.speculator.min_overlap):
+                self.outcome = "args"
+            else:
+                self.outcome = "hit"
+                return True
+        self._cancel()
+        return False
+
+    def _cancel(self):
+        self._cancel_flag.set()
+        self.future.cancel()
+        self.speculator._miss(self.outcome)
+        self._count_unused()
+
+    def _hit(self, requested, output):
+        # Yang dihemat: bagian pekerjaan yang sudah berjalan sebelum tool memintanya
+        finished = self.finished or time.perf_counter()
+        self.saved_seconds = max(0.0, min(finished, requested) - self.started)
+        waited = max(0.0, finished - requested)
+        turn_metrics = current()
+        if turn_metrics is not None:
+            turn_metrics.record(STAGE_SPECULATION_WAIT, waited)
+        self.speculator._record_hit(self.saved_seconds)
+        self.speculator.log(f">> Spekulasi hit ({self.tool_name}): hemat {self.saved_seconds:.2f}s, "
+                            f"menunggu {waited:.2f}s")
+        return output
+
+    def _failed(self, error):
+        with self._lock:
+            self.outcome = "error"
+        self.speculator._miss("error")
+        self.speculator.log(f"Peringatan: Spekulasi {self.tool_name} gagal ({error}); tool dijalankan ulang.")
+        return None
+
+    def take(self, tool_name, question):
+        """Hasil prefetch untuk panggilan tool ini, atau None (tool menjalankan pekerjaannya sendiri)."""
+        if not self._claim(tool_name, question):
+            return None
+        requested = time.perf_counter()
+        try:
+            return self._hit(requested, self.future.result())
+        except Exception as e:  # termasuk Future yang dibatalkan (close)
+            return self._failed(e)
+
+    async def atake(self, tool_name, question):
+        if not self._claim(tool_name, question):
+            return None
+        requested = time.perf_counter()
+        try:
+            return self._hit(requested, await asyncio.wrap_future(self.future))
+        except Exception as e:  # termasuk Future yang dibatalkan (close)
+            return self._failed(e)
+
+    def finish(self):
+        """Akhir turn: spekulasi yang tidak terpakai (agent menjawab tanpa tool) dibatalkan."""
+        with self._lock:
+            if self.outcome is not None:
+                return
+            self.outcome = "no_tool"
+        self._cancel()
+
+    def describe(self):
+        if self.outcome == "hit":
+            return f"hit, hemat {self.saved_seconds:.2f}s"
+        return f"miss ({self.outcome or 'berjalan'})"
+
+
+class Speculator:
+    """
+    Memulai spekulasi per turn dan menyimpan statistiknya. `runner` (`AsyncRunner`) dipakai untuk jalur async;
+    tanpa runner, job dijalankan di thread pool `max_workers`.
+    """
+
+    def __init__(self, runner=None, max_workers=4, min_overlap=0.75, log=print):
+        self.runner = runner
+        self.min_overlap = min_overlap
+        self.log = log
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="cinebot-speculation")
+        self._lock = threading.Lock()
+        self.metrics = {"started": 0, "hits": 0, "misses": 0, "cancelled": 0, "discarded": 0, "saved_seconds": 0.0,
+                        "miss_reasons": {}}
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.metrics[key] += value
+
+    def _miss(self, reason):
+        with self._lock:
+            self.metrics["misses"] += 1
+            self.metrics["miss_reasons"][reason] = self.metrics["miss_reasons"].get(reason, 0) + 1
+
+    def _record_hit(self, saved_seconds):
+        with self._lock:
+            self.metrics["hits"] += 1
+            self.metrics["saved_seconds"] += saved_seconds
+
+    def start(self, tool_name, question, fn, afn=None):
+        """
+        Mulai `fn(question, cancelled)` (atau `afn` di loop runner) di latar; kembalikan `Speculation`.
+        `cancelled` adalah `threading.Event` yang di-set saat hasilnya pasti tidak dipakai (lihat `check_cancelled`).
+        """
+        self._count("started")
+        started = time.perf_counter()
+        cancelled = threading.Event()
+        if self.runner is not None and afn is not None:
+            async def job():
+                with activate(None):  # tahap embedding/Qdrant spekulatif tidak masuk metrik turn
+                    return await afn(question, cancelled)
+            future = asyncio.run_coroutine_threadsafe(job(), self.runner.loop)
+        else:
+            future = self._pool.submit(fn, question, cancelled)
+        return Speculation(self, tool_name, question, future, started, cancelled)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics, miss_reasons=dict(self.metrics["miss_reasons"]))
+        decided = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / decided if decided else 0.0
+        metrics["avg_saved_per_hit"] = metrics["saved_seconds"] / metrics["hits"] if metrics["hits"] else 0.0
+        metrics["avg_saved_per_turn"] = metrics["saved_seconds"] / decided if decided else 0.0
+        return metrics
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@contextmanager
+def speculating(speculation):
+    """Pasang `speculation` untuk turn ini (contextvar, ikut ke thread/task tool); dibatalkan jika tak terpakai."""
+    token = _active.set(speculation)
+    try:
+        yield speculation
+    finally:
+        _active.reset(token)
+        if speculation is not None:
+            speculation.finish()
+
+
+def take(tool_name, question):
+    """Hasil spekulasi turn aktif untuk panggilan tool ini, atau None."""
+    speculation = _active.get()
+    return speculation.take(tool_name, question) if speculation is not None else None
+
+
+async def atake(tool_name, question):
+    speculation = _active.get()
+    return await speculation.atake(tool_name, question) if speculation is not None else None
@@ -0,0 +1,82 @@
+"""
+Sub-agent SQL untuk tool `get_factual_movie_data`.
+
+- SQL_SYSTEM_PROMPT: guidelines pembuatan query, pembatasan, dan instruksi referensi poster (`poster:<Movie_ID>`).
+- build_sql_agent: rakit SQLDatabaseToolkit + create_agent (dipanggil sekali per proses oleh `cinebot.resources`).
+  Jika `executor` diberikan, tool `sql_db_query` diganti versi ber-guard (`cinebot.sql_executor`):
+  pool read-only, timeout, batas baris, cache hasil.
+- extract_sql_query: ambil query SQL terakhir yang dieksekusi sub-agent dari message history-nya.
+"""
+from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage
+
+from cinebot.metrics import SQL_QUERY_TOOL
+from cinebot.sql_executor import GuardedQuerySQLTool
+
+NO_SQL_QUERY = "Tidak ada query SQL yang dieksekusi (jawaban langsung)."
+
+SQL_SYSTEM_PROMPT = """
+    You are an agent designed to interact with a SQL database.
+    Given an input question, create a syntactically correct {dialect} query to run,
+    then look at the results of the query and return the answer. Unless the user
+    specifies a specific number of examples they wish to obtain, always limit your
+    query to at most {top_k} results.
+
+    You can order the results by a relevant column to return the most interesting
+    examples in the database. Never query for all the columns from a specific table,
+    only ask for the relevant columns given the question.
+
+    When you query for data about specific movies (e.g., Series_Title, Rating),
+    YOU MUST ALWAYS ALSO SELECT the 'Movie_ID' column (never select 'Poster_Link').
+    In your final natural language answer, after mentioning a movie,
+    YOU MUST include its short poster reference 'poster:<Movie_ID>'.
+    Contoh Jawaban: "Filmnya adalah The Dark Knight (2008, rating 9.0) poster:3."
+
+    The `movies` table has one row per movie (key: Movie_ID). For genre or actor questions,
+    use the indexed junction tables instead of LIKE on `Genre`/`Star1`-`Star4`:
+    `movie_genres` (Movie_ID, Genre_ID) + `genres` (Genre_ID, Name) and
+    `movie_stars` (Movie_ID, Star_ID, Billing) + `stars` (Star_ID, Name).
+    Example: SELECT m.Movie_ID, m.Series_Title, m.IMDB_Rating FROM movies m
+    JOIN movie_genres mg ON mg.Movie_ID = m.Movie_ID JOIN genres g ON g.Genre_ID = mg.Genre_ID
+    WHERE g.Name = 'Sci-Fi' ORDER BY m.IMDB_Rating DESC LIMIT 5;
+
+    You MUST double check your query before executing it. If you get an error while
+    executing a query, rewrite the query and try again.
+
+    DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the
+    database.
+
+    To start you should ALWAYS look at the tables in the database to see what you
+    can query. Do NOT skip this step.
+    Then you should query the schema of the most relevant tables.
+    """
+
+
+def build_sql_agent(llm, db, top_k=5, executor=None):
+    """Rakit sub-agent SQL (toolkit + system prompt terformat) untuk database `db`."""
+    # 1. Create SQL toolkit & ambil tools-nya
+    toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+    sql_tools = toolkit.get_tools()
+    if executor is not None:
+        sql_tools = [GuardedQuerySQLTool(executor=executor) if t.name == SQL_QUERY_TOOL else t for t in sql_tools]
+
+    # 2. Format system prompt khusus SQL
+    sql_system_prompt = SQL_SYSTEM_PROMPT.format(dialect=db.dialect, top_k=top_k)
+
+    # 3. Create a dedicated "sub-agent" for SQL queries
+    return create_agent(
+        llm,
+        sql_tools,
+        system_prompt=sql_system_prompt,
+    )
+
+
+def extract_sql_query(messages):
+    """Cari query `sql_db_query` terakhir di message history sub-agent."""
+    for msg in reversed(messages):
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            for call in msg.tool_calls:
+                if call['name'] == SQL_QUERY_TOOL:
+                    return call['args'].get('query', 'Query tidak ditemukan')
+    return NO_SQL_QUERY
@@ -0,0 +1,296 @@
+"""
+Lapisan eksekusi SQL read-only untuk tool `sql_db_query` sub-agent SQL.
+
+Sebelumnya `sql_db_query` dieksekusi lewat `SQLDatabase` (SQLAlchemy) tanpa batas waktu/baris,
+dan SQL yang sama dieksekusi ulang untuk setiap pertanyaan berulang. Di sini:
+- Pool koneksi SQLite read-only (`mode=ro&immutable=1`, `check_same_thread=False`) dipakai ulang antar query.
+- Guard sebelum eksekusi: hanya satu statement SELECT/WITH; authorizer SQLite menolak semua aksi selain
+  baca (INSERT/UPDATE/DELETE/DDL/PRAGMA/ATTACH) saat kompilasi statement.
+- Statement timeout lewat progress handler (`interrupted`), dan batas baris (`fetchmany`) dengan catatan
+  "dipotong" di output.
+- Cache hasil per SQL ternormalisasi (spasi/kapitalisasi di luar literal string, titik koma di akhir), LRU.
+- Identitas file database (inode, mtime, ukuran) dicek di setiap query: jika setup.py mengganti movies.db
+  (`os.replace`), pool ditutup dan cache hasil dikosongkan.
+- Counter hit/miss/ditolak/timeout + waktu eksekusi (`stats()`); hit cache tercatat sebagai tahap
+  `sql_cache_hit` di `cinebot.metrics`.
+- `explain(sql)`: validasi tanpa eksekusi (guard + `EXPLAIN` di koneksi pool), dipakai mode SQL single-shot
+  (`cinebot.text_to_sql`) sebelum query buatan LLM dijalankan.
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from cinebot.metrics import SQL_QUERY_TOOL, STAGE_SQL_CACHE_HIT, current
+
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+# Literal string ('...', "''" di dalamnya), identifier ber-quote ("..." / [...] / `...`), atau sisanya
+_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\[[^\]]*\]|`[^`]*`|[^'\"\[`]+")
+_MAX_STRING_LENGTH = 300
+
+
+class SQLGuardError(ValueError):
+    """Query ditolak sebelum/saat kompilasi (bukan SELECT tunggal, atau mencoba menulis)."""
+
+
+def normalize_sql(sql):
+    """Kunci cache: spasi diringkas & huruf kecil di luar literal string, tanpa titik koma di akhir."""
+    parts = []
+    for token in _TOKEN_RE.findall(sql.strip().rstrip(";").strip()):
+        parts.append(token if token[0] == "'" else re.sub(r"\s+", " ", token.casefold()))
+    return "".join(parts).strip()
+
+
+def check_read_only(sql):
+    """Tolak lebih awal: harus satu statement yang diawali SELECT/WITH (authorizer tetap jadi guard utama)."""
+    statement = sql.strip().rstrip(";").strip()
+    if not statement:
+        raise SQLGuardError("Query kosong.")
+    code = "".join(t for t in _TOKEN_RE.findall(statement) if t[0] not in "'\"[`")
+    if ";" in code:
+        raise SQLGuardError("Hanya satu statement SQL per query yang diizinkan.")
+    first = code.split(None, 1)[0].casefold() if code.split() else ""
+    if first not in ("select", "with"):
+        raise SQLGuardError(f"Hanya query SELECT yang diizinkan (ditolak: {first.upper() or 'kosong'}).")
+    return statement
+
+
+def _authorizer(action, *args):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _file_identity(db_path):
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class QueryResult:
+    columns: list
+    rows: list
+    truncated: bool = False
+    cached: bool = False
+    seconds: float = 0.0
+
+
+class ReadOnlySQLExecutor:
+    """Eksekutor SQL read-only: pool koneksi + guard + cache hasil (lihat docstring modul)."""
+
+    def __init__(self, db_path, pool_size=4, timeout=5.0, max_rows=200, cache_size=256, log=print):
+        self.db_path = db_path
+        self.log = log
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.cache_size = cache_size
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._identity = _file_identity(db_path)
+        self.metrics = {"hits": 0, "misses": 0, "rejected": 0, "timeouts": 0, "errors": 0,
+                        "invalidations": 0, "executions": 0, "execution_seconds": 0.0,
+                        "explains": 0, "invalid": 0}
+
+    # --- Pool & invalidasi ---
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        conn.set_authorizer(_authorizer)
+        return conn
+
+    def _check_generation(self):
+        """Jika file database diganti (setup.py), tutup koneksi lama dan kosongkan cache hasil."""
+        identity = _file_identity(self.db_path)
+        if identity == self._identity:
+            return
+        with self._lock:
+            if identity == self._identity:
+                return
+            self._identity = identity
+            self._cache.clear()
+            self.metrics["invalidations"] += 1
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    def _acquire(self):
+        self._slots.acquire()
+        identity = self._identity
+        try:
+            return self._pool.get_nowait(), identity
+        except queue.Empty:
+            try:
+                return self._connect(), identity
+            except Exception:
+                self._slots.release()
+                raise
+
+    def _release(self, conn, identity):
+        # Koneksi dari generasi lama (file sudah diganti) tidak dikembalikan ke pool
+        if identity == self._identity:
+            self._pool.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # --- Eksekusi ---
+    def _count(self, key, value=1):
+        with self._lock:
+            self.metrics[key] += value
+
+    def execute(self, sql, params=()):
+        """Jalankan query read-only; `SQLGuardError` jika ditolak, `sqlite3.Error` untuk error SQL/timeout."""
+        try:
+            statement = check_read_only(sql)
+        except SQLGuardError:
+            self._count("rejected")
+            raise
+        self._check_generation()
+        key = (normalize_sql(statement), tuple(params))
+        if self.cache_size > 0:
+            started = time.perf_counter()
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.metrics["hits"] += 1
+            if cached is not None:
+                turn_metrics = current()
+                if turn_metrics is not None:
+                    turn_metrics.record(STAGE_SQL_CACHE_HIT, time.perf_counter() - started)
+                return QueryResult(cached.columns, cached.rows, cached.truncated, cached=True)
+        self._count("misses")
+
+        conn, identity = self._acquire()
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        if deadline is not None:
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        try:
+            cursor = conn.execute(statement, params)
+            columns = [c[0] for c in cursor.description or ()]
+            rows = cursor.fetchmany(self.max_rows + 1) if self.max_rows else cursor.fetchall()
+            cursor.close()
+        except sqlite3.DatabaseError as e:
+            if "not authorized" in str(e):
+                self._count("rejected")
+                raise SQLGuardError("Query mencoba mengubah database atau mengakses objek yang tidak diizinkan.") from e
+            if "interrupted" in str(e):
+                self._count("timeouts")
+                raise sqlite3.OperationalError(f"Query melebihi batas waktu {self.timeout:g} detik.") from e
+            self._count("errors")
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+            self._release(conn, identity)
+        seconds = time.perf_counter() - started
+
+        truncated = bool(self.max_rows) and len(rows) > self.max_rows
+        result = QueryResult(columns, rows[:self.max_rows] if truncated else rows, truncated, seconds=seconds)
+        with self._lock:
+            self.metrics["executions"] += 1
+            self.metrics["execution_seconds"] += seconds
+            if self.cache_size > 0 and identity == self._identity:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def explain(self, sql):
+        """
+        Validasi tanpa menjalankan query: guard read-only lalu `EXPLAIN` (SQLite mengompilasi statement, jadi
+        error sintaks, tabel/kolom yang tidak ada, dan aksi selain baca ketahuan). Mengembalikan statement
+        yang lolos; `SQLGuardError` jika ditolak, `sqlite3.Error` jika tidak valid.
+        """
+        try:
+            statement = check_read_only(sql)
+        except SQLGuardError:
+            self._count("rejected")
+            raise
+        self._check_generation()
+        conn, identity = self._acquire()
+        try:
+            conn.execute(f"EXPLAIN {statement}").fetchall()
+        except sqlite3.DatabaseError as e:
+            if "not authorized" in str(e):
+                self._count("rejected")
+                raise SQLGuardError("Query mencoba mengubah database atau mengakses objek yang tidak diizinkan.") from e
+            self._count("invalid")
+            raise
+        finally:
+            self._release(conn, identity)
+        self._count("explains")
+        return statement
+
+    def run(self, sql):
+        """Format output sama dengan `SQLDatabase.run_no_throw`: str(list of tuple), "" jika kosong, "Error: ..."."""
+        try:
+            result = self.execute(sql)
+        except (SQLGuardError, sqlite3.Error) as e:
+            return f"Error: {e}"
+        status = "cache hit" if result.cached else f"{result.seconds * 1000:.1f}ms"
+        self.log(f">> SQL ({status}, {len(result.rows)} baris{', dipotong' if result.truncated else ''})")
+        if not result.rows:
+            return ""
+        rows = [tuple(_truncate(value) for value in row) for row in result.rows]
+        output = str(rows)
+        if result.truncated:
+            output += (f"\n(Hasil dipotong di {self.max_rows} baris. Tambahkan LIMIT atau agregasi "
+                       f"jika butuh ringkasan seluruh data.)")
+        return output
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["entries"] = len(self._cache)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        metrics["avg_execution_ms"] = (
+            metrics["execution_seconds"] / metrics["executions"] * 1000 if metrics["executions"] else 0.0
+        )
+        return metrics
+
+
+def _truncate(value):
+    if isinstance(value, str) and len(value) > _MAX_STRING_LENGTH:
+        return value[:_MAX_STRING_LENGTH] + "..."
+    return value
+
+
+class _QueryInput(BaseModel):
+    query: str = Field(..., description="A detailed and correct SQL query.")
+
+
+class GuardedQuerySQLTool(BaseTool):
+    """Pengganti `QuerySQLDatabaseTool` (nama & deskripsi sama) yang mengeksekusi lewat `ReadOnlySQLExecutor`."""
+
+    name: str = SQL_QUERY_TOOL
+    description: str = """
+    Execute a SQL query against the database and get back the result..
+    If the query is not correct, an error message will be returned.
+    If an error is returned, rewrite the query, check the query, and try again.
+    """
+    args_schema: type[BaseModel] = _QueryInput
+    executor: ReadOnlySQLExecutor
+
+    def _run(self, query: str, run_manager=None) -> str:
+        return self.executor.run(query)
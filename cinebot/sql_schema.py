@@ -0,0 +1,216 @@
+"""
+Skema SQLite CineBot (bertipe, ber-index, ternormalisasi) yang dibangun oleh `setup.py`.
+
+Sebelumnya `df.to_sql('movies', ...)` menghasilkan tipe kolom hasil tebakan pandas, tanpa index,
+dan field multi-nilai (`Genre` = "Crime, Drama", Star1-4) sebagai string biasa, sehingga setiap
+pertanyaan sutradara/tahun/genre/aktor menjadi full scan dengan `LIKE`. Skema di sini:
+- `movies`: tetap datar dengan kolom yang sama seperti sebelumnya (kompatibel dengan query lama),
+  tapi bertipe eksplisit dan punya `Movie_ID` sebagai primary key.
+  Catatan: `movies` sengaja tabel, bukan view — refleksi view `SQLDatabase` (LangChain) gagal di SQLite.
+- Index pada Director, Released_Year, IMDB_Rating, Gross, No_of_Votes.
+- Junction table `genres`/`movie_genres` dan `stars`/`movie_stars` (dengan urutan billing).
+- FTS5 `movies_fts` atas Series_Title + Overview (jika SQLite mendukung FTS5).
+- `ANALYZE` di akhir agar query planner punya statistik.
+Versi skema disimpan di `PRAGMA user_version`.
+
+Ingestion streaming (`cinebot.stream_ingest`) memakai fungsi yang sama per chunk: skema tanpa index
+(`with_indexes=False`), `insert_movies` berulang per chunk, lalu `create_indexes` +
+`finalize_movie_database` sekali di akhir.
+"""
+import os
+import sqlite3
+
+SCHEMA_VERSION = 1
+
+# Kolom datar (urutan sama dengan CSV) beserta tipe SQLite-nya
+MOVIE_COLUMNS = [
+    ("Poster_Link", "TEXT"),
+    ("Series_Title", "TEXT NOT NULL"),
+    ("Released_Year", "INTEGER"),
+    ("Certificate", "TEXT"),
+    ("Runtime", "INTEGER"),
+    ("Genre", "TEXT"),
+    ("IMDB_Rating", "REAL"),
+    ("Overview", "TEXT"),
+    ("Meta_score", "REAL"),
+    ("Director", "TEXT"),
+    ("Star1", "TEXT"),
+    ("Star2", "TEXT"),
+    ("Star3", "TEXT"),
+    ("Star4", "TEXT"),
+    ("No_of_Votes", "INTEGER"),
+    ("Gross", "REAL"),
+]
+STAR_COLUMNS = ("Star1", "Star2", "Star3", "Star4")
+INDEXED_COLUMNS = ("Director", "Released_Year", "IMDB_Rating", "Gross", "No_of_Votes")
+
+# Tabel yang diperlihatkan ke sub-agent SQL (tabel FTS & statistik tidak ikut)
+AGENT_TABLES = ("movies", "genres", "movie_genres", "stars", "movie_stars")
+
+_PYTHON_TYPES = {"INTEGER": int, "REAL": float, "TEXT": str}
+
+
+def fts5_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def split_genres(value):
+    """'Crime, Drama' -> ['Crime', 'Drama']."""
+    if value is None:
+        return []
+    return [g.strip() for g in str(value).split(",") if g.strip()]
+
+
+def _coerce(value, sql_type):
+    """Nilai pandas/numpy -> tipe Python sesuai kolom (NaN -> NULL)."""
+    if value is None or value != value:  # NaN float/numpy
+        return None
+    python_type = _PYTHON_TYPES[sql_type.split()[0]]
+    if python_type is int:
+        return int(float(value))
+    return python_type(value)
+
+
+def create_schema(conn, with_fts=True, with_indexes=True):
+    columns = ",\n    ".join(f"{name} {sql_type}" for name, sql_type in MOVIE_COLUMNS)
+    conn.executescript(f"""
+        CREATE TABLE movies (
+            Movie_ID INTEGER PRIMARY KEY,
+            {columns}
+        );
+        CREATE TABLE genres (
+            Genre_ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE movie_genres (
+            Movie_ID INTEGER NOT NULL REFERENCES movies(Movie_ID),
+            Genre_ID INTEGER NOT NULL REFERENCES genres(Genre_ID),
+            PRIMARY KEY (Movie_ID, Genre_ID)
+        ) WITHOUT ROWID;
+        CREATE TABLE stars (
+            Star_ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE movie_stars (
+            Movie_ID INTEGER NOT NULL REFERENCES movies(Movie_ID),
+            Star_ID INTEGER NOT NULL REFERENCES stars(Star_ID),
+            Billing INTEGER NOT NULL,
+            PRIMARY KEY (Movie_ID, Star_ID)
+        ) WITHOUT ROWID;
+    """)
+    if with_indexes:
+        create_indexes(conn)
+    if with_fts:
+        conn.execute("""
+            CREATE VIRTUAL TABLE movies_fts USING fts5(
+                Series_Title, Overview, content='movies', content_rowid='Movie_ID'
+            )
+        """)
+
+
+def create_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_movie_genres_genre ON movie_genres(Genre_ID, Movie_ID)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_movie_stars_star ON movie_stars(Star_ID, Movie_ID)")
+    for column in INDEXED_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_movies_{column.lower()} ON movies({column})")
+
+
+def _name_ids(conn, table, id_column, names, chunk=500):
+    """Tambahkan nama yang belum ada (ID baru berurutan sesuai kemunculan pertama); kembalikan {nama: ID}."""
+    names = list(names)
+    conn.executemany(f"INSERT OR IGNORE INTO {table} (Name) VALUES (?)", [(name,) for name in names])
+    ids = {}
+    for i in range(0, len(names), chunk):
+        part = names[i:i + chunk]
+        placeholders = ", ".join("?" * len(part))
+        ids.update(conn.execute(f"SELECT Name, {id_column} FROM {table} WHERE Name IN ({placeholders})", part))
+    return ids
+
+
+def insert_movies(conn, df, first_movie_id=1):
+    """
+    Isi tabel utama + junction table dari DataFrame. Movie_ID = kolom `Movie_ID` jika ada (ID stabil dari
+    `cinebot.ingest.assign_movie_ids`), selain itu urutan baris mulai `first_movie_id`.
+    Genre/aktor yang sudah ada dipakai ulang, jadi bisa dipanggil berulang per chunk.
+    """
+    names = [name for name, _ in MOVIE_COLUMNS]
+    rows = []
+    genre_names, star_names = {}, {}  # dict sebagai set berurutan (kemunculan pertama)
+    movie_genres, movie_stars = [], []
+    if "Movie_ID" in df.columns:
+        movie_ids = [int(movie_id) for movie_id in df["Movie_ID"]]
+    else:
+        movie_ids = range(first_movie_id, first_movie_id + len(df))
+    for movie_id, record in zip(movie_ids, df[names].itertuples(index=False, name=None)):
+        values = [_coerce(v, t) for v, (_, t) in zip(record, MOVIE_COLUMNS)]
+        rows.append((movie_id, *values))
+        data = dict(zip(names, values))
+        for genre in split_genres(data["Genre"]):
+            genre_names.setdefault(genre)
+            movie_genres.append((movie_id, genre))
+        for billing, column in enumerate(STAR_COLUMNS, start=1):
+            star = data[column]
+            if not star:
+                continue
+            star_names.setdefault(star)
+            movie_stars.append((movie_id, star, billing))
+
+    placeholders = ", ".join("?" * (len(names) + 1))
+    conn.executemany(f"INSERT INTO movies (Movie_ID, {', '.join(names)}) VALUES ({placeholders})", rows)
+    genre_ids = _name_ids(conn, "genres", "Genre_ID", genre_names)
+    star_ids = _name_ids(conn, "stars", "Star_ID", star_names)
+    # Aktor yang sama bisa tercantum dua kali di satu film; simpan billing pertamanya saja
+    conn.executemany("INSERT OR IGNORE INTO movie_genres VALUES (?, ?)",
+                     [(movie_id, genre_ids[genre]) for movie_id, genre in movie_genres])
+    conn.executemany("INSERT OR IGNORE INTO movie_stars VALUES (?, ?, ?)",
+                     [(movie_id, star_ids[star], billing) for movie_id, star, billing in movie_stars])
+    return len(rows)
+
+
+def finalize_movie_database(conn, with_fts):
+    """Langkah akhir setelah semua baris masuk: isi FTS, tandai versi skema, lalu ANALYZE."""
+    with conn:
+        if with_fts:
+            conn.execute("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.execute("ANALYZE")
+
+
+def build_movie_database(db_path, df):
+    """Bangun database lengkap di `db_path` (file harus belum ada). Kembalikan ringkasan."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with_fts = fts5_available(conn)
+        with conn:
+            create_schema(conn, with_fts=with_fts)
+            count = insert_movies(conn, df)
+        finalize_movie_database(conn, with_fts)
+        return {"movies": count, "fts": with_fts, "schema_version": SCHEMA_VERSION}
+    finally:
+        conn.close()
+
+
+def schema_version(db_path):
+    """`PRAGMA user_version` dari database (0 untuk tabel datar lama hasil `to_sql`)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def agent_tables(db_path):
+    """Tabel untuk sub-agent SQL yang benar-benar ada di database (DB lama hanya punya `movies`)."""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    return [name for name in AGENT_TABLES if name in existing]
@@ -0,0 +1,332 @@
+"""
+Ingestion streaming ber-memori terbatas (`setup.py --stream`) untuk sumber yang jauh lebih besar dari IMDb Top 1000.
+
+Mode biasa memuat seluruh CSV ke DataFrame, membangun record semua baris, dan mengambil hash semua point
+Qdrant sebelum mengunggah apa pun, jadi memori tumbuh linear dengan ukuran input. Di sini sumber dibaca per
+chunk lewat rantai generator, dan setiap chunk selesai diproses sebelum chunk berikutnya dibaca:
+
+    baca (`pd.read_csv(chunksize=...)`) -> bersihkan -> teks embedding + record -> diff hash Qdrant untuk ID
+    chunk itu saja (`retrieve`) -> embed + upsert yang baru/berubah (`cinebot.pipeline`) -> append ke SQLite
+
+Puncak memori ~ satu chunk (+ batch in-flight pipeline), tidak bergantung pada jumlah baris.
+
+Checkpoint/resume:
+- SQLite ditulis ke `<db>.partial` (skema `cinebot.sql_schema` tanpa index). Posisi baris sumber,
+  counter, dan point ID yang sudah terlihat disimpan di `<db>.checkpoint` yang di-ATTACH ke koneksi
+  yang sama, sehingga baris SQL satu chunk dan checkpoint-nya di-commit dalam SATU transaksi.
+- Movie_ID stabil (`cinebot.ingest.assign_movie_ids`, sama dengan mode biasa); tabrakan dicek ke baris
+  chunk sebelumnya di `<db>.partial`.
+- Crash di tengah chunk -> chunk itu diulang; upsert Qdrant idempoten (hash sama = tidak di-embed ulang).
+- Run berikutnya dengan sumber yang sama (path, ukuran, mtime) melanjutkan dari chunk terakhir yang
+  ter-commit; `full=True` (koleksi juga di-drop) atau sumber yang berubah mulai dari awal.
+- Setelah chunk terakhir: point Qdrant yang tidak terlihat dihapus (scroll per halaman, dicocokkan ke tabel
+  checkpoint), index & FTS dibangun sekali, ANALYZE, lalu `<db>.partial` di-`os.replace` ke `<db>`.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+from qdrant_client import models
+
+from cinebot.collection_profile import get_profile
+from cinebot.ingest import assign_movie_ids, plan_sync, prepare_collection, records_from_dataframe, update_payloads
+from cinebot.metrics import stage
+from cinebot.pipeline import PipelineStats, run_ingest_pipeline
+from cinebot.sql_schema import (
+    MOVIE_COLUMNS,
+    SCHEMA_VERSION,
+    create_indexes,
+    create_schema,
+    finalize_movie_database,
+    fts5_available,
+    insert_movies,
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+NUMERIC_COLUMNS = ("Released_Year", "Runtime", "IMDB_Rating", "Meta_score", "No_of_Votes", "Gross")
+# Kolom yang masuk ke teks embedding (NaN -> "" agar teks tidak berisi "nan")
+TEXT_COLUMNS = ("Series_Title", "Genre", "Director", "Star1", "Star2", "Star3", "Overview")
+
+_COUNTERS = ("rows", "dropped", "inserted", "updated", "payload_updated", "unchanged", "embedded_documents",
+             "pipeline_batches", "pipeline_retries")
+
+
+def peak_rss_mb():
+    """Puncak resident set size proses ini (MB); None jika platform tidak mendukung."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)  # macOS: byte, Linux: KB
+
+
+def source_fingerprint(csv_path):
+    """Identitas sumber untuk resume: checkpoint hanya dipakai jika file tidak berubah sejak run itu."""
+    info = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def file_hash(path, block_size=1 << 20):
+    """sha256 isi file, dibaca per blok (pengganti `dataset_hash(df)` tanpa memuat DataFrame)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# === Generator: baca -> bersihkan ===
+def read_chunks(csv_path, chunk_size=DEFAULT_CHUNK_SIZE, skip_rows=0):
+    """
+    Generator (chunk DataFrame, jumlah baris sumber terbaca, fraksi file terbaca).
+    `skip_rows` baris data pertama dilewati parser tanpa dibentuk menjadi DataFrame (resume).
+    """
+    total = os.path.getsize(csv_path) or 1
+    with open(csv_path, "rb") as f:
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        rows_read = skip_rows
+        for chunk in pd.read_csv(f, chunksize=chunk_size, skiprows=skip):
+            rows_read += len(chunk)
+            yield chunk, rows_read, min(f.tell() / total, 1.0)
+
+
+def clean_chunk(chunk, first_row):
+    """
+    (DataFrame bersih, jumlah baris dibuang). Kolom yang hilang ditambahkan kosong, angka di-coerce,
+    baris tanpa judul/tahun/rating dibuang. Index = urutan global baris yang lolos mulai `first_row`.
+    """
+    df = chunk.copy()
+    for name, _ in MOVIE_COLUMNS:
+        if name not in df.columns:
+            df[name] = None
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    for column in TEXT_COLUMNS:
+        df[column] = df[column].fillna("").astype(str).str.strip()
+    keep = df["Series_Title"].ne("") & df["Released_Year"].notna() & df["IMDB_Rating"].notna()
+    df = df[keep]
+    df.index = pd.RangeIndex(first_row, first_row + len(df))
+    return df, int((~keep).sum())
+
+
+# === Checkpoint ===
+def _connect(partial_file, checkpoint_file):
+    conn = sqlite3.connect(partial_file)
+    conn.execute("ATTACH DATABASE ? AS ckpt", (checkpoint_file,))
+    return conn
+
+
+def _read_state(checkpoint_file):
+    conn = sqlite3.connect(f"file:{checkpoint_file}?mode=ro", uri=True)
+    try:
+        return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM state")}
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def _write_state(conn, state):
+    conn.executemany("INSERT OR REPLACE INTO ckpt.state (key, value) VALUES (?, ?)",
+                     [(key, json.dumps(value)) for key, value in state.items()])
+
+
+def open_checkpoint(db_file, csv_path, full=False, log=print):
+    """
+    (koneksi ke `<db>.partial` dengan checkpoint ter-ATTACH, state). State lama dipakai jika sumbernya sama
+    dan `full=False`; selain itu file partial & checkpoint dibuat ulang.
+    """
+    partial_file, checkpoint_file = db_file + ".partial", db_file + ".checkpoint"
+    fingerprint = source_fingerprint(csv_path)
+    state = None
+    if not full and os.path.exists(partial_file) and os.path.exists(checkpoint_file):
+        state = _read_state(checkpoint_file)
+        if state is not None and state.get("fingerprint") != fingerprint:
+            log("Checkpoint ingestion streaming ditemukan tapi sumber CSV sudah berubah; mulai dari awal.")
+            state = None
+    if state is not None:
+        log(f"Melanjutkan ingestion streaming dari baris sumber {state['rows_read']} "
+            f"(chunk ke-{state['chunks'] + 1}).")
+        return _connect(partial_file, checkpoint_file), state
+
+    for path in (partial_file, checkpoint_file):
+        if os.path.exists(path):
+            os.remove(path)
+    conn = _connect(partial_file, checkpoint_file)
+    with_fts = fts5_available(conn)
+    state = {
+        "fingerprint": fingerprint,
+        "with_fts": with_fts,
+        "rows_read": 0,
+        "chunks": 0,
+        "collection_created": False,
+        **{name: 0 for name in _COUNTERS},
+    }
+    with conn:
+        create_schema(conn, with_fts=with_fts, with_indexes=False)
+        conn.execute("CREATE TABLE ckpt.state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE ckpt.seen (point_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        _write_state(conn, state)
+    return conn, state
+
+
+# === Qdrant per chunk ===
+def fetch_hashes(client, collection_name, point_ids):
+    """{point_id: (content_hash, text_hash)} hanya untuk ID di chunk ini (bukan scan seluruh koleksi)."""
+    points = client.retrieve(
+        collection_name=collection_name,
+        ids=list(point_ids),
+        with_payload=["content_hash", "text_hash"],
+        with_vectors=False,
+    )
+    existing = {}
+    for point in points:
+        payload = point.payload or {}
+        existing[str(point.id)] = (payload.get("content_hash"), payload.get("text_hash"))
+    return existing
+
+
+def delete_unseen(client, collection_name, conn, page_size=512):
+    """Hapus point yang tidak muncul di sumber (tabel `ckpt.seen`), dicek per halaman scroll."""
+    deleted = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name, limit=page_size, offset=offset, with_payload=False, with_vectors=False,
+        )
+        ids = [str(point.id) for point in points]
+        if ids:
+            placeholders = ", ".join("?" * len(ids))
+            seen = {row[0] for row in conn.execute(
+                f"SELECT point_id FROM ckpt.seen WHERE point_id IN ({placeholders})", ids)}
+            stale = [pid for pid in ids if pid not in seen]
+            if stale:
+                client.delete(collection_name=collection_name, points_selector=models.PointIdsList(points=stale))
+                deleted += len(stale)
+        if offset is None:
+            return deleted
+
+
+# === Orkestrasi ===
+def stream_ingest(client, collection_name, csv_path, db_file, embeddings, chunk_size=DEFAULT_CHUNK_SIZE,
+                  batch_size=100, concurrency=4, requests_per_minute=None, profile=None,
+                  embedding_model="text-embedding-3-small", full=False, log=print):
+    """
+    Ingestion CSV -> Qdrant + SQLite per chunk (lihat docstring modul).
+    Kembalikan {"sql", "sync", "stream"}; bagian "sync" berbentuk seperti hasil `sync_collection`, tetapi
+    berisi jumlah (bukan daftar ID) agar ukurannya tidak ikut tumbuh dengan dataset.
+    """
+    started = time.perf_counter()
+    profile = profile or get_profile()
+    conn, state = open_checkpoint(db_file, csv_path, full=full, log=log)
+    try:
+        resumed_from = state["rows_read"]
+        created, indexed_fields = prepare_collection(
+            client, collection_name, embeddings, profile, embedding_model=embedding_model, full=full, log=log,
+        )
+        # Koleksi yang baru dibuat proses ini belum punya hash apa pun; setelah resume hash tetap diambil
+        # (chunk yang terputus mungkin sudah sebagian ter-upsert)
+        state["collection_created"] = state["collection_created"] or created
+
+        rows_at_start = state["rows"]
+        for chunk, rows_read, fraction in read_chunks(csv_path, chunk_size, skip_rows=resumed_from):
+            chunk_started = time.perf_counter()
+            with stage("stream_clean_records"):
+                df, dropped = clean_chunk(chunk, state["rows"])
+                df = assign_movie_ids(df, is_taken=lambda movie_id: conn.execute(
+                    "SELECT 1 FROM movies WHERE Movie_ID = ?", (movie_id,)).fetchone() is not None)
+                records = records_from_dataframe(df)
+            del chunk
+            with stage("qdrant_fetch_hashes"):
+                existing = {} if created else fetch_hashes(client, collection_name, {r.point_id for r in records})
+            plan = plan_sync(records, existing)
+
+            pipeline_stats = PipelineStats()
+            if plan.to_upsert:
+                with stage("embed_upload"):
+                    pipeline_stats = run_ingest_pipeline(
+                        client, collection_name, plan.to_upsert, embeddings, batch_size=batch_size,
+                        concurrency=concurrency, requests_per_minute=requests_per_minute,
+                        log=lambda message: None,  # progres dilaporkan per chunk, bukan per batch
+                    )
+            with stage("qdrant_payload_update"):
+                update_payloads(client, collection_name, plan.payload_only, batch_size)
+
+            # Baris SQL chunk + checkpoint: satu transaksi (keduanya ada, atau keduanya tidak)
+            with stage("sql_append"), conn:
+                insert_movies(conn, df)
+                conn.executemany("INSERT OR IGNORE INTO ckpt.seen VALUES (?)", [(r.point_id,) for r in records])
+                state.update({
+                    "rows_read": rows_read,
+                    "chunks": state["chunks"] + 1,
+                    "rows": state["rows"] + len(df),
+                    "dropped": state["dropped"] + dropped,
+                    "inserted": state["inserted"] + len(plan.new_ids),
+                    "updated": state["updated"] + len(plan.to_upsert) - len(plan.new_ids),
+                    "payload_updated": state["payload_updated"] + len(plan.payload_only),
+                    "unchanged": state["unchanged"] + len(plan.unchanged),
+                    "embedded_documents": state["embedded_documents"] + len(plan.to_upsert),
+                    "pipeline_batches": state["pipeline_batches"] + pipeline_stats.batches,
+                    "pipeline_retries": state["pipeline_retries"] + pipeline_stats.retries,
+                })
+                _write_state(conn, state)
+
+            elapsed = time.perf_counter() - started
+            rss = peak_rss_mb()
+            log(f"Chunk {state['chunks']}: {state['rows']} film ({fraction:.0%} file) | "
+                f"+{len(df)} baris, {len(plan.to_upsert)} di-embed, {len(plan.unchanged)} tidak berubah, "
+                f"{dropped} dibuang, {len(df) / (time.perf_counter() - chunk_started):.0f} baris/detik | "
+                f"rata-rata {(state['rows'] - rows_at_start) / elapsed:.0f} baris/detik"
+                + (f" | RSS puncak {rss:.0f} MB" if rss else ""))
+
+        # Koleksi yang dibuat oleh run streaming ini hanya berisi baris sumber: tidak ada yang perlu dihapus
+        deleted = 0
+        if not state["collection_created"]:
+            with stage("qdrant_delete"):
+                deleted = delete_unseen(client, collection_name, conn)
+        with stage("sql_finalize"):
+            with conn:
+                create_indexes(conn)
+            finalize_movie_database(conn, state["with_fts"])
+            conn.execute("DETACH DATABASE ckpt")
+    finally:
+        conn.close()
+
+    os.replace(db_file + ".partial", db_file)
+    os.remove(db_file + ".checkpoint")
+    wall = time.perf_counter() - started
+    return {
+        "sql": {
+            "rewritten": True,
+            "dataset_hash": file_hash(csv_path),
+            "sql_schema": {"movies": state["rows"], "fts": state["with_fts"], "schema_version": SCHEMA_VERSION},
+        },
+        "sync": {
+            "collection_created": state["collection_created"],
+            "inserted": state["inserted"],
+            "updated": state["updated"],
+            "payload_updated": state["payload_updated"],
+            "deleted": deleted,
+            "unchanged": state["unchanged"],
+            "embedded_documents": state["embedded_documents"],
+            "pipeline": {"batches": state["pipeline_batches"], "retries": state["pipeline_retries"]},
+            "collection_profile": profile.as_dict(),
+            "payload_indexes_created": indexed_fields,
+        },
+        "stream": {
+            "chunk_size": chunk_size,
+            "chunks": state["chunks"],
+            "rows_read": state["rows_read"],
+            "rows": state["rows"],
+            "dropped": state["dropped"],
+            "resumed_from_row": resumed_from,
+            "wall_seconds": round(wall, 3),
+            "rows_per_sec": round((state["rows"] - rows_at_start) / wall, 1) if wall else 0.0,
+            "peak_rss_mb": round(peak_rss_mb() or 0, 1) or None,
+        },
+    }
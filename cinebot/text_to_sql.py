@@ -0,0 +1,260 @@
+"""
+Mode cepat tool `get_factual_movie_data`: text-to-SQL single-shot dengan validasi lokal, fallback ke sub-agent ReAct.
+
+Sebelumnya setiap pertanyaan faktual menjalankan sub-agent ReAct (`cinebot.sql_agent`) yang wajib melihat daftar
+tabel lalu skema sebelum menulis query: 4-6 round trip LLM berurutan, bahkan untuk "siapa sutradara X". Di sini:
+- Skema tabel agent (CREATE dari `sqlite_master`) + contoh nilai (nama genre, rating usia, rentang tahun/rating/
+  durasi/gross, sutradara & pemeran terbanyak) disusun sekali (`describe_schema`) dan ditanam di prompt.
+- LLM menulis SQL dalam SATU panggilan (atau `NO_SQL` jika pertanyaan tidak bisa dijawab dari database).
+- SQL divalidasi lokal sebelum dijalankan: guard read-only (satu SELECT) + `EXPLAIN` (`ReadOnlySQLExecutor.explain`),
+  lalu dieksekusi lewat pool read-only yang sama dengan `sql_db_query` (timeout, batas baris, cache hasil).
+- Hasil dikembalikan sebagai payload terstruktur (`cinebot.tool_payloads`): daftar film jika Movie_ID ikut
+  di-SELECT, selain itu baris ringkas `kolom=nilai`; agent utama yang menyusun jawabannya.
+- Sub-agent ReAct hanya dipakai jika LLM menjawab `NO_SQL`, validasi gagal, atau eksekusi error
+  (`CINEBOT_SQL_MODE=agent`: selalu ReAct, perilaku lama).
+- Jumlah round trip LLM per pertanyaan dicatat per mode (`stats()`) dan dicetak di log.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from cinebot.metrics import STAGE_SQL_EXECUTION, STAGE_SQL_VALIDATION, stage
+from cinebot.sql_agent import extract_sql_query
+from cinebot.sql_executor import SQLGuardError
+from cinebot.sql_schema import agent_tables
+from cinebot.tool_payloads import movie_from_row, movies_payload, short_synopsis, sql_answer_payload
+
+MODE_SINGLE_SHOT = "single_shot"
+MODE_AGENT = "agent"
+NO_SQL = "NO_SQL"
+
+SINGLE_SHOT_PROMPT = """
+    You translate a question about movies into ONE syntactically correct {dialect} query
+    for the database below. The schema and sample values are complete: do not ask for more.
+
+    {schema}
+
+    Rules:
+    - Reply with ONLY the SQL query (no explanation). If the question cannot be answered
+      from this database, reply exactly {no_sql}.
+    - A single SELECT (or WITH ... SELECT) statement. NEVER write DML/DDL
+      (INSERT, UPDATE, DELETE, DROP etc.).
+    - Unless the user specifies a specific number of examples, limit the query to at most {top_k} results,
+      ordered by a relevant column to return the most interesting examples.
+    - Never select all the columns; only the relevant columns for the question.
+    - When the query returns specific movies, YOU MUST ALWAYS ALSO SELECT 'Movie_ID' and 'Series_Title'
+      (never select 'Poster_Link').
+    - For genre or actor questions, use the junction tables `movie_genres` + `genres` and
+      `movie_stars` + `stars` with `=` on the exact name, instead of LIKE on `Genre`/`Star1`-`Star4`.
+    """
+
+_FENCE_RE = re.compile(r"```(?:sql)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_START_RE = re.compile(r"\b(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def _values(conn, sql):
+    return [row[0] for row in conn.execute(sql) if row[0] is not None]
+
+
+def describe_schema(db_path, examples=5):
+    """Skema tabel agent + contoh nilai sebagai teks prompt ('' jika database belum ada)."""
+    tables = agent_tables(db_path)
+    if not tables:
+        return ""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        lines = [sql.strip() + ";" for name in tables
+                 for sql in _values(conn, f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = '{name}'")]
+        lines.append("\nSample values:")
+        if "genres" in tables:
+            lines.append("- genres.Name (all): " + ", ".join(_values(conn, "SELECT Name FROM genres ORDER BY Name")))
+        certificates = _values(conn, "SELECT DISTINCT Certificate FROM movies ORDER BY Certificate")
+        lines.append("- movies.Certificate (all): " + ", ".join(certificates))
+        for column in ("Released_Year", "IMDB_Rating", "Runtime", "Meta_score", "No_of_Votes", "Gross"):
+            low, high = conn.execute(f"SELECT MIN({column}), MAX({column}) FROM movies").fetchone()
+            lines.append(f"- movies.{column}: {low} .. {high}")
+        lines.append("- movies.Runtime is in minutes, movies.Gross in US dollars; "
+                     "Gross = 0 / Meta_score = 0 means unknown (exclude them for averages and rankings)")
+        directors = _values(conn, f"SELECT Director FROM movies GROUP BY Director "
+                                  f"ORDER BY COUNT(*) DESC, Director LIMIT {examples}")
+        lines.append("- movies.Director (examples): " + ", ".join(directors))
+        if "stars" in tables:
+            stars = _values(conn, f"SELECT s.Name FROM stars s JOIN movie_stars ms ON ms.Star_ID = s.Star_ID "
+                                  f"GROUP BY s.Star_ID ORDER BY COUNT(*) DESC, s.Name LIMIT {examples}")
+            lines.append("- stars.Name (examples): " + ", ".join(stars))
+        titles = _values(conn, f"SELECT Series_Title FROM movies ORDER BY No_of_Votes DESC LIMIT {examples}")
+        lines.append("- movies.Series_Title (examples): " + ", ".join(titles))
+        return "\n".join(lines)
+    finally:
+        conn.close()
+
+
+def extract_sql(text):
+    """
+    SQL dari jawaban LLM; None untuk NO_SQL / tanpa query. Isi blok ``` diambil apa adanya (statement selain
+    SELECT tetap sampai ke guard), di luar blok teks sebelum SELECT/WITH dibuang.
+    """
+    text = (text or "").strip()
+    fenced = _FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    if not text or text.upper().startswith(NO_SQL):
+        return None
+    if fenced:
+        return text.rstrip(";").strip()
+    match = _START_RE.search(text)
+    if match is None:
+        return None
+    return text[match.start():].strip().rstrip(";").strip()
+
+
+def _movie(columns, row):
+    item = movie_from_row(columns, row)
+    if "overview" in item:
+        item["synopsis"] = short_synopsis(item.pop("overview"))
+    return item
+
+
+class TextToSQL:
+    """Jawab pertanyaan faktual: single-shot + validasi lokal, fallback sub-agent ReAct (lihat docstring modul)."""
+
+    def __init__(self, llm, executor, agent, posters=None, dialect="sqlite", top_k=5, mode=MODE_SINGLE_SHOT,
+                 log=print):
+        self.llm = llm
+        self.executor = executor
+        self.agent = agent
+        self.posters = posters
+        self.dialect = dialect
+        self.top_k = top_k
+        self.mode = mode
+        self.log = log
+        self._prompt = None
+        self._prompt_identity = None
+        self._lock = threading.Lock()
+        self.metrics = {"questions": 0, "single_shot": 0, "fallback": 0, "agent": 0,
+                        "llm_calls_single_shot": 0, "llm_calls_fallback": 0, "llm_calls_agent": 0,
+                        "fallback_reasons": {}}
+
+    # --- Prompt (skema disusun sekali; disusun ulang jika setup.py mengganti file database) ---
+    def system_prompt(self):
+        db_path = self.executor.db_path
+        try:
+            st = os.stat(db_path)
+            identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            identity = None
+        with self._lock:
+            if self._prompt is None or identity != self._prompt_identity:
+                schema = describe_schema(db_path)
+                self._prompt = SINGLE_SHOT_PROMPT.format(dialect=self.dialect, schema=schema, top_k=self.top_k,
+                                                         no_sql=NO_SQL)
+                self._prompt_identity = identity
+            return self._prompt
+
+    def _messages(self, question):
+        return [SystemMessage(content=self.system_prompt()), HumanMessage(content=question)]
+
+    # --- Single-shot: validasi + eksekusi lokal ---
+    def _run_sql(self, text):
+        """(output, None) jika SQL lolos validasi & eksekusi; (None, (alasan, detail)) jika perlu fallback."""
+        sql = extract_sql(text)
+        if sql is None:
+            return None, ("no_sql", "LLM tidak menulis query")
+        try:
+            with stage(STAGE_SQL_VALIDATION):
+                statement = self.executor.explain(sql)
+        except (SQLGuardError, sqlite3.Error) as e:
+            return None, ("invalid", str(e))
+        try:
+            with stage(STAGE_SQL_EXECUTION):
+                result = self.executor.execute(statement)
+        except (SQLGuardError, sqlite3.Error) as e:
+            return None, ("execution", str(e))
+        return self._format_result(statement, result), None
+
+    def _format_result(self, sql, result):
+        note = f"Hasil dipotong di {self.executor.max_rows} baris." if result.truncated else None
+        if "Movie_ID" in result.columns:
+            movies = [_movie(result.columns, row) for row in result.rows]
+            if not movies:
+                note = "Tidak ada film yang cocok dengan query."
+            return movies_payload(movies, source="sql", note=note, sql=sql)
+        rows = ["; ".join(f"{column}={value}" for column, value in zip(result.columns, row)) for row in result.rows]
+        answer = "\n".join(rows) if rows else "Query tidak mengembalikan baris."
+        return sql_answer_payload(answer + (f"\n({note})" if note else ""), sql)
+
+    # --- Sub-agent ReAct (mode agent & fallback) ---
+    @staticmethod
+    def _agent_input(question):
+        return {"messages": [{"role": "user", "content": question}]}
+
+    def _format_agent_response(self, response_state):
+        """(payload jawaban + SQL terakhir, jumlah round trip LLM sub-agent)."""
+        messages = response_state["messages"]
+        answer = messages[-1].content
+        if self.posters is not None:
+            # URL poster yang lolos di jawaban diganti referensi pendek
+            answer = self.posters.compact(answer)
+        llm_calls = sum(1 for m in messages if isinstance(m, AIMessage))
+        return sql_answer_payload(answer, extract_sql_query(messages)), llm_calls
+
+    def _record(self, mode, llm_calls, reason=None):
+        with self._lock:
+            self.metrics["questions"] += 1
+            self.metrics[mode] += 1
+            self.metrics[f"llm_calls_{mode}"] += llm_calls
+            if reason is not None:
+                reasons = self.metrics["fallback_reasons"]
+                reasons[reason] = reasons.get(reason, 0) + 1
+        label = {"single_shot": "single-shot", "fallback": "fallback ReAct", "agent": "sub-agent ReAct"}[mode]
+        self.log(f">> SQL {label}: {llm_calls} panggilan LLM")
+
+    # --- API ---
+    def answer(self, question):
+        if self.mode == MODE_AGENT:
+            output, llm_calls = self._format_agent_response(self.agent.invoke(self._agent_input(question)))
+            self._record("agent", llm_calls)
+            return output
+        response = self.llm.invoke(self._messages(question))
+        output, failure = self._run_sql(response.content)
+        if failure is None:
+            self._record("single_shot", 1)
+            return output
+        self.log(f">> SQL single-shot gagal ({failure[0]}: {failure[1]}), fallback ke sub-agent ReAct")
+        output, llm_calls = self._format_agent_response(self.agent.invoke(self._agent_input(question)))
+        self._record("fallback", 1 + llm_calls, failure[0])
+        return output
+
+    async def aanswer(self, question):
+        if self.mode == MODE_AGENT:
+            output, llm_calls = self._format_agent_response(await self.agent.ainvoke(self._agent_input(question)))
+            self._record("agent", llm_calls)
+            return output
+        response = await self.llm.ainvoke(self._messages(question))
+        # Validasi & eksekusi SQLite memblokir: jalankan di thread (contextvar metrik ikut terbawa)
+        output, failure = await asyncio.to_thread(self._run_sql, response.content)
+        if failure is None:
+            self._record("single_shot", 1)
+            return output
+        self.log(f">> SQL single-shot gagal ({failure[0]}: {failure[1]}), fallback ke sub-agent ReAct")
+        output, llm_calls = self._format_agent_response(await self.agent.ainvoke(self._agent_input(question)))
+        self._record("fallback", 1 + llm_calls, failure[0])
+        return output
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics, fallback_reasons=dict(self.metrics["fallback_reasons"]))
+        for mode in ("single_shot", "fallback", "agent"):
+            count = metrics[mode]
+            metrics[f"avg_llm_calls_{mode}"] = metrics[f"llm_calls_{mode}"] / count if count else 0.0
+        total_calls = metrics["llm_calls_single_shot"] + metrics["llm_calls_fallback"] + metrics["llm_calls_agent"]
+        metrics["avg_llm_calls"] = total_calls / metrics["questions"] if metrics["questions"] else 0.0
+        metrics["fallback_rate"] = (
+            metrics["fallback"] / (metrics["single_shot"] + metrics["fallback"])
+            if metrics["single_shot"] + metrics["fallback"] else 0.0
+        )
+        return metrics
@@ -0,0 +1,199 @@
+"""
+Resolver judul film cepat untuk pertanyaan "mirip <film>" (kamus dari kolom `Series_Title`).
+
+Tiga tingkat, dari yang paling ketat:
+- exact : judul ternormalisasi (casefold, aksen & tanda baca dibuang, "&" -> "and").
+- alias : varian yang dibangkitkan dari judul itu sendiri — tanpa artikel di depan ("dark knight"),
+  tanpa subjudul setelah ":" / " - " ("star wars episode v"), angka <-> romawi ("toy story 3" /
+  "toy story iii"), plus alias eksplisit dari pemanggil. Alias dari judul lengkap mengalahkan alias dari
+  judul tanpa subjudul ("godfather" -> The Godfather, bukan Part II); alias yang tetap menunjuk ke lebih
+  dari satu judul dibuang (ambigu).
+- fuzzy : typo ("inceptoin"): index trigram karakter memilih beberapa kunci dengan trigram bersama
+  terbanyak, lalu `difflib` hanya membandingkan kandidat itu (bukan seluruh kamus).
+
+Teks setelah judul ("mirip Inception yang seru") diabaikan: kandidat dicoba dari prefiks terpanjang.
+Kata sambung setelah penanda ("mirip dengan Inception", "serupa sama Heat") dilewati.
+"""
+import difflib
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, replace
+
+EXACT = "exact"
+ALIAS = "alias"
+FUZZY = "fuzzy"
+
+_ARTICLES = ("the", "a", "an")
+_ROMAN = {"2": "ii", "3": "iii", "4": "iv", "5": "v", "6": "vi"}
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SUBTITLE_RE = re.compile(r"\s*(?::|\s-\s)\s*")
+_MAX_TITLE_WORDS = 16
+# Setelah penanda kemiripan: kata sambung & "film" opsional, lalu kandidat judul
+_AFTER_MARKER = r"\s+(?:(?:dengan|dgn|sama)\s+)?(?:(?:film|movie)\s+)?(.+)$"
+
+
+def normalize_title(text):
+    """Kunci judul: casefold, tanpa aksen/tanda baca, "&" -> "and", spasi diringkas."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    text = _NON_WORD_RE.sub(" ", text.casefold().replace("&", " and ").replace("'", ""))
+    return " ".join(text.split())
+
+
+def _raw_end(text, start, words):
+    """Posisi akhir di `text` (mulai `start`) setelah `words` kata ternormalisasi; tanda baca ikut terpotong."""
+    count = 0
+    for token in re.finditer(r"\S+", text[start:]):
+        count += len(normalize_title(token.group()).split())
+        if count >= words:
+            return start + token.end()
+    return len(text)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _variants(key):
+    """Varian satu kunci: tanpa artikel di depan, angka <-> romawi."""
+    words = key.split()
+    candidates = {key}
+    if len(words) > 1 and words[0] in _ARTICLES:
+        candidates.add(" ".join(words[1:]))
+    for candidate in list(candidates):
+        parts = candidate.split()
+        for mapping in (_ROMAN, {v: k for k, v in _ROMAN.items()}):
+            swapped = [mapping.get(w, w) for w in parts]
+            if swapped != parts:
+                candidates.add(" ".join(swapped))
+    return candidates
+
+
+def title_aliases(title):
+    """
+    Alias satu judul -> prioritas (0 = dari judul lengkap, 1 = dari judul tanpa subjudul).
+    Kunci exact judul itu sendiri tidak ikut.
+    """
+    full = normalize_title(title)
+    main = normalize_title(_SUBTITLE_RE.split(str(title), maxsplit=1)[0])
+    aliases = {alias: 1 for alias in _variants(main)} if main != full else {}
+    aliases.update({alias: 0 for alias in _variants(full)})
+    aliases.pop(full, None)
+    return {alias: priority for alias, priority in aliases.items() if len(alias) >= 3}
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    title: str       # Series_Title persis seperti di database
+    method: str      # exact / alias / fuzzy
+    score: float     # 1.0 untuk exact/alias, rasio difflib untuk fuzzy
+    matched: str     # potongan pertanyaan yang cocok (kunci ternormalisasi)
+    span: tuple = None  # (awal, akhir) judul di teks asli; diisi oleh `find_after`
+
+
+class TitleResolver:
+    """Kamus judul -> Series_Title (exact, alias, fuzzy); dibangun sekali per proses."""
+
+    def __init__(self, titles, aliases=None, fuzzy_cutoff=0.85, min_fuzzy_length=5, fuzzy_candidates=10):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.fuzzy_candidates = fuzzy_candidates
+        self.min_fuzzy_length = min_fuzzy_length
+        self.exact = {}
+        for title in titles:
+            key = normalize_title(title)
+            if key:
+                self.exact.setdefault(key, title)
+
+        # alias -> (prioritas terbaik, judul-judul dengan prioritas itu)
+        generated = {}
+        for title in self.exact.values():
+            for alias, priority in title_aliases(title).items():
+                if alias in self.exact:
+                    continue
+                best, found = generated.get(alias, (priority, set()))
+                if priority < best:
+                    best, found = priority, set()
+                if priority == best:
+                    found.add(title)
+                generated[alias] = (best, found)
+        for alias, title in (aliases or {}).items():
+            generated[normalize_title(alias)] = (-1, {title})
+        # Alias yang (pada prioritas terbaiknya) cocok ke beberapa judul tidak bisa memilih satu film,
+        # mis. "lord of the rings" untuk tiga film trilogi
+        self.aliases = {alias: next(iter(found)) for alias, (_, found) in generated.items() if len(found) == 1}
+
+        # Index trigram karakter atas semua kunci (exact + alias) untuk memilih kandidat fuzzy
+        self._keys = list(self.exact) + list(self.aliases)
+        self._postings = {}
+        for i, key in enumerate(self._keys):
+            for gram in _trigrams(key):
+                self._postings.setdefault(gram, []).append(i)
+        self.max_words = min(max((len(key.split()) for key in self._keys), default=1), _MAX_TITLE_WORDS)
+
+    @classmethod
+    def from_sqlite(cls, db_path, **kwargs):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            titles = [row[0] for row in conn.execute("SELECT Series_Title FROM movies ORDER BY Movie_ID")]
+        finally:
+            conn.close()
+        return cls(titles, **kwargs)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def _lookup(self, key):
+        if key in self.exact:
+            return TitleMatch(self.exact[key], EXACT, 1.0, key)
+        if key in self.aliases:
+            return TitleMatch(self.aliases[key], ALIAS, 1.0, key)
+        return None
+
+    def _fuzzy(self, key):
+        if len(key) < self.min_fuzzy_length:
+            return None
+        shared = Counter()
+        for gram in _trigrams(key):
+            shared.update(self._postings.get(gram, ()))
+        candidates = [self._keys[i] for i, _ in shared.most_common(self.fuzzy_candidates)]
+        best = difflib.get_close_matches(key, candidates, n=1, cutoff=self.fuzzy_cutoff)
+        if not best:
+            return None
+        found = self._lookup(best[0])
+        score = difflib.SequenceMatcher(None, key, best[0]).ratio()
+        return TitleMatch(found.title, FUZZY, score, key)
+
+    def resolve(self, text, fuzzy=True):
+        """
+        Judul di AWAL `text` (mis. ekor pertanyaan setelah "mirip"); prefiks terpanjang yang cocok menang.
+        Semua prefiks dicoba exact/alias dulu, baru fuzzy. None jika tidak ada yang cocok.
+        """
+        words = normalize_title(text).split()
+        prefixes = [" ".join(words[:n]) for n in range(min(len(words), self.max_words), 0, -1)]
+        for prefix in prefixes:
+            found = self._lookup(prefix)
+            if found is not None:
+                return found
+        if fuzzy:
+            for prefix in prefixes:
+                found = self._fuzzy(prefix)
+                if found is not None:
+                    return found
+        return None
+
+    def find_after(self, text, markers, fuzzy=True):
+        """
+        Judul yang muncul tepat setelah salah satu penanda (mis. "mirip", "seperti"), opsional kata sambung
+        ("dengan", "sama") dan "film". `span` menunjuk judul di `text` asli (aksen, apostrof, "&" utuh),
+        sehingga pemanggil bisa memotongnya tanpa membangun ulang pola dari kunci ternormalisasi.
+        """
+        text = str(text or "")
+        for marker in markers:
+            for match in re.finditer(r"(?<!\w)" + re.escape(marker) + _AFTER_MARKER, text, re.IGNORECASE):
+                found = self.resolve(match.group(1), fuzzy=fuzzy)
+                if found is not None:
+                    start = match.start(1)
+                    return replace(found, span=(start, _raw_end(text, start, len(found.matched.split()))))
+        return None
@@ -0,0 +1,125 @@
+"""
+Payload terstruktur & ringkas untuk output tool.
+
+Sebelumnya tool mengembalikan teks panjang (sinopsis penuh + tag `||POSTER||<URL panjang>`, atau
+jawaban bebas + `||SQL_QUERY||`) yang seluruhnya dibaca ulang LLM saat sintesis, lalu dipecah UI
+dengan `split`. Sekarang setiap tool mengembalikan JSON ringkas (tanpa spasi) dengan skema tetap:
+
+- Rekomendasi (RAG)   : {"type": "movies", "source": "rag", "movies": [...], "note"?}
+- Template SQL router : {"type": "movies", "source": "sql", "movies": [...], "sql": "..."}
+  (juga SQL single-shot `cinebot.text_to_sql` yang men-SELECT Movie_ID)
+- Sub-agent SQL       : {"type": "sql", "answer": "...", "sql": "..."}
+  (juga SQL single-shot tanpa Movie_ID, mis. agregat: answer berisi baris `kolom=nilai`)
+- Error               : {"type": "error", "error": "...", "sql": "..."}
+
+Setiap film: id (Movie_ID SQLite), title, year, rating, genre, poster (`poster:<Movie_ID>`,
+lihat `cinebot.posters`), dan field tambahan yang relevan (synopsis dipotong, gross, director).
+Expander UI memakai `parse_payload` (data terstruktur), bukan `split` teks.
+"""
+import json
+
+PAYLOAD_VERSION = 1
+SYNOPSIS_MAX_CHARS = 160
+# Output tool lama (sebelum payload JSON) — masih bisa muncul dari cache jawaban
+LEGACY_SQL_DELIMITER = "||SQL_QUERY||"
+LEGACY_ERROR_MARKER = "Terjadi error saat menjalankan query"
+
+
+def dumps(payload):
+    return json.dumps({"v": PAYLOAD_VERSION, **payload}, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_payload(text):
+    """Payload dict dari output tool; None untuk output lama (teks bebas)."""
+    if not text or not text.lstrip().startswith("{"):
+        return None
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) and "type" in payload else None
+
+
+def short_synopsis(text, max_chars=SYNOPSIS_MAX_CHARS):
+    text = " ".join((text or "").split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def _clean(value):
+    """Buang field kosong agar payload tetap ringkas."""
+    return {k: v for k, v in value.items() if v not in (None, "", [], ())}
+
+
+def movie_from_document(doc, posters):
+    """Item film dari Document hasil similarity search (payload LangChain di Qdrant / index NumPy)."""
+    metadata = doc.metadata
+    genre = metadata.get("genre")
+    url = metadata.get("poster")
+    # id = Movie_ID SQLite (sama dengan payload template SQL), dicari lewat URL poster
+    movie_id = posters.ids.get(url) if posters is not None else None
+    return _clean({
+        "id": movie_id,
+        "title": metadata.get("title"),
+        "year": metadata.get("year"),
+        "rating": metadata.get("rating"),
+        "genre": genre if isinstance(genre, list) else [g.strip() for g in (genre or "").split(",") if g.strip()],
+        "poster": posters.ref(url=url) if posters is not None else url,
+        "synopsis": short_synopsis(doc.page_content.split("Sinopsis: ")[-1]),
+    })
+
+
+# Kolom SQLite -> nama field payload
+SQL_FIELD_NAMES = {
+    "Movie_ID": "id",
+    "Series_Title": "title",
+    "Released_Year": "year",
+    "IMDB_Rating": "rating",
+    "Gross": "gross",
+    "No_of_Votes": "votes",
+    "Director": "director",
+    "Runtime": "runtime",
+    "Genre": "genre",
+}
+
+
+def movie_from_row(columns, row):
+    """Item film dari baris SQLite; Movie_ID dipakai sebagai referensi poster."""
+    data = dict(zip(columns, row))
+    item = {SQL_FIELD_NAMES.get(k, k.lower()): v for k, v in data.items() if k != "Poster_Link"}
+    if data.get("Movie_ID") is not None:
+        item["poster"] = f"poster:{data['Movie_ID']}"
+    if isinstance(item.get("gross"), float):
+        item["gross"] = int(item["gross"])
+    return _clean(item)
+
+
+def movies_payload(movies, source, note=None, sql=None):
+    return dumps(_clean({"type": "movies", "source": source, "count": len(movies), "movies": movies,
+                         "note": note, "sql": sql}))
+
+
+def sql_answer_payload(answer, sql):
+    return dumps(_clean({"type": "sql", "answer": answer, "sql": sql}))
+
+
+def error_payload(message, sql=None):
+    return dumps(_clean({"type": "error", "error": message, "sql": sql}))
+
+
+def payload_sql(tool_output):
+    """Query SQL di output tool (payload JSON atau format lama `||SQL_QUERY||`); None jika tidak ada."""
+    payload = parse_payload(tool_output)
+    if payload is not None:
+        return payload.get("sql")
+    if tool_output and LEGACY_SQL_DELIMITER in tool_output:
+        return tool_output.split(LEGACY_SQL_DELIMITER)[1]
+    return None
+
+
+def is_error_output(tool_output):
+    payload = parse_payload(tool_output)
+    if payload is not None:
+        return payload["type"] == "error"
+    return LEGACY_ERROR_MARKER in (tool_output or "")
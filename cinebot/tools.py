@@ -0,0 +1,220 @@
+"""
+Tools yang dipakai agent utama CineBot.
+
+- get_movie_recommendations (RAG / Qdrant): rekomendasi kualitatif berbasis tema/plot/kemiripan,
+  dengan batasan tahun/rating/genre dari pertanyaan sebagai filter native (`cinebot.query_filters`).
+  "mirip <film yang ada di dataset>" dijawab dari graf tetangga (`cinebot.neighbors`) tanpa embedding.
+- get_factual_movie_data (SQL): pertanyaan faktual/kuantitatif. SQL ditulis dalam satu panggilan LLM dan
+  divalidasi lokal; sub-agent ReAct hanya sebagai fallback (`cinebot.text_to_sql`).
+
+Keduanya memakai resource bersama dari `cinebot.resources` (dibangun sekali per proses),
+bukan membangun client/agent baru di setiap panggilan. Panggilan identik (pertanyaan ternormalisasi)
+yang berjalan bersamaan berbagi satu eksekusi (`cinebot.single_flight`). Masing-masing juga punya versi async
+(`tool.coroutine`) yang dipakai `ainvoke`/`astream` di jalur async (`cinebot.async_runtime`).
+Turn agent bisa memulai pekerjaan tool rekomendasi lebih dulu (`start_speculation`, `cinebot.speculation`);
+tool memakai hasil prefetch itu jika argumennya kompatibel.
+"""
+from langchain.tools import tool
+
+from cinebot import speculation
+from cinebot.normalize import cache_key, normalize_question
+from cinebot.query_filters import extract_filters
+from cinebot.resources import get_resources
+from cinebot.tool_payloads import (
+    error_payload,
+    is_error_output,
+    movie_from_document,
+    movies_payload,
+)
+
+
+def _coalesced(tool_name, question, fn):
+    """
+    Hasil spekulatif turn ini jika kompatibel; selain itu jalankan `fn()` lewat single-flight resource
+    (jika aktif). Output error tidak dibagikan ke follower.
+    """
+    prefetched = speculation.take(tool_name, question)
+    if prefetched is not None:
+        return prefetched
+    flight = get_resources().single_flight
+    if flight is None:
+        return fn()
+    output, shared = flight.do(cache_key(tool_name, normalize_question(question)), fn,
+                               shareable=lambda out: not is_error_output(out))
+    if shared:
+        print(f">> {tool_name}: hasil dibagi dari panggilan identik yang sedang berjalan")
+    return output
+
+
+async def _acoalesced(tool_name, question, afn):
+    prefetched = await speculation.atake(tool_name, question)
+    if prefetched is not None:
+        return prefetched
+    flight = get_resources().single_flight
+    if flight is None:
+        return await afn()
+    output, shared = await flight.ado(cache_key(tool_name, normalize_question(question)), afn,
+                                      shareable=lambda out: not is_error_output(out))
+    if shared:
+        print(f">> {tool_name}: hasil dibagi dari panggilan identik yang sedang berjalan")
+    return output
+
+
+def format_genre(value):
+    """Genre di payload berupa array (["Crime", "Drama"]); payload lama masih string."""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(value) or "N/A"
+    return value or "N/A"
+
+
+# Tool RAG — get_movie_recommendations
+# - Input: pertanyaan natural language.
+# - Output: payload JSON ringkas (`cinebot.tool_payloads`): film + referensi poster pendek `poster:<Movie_ID>`.
+@tool
+def get_movie_recommendations(question: str) -> str:
+    """
+    Gunakan alat ini untuk mencari rekomendasi film berdasarkan deskripsi plot,
+    tema, genre, atau film lain yang mirip.
+    Input harus berupa pertanyaan dalam bahasa natural tentang film yang dicari.
+    Contoh: 'Cari film tentang perjalanan waktu' atau 'Rekomendasi film mirip The Dark Knight'.
+    """
+    print(f"\n>> Using RAG Tool for movie recommendations: '{question}'")
+    return _coalesced("get_movie_recommendations", question, lambda: _recommendations(question))
+
+
+def _recommendations(question, cancelled=None):
+    """`cancelled`: flag batal dari spekulasi (`cinebot.speculation`), dicek sebelum embedding & sebelum pencarian."""
+    resources = get_resources()
+    speculation.check_cancelled(cancelled)
+
+    # "mirip <film di dataset>": tetangga film itu dari graf, tanpa embedding & pencarian vektor
+    similar = _from_neighbor_graph(resources, question)
+    if similar is not None:
+        return similar
+    # Batasan tahun/rating/genre di pertanyaan dikirim sebagai filter native (satu pencarian, top-k tetap benar)
+    filters = extract_filters(question)
+    note = None
+    if filters.is_empty:
+        results = resources.similarity_search(question, k=3, cancelled=cancelled)
+    else:
+        print(f">> Filter metadata: {filters.describe()}")
+        results = resources.similarity_search(question, k=3, filters=filters, cancelled=cancelled)
+        if not results:
+            note = _no_match_note(filters)
+            results = resources.similarity_search(question, k=3, cancelled=cancelled)
+    _log_embedding_cache(resources)
+    return _format_recommendations(results, note)
+
+
+async def _aget_movie_recommendations(question: str) -> str:
+    print(f"\n>> Using RAG Tool (async) for movie recommendations: '{question}'")
+    return await _acoalesced("get_movie_recommendations", question, lambda: _arecommendations(question))
+
+
+async def _arecommendations(question, cancelled=None):
+    resources = get_resources()
+    speculation.check_cancelled(cancelled)
+
+    similar = _from_neighbor_graph(resources, question)
+    if similar is not None:
+        return similar
+    filters = extract_filters(question)
+    note = None
+    if filters.is_empty:
+        results = await resources.asimilarity_search(question, k=3, cancelled=cancelled)
+    else:
+        print(f">> Filter metadata: {filters.describe()}")
+        results = await resources.asimilarity_search(question, k=3, filters=filters, cancelled=cancelled)
+        if not results:
+            note = _no_match_note(filters)
+            results = await resources.asimilarity_search(question, k=3, cancelled=cancelled)
+    _log_embedding_cache(resources)
+    return _format_recommendations(results, note)
+
+
+def _log_embedding_cache(resources):
+    stats = getattr(resources.embeddings, "stats", None)
+    if stats is not None:
+        print(f">> Cache embedding: {stats()}")
+
+
+def _from_neighbor_graph(resources, question, k=3):
+    """Film acuan dikenali -> tetangganya dari graf; None jika tidak berlaku atau filter menyisakan < k film."""
+    found = resources.similar_movies(question, k=k)
+    if found is None:
+        return None
+    match, filters, seed, results = found
+    if len(results) < k:
+        return None
+    print(f">> Graf tetangga: '{match.title}' ({match.method}), tanpa embedding & pencarian vektor")
+    note = f"Film paling mirip dengan '{seed.metadata['title']}' ({seed.metadata['year']})"
+    if not filters.is_empty:
+        note += f", dengan filter {filters.describe()}"
+    return _format_recommendations(results, note + ".")
+
+
+def _no_match_note(filters):
+    return f"Tidak ada film yang cocok dengan filter {filters.describe()}; berikut hasil tanpa filter."
+
+
+def _format_recommendations(results, note=None):
+    posters = get_resources().posters
+    return movies_payload([movie_from_document(doc, posters) for doc in results], source="rag", note=note)
+
+
+# Tool SQL — get_factual_movie_data
+# - Text-to-SQL single-shot + fallback sub-agent SQL sudah dirakit sekali di resource layer; di sini hanya invoke.
+# - Output: payload JSON {"type": "movies", "source": "sql", ...} / {"type": "sql", "answer", "sql"}
+#   (atau {"type": "error", ...}).
+@tool
+def get_factual_movie_data(question: str) -> str:
+    """
+    Gunakan alat ini untuk menjawab pertanyaan spesifik dan faktual tentang data film,
+    seperti rating, tahun rilis, sutradara, pendapatan (gross), jumlah vote, dan durasi.
+    Sangat baik untuk pertanyaan yang melibatkan angka, statistik, perbandingan, atau daftar.
+    Contoh: 'top 5 film rating tertinggi 2019', 'rata-rata pendapatan film Christopher Nolan', 'total film di atas 150 menit'.
+    """
+    print(f"\n>> Using SQL Tool for factual movie data: '{question}'")
+    return _coalesced("get_factual_movie_data", question, lambda: _factual_movie_data(question))
+
+
+def _factual_movie_data(question):
+    try:
+        # Single-shot SQL (validasi lokal) atau sub-agent SQL; output sudah berupa payload
+        return get_resources().text_to_sql.answer(question)
+
+    except Exception as e:
+        # Error juga dikirim sebagai payload agar parsing tidak gagal
+        return error_payload(f"Terjadi error saat menjalankan query: {e}.")
+
+
+async def _aget_factual_movie_data(question: str) -> str:
+    print(f"\n>> Using SQL Tool (async) for factual movie data: '{question}'")
+    return await _acoalesced("get_factual_movie_data", question, lambda: _afactual_movie_data(question))
+
+
+async def _afactual_movie_data(question):
+    try:
+        return await get_resources().text_to_sql.aanswer(question)
+
+    except Exception as e:
+        return error_payload(f"Terjadi error saat menjalankan query: {e}.")
+
+
+def start_speculation(question):
+    """
+    Mulai pekerjaan `get_movie_recommendations` untuk `question` di latar (paralel dengan hop LLM pemilihan tool);
+    pasang hasilnya dengan `cinebot.speculation.speculating`. None jika spekulasi nonaktif.
+    """
+    speculator = get_resources().speculator
+    if speculator is None:
+        return None
+    return speculator.start("get_movie_recommendations", question, _recommendations, _arecommendations)
+
+
+# Versi async dipakai otomatis oleh `ainvoke`/`astream`; `invoke` tetap memakai fungsi sync
+get_movie_recommendations.coroutine = _aget_movie_recommendations
+get_factual_movie_data.coroutine = _aget_factual_movie_data
+
+# Daftar tool yang diregistrasi ke agent utama
+tools = [get_movie_recommendations, get_factual_movie_data]
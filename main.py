@@ -1,24 +1,31 @@
 # === BAGIAN 1: SETUP & INISIALISASI ===
 # 1.1: Imports & Requirements
 # - Semua import yang diperlukan untuk Streamlit, LangChain, Qdrant, Langfuse, dotenv, dll.
+# - Streamlit menjalankan ulang file ini dari atas setiap kali user berinteraksi (rerun). Yang mahal
+#   (resource, agent, client Langfuse) dibangun SEKALI per proses lewat factory ber-cache
+#   (st.cache_resource / cinebot.resources); import yang jarang dipakai (langfuse, create_agent) dimuat lazy
+#   di dalam factory tersebut, sehingga rerun hanya mengerjakan UI. Cek: python -m benchmarks.bench_startup --check
 
 import streamlit as st
 import os
 # from dotenv import load_dotenv
+import time
 import uuid
-
-# LangChain imports for LLM, Tools, and Agent
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain.tools import tool
-from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage, AIMessage
-
-# Langfuse imports for tracing
-from langfuse import get_client
-from langfuse.langchain import CallbackHandler
+from dataclasses import replace
+
+# CineBot modules: konfigurasi, resource bersama (dibangun sekali per proses), dan tools
+from cinebot.async_runtime import TurnTimeoutError
+from cinebot.chat import (
+    FALLBACK_ANSWER, TurnResult, arun_agent_turn, arun_fast_path_turn, astream_agent_turn,
+    astream_fast_path_turn, run_agent_turn, run_fast_path_turn, stream_agent_turn,
+    stream_fast_path_turn, to_langchain_messages,
+)
+from cinebot.config import Settings
+from cinebot.metrics import MetricsCallbackHandler, StageMetrics, activate
+from cinebot.resources import get_resources
+from cinebot.single_flight import turn_key
+from cinebot.speculation import speculating
+from cinebot.tools import start_speculation, tools
 
 # 1.2: Streamlit page configuration
 # - Atur judul, ikon, dan layout halaman
@@ -52,167 +59,49 @@ except KeyError:
 # Initialize Langfuse client globally for tracing
 # Ini akan membaca LANGFUSE_SECRET_KEY, LANGFUSE_PUBLIC_KEY, dll.
 # dari environment (secrets/dotenv) secara otomatis.
-try:
-    langfuse = get_client()
-except Exception as e:
-    print(f"Peringatan: Gagal menginisialisasi Langfuse. Tracing mungkin tidak aktif. Error: {e}")
-    langfuse = None
-
-# 1.5: LLM & Embedding initialization
-# - Konfigurasi model LLM (ChatOpenAI) dan embeddings (OpenAIEmbeddings).
-# - Gunakan API key dari environment.
-# Inisialisasi model LLM dan Embedding
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    api_key=OPENAI_API_KEY,
-    temperature=0
-)
-
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    api_key=OPENAI_API_KEY
+# - Tanpa LANGFUSE_PUBLIC_KEY/SECRET_KEY, callback Langfuse tidak dipasang; metrik per tahap
+#   (cinebot/metrics.py) tetap berjalan karena tidak bergantung pada layanan eksternal.
+# - Dibuat sekali per proses; paket langfuse (~0.7 detik import) hanya dimuat jika kuncinya ada.
+@st.cache_resource(show_spinner=False)
+def load_langfuse():
+    if not (os.getenv("LANGFUSE_PUBLIC_KEY") and os.getenv("LANGFUSE_SECRET_KEY")):
+        return None
+    try:
+        from langfuse import get_client
+        return get_client()
+    except Exception as e:
+        print(f"Peringatan: Gagal menginisialisasi Langfuse. Tracing mungkin tidak aktif. Error: {e}")
+        return None
+
+
+langfuse = load_langfuse()
+
+# 1.5: Resource bersama (LLM, embeddings, Qdrant, SQL sub-agent)
+# - Dibangun SEKALI per proses oleh cinebot.resources dan dibagi ke semua sesi.
+# - Client Qdrant tetap hidup (gRPC jika tersedia), di-warm-up saat boot, dan di-reconnect otomatis.
+# - Jika konfigurasi (Settings) berubah, resource dibangun ulang secara otomatis.
+# - CINEBOT_ASYNC=1 (default): turn dijalankan async di event loop bersama (resources.runner) dengan
+#   batas konkurensi & timeout per request; thread script Streamlit hanya menunggu hasil.
+settings = Settings(
+    openai_api_key=OPENAI_API_KEY,
+    qdrant_url=QDRANT_URL,
+    qdrant_api_key=QDRANT_API_KEY,
 )
-
-# 1.6: Konstanta aplikasi
-# - Nama koleksi Qdrant dan URI database SQLite disimpan di sini.
-# Define constants for Qdrant and SQL database
-QDRANT_COLLECTION_NAME = "imdb_movies"
-SQL_DB_URI = "sqlite:///movies.db"
+resources = get_resources(settings)
+llm = resources.llm
 
 # === BAGIAN 2: DEFINISI TOOLS ===
 # 2.1: Overview
 # - Tool adalah fungsi yang dipakai agent untuk mengambil data.
 # - Di aplikasi ini ada dua tool: RAG (Qdrant) untuk rekomendasi kualitatif dan SQL untuk data faktual.
-
-# 2.2: Tool RAG — get_movie_recommendations
-# - Tujuan: cari film berdasarkan tema/plot/kemiripan (kualitatif).
-# - Input: pertanyaan natural language.
-# - Output: string terformat dengan metadata film, termasuk tag khusus poster `||POSTER||URL`.
-@tool
-def get_movie_recommendations(question: str) -> str:
-    """
-    Gunakan alat ini untuk mencari rekomendasi film berdasarkan deskripsi plot, 
-    tema, genre, atau film lain yang mirip. 
-    Input harus berupa pertanyaan dalam bahasa natural tentang film yang dicari.
-    Contoh: 'Cari film tentang perjalanan waktu' atau 'Rekomendasi film mirip The Dark Knight'.
-    """
-    print(f"\n>> Using RAG Tool for movie recommendations: '{question}'")
-    qdrant_store = QdrantVectorStore.from_existing_collection(
-        embedding=embeddings,
-        collection_name=QDRANT_COLLECTION_NAME,
-        url=QDRANT_URL,
-        api_key=QDRANT_API_KEY
-    )
-    results = qdrant_store.similarity_search(question, k=3)
-    formatted_results = "\n\n".join(
-        [
-            f"Judul: {doc.metadata.get('title', 'N/A')}\n"
-            f"Tahun: {doc.metadata.get('year', 'N/A')}\n"
-            f"Rating: {doc.metadata.get('rating', 'N/A')}\n"
-            f"Genre: {doc.metadata.get('genre', 'N/A')}\n"
-            f"Sinopsis: {doc.page_content.split('Sinopsis: ')[-1]}"
-            f"||POSTER||{doc.metadata.get('poster', 'No Poster URL')}"
-            for doc in results
-        ]
-    )
-    return f"Berikut adalah 3 film yang paling relevan berdasarkan pencarianmu:\n{formatted_results}"
-
-# 2.3: Tool SQL — get_factual_movie_data
-# - Tujuan: jawab pertanyaan faktual/kuantitatif (rating, tahun, sutradara, dsb.)
-# - Pendekatan:
-#   1) Buat koneksi SQLDatabase
-#   2) Inisialisasi SQLDatabaseToolkit dan ambil tools SQL
-#   3) Definisikan system prompt khusus SQL (guidelines untuk pembuatan query, pembatasan, dan instruksi Poster)
-#   4) Buat sub-agent khusus untuk menjalankan langkah pembuatan query dan eksekusi
-#   5) Jalankan sub-agent, ambil jawaban akhir dan, jika ada, query SQL yang dieksekusi
-# - Output: gabungan jawaban dan delimiter `||SQL_QUERY||` diikuti SQL query (atau pesan error + delimiter).
-@tool
-def get_factual_movie_data(question: str) -> str:
-    """
-    Gunakan alat ini untuk menjawab pertanyaan spesifik dan faktual tentang data film, 
-    seperti rating, tahun rilis, sutradara, pendapatan (gross), jumlah vote, dan durasi. 
-    Sangat baik untuk pertanyaan yang melibatkan angka, statistik, perbandingan, atau daftar.
-    Contoh: 'top 5 film rating tertinggi 2019', 'rata-rata pendapatan film Christopher Nolan', 'total film di atas 150 menit'.
-    """ 
-    print(f"\n>> Using SQL Tool for factual movie data: '{question}'")
-    
-    db = SQLDatabase.from_uri(SQL_DB_URI)
-    
-    # 1. Create SQL toolkit
-    toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-    
-    # 2. Get the tools from the toolkit
-    sql_tools = toolkit.get_tools()
-
-    # 3. Buat system prompt khusus untuk SQL
-    sql_system_prompt = """
-    You are an agent designed to interact with a SQL database.
-    Given an input question, create a syntactically correct {dialect} query to run,
-    then look at the results of the query and return the answer. Unless the user
-    specifies a specific number of examples they wish to obtain, always limit your
-    query to at most {top_k} results.
-
-    You can order the results by a relevant column to return the most interesting
-    examples in the database. Never query for all the columns from a specific table,
-    only ask for the relevant columns given the question.
-
-    When you query for data about specific movies (e.g., Series_Title, Rating), 
-    YOU MUST ALWAYS ALSO SELECT the 'Poster_Link' column.
-    In your final natural language answer, after mentioning a movie, 
-    YOU MUST include its poster URL, prefixed with the special tag '||POSTER||'.
-    Contoh Jawaban: "Filmnya adalah The Dark Knight. ||POSTER||http://url.com/poster.jpg"
-
-    You MUST double check your query before executing it. If you get an error while
-    executing a query, rewrite the query and try again.
-    
-    DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the
-    database.
-    
-    To start you should ALWAYS look at the tables in the database to see what you
-    can query. Do NOT skip this step.
-    Then you should query the schema of the most relevant tables.
-    """.format(
-        dialect=db.dialect,
-        top_k=5,
-    )
-
-    # 4. Create a dedicated "sub-agent" for SQL queries
-    sql_agent_runnable = create_agent(
-        llm,
-        sql_tools,
-        system_prompt=sql_system_prompt,
-    )
-    
-    try:
-        # 5. Invoke the SQL sub-agent
-        response_state = sql_agent_runnable.invoke({
-            "messages": [{"role": "user", "content": question}]
-        })
-        
-        # 6. Extract the final answer from the last message
-        answer = response_state["messages"][-1].content
-        
-        # 7. Extract the SQL Query from intermediate steps (sub-agent's message history)
-        sql_query = "Tidak ada query SQL yang dieksekusi (jawaban langsung)."
-        for msg in reversed(response_state["messages"]):
-            if isinstance(msg, AIMessage) and msg.tool_calls:
-                for call in msg.tool_calls:
-                    if call['name'] == 'sql_db_query':
-                        sql_query = call['args'].get('query', 'Query tidak ditemukan')
-                        break # Found the query, stop inner loop
-                if sql_query != "Tidak ada query SQL yang dieksekusi (jawasan langsung).": # If query was found, stop outer loop
-                    break
-            
-        # 8. Combine answer and SQL query using a unique delimiter for main agent parsing
-        return f"{answer}||SQL_QUERY||{sql_query}"
-        
-    except Exception as e:
-        # Kirim error dengan delimiter yang sama agar parsing tidak gagal
-        return f"Terjadi error saat menjalankan query: {e}.||SQL_QUERY||"  
-
-
-# 2.4: Daftar tool yang diregistrasi ke agent utama
-tools = [get_movie_recommendations, get_factual_movie_data]
+# - Definisi tool ada di cinebot/tools.py:
+#   * get_movie_recommendations — similarity search ke Qdrant (store bersama).
+#   * get_factual_movie_data — SQL single-shot (skema di prompt, validasi lokal dengan EXPLAIN);
+#     sub-agent SQL ReAct yang sudah dirakit sekali hanya dipanggil jika SQL gagal divalidasi/dieksekusi.
+# - Output tool berupa payload JSON ringkas (cinebot/tool_payloads.py): data film + referensi poster pendek
+#   `poster:<Movie_ID>`; URL poster asli baru disisipkan saat render (resources.posters.expand).
+# - Saat render, thumbnail lokal hasil prefetch setup.py (static/posters, disajikan Streamlit di app/static/)
+#   dipakai lebih dulu; URL CDN remote hanya untuk poster yang belum ter-cache.
 
 # === BAGIAN 3: MERAKIT AGENT UTAMA ===
 # 3.1: System prompt utama (PERSONALITAS + ATURAN PENTING)
@@ -246,16 +135,16 @@ When your answer comes from a tool (RAG or SQL):
 2.  **The List (WAJIB TABEL):** Kamu HARUS menyajikan daftar film dalam format **Tabel Markdown**.
     
     --- **INSTRUKSI POSTER (KRUSIAL!)** ---
-    * Tool akan memberimu data mentah yang mengandung tag `||POSTER||http://...`
-    * Tugasmu adalah **mengambil URL** dari tag tersebut dan mengubahnya menjadi **sintaks gambar Markdown** (`![Poster](URL)`) di dalam tabel.
+    * Tool memberimu data JSON. Setiap film punya field `poster` berisi referensi pendek seperti `poster:22` (jawaban SQL juga menulis `poster:<id>` setelah judul).
+    * Tulis referensi itu **apa adanya** sebagai **sintaks gambar Markdown** (`![Poster](poster:22)`) di dalam tabel — aplikasi akan menggantinya dengan gambar poster. JANGAN mengarang URL.
     * Buat kolom baru bernama `Poster` untuk menaruh sintaks gambar itu.
-    * Jika URL poster tidak ada atau `No Poster URL`, tulis "N/A" di kolom Poster.
+    * Jika film tidak punya field `poster`, tulis "N/A" di kolom Poster.
     
     * **Contoh Tabel YANG HARUS DIIKUTI:**
         | Poster | Film | Tahun | Rating | Kenapa Wajib Tonton? |
         |---|---|---|---|---|
-        | ![Poster](httpsMARVEL_POSTER_URL.jpg) | Avengers: Endgame | 2019 | 8.4 | Puncak epik dari saga Marvel yang emosional dan penuh aksi. |
-        | ![Poster](INTERSTELLAR_POSTER_URL.jpg) | Interstellar | 2014 | 8.6 | Sci-fi epik tentang waktu dan cinta keluarga. Visualnya luar biasa. |
+        | ![Poster](poster:60) | Avengers: Endgame | 2019 | 8.4 | Puncak epik dari saga Marvel yang emosional dan penuh aksi. |
+        | ![Poster](poster:22) | Interstellar | 2014 | 8.6 | Sci-fi epik tentang waktu dan cinta keluarga. Visualnya luar biasa. |
 
 --- **!!! ATURAN KRUSIAL: FOLLOW-UP CERDAS (Tiru ini!) !!!** ---
 * **JANGAN PERNAH** mengakhiri jawabanmu dengan pertanyaan generik dan membosankan...
@@ -275,11 +164,19 @@ When your answer comes from a tool (RAG or SQL):
 # 3.2: Buat agent utama (runnable)
 # - Gunakan create_agent dengan llm, tools, dan system_prompt di atas.
 # - Hasil: agent_runnable yang dapat dipanggil / di-stream.
-agent_runnable = create_agent(
-    llm,
-    tools,
-    system_prompt=SYSTEM_PROMPT
-)
+# - Graph agent stateless per invoke, jadi cukup dirakit SEKALI per proses (per konfigurasi & prompt),
+#   bukan di setiap rerun Streamlit.
+@st.cache_resource(show_spinner="Menyiapkan agent CineBot...")
+def load_agent(settings, system_prompt):
+    from langchain.agents import create_agent
+    return create_agent(
+        get_resources(settings).llm,
+        tools,
+        system_prompt=system_prompt
+    )
+
+
+agent_runnable = load_agent(settings, SYSTEM_PROMPT)
 
 # === BAGIAN 4: STREAMLIT UI & FLOW INTERAKSI ===
 # 4.1: UI Sidebar
@@ -302,6 +199,8 @@ with st.sidebar:
     # GitHub repository link
     st.markdown("[Lihat Kode di GitHub](https://github.com/thariqabe666/Project-3-CineBot_Movie_Expert)")
     st.markdown("---")
+    # Rincian waktu per tahap (embedding, Qdrant, SQL, LLM) di expander "Lihat Proses Berpikir CineBot"
+    show_timings = st.toggle("Tampilkan rincian waktu per tahap", value=settings.show_timings)
     # Chat history clear button
     if st.button("Hapus Riwayat Obrolan", use_container_width=True, type="primary"):
         st.session_state.messages = []
@@ -354,103 +253,258 @@ if "messages" not in st.session_state:
 
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+        # Referensi poster pendek (poster:<Movie_ID>) baru di-expand jadi URL saat render
+        st.markdown(resources.posters.expand(message["content"]))
+
+# 4.4: Menjalankan satu turn (fast path / agent) & streaming ke UI
+# - CINEBOT_STREAMING=1 (default): token jawaban dirender ke placeholder selagi LLM menulis;
+#   label st.status menunjukkan langkah yang sedang berjalan (memilih tool, menjalankan tool, menyusun jawaban).
+# - Jalur async (resources.runner) atau sync dipilih otomatis; hasil akhirnya tetap TurnResult
+#   (tool call, output mentah tool, query SQL, serta timing TTFT & total).
+def render_stream(events, status, placeholder):
+    text, result, last_render = "", None, 0.0
+    for event in events:
+        if event.kind == "status":
+            status.update(label=event.text)
+            status.write(event.text)
+            # Teks sebelum tool call (jika ada) bukan jawaban akhir
+            text = ""
+            placeholder.empty()
+        elif event.kind == "token":
+            text += event.text
+            # Batasi frekuensi render (tabel Markdown + gambar poster cukup berat dirender ulang)
+            if time.perf_counter() - last_render > 0.05:
+                placeholder.markdown(resources.posters.expand(text) + "▌", unsafe_allow_html=True)
+                last_render = time.perf_counter()
+        else:
+            result = event.result
+    return result
+
+
+def run_turn(stream_fn, astream_fn, run_fn, arun_fn, *args, config=None, status=None, placeholder=None, metrics=None):
+    # Tahap non-LangChain (embedding, Qdrant, template SQL) dicatat ke `metrics` lewat contextvar,
+    # yang ikut terbawa ke event loop async & thread tool. `in_use` menahan penutupan resource ini jika
+    # konfigurasi berganti di tengah turn (cinebot.resources)
+    with activate(metrics), resources.in_use():
+        if settings.streaming_enabled:
+            if resources.runner is not None:
+                events = resources.runner.iterate(astream_fn(*args, config=config))
+            else:
+                events = stream_fn(*args, config=config)
+            return render_stream(events, status, placeholder)
+        if resources.runner is not None:
+            return resources.runner.run(arun_fn(*args, config=config))
+        return run_fn(*args, config=config)
+
 
 if user_input:
+    # History SEBELUM pertanyaan ini (dipakai sebagai konteks kunci cache jawaban)
+    previous_messages = list(st.session_state.messages)
     st.session_state.messages.append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.markdown(user_input)
 
     # 1. Convert chat history from dicts to LangChain BaseMessage objects
-    from langchain_core.messages import HumanMessage, AIMessage
-    langchain_messages = [
-        HumanMessage(content=msg["content"]) if msg["role"] == "user" else AIMessage(content=msg["content"])
-        for msg in st.session_state.messages
-    ]
-
-    # 2. Variabel untuk menyimpan info proses berpikir
-    tool_call_info = None
-    full_tool_output = ""
-    sql_query_to_display = None
-    display_answer = ""
-    last_valid_state = None 
+    # - Dengan anggaran token (cinebot/history.py): turn terakhir utuh, jawaban lama diringkas jadi
+    #   daftar judul tanpa URL poster agar prompt tidak tumbuh linear sepanjang sesi
+    history_stats = None
+    if resources.history is not None:
+        langchain_messages, history_stats = resources.history.compact(st.session_state.messages)
+        print(f"\n>> History prompt: {history_stats.describe()}")
+    else:
+        langchain_messages = to_langchain_messages(st.session_state.messages)
+
+    answer_cache = resources.answer_cache
 
     with st.chat_message("assistant"):
-        with st.spinner("CineBot sedang mencari jawaban..."):
-            
-            # Initialize Langfuse callback handler
-            langfuse_handler = CallbackHandler()
-            
-            # 3. Configure Langfuse tracing with metadata
+        # Status proses (memilih tool -> menjalankan tool -> menyusun jawaban) + placeholder jawaban streaming
+        status = st.status("CineBot sedang mencari jawaban...", expanded=False)
+        placeholder = st.empty()
+        turn_started = time.perf_counter()
+        # Metrik per tahap turn ini (cinebot/metrics.py): durasi tiap tahap, round trip LLM, token
+        turn_metrics = StageMetrics()
+
+        # 2. Cek cache jawaban dulu (exact -> similarity); jika hit, agent tidak dijalankan
+        result = None
+        shared = False
+        if answer_cache is not None:
+            with turn_metrics.stage("answer_cache"):
+                result, cache_tier = answer_cache.lookup(user_input, previous_messages)
+            if result is not None:
+                print(f"\n>> Answer cache hit ({cache_tier}): '{user_input}' | stats: {answer_cache.stats()}")
+                elapsed = time.perf_counter() - turn_started
+                result = replace(result, timings={"ttft_seconds": elapsed, "total_seconds": elapsed})
+
+        if result is None:
+            # 3. Callback: metrik per tahap (selalu) + Langfuse tracing (jika dikonfigurasi)
+            callbacks = [MetricsCallbackHandler(turn_metrics)]
+            if langfuse is not None:
+                from langfuse.langchain import CallbackHandler
+                callbacks.append(CallbackHandler())
             config = {
-                "callbacks": [langfuse_handler],
+                "callbacks": callbacks,
                 "run_name": f"Query: {user_input[:30]}...",
                 "metadata": { # Lewatkan atribut di sini
                     "langfuse_session_id": st.session_state.session_id,
-                    "langfuse_user_id": st.session_state.session_id, 
+                    "langfuse_user_id": st.session_state.session_id,
                     "langfuse_tags": ["CineBot-v1", "Capstone-Mod3"]
                 }
-            }            
-            
-            # 4. Stream agent response with Langfuse configuration
-            stream = agent_runnable.stream(
-                {"messages": langchain_messages},
-                stream_mode="values",
-                config=config
-            )
-            
-            for chunk in stream:
-                if "messages" in chunk:
-                    last_valid_state = chunk 
-                    last_message = chunk["messages"][-1]
-                    
-                    # Capture tool call information when the agent decides to use a tool
-                    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-                        call = last_message.tool_calls[0]
-                        tool_call_info = {
-                            "name": call['name'],
-                            "args": call['args']
-                        }
-                        
-                    # Capture raw tool output if the message type is 'tool'
-                    if hasattr(last_message, "type") and last_message.type == "tool": # LangChain message objects have a .type attribute
-                        full_tool_output = last_message.content
-            
-            # 5. Ambil jawaban akhir (setelah stream selesai)
-            if last_valid_state:
-                final_answer_object = last_valid_state["messages"][-1]
-                display_answer = final_answer_object.content
+            }
+
+            def compute_turn():
+                result = None
+                decision = None
+                # 4a. Router fast path: pertanyaan dengan confidence tinggi langsung ke tool/template SQL
+                # (hop LLM pemilihan tool dilewati); pertanyaan ambigu tetap ke agent penuh
+                router = resources.router
+                if router is not None:
+                    decision = router.route(user_input)
+                    print(f"\n>> Router: target={decision.target} template={decision.template} "
+                          f"confidence={decision.confidence:.2f} ({decision.reason})")
+                    if router.is_confident(decision):
+                        try:
+                            result = run_turn(
+                                stream_fast_path_turn, astream_fast_path_turn, run_fast_path_turn, arun_fast_path_turn,
+                                llm, SYSTEM_PROMPT, langchain_messages, decision, tools, resources.sql_db_path,
+                                config=config, status=status, placeholder=placeholder, metrics=turn_metrics,
+                            )
+                            router.record_fast_path(decision)
+                            print(f">> Router fast path selesai | stats: {router.snapshot()}")
+                        except Exception as e:
+                            print(f"Peringatan: Router fast path gagal, fallback ke agent. Error: {e}")
+                            result = None
+
+                # 4b. Stream agent response with Langfuse configuration
+                # - Tool call, output mentah tool, dan query SQL dikumpulkan di TurnResult (cinebot/chat.py)
+                # - Jalur async: astream + tool async, dibatasi semaphore & timeout (resources.runner)
+                # - Spekulasi (cinebot/speculation.py): retrieval rekomendasi dimulai sekarang, paralel dengan hop
+                #   LLM pemilihan tool, hanya jika router condong ke rekomendasi (Router.leans_recommendation) atau
+                #   router tidak aktif; dipakai tool jika agent memilih RAG dengan argumen kompatibel, selain itu
+                #   dibatalkan (job berhenti di antara embedding dan pencarian)
+                if result is None:
+                    turn_speculation = None
+                    if router is None or router.leans_recommendation(user_input, decision):
+                        turn_speculation = start_speculation(user_input)
+                    try:
+                        with speculating(turn_speculation):
+                            result = run_turn(
+                                stream_agent_turn, astream_agent_turn, run_agent_turn, arun_agent_turn,
+                                agent_runnable, langchain_messages,
+                                config=config, status=status, placeholder=placeholder, metrics=turn_metrics,
+                            )
+                        if router is not None:
+                            router.record_agent_turn(result.timings.get("selection_seconds"))
+                        if turn_speculation is not None:
+                            print(f">> Spekulasi: {turn_speculation.describe()} | stats: "
+                                  f"{resources.speculator.stats()}")
+                            if turn_speculation.outcome == "hit":
+                                result = replace(result, timings={
+                                    **result.timings, "speculation_saved_seconds": turn_speculation.saved_seconds
+                                })
+                    except TurnTimeoutError as e:
+                        print(f"Peringatan: {e} | runner: {resources.runner.snapshot()}")
+                        result = TurnResult(
+                            answer=FALLBACK_ANSWER,
+                            source="error:timeout",
+                            timings={"total_seconds": time.perf_counter() - turn_started},
+                        )
+                return result
+
+            # 4c. Single-flight (cinebot/single_flight.py): sesi lain yang sedang menjalankan pertanyaan identik
+            # (kunci = pertanyaan ternormalisasi + konteks history, sama dengan cache jawaban) jadi leader;
+            # sesi ini menunggu hasilnya alih-alih memulai agent run sendiri. Hasil error tidak dibagikan.
+            if resources.single_flight is not None:
+                result, shared = resources.single_flight.do(
+                    turn_key(user_input, previous_messages, settings.answer_cache_history_turns),
+                    compute_turn,
+                    shareable=lambda turn: not turn.is_error,
+                    on_wait=lambda: status.update(label="Pertanyaan yang sama sedang dijawab, menunggu hasilnya..."),
+                )
             else:
-                display_answer = "Maaf, terjadi kesalahan."
-            
-            # 6. Parse SQL query from tool output if SQL tool was used
-            if tool_call_info and tool_call_info['name'] == 'get_factual_movie_data':
-                if "||SQL_QUERY||" in full_tool_output:
-                    parts = full_tool_output.split("||SQL_QUERY||")
-                    sql_query_to_display = parts[1]
-                else:
-                    sql_query_to_display = "Query tidak dapat diekstrak dari tool."
-            
-            # Display the final answer from the agent.
-            # The agent is instructed to format posters as Markdown images within a table.
-            # unsafe_allow_html=True is used for robustness in case the agent generates
-            # complex markdown or HTML elements.
-            st.markdown(display_answer, unsafe_allow_html=True)
+                result = compute_turn()
+            if shared:
+                print(f"\n>> Single-flight: hasil dibagi dari turn identik | stats: {resources.single_flight.stats()}")
+                elapsed = time.perf_counter() - turn_started
+                result = replace(result, timings={"ttft_seconds": elapsed, "total_seconds": elapsed})
+
+            # 5. Simpan ke cache jawaban (hasil error tidak disimpan; hasil bersama sudah disimpan leader)
+            if answer_cache is not None and not shared:
+                answer_cache.store(user_input, previous_messages, result)
+
+        display_answer = result.answer
+        timings = result.timings
+        ttft = timings.get("ttft_seconds", timings.get("total_seconds"))
+        print(f">> Turn selesai ({result.source}): ttft={ttft or 0:.2f}s total={timings.get('total_seconds', 0):.2f}s")
+        print(f">> Tahap: {turn_metrics.describe()}")
+        if resources.metrics is not None:
+            resources.metrics.observe_turn(
+                turn_metrics, "shared" if shared else result.source, timings.get("total_seconds", 0), ttft,
+                session_id=st.session_state.session_id,
+            )
+        status.update(
+            label=f"Selesai dalam {timings.get('total_seconds', 0):.1f} detik",
+            state="error" if result.is_error else "complete",
+        )
+
+        # Display the final answer from the agent.
+        # The agent is instructed to format posters as Markdown images within a table.
+        # unsafe_allow_html=True is used for robustness in case the agent generates
+        # complex markdown or HTML elements.
+        placeholder.markdown(resources.posters.expand(display_answer), unsafe_allow_html=True)
 
 
     # --- Tampilkan Expander DI LUAR `chat_message` ---
+    tool_call_info = result.tool_call_info
     if tool_call_info:
         with st.expander("Lihat Proses Berpikir CineBot 🤖"):
+            if shared:
+                st.caption("🤝 Jawaban dibagi dari permintaan identik yang sedang berjalan di sesi lain.")
+            if result.source.startswith("cache"):
+                st.caption(f"⚡ Jawaban diambil dari cache ({result.source.split(':')[1]}).")
+            elif result.source.startswith("router"):
+                st.caption(f"⚡ Fast path router ({result.source.split(':')[1]}) — tanpa hop pemilihan tool.")
+            if "speculation_saved_seconds" in result.timings:
+                st.caption(f"🔮 Retrieval spekulatif dipakai (berjalan paralel dengan pemilihan tool): hemat "
+                           f"{result.timings['speculation_saved_seconds']:.2f} detik.")
+            if "ttft_seconds" in result.timings:
+                st.caption(f"⏱️ Token pertama {result.timings['ttft_seconds']:.2f} detik, "
+                           f"total {result.timings['total_seconds']:.2f} detik.")
+            if history_stats is not None and history_stats.tokens_after < history_stats.tokens_before:
+                st.caption(f"🧾 History prompt diringkas: {history_stats.tokens_before} → "
+                           f"{history_stats.tokens_after} token.")
+            if show_timings:
+                # Rincian waktu per tahap; `tool:*` sudah mencakup tahap di dalamnya (embedding, Qdrant, sub-agent SQL)
+                st.markdown("**Rincian Waktu per Tahap:**")
+                st.dataframe(
+                    [{"tahap": name, "jumlah": count, "detik": round(seconds, 3)}
+                     for name, count, seconds in turn_metrics.breakdown()],
+                    hide_index=True,
+                )
+                st.caption(f"🔁 {turn_metrics.llm_calls} round trip LLM · {turn_metrics.prompt_tokens} token prompt · "
+                           f"{turn_metrics.completion_tokens} token completion.")
             st.markdown(f"**Tool Dipilih:** `{tool_call_info['name']}`")
             st.markdown(f"**Input untuk Tool:**")
             st.json(tool_call_info['args'])
-            
-            if sql_query_to_display:
+
+            if result.sql_query:
                 st.markdown("**Generated SQL Query:**")
-                st.code(sql_query_to_display.strip(), language="sql")
-            
+                st.code(result.sql_query.strip(), language="sql")
+
+            # Payload terstruktur dari tool (cinebot/tool_payloads.py); output format lama tetap ditampilkan sebagai teks
             st.markdown("**Output Mentah dari Tool:**")
-            st.text(full_tool_output.split("||SQL_QUERY||")[0])
+            payload = result.tool_payload
+            if payload is None:
+                st.text(result.display_tool_output)
+            elif payload.get("movies"):
+                st.dataframe(
+                    [{**movie, "poster": resources.posters.display_url(movie.get("poster"))} for movie in payload["movies"]],
+                    column_config={"poster": st.column_config.ImageColumn("Poster")},
+                    hide_index=True,
+                )
+                if payload.get("note"):
+                    st.caption(payload["note"])
+            else:
+                st.json({k: v for k, v in payload.items() if k != "sql"})
 
     # Tambahkan jawaban bersih (yang sudah disintesis) ke history
     st.session_state.messages.append({"role": "assistant", "content": display_answer})
@@ -1,80 +1,141 @@
 # === BAGIAN 1: IMPORTS & ENVIRONMENT ===
 # 1.1: Imports utama
 # - Library untuk file I/O, data processing, SQL, embeddings, Qdrant, dan dotenv.
-# - Jangan ubah import: mereka diperlukan untuk proses setup.
+# - Logika ingestion (record deterministik, diff content-hash, SQLite atomik, manifest) ada di cinebot/ingest.py.
 import os
+import argparse
+import time
 import pandas as pd
-from sqlalchemy import create_engine
 from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from langchain_core.documents import Document
 from qdrant_client import QdrantClient
 from dotenv import load_dotenv
+from cinebot.ingest import (
+    records_from_dataframe,
+    sync_collection,
+    write_sql_database,
+    read_last_manifest,
+    append_manifest,
+)
+from cinebot.collection_profile import get_profile
+from cinebot.local_index import export_from_qdrant
+from cinebot.metrics import MetricsRegistry, StageMetrics, activate
+from cinebot.neighbors import DEFAULT_K, build_neighbor_graph
+from cinebot.poster_cache import PosterCache, prefetch_posters
+from cinebot.posters import PosterIndex
+from cinebot.stream_ingest import DEFAULT_CHUNK_SIZE, stream_ingest
 
 # 1.2: Load environment variables
 # - Prioritas: file .env lokal. Variabel penting:
 #   * OPENAI_API_KEY: untuk embedding OpenAI
 #   * QDRANT_URL / QDRANT_API_KEY: koneksi ke Qdrant
 # - Tujuan: terpisah antara konfigurasi (secrets) dan kode.
-load_dotenv() 
+load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
+# 1.3: Argumen command line
+# - Default: sinkronisasi INKREMENTAL (hanya baris baru/berubah yang di-embed, baris hilang dihapus).
+# - --full: hapus koleksi & tulis ulang SQLite, lalu isi ulang semuanya (perilaku lama).
+# - --batch-size / --concurrency / --rpm: atur pipeline embedding+upload (lihat cinebot/pipeline.py).
+# - --profile: profil koleksi Qdrant (HNSW, quantization, on-disk; lihat cinebot/collection_profile.py).
+# - --neighbors-k: jumlah tetangga per film di graf "mirip <film>" (lihat cinebot/neighbors.py).
+# - --poster-workers / --skip-posters: prefetch poster ke cache lokal (lihat cinebot/poster_cache.py).
+# - --stream / --chunk-size: ingestion per chunk ber-memori terbatas dengan checkpoint/resume untuk CSV besar
+#   (lihat cinebot/stream_ingest.py); --csv: sumber data lain.
+parser = argparse.ArgumentParser(description="Setup database SQL & vector (Qdrant) untuk CineBot.")
+parser.add_argument("--full", action="store_true", help="Bangun ulang koleksi Qdrant & SQLite dari nol.")
+parser.add_argument("--batch-size", type=int, default=100, help="Jumlah dokumen per batch embedding/upload.")
+parser.add_argument("--concurrency", type=int, default=4, help="Jumlah request embedding paralel.")
+parser.add_argument("--profile", default=os.getenv("CINEBOT_COLLECTION_PROFILE", "default"),
+                    help="Profil koleksi Qdrant (default, memory, binary, accuracy).")
+parser.add_argument("--rpm", type=int, default=None, help="Batas request embedding per menit (token bucket).")
+parser.add_argument("--neighbors-k", type=int, default=DEFAULT_K, help="Jumlah tetangga per film di graf kemiripan.")
+parser.add_argument("--poster-workers", type=int, default=8, help="Jumlah unduhan poster paralel.")
+parser.add_argument("--skip-posters", action="store_true", help="Lewati prefetch poster ke cache lokal.")
+parser.add_argument("--stream", action="store_true",
+                    help="Baca CSV per chunk (memori terbatas, bisa dilanjutkan setelah terputus).")
+parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Jumlah baris CSV per chunk (--stream).")
+parser.add_argument("--csv", default='data/imdb_top_1000_cleaned.csv', help="Path CSV sumber.")
+args = parser.parse_args()
+
 # === BAGIAN 2: PATHS & KONSTANTA ===
 # 2.1: File / resource paths
 # - csv_path: sumber data IMDb yang sudah dibersihkan
-# - db_path: SQLite URI yang akan menghasilkan file movies.db
+# - db_file: file SQLite (movies.db) untuk tool SQL
 # - qdrant_collection_name: nama koleksi tempat vector akan disimpan
-csv_path = 'data/imdb_top_1000_cleaned.csv'
-db_path = 'sqlite:///movies.db' # Ini akan membuat file 'movies.db'
+# - manifest_path: log JSONL berisi ringkasan setiap run setup (apa saja yang di-insert/update/delete)
+csv_path = args.csv
+db_file = 'movies.db'
 qdrant_collection_name = 'imdb_movies'
+local_index_path = os.getenv("CINEBOT_LOCAL_INDEX_PATH", "data/index") # artefak index NumPy lokal
+manifest_path = 'data/ingest_manifest.jsonl'
+poster_cache_dir = os.getenv("CINEBOT_POSTER_CACHE_DIR", "static/posters") # cache poster (disajikan Streamlit)
+
+metrics_path = os.getenv("CINEBOT_METRICS_PATH", ".cache/metrics.jsonl") # sink JSONL metrik (kosong = nonaktif)
+
+run_started = time.time()
+last_manifest = read_last_manifest(manifest_path)
+# Rincian waktu per tahap (cinebot/metrics.py); tahap di dalam sync_collection ikut tercatat lewat activate()
+ingest_metrics = StageMetrics()
 
 # === BAGIAN 3: LOAD DATA CSV ===
 # 3.1: Tujuan
 # - Memuat CSV sebagai DataFrame pandas untuk diproses lebih lanjut.
 # 3.2: Error handling
 # - Jika file tidak ditemukan, hentikan proses dengan pesan yang jelas.
-try:
-    df = pd.read_csv(csv_path)
-    print(f"Data CSV '{csv_path}' berhasil dimuat.")
-except FileNotFoundError:
+# 3.3: Mode --stream
+# - CSV TIDAK dimuat di sini; dibaca per chunk di langkah 5.6 (SQLite ikut diisi per chunk).
+if not os.path.exists(csv_path):
     print(f"ERROR: File CSV tidak ditemukan di '{csv_path}'.")
     exit()
+if args.stream:
+    print(f"Mode streaming: CSV '{csv_path}' dibaca per {args.chunk_size} baris.")
+else:
+    with ingest_metrics.stage("load_csv"):
+        df = pd.read_csv(csv_path)
+    print(f"Data CSV '{csv_path}' berhasil dimuat.")
 
 # === BAGIAN 4: SETUP DATABASE SQL (UNTUK TOOL SQL) ===
 # 4.1: Tujuan
 # - Menyimpan DataFrame ke SQLite agar tool SQL dapat dijalankan terhadap tabel 'movies'.
+# - Skema bertipe eksplisit (cinebot/sql_schema.py): index Director/Released_Year/IMDB_Rating/Gross/No_of_Votes,
+#   junction table genres/movie_genres & stars/movie_stars, FTS5 movies_fts (judul + sinopsis), lalu ANALYZE.
 # 4.2: Pendekatan
-# - Gunakan create_engine dari SQLAlchemy dan df.to_sql(if_exists='replace').
-# 4.3: Catatan
-# - if_exists='replace' menimpa tabel lama; ini berguna untuk development/refresh data.
-print("\nMemulai setup database SQL...")
-try:
-    # Buat koneksi engine ke file database SQLite
-    engine = create_engine(db_path)
-    
-    # Simpan DataFrame ke database SQL sebagai tabel bernama 'movies'
-    # if_exists='replace' berarti akan menimpa tabel jika sudah ada
-    df.to_sql('movies', engine, if_exists='replace', index=False)
-    
-    print(f"Database SQL 'movies.db' dan tabel 'movies' berhasil dibuat.")
-except Exception as e:
-    print(f"ERROR saat membuat database SQL: {e}")
-    exit()
+# - Tulis ke file sementara (movies.db.tmp) lalu os.replace ke movies.db: tidak ada jeda di mana tabel kosong.
+# - Jika isi CSV sama persis dengan run sebelumnya (hash dataset di manifest) dan versi skema sudah terbaru,
+#   langkah ini dilewati.
+# - Mode --stream: database dibangun per chunk bersama Qdrant di langkah 5.6.
+if not args.stream:
+    print("\nMemulai setup database SQL...")
+    try:
+        with ingest_metrics.stage("sql_database"):
+            sql_result = write_sql_database(
+                df,
+                db_file,
+                previous_hash=(last_manifest or {}).get("dataset_hash"),
+                force=args.full,
+            )
+        if sql_result["rewritten"]:
+            print(f"Database SQL '{db_file}' berhasil dibuat ({sql_result['sql_schema']['movies']} film, "
+                  f"skema v{sql_result['sql_schema']['schema_version']}, FTS5={sql_result['sql_schema']['fts']}).")
+        else:
+            print(f"Dataset tidak berubah; database SQL '{db_file}' dipakai apa adanya.")
+    except Exception as e:
+        print(f"ERROR saat membuat database SQL: {e}")
+        exit()
 
 # === BAGIAN 5: SETUP VECTOR DATABASE (QDRANT) ===
 # 5.1: Tujuan utama
-# - Membuat koleksi vector di Qdrant berisi embedded documents dari dataset.
+# - Menyinkronkan koleksi vector di Qdrant dengan dataset.
 # - Dokumen akan digunakan untuk RAG / similarity search (Tool rekomendasi).
 # 5.2: Langkah besar
-# - Inisialisasi embeddings
-# - Siapkan teks yang akan di-embed (gabungan kolom relevan)
-# - Konversi baris menjadi Document with metadata
-# - Inisialisasi Qdrant client & VectorStore
-# - (Opsional tapi direkomendasikan) Recreate collection secara aman
-# - Unggah dokumen secara batching untuk mengurangi timeout dan beban
+# - Inisialisasi embeddings & Qdrant client
+# - Bangun record: point ID deterministik + content hash (teks embedding + metadata)
+# - Bandingkan dengan hash yang tersimpan di payload Qdrant
+# - Embed & upsert hanya record baru/berubah, hapus point yang barisnya sudah tidak ada
+# - Embedding berjalan paralel (rate-limited, retry 429) dan tumpang-tindih dengan upload ke Qdrant
 print("\nMemulai setup database vector (Qdrant)...")
 try:
     # 5.3: Inisialisasi model embedding
@@ -83,79 +144,183 @@ try:
         api_key=OPENAI_API_KEY
     )
 
-    # 5.4: Siapkan teks untuk embedding
-    # - Gabungkan field penting (judul, genre, director, cast, overview)
-    # - Tujuan: memberikan konteks yang kaya untuk similarity search
-    df['text_for_embedding'] = (
-        "Judul: " + df['Series_Title'] + "; " +
-        "Genre: " + df['Genre'] + "; " +
-        "Sutradara: " + df['Director'] + "; " +
-        "Pemeran: " + df['Star1'] + ", " + df['Star2'] + ", " + df['Star3'] + "; " +
-        "Sinopsis: " + df['Overview']
-    )
+    # 5.4: Bangun record dari DataFrame (mode --stream: per chunk di dalam langkah 5.6)
+    # - Teks embedding: judul, genre, director, cast, overview
+    # - Metadata: title, year, rating, genre, poster
+    if not args.stream:
+        with ingest_metrics.stage("build_records"):
+            records = records_from_dataframe(df)
 
-    # 5.5: Konversi ke Document (LangChain)
-    # - Sertakan metadata yang berguna (title, year, rating, genre, poster)
-    documents = [
-        Document(
-            page_content=row['text_for_embedding'],
-            metadata={
-                'id': i,
-                'title': row['Series_Title'],
-                'year': row['Released_Year'],
-                'rating': row['IMDB_Rating'],
-                'genre': row['Genre'],
-                'poster': row['Poster_Link']
-            }
-        ) for i, row in df.iterrows()
-    ]
-
-    # 5.6: Inisialisasi Qdrant client & VectorStore
+    # 5.5: Inisialisasi Qdrant client
     # - Tambahkan timeout lebih besar untuk mengurangi kemungkinan kegagalan saat upload
-    # - Gunakan QdrantVectorStore wrapper untuk kemudahan API (add_documents, similarity_search, dsb.)
     client = QdrantClient(
         url=QDRANT_URL,
         api_key=QDRANT_API_KEY,
         timeout=60  # Tambahkan timeout yang lebih lama (dalam detik)
     )
 
-    qdrant_store = QdrantVectorStore(
-        client=client,
-        collection_name=qdrant_collection_name,
-        embedding=embeddings
-    )
-
-    # 5.7: (Opsional) Recreate collection secara aman
-    # - Tujuan: pastikan koleksi kosong sebelum upload ulang
-    # - Catatan: panggilan ini asumsi koleksi sudah pernah dibuat; jika belum, behavior client harus dicek
-    client.recreate_collection(
-        collection_name=qdrant_collection_name,
-        vectors_config=client.get_collection(collection_name=qdrant_collection_name).config.params.vectors
-    )
-    print(f"Koleksi '{qdrant_collection_name}' telah dikosongkan dan siap diisi ulang.")
-
-    # 5.8: Upload document secara batching
-    # - Alasan batching: mengurangi timeout, memori, dan beban jaringan
-    # - Pilih batch_size sesuai kualitas koneksi dan quota API
-    batch_size = 50
-    total_docs = len(documents)
-
-    for i in range(0, total_docs, batch_size):
-        batch = documents[i:i+batch_size]
-        qdrant_store.add_documents(batch)
-        print(f"Mengunggah batch {i//batch_size + 1}/{(total_docs + batch_size - 1)//batch_size}... ({min(i + batch_size, total_docs)}/{total_docs} dokumen)")
-    # --- AKHIR UPLOAD BATCH ---
+    # 5.6: Sinkronisasi (inkremental secara default, --full untuk bangun ulang)
+    # - Koleksi dibuat dari profil eksplisit jika belum ada (aman untuk cluster baru);
+    #   jika sudah ada, parameter HNSW/quantization/on-disk disesuaikan dengan profil.
+    # - Run kedua pada data yang sama tidak memanggil embedding sama sekali.
+    # - Di dalamnya tercatat: qdrant_scan_hashes, embed_upload, qdrant_payload_update, qdrant_delete.
+    # - Mode --stream: per chunk baca -> bersihkan -> record -> diff hash ID chunk -> embed/upsert -> append SQLite,
+    #   dengan checkpoint per chunk (run ulang setelah terputus melanjutkan dari chunk terakhir yang selesai).
+    #   Manifest berisi jumlah, bukan daftar ID point.
+    stream_summary = None
+    if args.stream:
+        with activate(ingest_metrics), ingest_metrics.stage("stream_ingest"):
+            streamed = stream_ingest(
+                client,
+                qdrant_collection_name,
+                csv_path,
+                db_file,
+                embeddings,
+                chunk_size=args.chunk_size,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                requests_per_minute=args.rpm,
+                profile=get_profile(args.profile),
+                embedding_model="text-embedding-3-small",
+                full=args.full,
+            )
+        sql_result, sync_result, stream_summary = streamed["sql"], streamed["sync"], streamed["stream"]
+        print(f"Database SQL '{db_file}' berhasil dibuat ({stream_summary['rows']} film dari "
+              f"{stream_summary['rows_read']} baris, {stream_summary['dropped']} dibuang, "
+              f"{stream_summary['rows_per_sec']:.0f} baris/detik, RSS puncak {stream_summary['peak_rss_mb']} MB).")
+    else:
+        with activate(ingest_metrics), ingest_metrics.stage("qdrant_sync"):
+            sync_result = sync_collection(
+                client,
+                qdrant_collection_name,
+                records,
+                embeddings,
+                batch_size=args.batch_size,
+                full=args.full,
+                concurrency=args.concurrency,
+                requests_per_minute=args.rpm,
+                profile=get_profile(args.profile),
+                embedding_model="text-embedding-3-small",
+            )
+    # --- AKHIR SINKRONISASI ---
 
-    print(f"Koleksi '{qdrant_collection_name}' di Qdrant berhasil dibuat/diisi.")
+    print(f"Koleksi '{qdrant_collection_name}' di Qdrant berhasil disinkronkan.")
 
 except Exception as e:
-    # 5.9: Error handling di tahap vector setup
+    # 5.7: Error handling di tahap vector setup
     # - Cetak pesan error yang jelas supaya mudah debug (mis. credentials, network, quota)
     print(f"ERROR saat setup Qdrant: {e}")
     exit()
 
-# === BAGIAN 6: PENUTUP / CATATAN PENTING ===
-# 6.1: Tanda bahwa setup selesai
-# 6.2: Instruksi singkat: jalankan main.py setelah setup sukses
+# === BAGIAN 6: EXPORT INDEX VEKTOR LOKAL (NUMPY) ===
+# 6.1: Tujuan
+# - Menyimpan salinan vektor + metadata (title, year, rating, genre, poster) ke artefak lokal
+#   (`vectors.npy` yang di-mmap + `metadata.json` kolumnar) untuk retriever in-process.
+# - Aktifkan di aplikasi dengan CINEBOT_RETRIEVER=numpy.
+# 6.2: Pendekatan
+# - Vektor di-scroll langsung dari koleksi Qdrant, sehingga index lokal memakai vektor yang sama persis
+#   dan urutan hasil pencarian cocok dengan Qdrant.
+# - Dilewati jika koleksi tidak berubah dan artefak sudah ada.
+# - Mode --stream: dilewati (BAGIAN 6-8 memuat semua vektor/URL ke memori); aplikasi memakai Qdrant,
+#   pencarian vektor untuk "mirip <film>", dan URL poster remote.
+collection_changed = any(sync_result[key] for key in ("inserted", "updated", "payload_updated", "deleted"))
+if args.stream:
+    print("\nMode streaming: export index lokal, graf tetangga, dan prefetch poster dilewati.")
+elif collection_changed or not os.path.exists(os.path.join(local_index_path, "vectors.npy")):
+    print("\nMengekspor index vektor lokal (NumPy)...")
+    try:
+        with ingest_metrics.stage("local_index_export"):
+            exported = export_from_qdrant(
+                client,
+                qdrant_collection_name,
+                local_index_path,
+                embedding_model="text-embedding-3-small",
+            )
+        print(f"Index lokal berisi {exported} vektor disimpan di '{local_index_path}'.")
+    except Exception as e:
+        # Index lokal bersifat opsional: aplikasi tetap bisa memakai Qdrant
+        print(f"Peringatan: Gagal mengekspor index lokal: {e}")
+
+# === BAGIAN 7: GRAF TETANGGA TERDEKAT ("MIRIP <FILM>") ===
+# 7.1: Tujuan
+# - Menyimpan top-k film paling mirip untuk SETIAP film (`neighbors.npz` di folder index lokal), sehingga
+#   pertanyaan "mirip <judul>" dijawab dari vektor film itu sendiri tanpa embedding & pencarian vektor.
+# 7.2: Pendekatan
+# - Dihitung dari vektor index lokal per batch (perkalian matriks + argpartition per baris).
+# - Inkremental: hanya film baru/berubah dan film yang tetangganya berubah/dihapus yang dihitung ulang penuh;
+#   --full menghitung ulang semuanya. Tidak ada yang dihitung jika vektor tidak berubah.
+neighbor_summary = None
+if not args.stream and os.path.exists(os.path.join(local_index_path, "vectors.npy")):
+    print("\nMemperbarui graf tetangga terdekat...")
+    try:
+        with ingest_metrics.stage("neighbor_graph"):
+            neighbor_summary = build_neighbor_graph(local_index_path, k=args.neighbors_k, full=args.full)
+        print(f"Graf tetangga ({neighbor_summary['mode']}): {neighbor_summary['movies']} film x "
+              f"{neighbor_summary['k']} tetangga, {neighbor_summary['recomputed']} dihitung ulang penuh, "
+              f"{neighbor_summary['merged']} digabung ({neighbor_summary['seconds']:.2f} detik).")
+    except Exception as e:
+        # Graf bersifat opsional: tanpa graf, "mirip <film>" memakai pencarian vektor biasa
+        print(f"Peringatan: Gagal memperbarui graf tetangga: {e}")
+
+# === BAGIAN 8: PREFETCH POSTER KE CACHE LOKAL ===
+# 8.1: Tujuan
+# - Mengunduh poster semua film ke cache lokal (content-addressed + thumbnail) agar tabel jawaban
+#   tidak bergantung pada CDN remote saat dirender. Aplikasi memakai URL remote hanya untuk poster yang gagal.
+# 8.2: Pendekatan
+# - Unduhan paralel dengan batas worker (--poster-workers), retry + backoff untuk timeout/429/5xx.
+# - Resume: poster yang sudah ada di manifest cache (URL sama, file masih ada) dilewati, jadi run ulang
+#   setelah terputus hanya mengunduh sisanya. Kegagalan tidak menghentikan setup.
+poster_stats = None
+if not args.skip_posters and not args.stream:
+    print("\nMemulai prefetch poster ke cache lokal...")
+    with ingest_metrics.stage("poster_prefetch"):
+        poster_stats = prefetch_posters(
+            PosterIndex.from_sqlite(db_file).urls,
+            PosterCache(poster_cache_dir),
+            workers=args.poster_workers,
+        )
+    print(f"Poster di '{poster_cache_dir}': {poster_stats.downloaded} diunduh, {poster_stats.skipped} sudah ada, "
+          f"{poster_stats.failed} gagal ({poster_stats.posters_per_sec:.1f} poster/detik).")
+
+# === BAGIAN 9: MANIFEST RUN & RINCIAN WAKTU ===
+# 9.1: Rincian waktu per tahap (qdrant_sync sudah mencakup tahap qdrant_*/embed_upload di dalamnya)
+stage_breakdown = ingest_metrics.as_dict()["stages"]
+print("\nRincian waktu per tahap:")
+for stage_name, stage_info in stage_breakdown.items():
+    print(f"  - {stage_name:<22} {stage_info['seconds']:>8.2f} detik")
+
+# 9.2: Catat apa yang dilakukan run ini (mode, jumlah insert/update/delete, ID point (--stream: jumlah), hash dataset,
+#      ringkasan stream, graf tetangga, poster, durasi, tahap)
+manifest = append_manifest(manifest_path, {
+    "mode": "full" if args.full else "incremental",
+    "csv_path": csv_path,
+    "rows": stream_summary["rows"] if args.stream else len(df),
+    "dataset_hash": sql_result["dataset_hash"],
+    "sql_rewritten": sql_result["rewritten"],
+    **sync_result,
+    "stream": stream_summary,
+    "neighbors": neighbor_summary,
+    "posters": poster_stats.as_dict() if poster_stats else None,
+    "duration_sec": round(time.time() - run_started, 2),
+    "stages": stage_breakdown,
+})
+# 9.3: Satu baris "ingest" di sink JSONL metrik yang sama dengan turn aplikasi
+MetricsRegistry(jsonl_path=metrics_path).write({
+    "kind": "ingest",
+    "mode": manifest["mode"],
+    "duration_sec": manifest["duration_sec"],
+    "embedded_documents": sync_result["embedded_documents"],
+    "stages": stage_breakdown,
+})
+# Mode biasa menyimpan daftar ID point, mode --stream hanya jumlahnya
+count = lambda value: value if isinstance(value, int) else len(value)
+print(f"\nManifest run dicatat di '{manifest_path}': "
+      f"{count(manifest['inserted'])} baru, {count(manifest['updated'])} berubah, "
+      f"{count(manifest['payload_updated'])} hanya metadata, {count(manifest['deleted'])} dihapus, "
+      f"{manifest['unchanged']} tidak berubah.")
+
+# === BAGIAN 10: PENUTUP / CATATAN PENTING ===
+# 10.1: Tanda bahwa setup selesai
+# 10.2: Instruksi singkat: jalankan main.py setelah setup sukses
 print("\n=== SETUP SELESAI ===")
-print("Kamu sekarang siap untuk menjalankan 'main.py'.")
\ No newline at end of file
+print("Kamu sekarang siap untuk menjalankan 'main.py'.")